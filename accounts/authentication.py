@@ -1,18 +1,125 @@
-"""JWT auth that rejects suspended / deactivated tenant accounts."""
+"""JWT auth that rejects suspended / deactivated tenant accounts.
+
+The token is verified once per request: ``TenantContextMiddleware`` runs the
+same authenticator and stashes the principal on the ``HttpRequest``; DRF then
+reuses it instead of decoding the token and loading the user a second time.
+
+The user (with ``restaurant`` pre-joined) and the tenant lifecycle verdict are
+kept in a short-TTL cache keyed by user id, so a typical authenticated request
+makes no auth queries at all. ``accounts.signals`` drops the entry whenever
+the user or their restaurant is saved/deleted.
+"""
 from __future__ import annotations
 
+import logging
+
+from django.conf import settings
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
+from core.read_through_cache import safe_cache_delete, safe_cache_get, safe_cache_set
 from platform_admin.lifecycle import user_tenant_access_denied_reason
 
+logger = logging.getLogger(__name__)
+
+# Bump when the cached payload shape changes so old entries are ignored.
+PRINCIPAL_CACHE_VERSION = 1
+PRINCIPAL_CACHE_TTL = getattr(settings, "AUTH_PRINCIPAL_CACHE_TTL", 60)
+
+# Attribute on the underlying ``HttpRequest`` carrying ``(raw_token, user, token)``.
+# DRF's ``Request`` proxies unknown attributes to it, so both layers see it.
+REQUEST_PRINCIPAL_ATTR = "_mizan_jwt_principal"
+
+
+def principal_cache_key(user_id) -> str:
+    return f"auth:principal:v{PRINCIPAL_CACHE_VERSION}:{user_id}"
+
+
+def invalidate_principal_cache(user_id) -> None:
+    """Drop the cached principal for one user (best-effort)."""
+    if user_id:
+        safe_cache_delete(principal_cache_key(user_id))
+
+
+def invalidate_principal_cache_many(user_ids) -> None:
+    """Drop cached principals for several users, e.g. a whole restaurant."""
+    from django.core.cache import cache
+
+    keys = [principal_cache_key(uid) for uid in user_ids if uid]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as exc:
+        logger.warning("principal cache delete_many failed: %s", exc)
+
+
+def stash_principal(request, raw_token, user, validated_token) -> None:
+    """Remember an authenticated principal on the raw ``HttpRequest``."""
+    target = getattr(request, "_request", request)
+    setattr(target, REQUEST_PRINCIPAL_ATTR, (raw_token, user, validated_token))
+
 
 class MizanJWTAuthentication(JWTAuthentication):
     """Standard JWT auth plus tenant lifecycle / inactive-user gates."""
 
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        stashed = getattr(request, REQUEST_PRINCIPAL_ATTR, None)
+        if stashed is not None and stashed[0] == raw_token:
+            return stashed[1], stashed[2]
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_user(validated_token)
+        stash_principal(request, raw_token, user, validated_token)
+        return user, validated_token
+
     def get_user(self, validated_token):
-        user = super().get_user(validated_token)
-        reason = user_tenant_access_denied_reason(user)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        user, reason = load_principal(user_id, loader=self._load_user)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
         if reason:
             raise AuthenticationFailed(reason, code="tenant_access_denied")
         return user
+
+    def _load_user(self, user_id):
+        """One query: the user plus its restaurant (tenant lifecycle lives there).
+
+        The password hash is deferred so it never lands in the shared cache.
+        """
+        try:
+            return (
+                self.user_model.objects.select_related("restaurant")
+                .defer("password")
+                .get(**{api_settings.USER_ID_FIELD: user_id})
+            )
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed("User not found", code="user_not_found") from e
+
+
+def load_principal(user_id, *, loader=None):
+    """``(user, tenant_denied_reason)`` from the principal cache, loaded on a miss.
+
+    Shared by HTTP auth and the WebSocket layer (``core.realtime``). Raises
+    ``AuthenticationFailed`` when the user does not exist.
+    """
+    key = principal_cache_key(user_id)
+    cached = safe_cache_get(key)
+    if cached is not None:
+        return cached
+    user = (loader or MizanJWTAuthentication()._load_user)(user_id)
+    reason = user_tenant_access_denied_reason(user)
+    safe_cache_set(key, (user, reason), PRINCIPAL_CACHE_TTL)
+    return user, reason
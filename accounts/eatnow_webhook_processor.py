@@ -15,6 +15,20 @@ from .models import EatNowReservation
 logger = logging.getLogger(__name__)
 
 
+def _mark_previous_days_stale(restaurant, ext_id: str) -> None:
+    """Bulk updates and reschedules bypass the day the post_save hook sees;
+    flag the reservation's current day in the demand curve before changing it."""
+    try:
+        from pos.demand_curve import mark_demand_days_stale
+
+        days = EatNowReservation.objects.filter(
+            restaurant=restaurant, external_id=ext_id
+        ).values_list("reservation_date", flat=True)
+        mark_demand_days_stale(restaurant.id, list(days))
+    except Exception as exc:
+        logger.warning("eatnow_webhook_processor: demand curve stale-mark failed: %s", exc)
+
+
 def normalize_eatnow_event_type(event_header: str, payload: Dict[str, Any]) -> str:
     """Map reservation.created, types in payload, etc. to RESERVATION_* constants."""
     ev = (event_header or "").strip()
@@ -125,6 +139,7 @@ def apply_eatnow_webhook_payload(restaurant, event_type: str, payload: Dict[str,
     if ev == "RESERVATION_DELETED":
         ext_id = _external_id_for_delete(payload)
         if ext_id:
+            _mark_previous_days_stale(restaurant, ext_id[:128])
             EatNowReservation.objects.filter(restaurant=restaurant, external_id=ext_id[:128]).update(is_deleted=True)
         else:
             logger.warning("eatnow_webhook_processor: DELETE without reservation id")
@@ -176,6 +191,7 @@ def apply_eatnow_webhook_payload(restaurant, event_type: str, payload: Dict[str,
         "raw_reservation": res,
         "is_deleted": False,
     }
+    _mark_previous_days_stale(restaurant, ext_id)
     EatNowReservation.objects.update_or_create(
         restaurant=restaurant,
         external_id=ext_id,
@@ -0,0 +1,229 @@
+"""
+Per-tenant geofence index for clock-in location matching.
+
+``find_matching_location`` used to load every active BusinessLocation and
+re-normalize each polygon on every clock-in. At shift change that is
+hundreds of identical queries per tenant within minutes. The index below is
+built once per tenant (one query), kept in process memory and holds:
+
+  - polygon rings already normalized and closed, with their bounding box
+  - pin coordinates pre-converted to radians for the haversine
+  - a coarse lat/lon grid mapping cells to the enforced sites whose zone
+    overlaps them, so a ping only runs containment tests against sites
+    that can possibly contain it
+
+A location save/delete bumps the tenant's generation in the shared cache
+(see ``accounts.signals``); every worker compares that generation on
+lookup and rebuilds on mismatch, so evaluating a ping costs one cache read
+and no DB queries. ``GEOFENCE_INDEX_TTL`` bounds staleness for writes that
+bypass signals (queryset ``update()``).
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from math import asin, cos, floor, radians, sin, sqrt
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from core.read_through_cache import safe_cache_get, safe_cache_set
+
+GEOFENCE_INDEX_TTL = 600
+_GEN_TTL = 24 * 3600
+# ~550 m of latitude per cell. Zones are at most a few hundred metres wide,
+# so a site normally lands in one to four cells.
+GRID_CELL_DEG = 0.005
+# Sites whose bounding box spans more cells than this (a badly drawn polygon
+# covering a whole city) skip the grid and are checked on every ping.
+_MAX_CELLS_PER_SITE = 64
+_EARTH_RADIUS_M = 6371000
+_M_PER_DEG_LAT = 111320.0
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _gen_key(restaurant_id) -> str:
+    return f"geofence:index:gen:{restaurant_id}"
+
+
+def invalidate_geofence_index(restaurant_id) -> None:
+    """Force every worker to rebuild the tenant's index on its next lookup."""
+    if not restaurant_id:
+        return
+    safe_cache_set(_gen_key(restaurant_id), uuid.uuid4().hex, _GEN_TTL)
+    with _local_lock:
+        _local.pop(str(restaurant_id), None)
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return floor(lat / GRID_CELL_DEG), floor(lon / GRID_CELL_DEG)
+
+
+class GeofenceSite:
+    """One configured location, pre-digested for fast point tests."""
+
+    __slots__ = ("location", "order", "lat", "lon", "lat_r", "lon_r", "cos_lat", "ring", "radius", "enforced", "bbox")
+
+    def __init__(self, location, order: int, ring: Sequence[Tuple[float, float]]):
+        from .utils import _clamp_radius_m
+
+        self.location = location
+        self.order = order
+        self.enforced = bool(getattr(location, "geofence_enabled", True))
+        self.radius = _clamp_radius_m(getattr(location, "radius", 100))
+        if location.latitude is not None and location.longitude is not None:
+            self.lat, self.lon = float(location.latitude), float(location.longitude)
+            self.lat_r, self.lon_r = radians(self.lat), radians(self.lon)
+            self.cos_lat = cos(self.lat_r)
+        else:
+            self.lat = self.lon = self.lat_r = self.lon_r = self.cos_lat = None
+
+        # A drawn polygon takes priority over the radius (location_contains_point).
+        if len(ring) >= 3:
+            ring = list(ring)
+            if ring[0] != ring[-1]:
+                ring.append(ring[0])
+            self.ring = tuple(ring)
+            lats = [p[0] for p in ring]
+            lons = [p[1] for p in ring]
+            self.bbox = (min(lats), min(lons), max(lats), max(lons))
+        else:
+            self.ring = None
+            if self.lat is None:
+                self.bbox = None
+            else:
+                dlat = self.radius / _M_PER_DEG_LAT
+                dlon = self.radius / (_M_PER_DEG_LAT * max(self.cos_lat, 1e-6))
+                self.bbox = (self.lat - dlat, self.lon - dlon, self.lat + dlat, self.lon + dlon)
+
+    def distance(self, lat_r: float, lon_r: float, cos_lat: float) -> Optional[float]:
+        """Haversine metres from the pin to a point given in radians."""
+        if self.lat_r is None:
+            return None
+        a = sin((lat_r - self.lat_r) / 2) ** 2 + self.cos_lat * cos_lat * sin((lon_r - self.lon_r) / 2) ** 2
+        return 2 * _EARTH_RADIUS_M * asin(min(1.0, sqrt(a)))
+
+    def contains(self, lat: float, lon: float, dist: Optional[float]) -> bool:
+        if self.bbox is None:
+            return False
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return False
+        if self.ring is None:
+            return dist is not None and dist <= self.radius
+        ring = self.ring
+        inside = False
+        j = len(ring) - 1
+        for i in range(len(ring)):
+            lat_i, lon_i = ring[i]
+            lat_j, lon_j = ring[j]
+            if ((lon_i > lon) != (lon_j > lon)) and (
+                lat < (lat_j - lat_i) * (lon - lon_i) / ((lon_j - lon_i) or 1e-15) + lat_i
+            ):
+                inside = not inside
+            j = i
+        return inside
+
+
+class GeofenceIndex:
+    """All usable clock-in sites of one tenant plus the candidate grid."""
+
+    def __init__(self, sites: List[GeofenceSite]):
+        self.sites = sites
+        # Sites with enforcement off match anywhere; sites too large for the
+        # grid are tested on every ping.
+        self.always = [s for s in sites if not s.enforced]
+        self.grid = {}
+        for site in sites:
+            if not site.enforced or site.bbox is None:
+                continue
+            min_lat, min_lon, max_lat, max_lon = site.bbox
+            lo, hi = _cell(min_lat, min_lon), _cell(max_lat, max_lon)
+            if (hi[0] - lo[0] + 1) * (hi[1] - lo[1] + 1) > _MAX_CELLS_PER_SITE:
+                self.always.append(site)
+                continue
+            for ci in range(lo[0], hi[0] + 1):
+                for cj in range(lo[1], hi[1] + 1):
+                    self.grid.setdefault((ci, cj), []).append(site)
+
+    @classmethod
+    def for_locations(cls, locations: Iterable) -> "GeofenceIndex":
+        from .utils import _normalize_polygon_ring
+
+        sites = []
+        for loc in locations:
+            ring = _normalize_polygon_ring(getattr(loc, "geofence_polygon", None) or [])
+            has_coords = loc.latitude is not None and loc.longitude is not None
+            if not has_coords and len(ring) < 3:
+                continue
+            sites.append(GeofenceSite(loc, len(sites), ring))
+        return cls(sites)
+
+    def __bool__(self) -> bool:
+        return bool(self.sites)
+
+    def candidates(self, lat: float, lon: float) -> List[GeofenceSite]:
+        found = self.always + self.grid.get(_cell(lat, lon), [])
+        if len(found) > 1:
+            found.sort(key=lambda s: s.order)
+        return found
+
+    def match(self, lat: float, lon: float):
+        """``(match, distance, nearest)`` — same contract as ``find_matching_location``."""
+        lat_r, lon_r = radians(lat), radians(lon)
+        cos_lat = cos(lat_r)
+
+        best_match = None
+        best_match_dist = None
+        for site in self.candidates(lat, lon):
+            dist = site.distance(lat_r, lon_r, cos_lat)
+            if not site.enforced:
+                # Geofence enforcement off — allow clock-in; prefer closest by pin.
+                score = dist if dist is not None else float("inf")
+                if best_match_dist is None or score < best_match_dist:
+                    best_match, best_match_dist = site.location, score if score != float("inf") else 0.0
+                continue
+            if site.contains(lat, lon, dist):
+                score = dist if dist is not None else 0.0
+                if best_match_dist is None or score < best_match_dist:
+                    best_match, best_match_dist = site.location, score
+        if best_match is not None:
+            return best_match, best_match_dist, best_match
+
+        nearest = None
+        nearest_dist = None
+        for site in self.sites:
+            dist = site.distance(lat_r, lon_r, cos_lat)
+            if dist is not None:
+                if nearest_dist is None or dist < nearest_dist:
+                    nearest, nearest_dist = site.location, dist
+            elif nearest is None:
+                # Polygon-only site — keep as a candidate nearest for messaging.
+                nearest = site.location
+        return None, nearest_dist, nearest
+
+
+def _build(restaurant_id) -> GeofenceIndex:
+    from .models import BusinessLocation
+
+    return GeofenceIndex.for_locations(BusinessLocation.objects.filter(restaurant_id=restaurant_id, is_active=True))
+
+
+def get_geofence_index(restaurant) -> GeofenceIndex:
+    """The tenant's index, rebuilt only after a location change or the TTL."""
+    rid = str(restaurant.pk)
+    gen = safe_cache_get(_gen_key(rid))
+    if gen is None:
+        # First use (or cache flushed): publish a generation so every worker
+        # agrees on when to rebuild.
+        gen = uuid.uuid4().hex
+        safe_cache_set(_gen_key(rid), gen, _GEN_TTL)
+    now = time.monotonic()
+    entry = _local.get(rid)
+    if entry is not None and entry[0] == gen and entry[1] > now:
+        return entry[2]
+    index = _build(restaurant.pk)
+    with _local_lock:
+        _local[rid] = (gen, now + GEOFENCE_INDEX_TTL, index)
+    return index
@@ -714,9 +714,18 @@ class UserManagementService:
                 id=default_primary_location_id, restaurant=restaurant
             ).exists():
                 default_primary_location_id = ''
-        from billing.limits import assert_can_add_staff
+        from billing.seats import reserve_seats
 
         results = { 'success': 0, 'failed': 0, 'errors': [], 'invitations': [] }
+        # Plan limit checked once for the whole list; rows claim seats as they go.
+        with reserve_seats(restaurant, len(invitations), partial=True) as seats:
+            UserManagementService._bulk_invite_rows(
+                invitations, restaurant, invited_by, expires_in_days, default_primary_location_id, seats, results
+            )
+        return results
+
+    @staticmethod
+    def _bulk_invite_rows(invitations, restaurant, invited_by, expires_in_days, default_primary_location_id, seats, results):
         for idx, item in enumerate(invitations, start=1):
             try:
                 email = (item.get('email') or '').strip()
@@ -756,10 +765,9 @@ class UserManagementService:
                     results['errors'].append(f"Item {idx}: Invitation already pending for {email}")
                     continue
 
-                seat_ok, seat_err = assert_can_add_staff(restaurant, additional=1)
-                if not seat_ok:
+                if not seats.take():
                     results['failed'] += 1
-                    results['errors'].append(f"Item {idx}: {seat_err}")
+                    results['errors'].append(f"Item {idx}: {seats.error}")
                     continue
 
                 token = secrets.token_urlsafe(32)
@@ -781,6 +789,7 @@ class UserManagementService:
                 if role_value == "CUSTOM":
                     ok, err, cr_label = validate_custom_invite(restaurant, "CUSTOM", custom_role_id or None)
                     if not ok:
+                        seats.give_back()
                         results['failed'] += 1
                         results['errors'].append(f"Item {idx}: {err}")
                         continue
@@ -819,7 +828,6 @@ class UserManagementService:
             except Exception as e:
                 results['failed'] += 1
                 results['errors'].append(f"Item {idx}: {str(e)}")
-        return results
 
     @staticmethod
     def get_miya_whatsapp_link(text: str | None = None):
@@ -898,7 +906,6 @@ class UserManagementService:
         the backend activates that staff's account and Miya replies via WhatsApp.
         Returns: { created, failed, errors, records, invite_link, batch_id }.
         """
-        from django.db import IntegrityError
         invite_link = UserManagementService.get_activation_invite_link()
         batch_id = secrets.token_hex(8)
         results = {
@@ -912,10 +919,19 @@ class UserManagementService:
         else:
             results["errors"].append("Provide csv_content or staff_list")
             return results
-        from billing.limits import assert_can_add_staff
+        from billing.seats import reserve_seats
+
+        # Plan limit checked once for the whole file; rows claim seats as they go.
+        with reserve_seats(restaurant, len(rows), partial=True) as seats:
+            UserManagementService._create_activation_rows(rows, restaurant, invited_by, batch_id, bool(csv_content), seats, results)
+        return results
+
+    @staticmethod
+    def _create_activation_rows(rows, restaurant, invited_by, batch_id, from_csv, seats, results):
+        from django.db import IntegrityError
 
         seen_phones = set()
-        for idx, row in enumerate(rows, start=2 if csv_content else 1):
+        for idx, row in enumerate(rows, start=2 if from_csv else 1):
             try:
                 n = _normalize_staff_upload_row(row)
                 raw_phone = n.get("phone") or ""
@@ -934,10 +950,9 @@ class UserManagementService:
                     results["failed"] += 1
                     results["errors"].append(f"Row {idx}: Duplicate phone number in this file")
                     continue
-                seat_ok, seat_err = assert_can_add_staff(restaurant, additional=1)
-                if not seat_ok:
+                if not seats.take():
                     results["failed"] += 1
-                    results["errors"].append(f"Row {idx}: {seat_err}")
+                    results["errors"].append(f"Row {idx}: {seats.error}")
                     continue
                 seen_phones.add(phone)
                 first_name = (n.get("first_name") or "").strip()
@@ -962,6 +977,7 @@ class UserManagementService:
                 if role_value == "CUSTOM":
                     ok, err, cr_label = validate_custom_invite(restaurant, "CUSTOM", custom_role_id or None)
                     if not ok:
+                        seats.give_back()
                         results["failed"] += 1
                         results["errors"].append(f"Row {idx}: {err}")
                         continue
@@ -988,12 +1004,12 @@ class UserManagementService:
                         "batch_id": batch_id,
                     })
                 except IntegrityError:
+                    seats.give_back()
                     results["failed"] += 1
                     results["errors"].append(f"Row {idx}: This phone is already pending activation for this restaurant")
             except Exception as e:
                 results["failed"] += 1
                 results["errors"].append(f"Row {idx}: {str(e)}")
-        return results
 
     @staticmethod
     def create_single_staff_activation_record(
@@ -1028,27 +1044,27 @@ class UserManagementService:
             return None, "Invalid or missing custom role for CUSTOM."
         first_name = (first_name or "").strip()
         last_name = (last_name or "").strip()
-        from billing.limits import assert_can_add_staff
+        from billing.seats import reserve_seats
 
-        seat_ok, seat_err = assert_can_add_staff(restaurant, additional=1)
-        if not seat_ok:
-            return None, seat_err
         batch_id = secrets.token_hex(8)
-        try:
-            record = StaffActivationRecord.objects.create(
-                restaurant=restaurant,
-                phone=phone,
-                first_name=first_name,
-                last_name=last_name,
-                role=role_value,
-                custom_role_label=cr_label if role_value == "CUSTOM" else "",
-                status=StaffActivationRecord.STATUS_NOT_ACTIVATED,
-                batch_id=batch_id,
-                invited_by=invited_by,
-            )
-            return record, None
-        except IntegrityError:
-            return None, "This phone number already has a pending activation for this restaurant."
+        with reserve_seats(restaurant, 1) as seats:
+            if not seats.take():
+                return None, seats.error
+            try:
+                record = StaffActivationRecord.objects.create(
+                    restaurant=restaurant,
+                    phone=phone,
+                    first_name=first_name,
+                    last_name=last_name,
+                    role=role_value,
+                    custom_role_label=cr_label if role_value == "CUSTOM" else "",
+                    status=StaffActivationRecord.STATUS_NOT_ACTIVATED,
+                    batch_id=batch_id,
+                    invited_by=invited_by,
+                )
+                return record, None
+            except IntegrityError:
+                return None, "This phone number already has a pending activation for this restaurant."
 
     @staticmethod
     def deactivate_user(user, deactivated_by):
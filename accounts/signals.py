@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.conf import settings
-from .models import UserInvitation, InvitationDeliveryLog, Restaurant
+from django.db import transaction
+from .models import BusinessLocation, CustomUser, UserInvitation, InvitationDeliveryLog, Restaurant
 from notifications.services import notification_service
 import logging
 import sys
@@ -16,6 +17,45 @@ def normalize_restaurant_country_code(sender, instance: Restaurant, **kwargs):
     instance.country_code = normalize_country_code_for_restaurant(instance)
 
 
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_principal_cache(sender, instance: CustomUser, **kwargs):
+    """Role, active flag or tenant changed — next request reloads the principal."""
+    from accounts.authentication import invalidate_principal_cache
+
+    invalidate_principal_cache(instance.pk)
+
+
+@receiver(post_save, sender=Restaurant)
+def invalidate_restaurant_principal_caches(sender, instance: Restaurant, created, **kwargs):
+    """Suspension / deactivation flags live on the restaurant, cached per staff user."""
+    if created:
+        return
+    from accounts.authentication import invalidate_principal_cache_many
+
+    try:
+        staff_ids = list(CustomUser.objects.filter(restaurant=instance).values_list('id', flat=True))
+    except Exception as exc:
+        logger.warning("principal cache invalidation failed restaurant=%s: %s", instance.pk, exc)
+        return
+    invalidate_principal_cache_many(staff_ids)
+
+
+@receiver(post_save, sender=BusinessLocation)
+@receiver(post_delete, sender=BusinessLocation)
+def invalidate_geofence_index_on_location_change(sender, instance: BusinessLocation, **kwargs):
+    """Zone moved, resized, toggled or removed — clock-in rebuilds the tenant index.
+
+    Bumped now for this process and again on commit, so another worker can't
+    rebuild from pre-commit rows and keep them under the new generation.
+    """
+    from accounts.geofence_index import invalidate_geofence_index
+
+    rid = instance.restaurant_id
+    invalidate_geofence_index(rid)
+    transaction.on_commit(lambda: invalidate_geofence_index(rid))
+
+
 def normalize_phone(phone):
     """
     Normalize phone number to digits only (no +, spaces, or dashes).
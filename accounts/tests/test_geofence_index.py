@@ -0,0 +1,65 @@
+"""Cached per-tenant geofence index: no queries per clock-in, invalidation on
+location changes, grid pruning and the batch API."""
+
+from django.test import TestCase
+
+from accounts.geofence_index import GeofenceIndex, get_geofence_index
+from accounts.models import BusinessLocation, Restaurant
+from accounts.utils import find_matching_location, match_locations_batch
+
+SQUARE = [[32.49, -7.91], [32.51, -7.91], [32.51, -7.89], [32.49, -7.89]]
+
+
+class GeofenceIndexTests(TestCase):
+    def setUp(self):
+        self.rest = Restaurant.objects.create(name="Index Cafe", email="index@cafe.test", latitude=None, longitude=None)
+        self.main = BusinessLocation.objects.create(
+            restaurant=self.rest, name="Main", latitude=32.0, longitude=-8.0, radius=50, is_primary=True,
+        )
+        self.poly = BusinessLocation.objects.create(
+            restaurant=self.rest, name="Poly", latitude=32.2, longitude=-7.5, radius=5, geofence_polygon=SQUARE,
+        )
+
+    def test_warm_index_runs_no_queries(self):
+        find_matching_location(self.rest, 32.0, -8.0)
+        with self.assertNumQueries(0):
+            match, dist, _ = find_matching_location(self.rest, 32.0001, -8.0)
+            poly_match, _, _ = find_matching_location(self.rest, 32.50, -7.90)
+            miss, miss_dist, nearest = find_matching_location(self.rest, 31.0, -8.0)
+        self.assertEqual(match, self.main)
+        self.assertLess(dist, 15)
+        self.assertEqual(poly_match, self.poly)
+        self.assertIsNone(miss)
+        self.assertEqual(nearest, self.main)
+        self.assertGreater(miss_dist, 100000)
+
+    def test_location_save_and_delete_rebuild_the_index(self):
+        self.assertIsNone(find_matching_location(self.rest, 31.0, -9.0)[0])
+        self.main.latitude, self.main.longitude = 31.0, -9.0
+        self.main.save()
+        self.assertEqual(find_matching_location(self.rest, 31.0, -9.0)[0].name, "Main")
+
+        self.poly.delete()
+        self.assertIsNone(find_matching_location(self.rest, 32.50, -7.90)[0])
+
+        self.poly.pk = None
+        self.poly.is_active = False
+        self.poly.save()
+        self.assertEqual(len(get_geofence_index(self.rest).sites), 1)
+
+    def test_grid_only_offers_nearby_sites(self):
+        index = GeofenceIndex.for_locations([self.main, self.poly])
+        self.assertEqual(index.candidates(32.0, -8.0), [index.sites[0]])
+        self.assertEqual(index.candidates(32.50, -7.90), [index.sites[1]])
+        self.assertEqual(index.candidates(10.0, 10.0), [])
+
+    def test_batch_matches_many_pings_and_disabled_sites_match_anywhere(self):
+        results = match_locations_batch(self.rest, [(32.0, -8.0), (32.50, -7.90), ("bad", None), (0.0, 0.0)])
+        self.assertEqual([r[0] for r in results], [self.main, self.poly, None, None])
+        self.assertEqual(results[3][2], self.main)
+
+        self.poly.geofence_enabled = False
+        self.poly.save()
+        match, dist, _ = find_matching_location(self.rest, 0.0, 0.0)
+        self.assertEqual(match, self.poly)
+        self.assertGreater(dist, 1000000)
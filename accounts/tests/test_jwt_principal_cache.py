@@ -0,0 +1,79 @@
+"""Single JWT validation per request + cached principal."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from accounts.authentication import (
+    REQUEST_PRINCIPAL_ATTR,
+    MizanJWTAuthentication,
+    principal_cache_key,
+    stash_principal,
+)
+
+
+def _user(active=True, pk="u1"):
+    return SimpleNamespace(pk=pk, is_active=active)
+
+
+class PrincipalStashTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_stashed_principal_skips_token_validation(self):
+        req = self.factory.get("/api/staff/", HTTP_AUTHORIZATION="Bearer abc.def.ghi")
+        user = _user()
+        stash_principal(req, b"abc.def.ghi", user, {"user_id": "u1"})
+
+        auth = MizanJWTAuthentication()
+        with patch.object(auth, "get_validated_token") as validate:
+            result = auth.authenticate(req)
+        validate.assert_not_called()
+        self.assertIs(result[0], user)
+
+    def test_different_token_is_validated_again(self):
+        req = self.factory.get("/api/staff/", HTTP_AUTHORIZATION="Bearer new.token.value")
+        stash_principal(req, b"old.token.value", _user(), {"user_id": "u1"})
+
+        auth = MizanJWTAuthentication()
+        fresh = _user()
+        with patch.object(auth, "get_validated_token", return_value={"user_id": "u2"}) as validate, \
+                patch.object(auth, "get_user", return_value=fresh):
+            result = auth.authenticate(req)
+        validate.assert_called_once()
+        self.assertIs(result[0], fresh)
+        self.assertEqual(getattr(req, REQUEST_PRINCIPAL_ATTR)[0], b"new.token.value")
+
+
+class PrincipalCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cache_hit_makes_no_user_query(self):
+        cache.set(principal_cache_key("u1"), (_user(pk="u1"), None), 60)
+        auth = MizanJWTAuthentication()
+        with patch.object(auth, "_load_user") as load:
+            self.assertEqual(auth.get_user({"user_id": "u1"}).pk, "u1")
+        load.assert_not_called()
+
+    def test_cache_miss_loads_and_stores_verdict(self):
+        user = _user()
+        auth = MizanJWTAuthentication()
+        with patch.object(auth, "_load_user", return_value=user), \
+                patch("accounts.authentication.user_tenant_access_denied_reason", return_value=None):
+            auth.get_user({"user_id": "u2"})
+        self.assertIsNotNone(cache.get(principal_cache_key("u2")))
+
+    def test_cached_denial_still_rejects(self):
+        cache.set(principal_cache_key("u3"), (_user(), "This business account has been suspended."), 60)
+        with self.assertRaises(AuthenticationFailed):
+            MizanJWTAuthentication().get_user({"user_id": "u3"})
+
+    def test_inactive_cached_user_rejected(self):
+        cache.set(principal_cache_key("u4"), (_user(active=False), None), 60)
+        with self.assertRaises(AuthenticationFailed):
+            MizanJWTAuthentication().get_user({"user_id": "u4"})
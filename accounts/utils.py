@@ -130,13 +130,10 @@ def restaurant_has_clockin_geofence(restaurant):
     """
     if restaurant is None:
         return False
-    from .models import BusinessLocation
+    from .geofence_index import get_geofence_index
 
-    for loc in BusinessLocation.objects.filter(restaurant=restaurant, is_active=True):
-        if loc.latitude is not None and loc.longitude is not None:
-            return True
-        if len(_normalize_polygon_ring(loc.geofence_polygon or [])) >= 3:
-            return True
+    if get_geofence_index(restaurant):
+        return True
     if restaurant.latitude is not None and restaurant.longitude is not None:
         return True
     if len(_normalize_polygon_ring(getattr(restaurant, "geofence_polygon", None) or [])) >= 3:
@@ -179,97 +176,77 @@ def find_matching_location(restaurant, user_lat, user_lon):
 
     The caller typically only cares about `match` ("can this person clock in?")
     but the other two are handy for error messages and analytics.
+
+    Sites come from the tenant's cached geofence index
+    (``accounts.geofence_index``), so a clock-in runs no DB queries.
     """
-    try:
-        user_lat_f = float(user_lat)
-        user_lon_f = float(user_lon)
-    except (TypeError, ValueError):
-        return None, None, None
+    return match_locations_batch(restaurant, [(user_lat, user_lon)])[0]
+
 
+def match_locations_batch(restaurant, points):
+    """
+    ``find_matching_location`` for many ``(lat, lon)`` pings of one tenant
+    (e.g. the live staff map). One index lookup for the whole batch; returns
+    one ``(match, distance, nearest)`` tuple per point, in order.
+    """
     # Local import to keep utils.py importable during app init (no model
     # registry required at module load).
-    from .models import BusinessLocation
+    from .geofence_index import get_geofence_index
 
-    locations = list(
-        BusinessLocation.objects.filter(restaurant=restaurant, is_active=True)
-    )
+    index = None
+    results = []
+    for user_lat, user_lon in points:
+        try:
+            user_lat_f = float(user_lat)
+            user_lon_f = float(user_lon)
+        except (TypeError, ValueError):
+            results.append((None, None, None))
+            continue
+        if index is None:
+            index = get_geofence_index(restaurant)
+        if index:
+            results.append(index.match(user_lat_f, user_lon_f))
+        else:
+            results.append(_match_legacy_site(restaurant, user_lat_f, user_lon_f))
+    return results
 
+
+def _match_legacy_site(restaurant, user_lat_f, user_lon_f):
     # Legacy fallback: older tenants might not have a BusinessLocation row
     # yet (e.g. tests, or a restaurant created via an old code path). Treat
     # Restaurant.* as a single ad-hoc site.
-    if not locations:
-        has_coords = restaurant.latitude is not None and restaurant.longitude is not None
-        has_poly = len(_normalize_polygon_ring(getattr(restaurant, "geofence_polygon", None) or [])) >= 3
-        if not has_coords and not has_poly:
-            return None, None, None
-
-        radius = _clamp_radius_m(restaurant.radius)
-
-        class _LegacySite:
-            id = None
-            name = "Main"
-            latitude = restaurant.latitude
-            longitude = restaurant.longitude
-            radius = radius
-            geofence_enabled = bool(restaurant.geofence_enabled)
-            geofence_polygon = getattr(restaurant, "geofence_polygon", None) or []
-            address = getattr(restaurant, "address", "") or ""
-
-        nearest = _LegacySite()
-        dist = None
-        if has_coords:
-            dist = calculate_distance(
-                float(restaurant.latitude),
-                float(restaurant.longitude),
-                user_lat_f,
-                user_lon_f,
-            )
-        if not nearest.geofence_enabled:
-            return nearest, dist if dist is not None else 0.0, nearest
-        if location_contains_point(nearest, user_lat_f, user_lon_f):
-            return nearest, dist if dist is not None else 0.0, nearest
-        return None, dist, nearest
-
-    best_match = None
-    best_match_dist = None
-    nearest = None
-    nearest_dist = None
-
-    for loc in locations:
-        has_coords = loc.latitude is not None and loc.longitude is not None
-        has_poly = len(_normalize_polygon_ring(loc.geofence_polygon or [])) >= 3
-        if not has_coords and not has_poly:
-            continue
-
-        dist = None
-        if has_coords:
-            dist = calculate_distance(
-                float(loc.latitude),
-                float(loc.longitude),
-                user_lat_f,
-                user_lon_f,
-            )
-            if nearest is None or (dist is not None and dist < nearest_dist):
-                nearest, nearest_dist = loc, dist
-        elif nearest is None:
-            # Polygon-only site — keep as a candidate nearest for messaging.
-            nearest, nearest_dist = loc, None
-
-        if not loc.geofence_enabled:
-            # Geofence enforcement off — allow clock-in; prefer closest by pin.
-            score = dist if dist is not None else float("inf")
-            if best_match_dist is None or score < best_match_dist:
-                best_match, best_match_dist = loc, score if score != float("inf") else 0.0
-            continue
-
-        if location_contains_point(loc, user_lat_f, user_lon_f):
-            score = dist if dist is not None else 0.0
-            if best_match_dist is None or score < best_match_dist:
-                best_match, best_match_dist = loc, score
+    has_coords = restaurant.latitude is not None and restaurant.longitude is not None
+    has_poly = len(_normalize_polygon_ring(getattr(restaurant, "geofence_polygon", None) or [])) >= 3
+    if not has_coords and not has_poly:
+        return None, None, None
 
-    if best_match is not None:
-        return best_match, best_match_dist, best_match
-    return None, nearest_dist, nearest
+    # Not ``radius``: a class body cannot read an enclosing local it also assigns.
+    site_radius = _clamp_radius_m(restaurant.radius)
+
+    class _LegacySite:
+        id = None
+        name = "Main"
+        latitude = restaurant.latitude
+        longitude = restaurant.longitude
+        radius = site_radius
+        geofence_enabled = bool(restaurant.geofence_enabled)
+        geofence_polygon = getattr(restaurant, "geofence_polygon", None) or []
+        address = getattr(restaurant, "address", "") or ""
+
+    nearest = _LegacySite()
+    dist = None
+    if has_coords:
+        dist = calculate_distance(
+            float(restaurant.latitude),
+            float(restaurant.longitude),
+            user_lat_f,
+            user_lon_f,
+        )
+    if not nearest.geofence_enabled:
+        return nearest, dist if dist is not None else 0.0, nearest
+    if location_contains_point(nearest, user_lat_f, user_lon_f):
+        return nearest, dist if dist is not None else 0.0, nearest
+    return None, dist, nearest
 
 
 def send_whatsapp(phone, message, template_name, language_code="en_US"):
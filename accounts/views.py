@@ -605,6 +605,7 @@ class InviteStaffView(APIView):
                 return Response({'error': err}, status=status.HTTP_400_BAD_REQUEST)
 
         from billing.limits import assert_can_add_staff
+        from billing.seats import reserve_seats
 
         seat_ok, seat_err = assert_can_add_staff(request.user.restaurant, additional=1)
         if not seat_ok:
@@ -653,14 +654,19 @@ class InviteStaffView(APIView):
         token = get_random_string(64)
         expires_at = timezone.now() + timezone.timedelta(days=7)
 
-        invitation = UserInvitation.objects.create(
-            email=email or '',
-            role=role,
-            invited_by=request.user,
-            restaurant=request.user.restaurant,
-            invitation_token=token,
-            expires_at=expires_at
-        )
+        # The pre-check above is read-only; hold the seat while creating so a
+        # concurrent invite can't take the same last seat.
+        with reserve_seats(request.user.restaurant, 1) as seats:
+            if not seats.take():
+                return Response({'error': seats.error}, status=status.HTTP_403_FORBIDDEN)
+            invitation = UserInvitation.objects.create(
+                email=email or '',
+                role=role,
+                invited_by=request.user,
+                restaurant=request.user.restaurant,
+                invitation_token=token,
+                expires_at=expires_at
+            )
 
         if first_name:
             invitation.first_name = first_name
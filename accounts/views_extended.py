@@ -15,6 +15,7 @@ import base64
 import json
 from .models import EatNowReservation, POSIntegration, AIAssistantConfig, Restaurant, StaffProfile, CustomUser
 from .custom_staff_roles import normalize_custom_staff_roles_payload
+from .utils import match_locations_batch
 from .eatnow_client import discover as eatnow_discover, list_reservations as eatnow_list_reservations, test_connection as eatnow_test
 from .eatnow_reservation_import import upsert_from_concierge_flat
 from .serializers_extended import (
@@ -1372,11 +1373,21 @@ class StaffLocationViewSet(viewsets.ViewSet):
         if not restaurant:
             return Response({'error': 'No restaurant'}, status=status.HTTP_400_BAD_REQUEST)
         
-        staff_profiles = StaffProfile.objects.filter(
+        staff_profiles = list(StaffProfile.objects.filter(
             user__restaurant=restaurant
         ).exclude(
             last_location_latitude__isnull=True
-        )
+        ))
         
         serializer = StaffProfileExtendedSerializer(staff_profiles, many=True)
-        return Response(serializer.data)
+        data = serializer.data
+        # Every pin on the map evaluated against the tenant's zones in one pass.
+        matches = match_locations_batch(
+            restaurant,
+            [(p.last_location_latitude, p.last_location_longitude) for p in staff_profiles],
+        )
+        for row, (match, distance, _nearest) in zip(data, matches):
+            row['within_geofence'] = match is not None
+            row['geofence_location'] = getattr(match, 'name', None)
+            row['geofence_distance_meters'] = distance
+        return Response(data)
@@ -800,6 +800,9 @@ class OnboardingGoogleCalendarView(APIView):
                 'refresh_token': None,
                 'token_expires_at': None,
             }
+            from dashboard.calendar_mirror import forget_calendar
+
+            forget_calendar(restaurant)
         elif action == 'connect':
             if not configured:
                 # Keep the user-facing copy short and free of internal
@@ -1064,6 +1067,10 @@ class GoogleCalendarOAuthCallbackView(APIView):
         gs['google_calendar'] = gcal
         restaurant.general_settings = gs
         restaurant.save(update_fields=['general_settings'])
+        # Possibly a different Google account: rebuild the mirror from scratch.
+        from dashboard.calendar_mirror import forget_calendar
+
+        forget_calendar(restaurant)
 
         _mark_step(restaurant, 'google_calendar')
 
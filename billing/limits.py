@@ -1,8 +1,6 @@
 """Plan seat / location limits for tenant entitlements."""
 from __future__ import annotations
 
-from django.utils import timezone
-
 from .models import SubscriptionPlan
 from .services import ensure_starter_subscription
 
@@ -21,26 +19,13 @@ def resolve_plan_for_restaurant(restaurant) -> SubscriptionPlan | None:
 
 
 def count_staff_seats(restaurant) -> int:
-    """Seats in use: active users + pending email invites + pending WhatsApp activations."""
-    from accounts.models import CustomUser, StaffActivationRecord, UserInvitation
-
-    active_users = CustomUser.objects.filter(
-        restaurant=restaurant,
-        is_active=True,
-    ).count()
-
-    pending_invites = UserInvitation.objects.filter(
-        restaurant=restaurant,
-        is_accepted=False,
-        expires_at__gt=timezone.now(),
-    ).count()
+    """Seats in use: active users + pending email invites + pending WhatsApp activations.
 
-    pending_activations = StaffActivationRecord.objects.filter(
-        restaurant=restaurant,
-        status=StaffActivationRecord.STATUS_NOT_ACTIVATED,
-    ).count()
+    Read from the tenant's running counter (``billing.seats``), not counted.
+    """
+    from .seats import seat_counter
 
-    return active_users + pending_invites + pending_activations
+    return seat_counter(restaurant).used
 
 
 def staff_limit_for_restaurant(restaurant) -> int | None:
@@ -51,35 +36,38 @@ def staff_limit_for_restaurant(restaurant) -> int | None:
     return plan.max_staff
 
 
+def limit_message(plan_name: str, max_staff: int, used: int, remaining: int) -> str:
+    if remaining <= 0:
+        return (
+            f"Your {plan_name} plan allows up to {max_staff} staff "
+            f"({used} seats in use). Upgrade your plan to add more."
+        )
+    return (
+        f"Your {plan_name} plan allows up to {max_staff} staff "
+        f"({used} in use, {remaining} seat{'s' if remaining != 1 else ''} left). "
+        f"Reduce this invite or upgrade your plan."
+    )
+
+
 def assert_can_add_staff(restaurant, additional: int = 1) -> tuple[bool, str | None]:
-    """Return (ok, error_message). ``additional`` is how many new seats are requested."""
+    """Return (ok, error_message). ``additional`` is how many new seats are requested.
+
+    A read-only pre-check; paths that create seats hold them with
+    ``billing.seats.reserve_seats`` so concurrent invites cannot overshoot.
+    """
     if additional <= 0:
         return True, None
 
-    max_staff = staff_limit_for_restaurant(restaurant)
+    plan = resolve_plan_for_restaurant(restaurant)
+    max_staff = plan.max_staff if plan else None
     if max_staff is None:
         return True, None
 
-    used = count_staff_seats(restaurant)
+    from .seats import active_reserved, seat_counter
+
+    counter = seat_counter(restaurant)
+    used = counter.used + active_reserved(counter)
     remaining = max_staff - used
     if remaining >= additional:
         return True, None
-
-    plan = resolve_plan_for_restaurant(restaurant)
-    plan_name = plan.name if plan else "current"
-    if remaining <= 0:
-        return (
-            False,
-            (
-                f"Your {plan_name} plan allows up to {max_staff} staff "
-                f"({used} seats in use). Upgrade your plan to add more."
-            ),
-        )
-    return (
-        False,
-        (
-            f"Your {plan_name} plan allows up to {max_staff} staff "
-            f"({used} in use, {remaining} seat{'s' if remaining != 1 else ''} left). "
-            f"Reduce this invite or upgrade your plan."
-        ),
-    )
+    return False, limit_message(plan.name, max_staff, used, remaining)
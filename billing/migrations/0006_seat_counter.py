@@ -0,0 +1,29 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('billing', '0005_subscription_platform_ops'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatCounter',
+            fields=[
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='seat_counter', serialize=False, to='accounts.restaurant')),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('pending_invites', models.PositiveIntegerField(default=0)),
+                ('pending_activations', models.PositiveIntegerField(default=0)),
+                ('invites_expire_at', models.DateTimeField(blank=True, null=True)),
+                ('reserved', models.IntegerField(default=0)),
+                ('reserved_until', models.DateTimeField(blank=True, null=True)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
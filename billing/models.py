@@ -157,3 +157,37 @@ class Subscription(models.Model):
         if self.plan:
             return self.plan.tier
         return getattr(settings, "BILLING_PILOT_DEFAULT_TIER", SubscriptionPlan.Tier.STARTER)
+
+
+class SeatCounter(models.Model):
+    """Running per-tenant staff seat usage (see ``billing.seats``).
+
+    Components are recounted under a row lock by signals whenever a user,
+    invitation or WhatsApp activation record changes, and reconciled
+    nightly. ``reserved`` holds seats promised to in-flight bulk imports
+    until ``reserved_until``.
+    """
+
+    restaurant = models.OneToOneField(
+        'accounts.Restaurant',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='seat_counter',
+    )
+    active_users = models.PositiveIntegerField(default=0)
+    pending_invites = models.PositiveIntegerField(default=0)
+    pending_activations = models.PositiveIntegerField(default=0)
+    # Earliest expiry among the counted invitations: once it passes the
+    # invite component is recounted on read.
+    invites_expire_at = models.DateTimeField(null=True, blank=True)
+    reserved = models.IntegerField(default=0)
+    reserved_until = models.DateTimeField(null=True, blank=True)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.restaurant_id}: {self.used} seats"
+
+    @property
+    def used(self) -> int:
+        return self.active_users + self.pending_invites + self.pending_activations
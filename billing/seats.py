@@ -0,0 +1,228 @@
+"""
+Per-tenant staff seat accounting.
+
+Seats in use = active users + pending email invitations + pending WhatsApp
+activations. Counting those on every staff add cost three ``COUNT`` queries
+per check — 1,500+ for a 500-row import. :class:`~billing.models.SeatCounter`
+keeps the three components instead:
+
+* ``billing.signals`` recounts the affected component whenever a user,
+  invitation or activation record is saved or deleted. The counter row is
+  locked first, so concurrent writers recount one after another and the
+  last recount always sees every committed row.
+* Invitations expire without a write; the counter remembers the earliest
+  expiry and recounts invitations on the first read after it.
+* :func:`reconcile_seat_counters` (nightly) recounts everything and drops
+  abandoned reservations.
+
+:func:`reserve_seats` is the write-side check: it locks the counter, checks
+the plan limit once and holds the granted seats in ``reserved`` while the
+caller creates rows, so two managers inviting at the same moment cannot
+both take the last seat.
+"""
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+USERS = "active_users"
+INVITES = "pending_invites"
+ACTIVATIONS = "pending_activations"
+ALL_COMPONENTS = (USERS, INVITES, ACTIVATIONS)
+# Reservations not released by then (worker killed mid-import) stop counting.
+RESERVATION_TTL = timedelta(minutes=15)
+
+
+def _count_component(restaurant_id, component: str, now) -> dict:
+    from accounts.models import CustomUser, StaffActivationRecord, UserInvitation
+
+    if component == USERS:
+        return {USERS: CustomUser.objects.filter(restaurant_id=restaurant_id, is_active=True).count()}
+    if component == INVITES:
+        row = UserInvitation.objects.filter(
+            restaurant_id=restaurant_id, is_accepted=False, expires_at__gt=now
+        ).aggregate(n=Count("id"), first_expiry=Min("expires_at"))
+        return {INVITES: row["n"], "invites_expire_at": row["first_expiry"]}
+    return {
+        ACTIVATIONS: StaffActivationRecord.objects.filter(
+            restaurant_id=restaurant_id, status=StaffActivationRecord.STATUS_NOT_ACTIVATED
+        ).count()
+    }
+
+
+def _locked_counter(restaurant_id, *, create: bool):
+    """``(counter, created)`` locked for update; ``(None, False)`` when absent and not created."""
+    from .models import SeatCounter
+
+    counter = SeatCounter.objects.select_for_update().filter(restaurant_id=restaurant_id).first()
+    if counter is not None or not create:
+        return counter, False
+    _, created = SeatCounter.objects.get_or_create(restaurant_id=restaurant_id)
+    return SeatCounter.objects.select_for_update().get(restaurant_id=restaurant_id), created
+
+
+def _apply_recount(counter, components: Iterable[str], now) -> None:
+    fields = []
+    for component in components:
+        for field, value in _count_component(counter.restaurant_id, component, now).items():
+            setattr(counter, field, value)
+            fields.append(field)
+    counter.save(update_fields=[*fields, "updated_at"])
+
+
+def recount_seats(restaurant_id, components: Iterable[str] = ALL_COMPONENTS, *, create: bool = False):
+    """Recount ``components`` for one tenant under the counter's row lock.
+
+    Without ``create`` a tenant that has no counter yet is left alone — its
+    counter is built with a full count on first use.
+    """
+    if not restaurant_id:
+        return None
+    now = timezone.now()
+    with transaction.atomic():
+        counter, created = _locked_counter(restaurant_id, create=create)
+        if counter is None:
+            return None
+        _apply_recount(counter, ALL_COMPONENTS if created else components, now)
+    return counter
+
+
+def _refresh_expired_invites(counter, now) -> None:
+    if counter.invites_expire_at is not None and counter.invites_expire_at <= now:
+        _apply_recount(counter, (INVITES,), now)
+
+
+def seat_counter(restaurant):
+    """The tenant's :class:`SeatCounter`, current as of now (one query when warm)."""
+    from .models import SeatCounter
+
+    now = timezone.now()
+    counter = SeatCounter.objects.filter(restaurant_id=restaurant.pk).first()
+    if counter is None:
+        return recount_seats(restaurant.pk, create=True)
+    if counter.invites_expire_at is not None and counter.invites_expire_at <= now:
+        return recount_seats(restaurant.pk, (INVITES,))
+    return counter
+
+
+def active_reserved(counter, now=None) -> int:
+    now = now or timezone.now()
+    if counter.reserved_until is None or counter.reserved_until <= now:
+        return 0
+    return max(counter.reserved, 0)
+
+
+class SeatReservation:
+    """Seats granted by :func:`reserve_seats`, handed out one row at a time."""
+
+    def __init__(self, granted: int, error: Optional[str] = None):
+        self.granted = granted
+        self.available = granted
+        self.error = error
+
+    def take(self) -> bool:
+        """Claim one granted seat for the row about to be created."""
+        if self.available <= 0:
+            return False
+        self.available -= 1
+        return True
+
+    def give_back(self) -> None:
+        """Return a seat claimed for a row that was not created after all."""
+        self.available = min(self.available + 1, self.granted)
+
+
+@contextmanager
+def reserve_seats(restaurant, n: int, *, partial: bool = False):
+    """Check the plan limit once for ``n`` new seats and hold them.
+
+    Yields a :class:`SeatReservation`. All-or-nothing by default; with
+    ``partial`` the reservation grants whatever is left (bulk imports keep
+    creating rows until the plan is full, as before). Granted seats stay in
+    ``SeatCounter.reserved`` until the block exits, so while it runs the
+    rows already created are counted twice — concurrent invites see the
+    limit conservatively, never optimistically.
+    """
+    from .limits import limit_message, resolve_plan_for_restaurant
+
+    plan = resolve_plan_for_restaurant(restaurant) if n > 0 else None
+    max_staff = plan.max_staff if plan else None
+    if n <= 0 or max_staff is None:
+        yield SeatReservation(max(n, 0))
+        return
+
+    now = timezone.now()
+    with transaction.atomic():
+        counter, created = _locked_counter(restaurant.pk, create=True)
+        if created:
+            _apply_recount(counter, ALL_COMPONENTS, now)
+        else:
+            _refresh_expired_invites(counter, now)
+        held = active_reserved(counter, now)
+        used = counter.used + held
+        remaining = max_staff - used
+        granted = n if remaining >= n else (max(remaining, 0) if partial else 0)
+        if granted:
+            counter.reserved = held + granted
+            counter.reserved_until = now + RESERVATION_TTL
+            counter.save(update_fields=["reserved", "reserved_until", "updated_at"])
+
+    if granted == n:
+        error = None
+    elif granted:
+        error = limit_message(plan.name, max_staff, used + granted, 0)
+    else:
+        error = limit_message(plan.name, max_staff, used, remaining)
+    try:
+        yield SeatReservation(granted, error)
+    finally:
+        if granted:
+            from .models import SeatCounter
+
+            SeatCounter.objects.filter(restaurant_id=restaurant.pk).update(
+                reserved=Greatest(F("reserved") - granted, Value(0)), updated_at=timezone.now()
+            )
+
+
+def reconcile_seat_counters(restaurant_ids: Optional[Iterable] = None) -> dict:
+    """Recount every existing counter and drop expired reservations.
+
+    Returns ``{"reconciled": n, "drifted": n}``; drift means a write path
+    bypassed the signals (queryset ``update()``, raw SQL) and is logged.
+    """
+    from .models import SeatCounter
+
+    ids = SeatCounter.objects.values_list("restaurant_id", flat=True)
+    if restaurant_ids is not None:
+        ids = ids.filter(restaurant_id__in=list(restaurant_ids))
+    reconciled = drifted = 0
+    for rid in list(ids):
+        now = timezone.now()
+        with transaction.atomic():
+            counter, _ = _locked_counter(rid, create=False)
+            if counter is None:
+                continue
+            before = (counter.active_users, counter.pending_invites, counter.pending_activations)
+            for component in ALL_COMPONENTS:
+                for field, value in _count_component(rid, component, now).items():
+                    setattr(counter, field, value)
+            after = (counter.active_users, counter.pending_invites, counter.pending_activations)
+            if before != after:
+                drifted += 1
+                logger.warning("seat counter drift restaurant=%s before=%s after=%s", rid, before, after)
+            if counter.reserved and active_reserved(counter, now) == 0:
+                counter.reserved = 0
+                counter.reserved_until = None
+            counter.reconciled_at = now
+            counter.save()
+        reconciled += 1
+    return {"reconciled": reconciled, "drifted": drifted}
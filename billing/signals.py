@@ -1,6 +1,17 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
+logger = logging.getLogger(__name__)
+
+# Fields whose change can move a user in or out of a tenant's seat count.
+_USER_SEAT_FIELDS = {"is_active", "restaurant", "restaurant_id"}
+# Seat-relevant state as loaded / last saved, so a save can tell whether the
+# user actually moved and which tenant they left.
+_SEAT_SNAPSHOT_ATTR = "_seat_snapshot"
+_UNKNOWN = object()
+
 
 @receiver(post_save, sender="accounts.Restaurant")
 def assign_starter_subscription_on_restaurant_create(sender, instance, created, **kwargs):
@@ -11,8 +22,67 @@ def assign_starter_subscription_on_restaurant_create(sender, instance, created,
 
         ensure_starter_subscription(instance)
     except Exception:
-        import logging
-
-        logging.getLogger(__name__).exception(
+        logger.exception(
             "Failed to assign Starter subscription for restaurant %s", instance.id
         )
+
+
+def _recount(restaurant_id, component):
+    from billing.seats import recount_seats
+
+    try:
+        recount_seats(restaurant_id, (component,))
+    except Exception:
+        logger.exception("Seat counter recount failed restaurant=%s component=%s", restaurant_id, component)
+
+
+def _seat_state(instance):
+    # Read from __dict__ so deferred fields stay unknown instead of loading.
+    data = instance.__dict__
+    return data.get("restaurant_id", _UNKNOWN), data.get("is_active", _UNKNOWN)
+
+
+@receiver(post_init, sender="accounts.CustomUser")
+def snapshot_user_seat_state(sender, instance, **kwargs):
+    setattr(instance, _SEAT_SNAPSHOT_ATTR, _seat_state(instance))
+
+
+@receiver(post_save, sender="accounts.CustomUser")
+def recount_active_user_seats(sender, instance, created=False, update_fields=None, **kwargs):
+    """Staff added, (de)activated or moved between tenants — recount the
+    active users of the tenant they left and the one they are in now."""
+    if update_fields is not None and not created and not (set(update_fields) & _USER_SEAT_FIELDS):
+        return
+    from billing.seats import USERS
+
+    before_restaurant, before_active = getattr(instance, _SEAT_SNAPSHOT_ATTR, (_UNKNOWN, _UNKNOWN))
+    snapshot = _seat_state(instance)
+    setattr(instance, _SEAT_SNAPSHOT_ATTR, snapshot)
+    if not created and (before_restaurant, before_active) == snapshot:
+        return
+    if before_restaurant not in (_UNKNOWN, None, instance.restaurant_id):
+        _recount(before_restaurant, USERS)
+    _recount(instance.restaurant_id, USERS)
+
+
+@receiver(post_delete, sender="accounts.CustomUser")
+def recount_active_user_seats_on_delete(sender, instance, **kwargs):
+    from billing.seats import USERS
+
+    _recount(instance.restaurant_id, USERS)
+
+
+@receiver(post_save, sender="accounts.UserInvitation")
+@receiver(post_delete, sender="accounts.UserInvitation")
+def recount_invitation_seats(sender, instance, **kwargs):
+    from billing.seats import INVITES
+
+    _recount(instance.restaurant_id, INVITES)
+
+
+@receiver(post_save, sender="accounts.StaffActivationRecord")
+@receiver(post_delete, sender="accounts.StaffActivationRecord")
+def recount_activation_seats(sender, instance, **kwargs):
+    from billing.seats import ACTIVATIONS
+
+    _recount(instance.restaurant_id, ACTIVATIONS)
@@ -0,0 +1,14 @@
+"""Periodic seat counter maintenance (see ``billing.seats``)."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from celery import shared_task
+
+from .seats import reconcile_seat_counters
+
+
+@shared_task
+def reconcile_staff_seats() -> Dict[str, Any]:
+    """Recount every tenant's seat counter and drop abandoned reservations."""
+    return {"success": True, **reconcile_seat_counters()}
@@ -0,0 +1,95 @@
+"""Seat counter: signal-maintained components, invite expiry, reservations
+and reconciliation."""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import CustomUser, Restaurant, StaffActivationRecord, UserInvitation
+from accounts.services import UserManagementService
+from billing.limits import assert_can_add_staff, count_staff_seats
+from billing.models import SeatCounter, Subscription, SubscriptionPlan
+from billing.seats import reconcile_seat_counters, reserve_seats
+
+
+class SeatCounterTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Seat Diner", email="seats@diner.test")
+        plan = SubscriptionPlan.objects.create(name="Tiny", slug="tiny-seats", price=0, max_staff=4)
+        Subscription.objects.update_or_create(restaurant=self.restaurant, defaults={"plan": plan, "status": "active"})
+        self.owner = CustomUser.objects.create_user(
+            email="owner@diner.test", password="pass12345", restaurant=self.restaurant, role="OWNER",
+        )
+
+    def _invite(self, n, expires_in=timedelta(days=7)):
+        return UserInvitation.objects.create(
+            restaurant=self.restaurant, email=f"invite{n}@diner.test", role="WAITER",
+            invitation_token=f"seat-token-{n}", expires_at=timezone.now() + expires_in,
+        )
+
+    def test_counter_follows_writes_and_reads_in_one_query(self):
+        self.assertEqual(count_staff_seats(self.restaurant), 1)
+        self._invite(1)
+        record = StaffActivationRecord.objects.create(restaurant=self.restaurant, phone="212600000001")
+        with self.assertNumQueries(1):
+            self.assertEqual(count_staff_seats(self.restaurant), 3)
+
+        record.status = StaffActivationRecord.STATUS_ACTIVATED
+        record.save()
+        self.owner.is_active = False
+        self.owner.save(update_fields=["is_active"])
+        self.assertEqual(count_staff_seats(self.restaurant), 1)
+
+    def test_expired_invites_stop_counting(self):
+        self._invite(1, expires_in=timedelta(hours=1))
+        self._invite(2)
+        self.assertEqual(count_staff_seats(self.restaurant), 3)
+        later = timezone.now() + timedelta(hours=2)
+        with mock.patch("billing.seats.timezone.now", return_value=later):
+            self.assertEqual(count_staff_seats(self.restaurant), 2)
+        self.assertGreater(SeatCounter.objects.get(pk=self.restaurant.pk).invites_expire_at, later)
+
+    def test_reservations_hold_seats_until_released(self):
+        with reserve_seats(self.restaurant, 2) as first:
+            self.assertEqual(first.granted, 2)
+            with reserve_seats(self.restaurant, 2) as second:
+                self.assertEqual(second.granted, 0)
+                self.assertIn("allows up to 4 staff", second.error)
+            self.assertEqual(assert_can_add_staff(self.restaurant, 2)[0], False)
+            with reserve_seats(self.restaurant, 5, partial=True) as rest:
+                self.assertEqual(rest.granted, 1)
+                self.assertTrue(rest.take())
+                self.assertFalse(rest.take())
+        self.assertEqual(SeatCounter.objects.get(pk=self.restaurant.pk).reserved, 0)
+        self.assertEqual(assert_can_add_staff(self.restaurant, 3), (True, None))
+
+    def test_bulk_import_checks_the_limit_once(self):
+        rows = [{"phone": f"21260000{n:04d}", "first_name": f"S{n}"} for n in range(6)]
+        result = UserManagementService.bulk_create_staff_activation_records(self.restaurant, staff_list=rows)
+        self.assertEqual((result["created"], result["failed"]), (3, 3))
+        self.assertIn("allows up to 4 staff", result["errors"][0])
+        self.assertEqual(count_staff_seats(self.restaurant), 4)
+
+    def test_reconcile_repairs_drift(self):
+        count_staff_seats(self.restaurant)
+        SeatCounter.objects.filter(pk=self.restaurant.pk).update(active_users=9, reserved=3)
+        self.assertEqual(reconcile_seat_counters([self.restaurant.pk]), {"reconciled": 1, "drifted": 1})
+        counter = SeatCounter.objects.get(pk=self.restaurant.pk)
+        self.assertEqual((counter.active_users, counter.reserved), (1, 0))
+
+    def test_moving_a_user_recounts_both_tenants_and_plain_saves_skip(self):
+        other = Restaurant.objects.create(name="Other Diner", email="other@diner.test")
+        self.assertEqual(count_staff_seats(self.restaurant), 1)
+        self.assertEqual(count_staff_seats(other), 0)
+
+        with mock.patch("billing.seats.recount_seats") as recount:
+            self.owner.first_name = "Renamed"
+            self.owner.save()
+        recount.assert_not_called()
+
+        self.owner.restaurant = other
+        self.owner.save()
+        self.assertEqual(SeatCounter.objects.get(pk=self.restaurant.pk).active_users, 0)
+        self.assertEqual(SeatCounter.objects.get(pk=other.pk).active_users, 1)
@@ -1,49 +1,70 @@
 import json
 import logging
+import uuid
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 logger = logging.getLogger(__name__)
 from channels.db import database_sync_to_async
-from rest_framework_simplejwt.tokens import AccessToken
-from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.realtime import TenantSocketMixin
 from .models import Message
-from .serializers import MessageSerializer
+from .persistence import message_buffer
 
-User = get_user_model()
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(TenantSocketMixin, AsyncWebsocketConsumer):
+    """Tenant-wide staff chat.
+
+    The user comes from ``core.realtime.JWTQueryAuthMiddleware`` (principal
+    cache); messages are broadcast immediately and persisted in batches by
+    ``chat.persistence``.
+    """
+
     async def connect(self):
-        self.user = self.scope['user']
-        if not self.user.is_authenticated:
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated or not self.user.restaurant_id:
             await self.close()
             return
 
         # Determine the room name based on whether it's a direct message or group chat
         # For simplicity, let's assume a single group chat for all staff in a restaurant
-        self.room_name = f'chat_{self.user.restaurant.id}'
-        self.room_group_name = f'chat_{self.user.restaurant.id}'
+        self.room_name = f'chat_{self.user.restaurant_id}'
+        self.room_group_name = f'chat_{self.user.restaurant_id}'
+        self._sender_info = None
+        self._recipient_info = {}
 
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
+        # Only the chat room: the user/manager notification groups carry
+        # events this consumer has no handlers for.
+        await self.join_connection_groups([self.room_group_name])
 
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
+        if not hasattr(self, 'room_group_name'):
+            return
+        await self.leave_connection_groups()
+        await message_buffer.flush()
 
     async def receive(self, text_data):
+        await self.touch_presence()
         data = json.loads(text_data)
         message_content = data['message']
         recipient_id = data.get('recipient_id') # Optional for direct messages
+        if recipient_id:
+            try:
+                recipient_id = uuid.UUID(str(recipient_id))
+            except ValueError:
+                logger.warning("Chat consumer: recipient not found for id=%s", recipient_id)
+                recipient_id = None
 
-        # Save message to database
-        message = await self.create_message(self.user, message_content, self.room_name, recipient_id)
-        serialized_message = MessageSerializer(message).data
+        message = Message(
+            sender_id=self.user.pk,
+            recipient_id=recipient_id or None,
+            room_name=self.room_name,
+            content=message_content,
+            timestamp=timezone.now(),
+        )
+        serialized_message = await self.serialize_message(message)
+        await message_buffer.add(message)
 
         # Send message to room group
         await self.channel_layer.group_send(
@@ -61,36 +82,45 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': message
         }))
 
-    @database_sync_to_async
-    def create_message(self, sender, content, room_name, recipient_id=None):
-        recipient = None
-        if recipient_id:
-            try:
-                recipient = User.objects.get(id=recipient_id)
-            except User.DoesNotExist:
-                logger.warning("Chat consumer: recipient not found for id=%s", recipient_id)
-        
-        return Message.objects.create(
-            sender=sender,
-            recipient=recipient,
-            room_name=room_name,
-            content=content
-        )
+    async def serialize_message(self, message):
+        """``MessageSerializer`` shape without touching the DB per message.
+
+        Sender info is serialized once per connection; recipients come from
+        the shared principal cache.
+        """
+        if self._sender_info is None:
+            self._sender_info = await database_sync_to_async(_user_info)(self.user)
+        recipient_info = None
+        if message.recipient_id:
+            key = str(message.recipient_id)
+            if key not in self._recipient_info:
+                self._recipient_info[key] = await database_sync_to_async(_recipient_info)(key)
+            recipient_info = self._recipient_info[key]
+        return {
+            'id': str(message.id),
+            'sender': str(self.user.pk),
+            'sender_info': self._sender_info,
+            'recipient': str(message.recipient_id) if message.recipient_id else None,
+            'recipient_info': recipient_info,
+            'room_name': message.room_name,
+            'content': message.content,
+            'timestamp': message.timestamp.isoformat(),
+            'is_read': False,
+        }
+
+
+def _user_info(user):
+    from accounts.serializers import UserSerializer
+
+    return json.loads(json.dumps(UserSerializer(user).data, default=str))
+
+
+def _recipient_info(user_id):
+    from accounts.authentication import load_principal
 
-    @database_sync_to_async
-    def get_user_from_token(self, token_key):
-        try:
-            access_token = AccessToken(token_key)
-            user = User.objects.get(id=access_token['user_id'])
-            return user
-        except Exception:
-            return None
-
-    async def websocket_connect(self, message):
-        query_string = self.scope['query_string'].decode()
-        token_param = dict(qc.split('=') for qc in query_string.split('&') if '=' in qc).get('token')
-
-        if token_param:
-            self.scope['user'] = await self.get_user_from_token(token_param)
-        
-        await super().websocket_connect(message)
+    try:
+        user, _reason = load_principal(user_id)
+    except Exception:
+        logger.warning("Chat consumer: recipient not found for id=%s", user_id)
+        return None
+    return _user_info(user)
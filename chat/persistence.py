@@ -0,0 +1,96 @@
+"""
+Batched chat message persistence for the WebSocket consumer.
+
+Messages are broadcast as soon as they arrive and queued here; the queue is
+written with one ``bulk_create`` when it reaches ``CHAT_BATCH_SIZE`` or
+``CHAT_FLUSH_DELAY`` seconds after its first message, whichever comes
+first. A burst of chat at shift change becomes a handful of inserts instead
+of one synchronous insert per frame. If a batch insert fails, its messages
+are retried one by one so only the offending rows are lost. Consumers flush
+on disconnect; a process crash can lose at most one flush window of
+messages.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from channels.db import database_sync_to_async
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CHAT_BATCH_SIZE = 200
+CHAT_FLUSH_DELAY = 0.25
+
+
+def write_messages(messages: List) -> int:
+    """Insert queued messages; unknown recipients become ``None`` (one lookup)."""
+    from django.contrib.auth import get_user_model
+
+    from .models import Message
+
+    if not messages:
+        return 0
+    recipient_ids = {m.recipient_id for m in messages if m.recipient_id}
+    if recipient_ids:
+        known = {
+            str(pk) for pk in get_user_model().objects.filter(pk__in=recipient_ids).values_list("pk", flat=True)
+        }
+        for m in messages:
+            if m.recipient_id and str(m.recipient_id) not in known:
+                logger.warning("Chat consumer: recipient not found for id=%s", m.recipient_id)
+                m.recipient_id = None
+    Message.objects.bulk_create(messages, batch_size=CHAT_BATCH_SIZE)
+    return len(messages)
+
+
+def write_messages_individually(messages: List) -> int:
+    """Fallback after a failed batch: one insert per message, skipping failures."""
+    written = 0
+    for message in messages:
+        try:
+            with transaction.atomic():
+                written += write_messages([message])
+        except Exception:
+            logger.exception("Chat message write failed id=%s", message.id)
+    return written
+
+
+class ChatMessageBuffer:
+    """Per-process queue of unsaved :class:`~chat.models.Message` rows."""
+
+    def __init__(self, batch_size: int = CHAT_BATCH_SIZE, delay: float = CHAT_FLUSH_DELAY):
+        self.batch_size = batch_size
+        self.delay = delay
+        self._pending: List = []
+        self._timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def add(self, message) -> None:
+        self._pending.append(message)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None or self._timer.done() or self._timer.get_loop() is not asyncio.get_running_loop():
+            self._timer = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.delay)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        try:
+            return await database_sync_to_async(write_messages)(batch)
+        except Exception:
+            logger.exception("Chat message batch write failed (%d messages); retrying one by one", len(batch))
+        return await database_sync_to_async(write_messages_individually)(batch)
+
+
+message_buffer = ChatMessageBuffer()
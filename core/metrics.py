@@ -0,0 +1,319 @@
+"""
+Prometheus metrics for the web tier, Celery workers and Miya.
+
+Everything is registered on the default ``prometheus_client`` registry and
+exported at ``/metrics`` (:func:`metrics_view`). Label values are always
+bounded: URL route patterns, task names, sweep names, Graph endpoint names,
+Miya stage and tool names — never tenant ids, user ids or raw paths.
+
+Multiprocess
+------------
+When ``PROMETHEUS_MULTIPROC_DIR`` is set (required for several Daphne /
+gunicorn processes or Celery prefork workers) ``prometheus_client`` keeps
+samples in per-process files in that directory and :func:`metrics_view`
+aggregates them. The directory must be emptied when the service starts.
+Celery workers cannot share it with the web container, so the worker's main
+process serves its own aggregate on ``CELERY_METRICS_PORT`` (see
+:func:`connect_celery_signals`); gunicorn deployments call
+:func:`mark_process_dead` from the ``child_exit`` hook.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 90, 180, 600)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "mizan_http_request_duration_seconds",
+    "Django request latency by URL route.",
+    ["route", "method", "status"],
+)
+HTTP_DB_QUERIES = Histogram(
+    "mizan_http_db_queries",
+    "Database queries executed per request, by URL route.",
+    ["route", "method"],
+    buckets=QUERY_BUCKETS,
+)
+CELERY_TASK_SECONDS = Histogram(
+    "mizan_celery_task_duration_seconds",
+    "Celery task run time.",
+    ["task", "state"],
+    buckets=SLOW_BUCKETS,
+)
+SWEEP_TENANT_SECONDS = Histogram(
+    "mizan_sweep_tenant_duration_seconds",
+    "Time a periodic sweep spends on one tenant.",
+    ["sweep"],
+    buckets=SLOW_BUCKETS,
+)
+GRAPH_REQUEST_SECONDS = Histogram(
+    "mizan_graph_api_request_duration_seconds",
+    "WhatsApp / Graph API call latency.",
+    ["endpoint", "status"],
+)
+GRAPH_ERRORS = Counter(
+    "mizan_graph_api_errors_total",
+    "Failed Graph API calls by Graph error code (``transport`` when no response).",
+    ["endpoint", "code"],
+)
+MIYA_STAGE_SECONDS = Histogram(
+    "mizan_miya_stage_duration_seconds",
+    "Miya turn time per pipeline stage.",
+    ["stage", "channel"],
+    buckets=SLOW_BUCKETS,
+)
+MIYA_TURNS = Counter(
+    "mizan_miya_turns_total",
+    "Miya copilot turns by outcome.",
+    ["outcome", "channel"],
+)
+MIYA_TOOL_SECONDS = Histogram(
+    "mizan_miya_tool_duration_seconds",
+    "Miya tool dispatch latency per tool.",
+    ["tool", "outcome"],
+    buckets=SLOW_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "mizan_cache_lookups_total",
+    "Read-through cache lookups by key namespace (hit / miss / error).",
+    ["namespace", "result"],
+)
+
+# Last path segments worth their own ``endpoint`` label; numeric ids
+# (media, phone numbers) collapse to ``object``.
+GRAPH_ENDPOINTS = {
+    "messages",
+    "media",
+    "message_templates",
+    "subscribed_apps",
+    "phone_numbers",
+    "register",
+    "whatsapp_business_profile",
+}
+
+
+def _multiprocess_dir() -> str:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir") or ""
+
+
+def metrics_registry() -> CollectorRegistry:
+    """The default registry, or a multiprocess aggregate when configured."""
+    if not _multiprocess_dir():
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop a dead worker's live-only samples (gunicorn ``child_exit``)."""
+    if _multiprocess_dir():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint.
+
+    Requires ``Authorization: Bearer <METRICS_TOKEN>`` when the setting is
+    configured; without a token it is only served in DEBUG.
+    """
+    from django.conf import settings
+    from django.http import Http404, HttpResponse
+
+    token = (getattr(settings, "METRICS_TOKEN", "") or "").strip()
+    if token:
+        auth = (request.META.get("HTTP_AUTHORIZATION") or "").strip()
+        if auth != f"Bearer {token}":
+            return HttpResponse("Unauthorized", status=401, content_type="text/plain")
+    elif not settings.DEBUG:
+        raise Http404()
+    return HttpResponse(generate_latest(metrics_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+# --- Web ---------------------------------------------------------------------
+
+def request_route(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.route or match.view_name or "unmatched"
+
+
+def observe_request(request, status_code: int, seconds: float, queries: int) -> None:
+    route = request_route(request)
+    method = request.method or "GET"
+    HTTP_REQUEST_SECONDS.labels(route, method, f"{int(status_code) // 100}xx").observe(seconds)
+    HTTP_DB_QUERIES.labels(route, method).observe(queries)
+
+
+# --- Celery ------------------------------------------------------------------
+
+_task_started: dict[str, float] = {}
+
+
+def _task_prerun(task_id=None, **_kwargs) -> None:
+    if task_id:
+        _task_started[task_id] = time.perf_counter()
+
+
+def _task_postrun(task_id=None, task=None, state=None, **_kwargs) -> None:
+    started = _task_started.pop(task_id, None) if task_id else None
+    if started is None:
+        return
+    name = getattr(task, "name", None) or "unknown"
+    CELERY_TASK_SECONDS.labels(name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+
+def _worker_process_shutdown(pid=None, **_kwargs) -> None:
+    mark_process_dead(pid or os.getpid())
+
+
+def _worker_ready(**_kwargs) -> None:
+    from django.conf import settings
+
+    port = int(getattr(settings, "CELERY_METRICS_PORT", 0) or 0)
+    if not port:
+        return
+    from prometheus_client import start_http_server
+
+    try:
+        start_http_server(port, registry=metrics_registry())
+    except OSError as exc:
+        logger.warning("celery metrics server not started on port %s: %s", port, exc)
+
+
+def connect_celery_signals() -> None:
+    """Time every task; serve worker metrics on ``CELERY_METRICS_PORT``."""
+    from celery import signals
+
+    signals.task_prerun.connect(_task_prerun, weak=False)
+    signals.task_postrun.connect(_task_postrun, weak=False)
+    signals.worker_process_shutdown.connect(_worker_process_shutdown, weak=False)
+    signals.worker_ready.connect(_worker_ready, weak=False)
+
+
+def timed_per_tenant(sweep: str, restaurants: Iterable[T]) -> Iterator[T]:
+    """Iterate a sweep's tenants, observing the time spent on each one.
+
+    ``for restaurant in timed_per_tenant("name", qs.iterator()):`` — the body
+    of the loop is what gets timed, including ``continue`` and ``break``.
+    """
+    hist = SWEEP_TENANT_SECONDS.labels(sweep)
+    for restaurant in restaurants:
+        started = time.perf_counter()
+        try:
+            yield restaurant
+        finally:
+            hist.observe(time.perf_counter() - started)
+
+
+# --- WhatsApp / Graph API ----------------------------------------------------
+
+def graph_endpoint(url: str) -> str:
+    parts = urlsplit(url or "")
+    if not parts.netloc.endswith("graph.facebook.com"):
+        return "media_download"
+    tail = parts.path.rstrip("/").rsplit("/", 1)[-1]
+    if tail.isdigit():
+        return "object"
+    return tail if tail in GRAPH_ENDPOINTS else "other"
+
+
+def _graph_error_code(resp) -> str:
+    try:
+        body = resp.json()
+    except Exception:
+        return str(resp.status_code)
+    err = body.get("error") if isinstance(body, dict) else None
+    if isinstance(err, dict) and err.get("code") is not None:
+        return str(err.get("code"))
+    return str(resp.status_code)
+
+
+def graph_request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """``requests.request`` for Graph API calls, timed per endpoint; failed
+    calls are counted by their Graph error code. Exceptions propagate."""
+    endpoint = graph_endpoint(url)
+    started = time.perf_counter()
+    try:
+        resp = requests.request(method, url, **kwargs)
+    except requests.RequestException:
+        GRAPH_REQUEST_SECONDS.labels(endpoint, "error").observe(time.perf_counter() - started)
+        GRAPH_ERRORS.labels(endpoint, "transport").inc()
+        raise
+    GRAPH_REQUEST_SECONDS.labels(endpoint, str(resp.status_code)).observe(time.perf_counter() - started)
+    if resp.status_code >= 400:
+        GRAPH_ERRORS.labels(endpoint, _graph_error_code(resp)).inc()
+    return resp
+
+
+# --- Miya ----------------------------------------------------------------------
+
+def observe_miya_stage(stage: str, seconds: float, channel: str = "dashboard") -> None:
+    MIYA_STAGE_SECONDS.labels(stage, channel or "dashboard").observe(seconds)
+
+
+@contextmanager
+def miya_stage(stage: str, channel: str = "dashboard"):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_miya_stage(stage, time.perf_counter() - started, channel)
+
+
+def observe_miya_turn(outcome: str, channel: str, stage_ms: dict[str, float]) -> None:
+    channel = channel or "dashboard"
+    MIYA_TURNS.labels(outcome or "unknown", channel).inc()
+    for stage, ms in stage_ms.items():
+        observe_miya_stage(stage, ms / 1000, channel)
+
+
+def observe_tool(tool: str, seconds: float, result: Any) -> None:
+    ok = isinstance(result, dict) and result.get("success") is not False
+    MIYA_TOOL_SECONDS.labels(tool or "unknown", "success" if ok else "failed").observe(seconds)
+
+
+# --- Cache -----------------------------------------------------------------------
+
+_NAMESPACE_SEGMENT = re.compile(r"[A-Za-z_]+\d?")
+
+
+def cache_namespace(key: str) -> str:
+    """Leading word segments of a key, up to three, stopping at the first id
+    (``agent:sched:staff_list:<rid>:<role>`` -> ``agent:sched:staff_list``)."""
+    parts = []
+    for seg in str(key).split(":")[:3]:
+        if not _NAMESPACE_SEGMENT.fullmatch(seg):
+            break
+        parts.append(seg)
+    return ":".join(parts) or "other"
+
+
+def count_cache_lookup(key: str, result: str) -> None:
+    CACHE_LOOKUPS.labels(cache_namespace(key), result).inc()
@@ -3,12 +3,15 @@ Multi-tenant middleware for Mizan AI
 Ensures tenant isolation and context validation for every request
 """
 import json
+import random
+import time
 import uuid
 
 from django.http import JsonResponse
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.authentication import MizanJWTAuthentication, stash_principal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -126,7 +129,8 @@ class TenantContextMiddleware(MiddlewareMixin):
     Flow:
     1. Skip webhooks, agent bridges, Mastra, and public auth paths
     2. Skip requests authenticated with the agent bearer secret
-    3. Resolve user from ``request.user`` (session) or JWT
+    3. Resolve user from ``request.user`` (session) or JWT; a JWT principal is
+       stashed on the request so DRF authentication reuses it
     4. Inject ``request.tenant_id`` / ``request.tenant`` when resolvable
     5. Fail closed (403) for authenticated users without a restaurant
     """
@@ -144,7 +148,7 @@ class TenantContextMiddleware(MiddlewareMixin):
             )
             return None
 
-        jwt_auth = JWTAuthentication()
+        jwt_auth = MizanJWTAuthentication()
         try:
             header = jwt_auth.get_header(request)
             if header is None:
@@ -154,6 +158,7 @@ class TenantContextMiddleware(MiddlewareMixin):
                 return None
             validated_token = jwt_auth.get_validated_token(raw_token)
             user = jwt_auth.get_user(validated_token)
+            stash_principal(request, raw_token, user, validated_token)
             request.user = user
             if inject_tenant_from_user(request, user):
                 logger.debug(
@@ -517,4 +522,61 @@ class AgentPathCsrfExemptMiddleware(MiddlewareMixin):
     def process_view(self, request, view_func, view_args, view_kwargs):
         if request.path.startswith(self.AGENT_PATHS):
             view_func.csrf_exempt = True
-        return None
\ No newline at end of file
+        return None
+
+class AuditBatchMiddleware:
+    """Collect the scheduling audit trail (``scheduling.audit.AuditLog``)
+    written during a request and store it with one ``bulk_create`` once the
+    request's transactions have committed (``scheduling.audit.audit_batch``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from scheduling.audit import audit_batch
+
+        with audit_batch():
+            return self.get_response(request)
+
+
+class MetricsMiddleware:
+    """Per-route request latency and query profile (``core.metrics``,
+    ``core.query_profile``): optional ``X-Query-Profile`` header and a
+    sampled log line listing repeated query shapes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.conf import settings
+        from django.db import connection
+
+        from core.metrics import observe_request, request_route
+        from core.query_profile import N_PLUS_ONE_MIN, QueryProfile
+
+        profile = QueryProfile()
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+            status_code = response.status_code
+            if getattr(settings, 'QUERY_PROFILE_HEADER', settings.DEBUG):
+                response['X-Query-Profile'] = profile.header_value()
+            return response
+        finally:
+            try:
+                observe_request(request, status_code, time.perf_counter() - started, profile.count)
+                rate = float(getattr(settings, 'QUERY_PROFILE_SAMPLE_RATE', 0) or 0)
+                if rate and random.random() < rate:
+                    # A shape repeated N_PLUS_ONE_MIN+ times is the N+1 signal;
+                    # those must reach production logs, the rest stay at INFO.
+                    logger.log(
+                        logging.WARNING if profile.duplicates(N_PLUS_ONE_MIN) else logging.INFO,
+                        "QUERY_PROFILE %s %s %s",
+                        request.method,
+                        request_route(request),
+                        json.dumps(profile.summary()),
+                    )
+            except Exception as exc:  # metrics must never break a response
+                logger.debug("MetricsMiddleware observe failed: %s", exc)
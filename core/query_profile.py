@@ -0,0 +1,86 @@
+"""
+Per-request database profile: query count, total DB time and repeated
+query shapes (the N+1 signature).
+
+:class:`QueryProfile` is a ``connection.execute_wrapper``; ``MetricsMiddleware``
+installs one per request, exports the count to Prometheus and
+
+* adds an ``X-Query-Profile`` header when ``QUERY_PROFILE_HEADER`` is on
+  (defaults to ``DEBUG``);
+* logs a sample of requests (``QUERY_PROFILE_SAMPLE_RATE``) with the most
+  repeated fingerprints, so production N+1s show up without DEBUG.
+
+Tests use :func:`profile_queries` (see ``core/tests/query_budget.py``).
+"""
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+_WS = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# IN (%s, %s, ...) and, after literal stripping, IN (?, ?) collapse to IN (...)
+_IN_LIST = re.compile(r"\bIN \((?:%s|\?)(?:,\s*(?:%s|\?))*\)", re.IGNORECASE)
+
+DUPLICATE_MIN = 2
+# A shape repeated this often in one request is logged as a likely N+1.
+N_PLUS_ONE_MIN = 5
+
+
+def fingerprint(sql: str) -> str:
+    """Query shape with literals and IN-list lengths removed."""
+    out = _WS.sub(" ", sql or "").strip()
+    out = _STRING.sub("?", out)
+    out = _NUMBER.sub("?", out)
+    return _IN_LIST.sub("IN (...)", out)
+
+
+class QueryProfile:
+    """Counts queries, DB time and fingerprints for one unit of work."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, min_count: int = DUPLICATE_MIN) -> List[Tuple[str, int]]:
+        """``[(fingerprint, times)]`` for shapes run ``min_count``+ times, most first."""
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n >= min_count]
+
+    @property
+    def duplicate_count(self) -> int:
+        """Queries beyond the first of each repeated shape."""
+        return sum(n - 1 for _, n in self.duplicates())
+
+    def header_value(self) -> str:
+        return f"count={self.count}; db_ms={self.db_seconds * 1000:.1f}; duplicates={self.duplicate_count}"
+
+    def summary(self, top: int = 3) -> dict:
+        return {
+            "queries": self.count,
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "duplicates": self.duplicate_count,
+            "top_duplicates": [{"n": n, "sql": fp[:300]} for fp, n in self.duplicates()[:top]],
+        }
+
+
+@contextmanager
+def profile_queries(using: str = "default") -> Iterator[QueryProfile]:
+    from django.db import connections
+
+    profile = QueryProfile()
+    with connections[using].execute_wrapper(profile):
+        yield profile
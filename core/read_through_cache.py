@@ -9,6 +9,8 @@ from typing import Any, Callable, TypeVar
 
 from django.core.cache import cache
 
+from core.metrics import count_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -26,10 +28,13 @@ _MEMORY_TYPE_KEYS = ["", "preference", "correction", "fact", "pattern"]
 
 def safe_cache_get(key: str) -> Any | None:
     try:
-        return cache.get(key)
+        value = cache.get(key)
     except Exception as exc:
         logger.warning("cache get failed key=%s: %s", key, exc)
+        count_cache_lookup(key, "error")
         return None
+    count_cache_lookup(key, "miss" if value is None else "hit")
+    return value
 
 
 def safe_cache_set(key: str, value: Any, timeout: int) -> None:
@@ -0,0 +1,212 @@
+"""
+WebSocket connection layer: auth, group membership and presence.
+
+At shift change hundreds of tablets and phones reconnect within a minute.
+Each connect used to decode the JWT and load the user from the DB; now:
+
+* :class:`JWTQueryAuthMiddleware` resolves ``?token=`` through the same
+  short-TTL principal cache as HTTP auth (``accounts.authentication``), so a
+  reconnect storm is served from the cache and suspended tenants / inactive
+  users are refused exactly as on HTTP.
+* :func:`connection_groups` computes the socket's channel-layer groups once,
+  from the cached principal and without queries: the per-user group, the
+  tenant group, the tenant managers group and the primary branch group.
+  Senders fan out with one ``group_send`` to a tenant/role/branch group
+  instead of querying recipients and sending per user.
+* Presence is a per-user connection count in the shared cache; transitions
+  (first socket opened / last socket closed) are pushed to the tenant
+  managers group as ``presence_update`` events.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import Iterable, List, Optional, Set
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+MANAGER_ROLES = frozenset({"SUPER_ADMIN", "OWNER", "ADMIN", "MANAGER"})
+# Refreshed by any client frame; bounds how long a socket on a crashed
+# worker keeps its user "online".
+PRESENCE_TTL = 3600
+
+
+def user_group(user_id) -> str:
+    return f"user_{user_id}_notifications"
+
+
+def tenant_group(restaurant_id) -> str:
+    # Name predates this module: restaurant settings broadcasts already
+    # target it.
+    return f"restaurant_settings_{restaurant_id}"
+
+
+def managers_group(restaurant_id) -> str:
+    return f"restaurant_{restaurant_id}_managers"
+
+
+def location_group(location_id) -> str:
+    return f"location_{location_id}"
+
+
+def connection_groups(user) -> List[str]:
+    """Groups a socket of ``user`` joins; pure function of the principal."""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return []
+    groups = [user_group(user.pk)]
+    rid = getattr(user, "restaurant_id", None)
+    if rid:
+        groups.append(tenant_group(rid))
+        if (getattr(user, "role", "") or "").upper() in MANAGER_ROLES:
+            groups.append(managers_group(rid))
+        if getattr(user, "primary_location_id", None):
+            groups.append(location_group(user.primary_location_id))
+    return groups
+
+
+def principal_for_token(raw_token) -> Optional[object]:
+    """Active user for a JWT access token, or ``None`` (invalid / denied)."""
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+    from accounts.authentication import MizanJWTAuthentication
+
+    auth = MizanJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def token_from_scope(scope) -> Optional[str]:
+    query = parse_qs((scope.get("query_string") or b"").decode())
+    return query.get("token", [None])[0]
+
+
+class JWTQueryAuthMiddleware(BaseMiddleware):
+    """Set ``scope['user']`` and ``scope['ws_groups']`` from ``?token=``."""
+
+    async def __call__(self, scope, receive, send):
+        token = token_from_scope(scope)
+        if token:
+            user = await database_sync_to_async(principal_for_token)(token)
+            scope = dict(scope, user=user or AnonymousUser(), ws_groups=connection_groups(user))
+        return await super().__call__(scope, receive, send)
+
+
+# ---------------------------------------------------------------------------
+# Presence
+# ---------------------------------------------------------------------------
+
+
+def _presence_key(restaurant_id, user_id) -> str:
+    return f"ws:presence:{restaurant_id}:{user_id}"
+
+
+def presence_connect(user) -> bool:
+    """Count one more open socket; True when the user just came online."""
+    key = _presence_key(user.restaurant_id, user.pk)
+    try:
+        cache.add(key, 0, PRESENCE_TTL)
+        count = cache.incr(key)
+        cache.touch(key, PRESENCE_TTL)
+    except Exception as exc:
+        logger.warning("presence connect failed key=%s: %s", key, exc)
+        return False
+    return count == 1
+
+
+def presence_disconnect(user) -> bool:
+    """Count one socket closed; True when it was the user's last."""
+    key = _presence_key(user.restaurant_id, user.pk)
+    try:
+        count = cache.decr(key)
+    except ValueError:
+        return False  # expired already
+    except Exception as exc:
+        logger.warning("presence disconnect failed key=%s: %s", key, exc)
+        return False
+    if count <= 0:
+        try:
+            cache.delete(key)
+        except Exception:
+            pass
+        return True
+    return False
+
+
+def presence_touch(user) -> None:
+    try:
+        cache.touch(_presence_key(user.restaurant_id, user.pk), PRESENCE_TTL)
+    except Exception as exc:
+        logger.warning("presence touch failed user=%s: %s", user.pk, exc)
+
+
+def online_user_ids(restaurant_id, user_ids: Iterable) -> Set[str]:
+    """Subset of ``user_ids`` with at least one open socket (one cache round trip)."""
+    keys = {_presence_key(restaurant_id, uid): str(uid) for uid in user_ids}
+    if not keys:
+        return set()
+    try:
+        found = cache.get_many(list(keys))
+    except Exception as exc:
+        logger.warning("presence lookup failed restaurant=%s: %s", restaurant_id, exc)
+        return set()
+    return {keys[k] for k, count in found.items() if count and count > 0}
+
+
+class TenantSocketMixin:
+    """Connect/disconnect bookkeeping shared by the app's WebSocket consumers.
+
+    Expects ``self.user`` to be the authenticated principal.
+    """
+
+    async def join_connection_groups(self, groups: Optional[Iterable[str]] = None) -> None:
+        """Join ``groups`` (default: the principal's notification groups) and
+        count the socket towards presence.
+
+        Consumers that pass their own ``groups`` receive only those groups'
+        events, so they need handlers for nothing else.
+        """
+        if groups is None:
+            groups = self.scope.get("ws_groups") or connection_groups(self.user)
+        self.connection_groups = list(groups)
+        for group in self.connection_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+        if getattr(self.user, "restaurant_id", None) and await sync_to_async(presence_connect)(self.user):
+            await self._broadcast_presence(online=True)
+
+    async def leave_connection_groups(self) -> None:
+        for group in getattr(self, "connection_groups", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        user = getattr(self, "user", None)
+        if getattr(self, "connection_groups", None) and getattr(user, "restaurant_id", None):
+            if await sync_to_async(presence_disconnect)(user):
+                await self._broadcast_presence(online=False)
+
+    async def touch_presence(self) -> None:
+        if getattr(self.user, "restaurant_id", None):
+            await sync_to_async(presence_touch)(self.user)
+
+    async def _broadcast_presence(self, *, online: bool) -> None:
+        await self.channel_layer.group_send(
+            managers_group(self.user.restaurant_id),
+            {"type": "presence_update", "user_id": str(self.user.pk), "online": online},
+        )
+
+    async def send_json_event(self, payload) -> None:
+        await self.send(text_data=json.dumps(payload, default=str))
+
+    async def presence_update(self, event) -> None:
+        await self.send_json_event(
+            {"type": "presence_update", "user_id": event.get("user_id"), "online": event.get("online")}
+        )
+
+    async def settings_update(self, event) -> None:
+        await self.send_json_event({"type": "settings_update", "payload": event.get("payload")})
@@ -99,6 +99,14 @@ def compliance_document_upload_path(instance, filename):
     )
 
 
+def report_export_upload_path(instance, filename):
+    """Generated report export (CSV / XLSX / PDF); keeps the readable name."""
+    restaurant_id = getattr(instance, "restaurant_id", None)
+    export_id = getattr(instance, "pk", None) or uuid.uuid4()
+    name = os.path.basename(filename or "") or f"export{_extension(filename) or '.bin'}"
+    return f"{_org_prefix(restaurant_id, 'report-exports')}/{export_id}/{name}"
+
+
 def tenant_document_upload_path(instance, filename):
     """Miya tenant knowledge documents (widget + WhatsApp)."""
     return organization_upload_path(instance, filename, category="tenant-documents")
@@ -0,0 +1,29 @@
+"""Tenant-local calendar helpers.
+
+A tenant's business day is its ``Restaurant.timezone`` day, not the server's.
+Reporting, timeclock, inventory and POS code all bucket by it, so the helpers
+live here rather than in any one of those apps.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from django.utils import timezone
+
+
+def restaurant_tz(restaurant):
+    """The tenant's zone; the settings default when unset or invalid."""
+    try:
+        return ZoneInfo(restaurant.timezone or "")
+    except Exception:
+        return timezone.get_default_timezone()
+
+
+def local_day(restaurant, moment: datetime) -> date:
+    """Business day of an aware timestamp in the restaurant's timezone."""
+    return timezone.localtime(moment, restaurant_tz(restaurant)).date()
+
+
+def tenant_today(restaurant) -> date:
+    return local_day(restaurant, timezone.now())
@@ -0,0 +1,136 @@
+"""Query-budget harness for hot endpoints.
+
+Each hot endpoint declares a budget; :meth:`QueryBudgetMixin.assertQueryBudget`
+seeds fixture tenants of increasing size (``TENANT_SIZES`` staff), calls the
+endpoint for each and fails when a run exceeds the budget or when the query
+count grows with the tenant — the O(n) regression that only shows up in
+production. Failure messages list the repeated query shapes
+(:mod:`core.query_profile`).
+"""
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Sequence
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from core.query_profile import QueryProfile, profile_queries
+
+TENANT_SIZES = (10, 100, 1000)
+RESTAURANT_LAT, RESTAURANT_LON = 33.5731, -7.5898
+
+
+@dataclass
+class SeededTenant:
+    restaurant: object
+    manager: object
+    staff_ids: List[str] = field(default_factory=list)
+
+
+def seed_tenant(n_staff: int, *, day=None) -> SeededTenant:
+    """A restaurant with ``n_staff`` waiters, each with a shift ``day`` (today
+    by default), a clock-in for every other one and a dashboard task per
+    five staff. Bulk inserts, so 1000-staff tenants stay cheap."""
+    from accounts.models import CustomUser, Restaurant
+    from dashboard.models import Task
+    from scheduling.models import AssignedShift, WeeklySchedule
+    from timeclock.models import ClockEvent
+
+    day = day or timezone.localdate()
+    tag = uuid.uuid4().hex[:8]
+    restaurant = Restaurant.objects.create(
+        name=f"Budget {n_staff}",
+        email=f"budget-{tag}@test.local",
+        latitude=RESTAURANT_LAT,
+        longitude=RESTAURANT_LON,
+    )
+    manager = CustomUser.objects.create_user(
+        email=f"manager-{tag}@test.local",
+        password="pass12345",
+        role="MANAGER",
+        restaurant=restaurant,
+        first_name="Budget",
+        last_name="Manager",
+    )
+    password = make_password(None)
+    staff = CustomUser.objects.bulk_create(
+        [
+            CustomUser(
+                email=f"staff{i}-{tag}@test.local",
+                password=password,
+                role="WAITER",
+                restaurant=restaurant,
+                first_name="Staff",
+                last_name=str(i),
+                phone=f"+2126{n_staff:04d}{i:05d}",
+            )
+            for i in range(n_staff)
+        ],
+        batch_size=500,
+    )
+    week_start = day - timedelta(days=day.weekday())
+    schedule = WeeklySchedule.objects.create(
+        restaurant=restaurant, week_start=week_start, week_end=week_start + timedelta(days=6)
+    )
+    start = timezone.make_aware(datetime.combine(day, time(9, 0)))
+    AssignedShift.objects.bulk_create(
+        [
+            AssignedShift(
+                schedule=schedule,
+                staff=user,
+                shift_date=day,
+                start_time=start,
+                end_time=start + timedelta(hours=8),
+                role="WAITER",
+                status="SCHEDULED",
+            )
+            for user in staff
+        ],
+        batch_size=500,
+    )
+    ClockEvent.objects.bulk_create(
+        [ClockEvent(staff=user, event_type="in") for user in staff[::2]],
+        batch_size=500,
+    )
+    Task.objects.bulk_create(
+        [
+            Task(restaurant=restaurant, assigned_to=user, created_by=manager, title=f"Task {i}", priority="HIGH")
+            for i, user in enumerate(staff[::5])
+        ],
+        batch_size=500,
+    )
+    return SeededTenant(restaurant=restaurant, manager=manager, staff_ids=[str(u.id) for u in staff])
+
+
+def _describe(profiles: Dict[int, QueryProfile]) -> str:
+    lines = [f"{n} staff: {p.count} queries" for n, p in profiles.items()]
+    largest = profiles[max(profiles)]
+    for fp, times in largest.duplicates()[:5]:
+        lines.append(f"  x{times}: {fp[:200]}")
+    return "\n".join(lines)
+
+
+class QueryBudgetMixin:
+    """Mix into a ``TestCase``; see :meth:`assertQueryBudget`."""
+
+    TENANT_SIZES: Sequence[int] = TENANT_SIZES
+
+    def assertQueryBudget(self, call: Callable[[SeededTenant], object], budget: int, sizes: Sequence[int] = ()):
+        """``call(tenant)`` must stay within ``budget`` queries for every
+        tenant size and use the same number of queries for all of them."""
+        profiles: Dict[int, QueryProfile] = {}
+        for n in sizes or self.TENANT_SIZES:
+            tenant = seed_tenant(n)
+            with profile_queries() as profile:
+                response = call(tenant)
+            status = getattr(response, "status_code", 200)
+            self.assertLess(status, 400, f"{n} staff: HTTP {status} {getattr(response, 'data', '')}")
+            profiles[n] = profile
+        report = _describe(profiles)
+        self.assertLessEqual(max(p.count for p in profiles.values()), budget, f"over budget ({budget})\n{report}")
+        counts = {p.count for p in profiles.values()}
+        self.assertEqual(len(counts), 1, f"query count grows with tenant size\n{report}")
+        return profiles
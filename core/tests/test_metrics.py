@@ -0,0 +1,92 @@
+"""Prometheus metrics: label helpers, instrumented call sites and /metrics."""
+
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import SimpleTestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APIRequestFactory
+
+from core.metrics import (
+    cache_namespace,
+    graph_endpoint,
+    graph_request,
+    metrics_view,
+    timed_per_tenant,
+)
+from core.read_through_cache import safe_cache_get
+from miya.services.intelligence.turn_trace import TurnTraceTimer, new_turn_trace
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class LabelTests(SimpleTestCase):
+    def test_cache_namespace_stops_at_ids(self):
+        self.assertEqual(cache_namespace("agent:sched:staff_list:4f1c2e9a-77:all"), "agent:sched:staff_list")
+        self.assertEqual(cache_namespace("gcal_mirror_lock:4f1c2e9a:primary"), "gcal_mirror_lock")
+        self.assertEqual(cache_namespace("42"), "other")
+
+    def test_graph_endpoint(self):
+        self.assertEqual(graph_endpoint("https://graph.facebook.com/v22.0/1234/messages"), "messages")
+        self.assertEqual(graph_endpoint("https://graph.facebook.com/v22.0/98765"), "object")
+        self.assertEqual(graph_endpoint("https://lookaside.fbsbx.com/whatsapp_business/attachments/?mid=1"), "media_download")
+
+
+class InstrumentationTests(SimpleTestCase):
+    def test_graph_errors_are_counted_by_graph_code(self):
+        resp = MagicMock(status_code=400)
+        resp.json.return_value = {"error": {"code": 131047, "message": "Re-engagement message"}}
+        before = _sample("mizan_graph_api_errors_total", endpoint="messages", code="131047")
+        with patch("core.metrics.requests.request", return_value=resp):
+            out = graph_request("POST", "https://graph.facebook.com/v22.0/1/messages", json={})
+        self.assertIs(out, resp)
+        self.assertEqual(_sample("mizan_graph_api_errors_total", endpoint="messages", code="131047"), before + 1)
+
+    def test_graph_transport_errors_propagate(self):
+        before = _sample("mizan_graph_api_errors_total", endpoint="messages", code="transport")
+        with patch("core.metrics.requests.request", side_effect=requests.ConnectionError("down")):
+            with self.assertRaises(requests.RequestException):
+                graph_request("POST", "https://graph.facebook.com/v22.0/1/messages")
+        self.assertEqual(_sample("mizan_graph_api_errors_total", endpoint="messages", code="transport"), before + 1)
+
+    def test_cache_hits_and_misses(self):
+        hit = dict(namespace="metrics:test", result="hit")
+        miss = dict(namespace="metrics:test", result="miss")
+        before_hit, before_miss = _sample("mizan_cache_lookups_total", **hit), _sample("mizan_cache_lookups_total", **miss)
+        with patch("core.read_through_cache.cache") as cache:
+            cache.get.side_effect = [None, {"x": 1}]
+            safe_cache_get("metrics:test:1")
+            safe_cache_get("metrics:test:1")
+        self.assertEqual(_sample("mizan_cache_lookups_total", **hit), before_hit + 1)
+        self.assertEqual(_sample("mizan_cache_lookups_total", **miss), before_miss + 1)
+
+    def test_sweep_observes_each_tenant_even_on_break(self):
+        before = _sample("mizan_sweep_tenant_duration_seconds_count", sweep="metrics_test")
+        for n in timed_per_tenant("metrics_test", [1, 2, 3]):
+            if n == 2:
+                break
+        self.assertEqual(_sample("mizan_sweep_tenant_duration_seconds_count", sweep="metrics_test"), before + 2)
+
+    def test_turn_trace_stages(self):
+        trace = new_turn_trace(channel="metrics-test")
+        timer = TurnTraceTimer(trace)
+        timer.mark("understand")
+        timer.mark("context")
+        timer.finish(outcome="success", stage="execute")
+        self.assertEqual(set(trace.stage_ms), {"understand", "context", "execute"})
+        self.assertEqual(_sample("mizan_miya_turns_total", outcome="success", channel="metrics-test"), 1)
+        self.assertEqual(
+            _sample("mizan_miya_stage_duration_seconds_count", stage="context", channel="metrics-test"), 1
+        )
+
+
+class MetricsViewTests(SimpleTestCase):
+    @override_settings(METRICS_TOKEN="s3cret", DEBUG=False)
+    def test_token_required(self):
+        factory = APIRequestFactory()
+        self.assertEqual(metrics_view(factory.get("/metrics")).status_code, 401)
+        resp = metrics_view(factory.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"mizan_http_request_duration_seconds", resp.content)
@@ -0,0 +1,117 @@
+"""Query budgets for hot endpoints (see ``core/tests/query_budget.py``).
+
+Budgets are the current query counts plus a little headroom; the
+tenant-size check is what catches N+1s. Lower a budget when an endpoint
+gets cheaper.
+"""
+
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.query_profile import fingerprint, profile_queries
+from core.tests.query_budget import RESTAURANT_LAT, RESTAURANT_LON, QueryBudgetMixin
+
+AGENT_KEY = "budget-agent-key"
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_in_lists_collapse(self):
+        a = fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  AND n = 4")
+        b = fingerprint("SELECT * FROM t\nWHERE id IN (%s) AND name = 'it''s' AND n = 12")
+        self.assertEqual(a, b)
+        self.assertEqual(a, "SELECT * FROM t WHERE id IN (...) AND name = ? AND n = ?")
+
+
+class QueryProfileTests(TestCase):
+    def test_counts_repeated_shapes(self):
+        from accounts.models import Restaurant
+
+        with profile_queries() as profile:
+            for i in range(3):
+                list(Restaurant.objects.filter(name=f"r{i}"))
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        self.assertEqual(profile.count, 4)
+        self.assertEqual(len(profile.duplicates()), 1)
+        self.assertEqual(profile.duplicate_count, 2)
+        self.assertTrue(profile.header_value().startswith("count=4; db_ms="))
+
+    @override_settings(QUERY_PROFILE_HEADER=True, QUERY_PROFILE_SAMPLE_RATE=1.0)
+    def test_middleware_header_and_sampled_log(self):
+        with self.assertLogs("core.middleware", level="INFO") as logs:
+            response = self.client.get("/api/dashboard/summary/", secure=True)
+        self.assertRegex(response["X-Query-Profile"], r"^count=\d+; db_ms=[\d.]+; duplicates=\d+$")
+        self.assertTrue(any("QUERY_PROFILE GET api/dashboard/summary/" in line for line in logs.output))
+
+
+@override_settings(MIYA_MASTRA_API_KEY=AGENT_KEY, LUA_WEBHOOK_API_KEY=AGENT_KEY)
+class HotEndpointQueryBudgetTests(QueryBudgetMixin, TestCase):
+    factory = APIRequestFactory()
+
+    def _get(self, view, path, tenant, **extra):
+        request = self.factory.get(path, **extra)
+        force_authenticate(request, user=tenant.manager)
+        return view(request)
+
+    def _agent(self, view, path, tenant, data=None, method="get"):
+        build = getattr(self.factory, method)
+        request = build(
+            path,
+            data or {},
+            format="json" if method == "post" else None,
+            HTTP_AUTHORIZATION=f"Bearer {AGENT_KEY}",
+            HTTP_X_RESTAURANT_ID=str(tenant.restaurant.id),
+        )
+        return view(request)
+
+    def test_dashboard_summary(self):
+        from dashboard.api.summary import DashboardSummaryView
+
+        self.assertQueryBudget(
+            lambda t: self._get(DashboardSummaryView.as_view(), "/api/dashboard/summary/", t), budget=38
+        )
+
+    def test_portfolio_summary(self):
+        from dashboard.api.portfolio import PortfolioSummaryView
+
+        self.assertQueryBudget(
+            lambda t: self._get(PortfolioSummaryView.as_view(), "/api/dashboard/portfolio/", t), budget=12
+        )
+
+    def test_operations_live(self):
+        from dashboard.api.operations_live import OperationsLiveView
+
+        self.assertQueryBudget(
+            lambda t: self._get(OperationsLiveView.as_view(), "/api/dashboard/operations-live/", t), budget=15
+        )
+
+    def test_agent_operations_live(self):
+        from dashboard.api.operations_live import agent_list_operations_live
+
+        self.assertQueryBudget(
+            lambda t: self._agent(agent_list_operations_live, "/api/dashboard/agent/operations-live/", t),
+            budget=17,
+        )
+
+    def test_agent_staff_list(self):
+        from scheduling.views_agent import agent_list_staff
+
+        self.assertQueryBudget(
+            lambda t: self._agent(agent_list_staff, "/api/scheduling/agent/staff/", t), budget=4
+        )
+
+    @patch("timeclock.views.notification_service")
+    def test_agent_clock_in_by_phone(self, _notifications):
+        from accounts.models import CustomUser
+        from timeclock.views import agent_clock_in_by_phone
+
+        def clock_in(tenant):
+            phone = CustomUser.objects.get(id=tenant.staff_ids[1]).phone
+            return self._agent(
+                agent_clock_in_by_phone, "/api/timeclock/agent/clock-in-by-phone/", tenant, {"phone": phone, "latitude": RESTAURANT_LAT, "longitude": RESTAURANT_LON}, "post"
+            )
+
+        self.assertQueryBudget(clock_in, budget=18)
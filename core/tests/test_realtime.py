@@ -0,0 +1,137 @@
+"""WebSocket connection layer: cached principals, connect-time groups,
+presence and batched chat persistence."""
+
+import uuid
+from unittest import mock
+
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import path
+from rest_framework_simplejwt.tokens import AccessToken
+
+import chat.routing
+import notifications.routing
+from accounts.authentication import principal_cache_key
+from accounts.models import CustomUser, Restaurant
+from chat.models import Message
+from chat.persistence import ChatMessageBuffer, message_buffer
+from core.realtime import JWTQueryAuthMiddleware, location_group, managers_group, online_user_ids, user_group
+
+IN_MEMORY_LAYER = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+application = JWTQueryAuthMiddleware(
+    URLRouter(
+        notifications.routing.websocket_urlpatterns
+        + [path("ws/chat/", URLRouter(chat.routing.websocket_urlpatterns))]
+    )
+)
+
+
+def _socket(user, route="/ws/notifications/"):
+    return WebsocketCommunicator(application, f"{route}?token={AccessToken.for_user(user)}")
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class ConnectionLayerTests(SimpleTestCase):
+    """No database: every principal is served from the shared cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.restaurant_id = uuid.uuid4()
+        self.location_id = uuid.uuid4()
+
+    def _principal(self, role, **extra):
+        user = CustomUser(id=uuid.uuid4(), restaurant_id=self.restaurant_id, role=role, is_active=True, **extra)
+        cache.set(principal_cache_key(user.pk), (user, None), 60)
+        return user
+
+    async def test_groups_and_presence_are_set_up_at_connect(self):
+        manager = self._principal("MANAGER")
+        waiter = self._principal("WAITER", primary_location_id=self.location_id)
+
+        boss = _socket(manager)
+        self.assertTrue((await boss.connect())[0])
+        self.assertEqual((await boss.receive_json_from())["user_id"], str(manager.pk))
+        staff = _socket(waiter)
+        self.assertTrue((await staff.connect())[0])
+        self.assertEqual(await boss.receive_json_from(), {"type": "presence_update", "user_id": str(waiter.pk), "online": True})
+
+        layer = get_channel_layer()
+        await layer.group_send(managers_group(self.restaurant_id), {"type": "tasks_invalidate", "reason": "x"})
+        self.assertEqual((await boss.receive_json_from())["type"], "tasks_invalidate")
+        await layer.group_send(location_group(self.location_id), {"type": "send_notification", "notification": {"id": 1}})
+        self.assertEqual((await staff.receive_json_from())["notification"], {"id": 1})
+        self.assertTrue(await staff.receive_nothing())
+
+        await staff.disconnect()
+        self.assertFalse((await boss.receive_json_from())["online"])
+        self.assertEqual(online_user_ids(self.restaurant_id, [manager.pk, waiter.pk]), {str(manager.pk)})
+        await boss.disconnect()
+
+    async def test_chat_socket_survives_notification_broadcasts(self):
+        manager = self._principal("MANAGER")
+        chat = _socket(manager, "/ws/chat/")
+        self.assertTrue((await chat.connect())[0])
+
+        layer = get_channel_layer()
+        await layer.group_send(user_group(manager.pk), {"type": "send_notification", "notification": {"id": 1}})
+        await layer.group_send(managers_group(self.restaurant_id), {"type": "tasks_invalidate", "reason": "x"})
+        self.assertTrue(await chat.receive_nothing())
+
+        await layer.group_send(f"chat_{self.restaurant_id}", {"type": "chat_message", "message": {"content": "hi"}})
+        self.assertEqual((await chat.receive_json_from())["message"], {"content": "hi"})
+        self.assertEqual(online_user_ids(self.restaurant_id, [manager.pk]), {str(manager.pk)})
+        await chat.disconnect()
+        self.assertEqual(online_user_ids(self.restaurant_id, [manager.pk]), set())
+
+    async def test_missing_invalid_or_denied_tokens_are_refused(self):
+        self.assertEqual(await WebsocketCommunicator(application, "/ws/notifications/").connect(), (False, 4001))
+        bad = WebsocketCommunicator(application, "/ws/notifications/?token=not-a-jwt")
+        self.assertEqual(await bad.connect(), (False, 4002))
+
+        suspended = self._principal("WAITER")
+        cache.set(principal_cache_key(suspended.pk), (suspended, "This business account has been suspended."), 60)
+        self.assertEqual(await _socket(suspended).connect(), (False, 4002))
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_LAYER)
+class ChatBatchingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Socket Grill", email="socket@grill.test")
+        self.user = CustomUser.objects.create_user(
+            email="chatty@grill.test", password="pass12345", restaurant=self.restaurant, role="WAITER",
+        )
+
+    async def test_messages_broadcast_immediately_and_persist_in_one_batch(self):
+        socket = _socket(self.user, "/ws/chat/")
+        self.assertTrue((await socket.connect())[0])
+        with mock.patch.object(message_buffer, "delay", 60):
+            for n in range(3):
+                await socket.send_json_to({"message": f"hello {n}", "recipient_id": str(uuid.uuid4()) if n == 2 else None})
+                event = await socket.receive_json_from()
+                self.assertEqual(event["message"]["content"], f"hello {n}")
+            self.assertEqual(await Message.objects.acount(), 0)
+            await socket.disconnect()
+
+        self.assertEqual(await Message.objects.filter(sender=self.user).acount(), 3)
+        self.assertFalse(await Message.objects.filter(recipient__isnull=False).aexists())
+
+    async def test_failed_batch_falls_back_to_row_inserts(self):
+        buffer = ChatMessageBuffer(delay=60)
+        for content in ("one", "boom", "three"):
+            await buffer.add(Message(sender_id=self.user.pk, room_name="chat", content=content))
+        real_bulk_create = Message.objects.bulk_create
+
+        def bulk_create(objs, **kwargs):
+            if any(m.content == "boom" for m in objs):
+                raise RuntimeError("bad row")
+            return real_bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Message.objects, "bulk_create", side_effect=bulk_create):
+            self.assertEqual(await buffer.flush(), 2)
+        contents = [m.content async for m in Message.objects.order_by("content")]
+        self.assertEqual(contents, ["one", "three"])
@@ -97,7 +97,7 @@ class TenantContextMiddlewareTests(SimpleTestCase):
         self.assertIsNone(self._process(req))
         self.assertFalse(hasattr(req, "tenant_id"))
 
-    @patch("core.middleware.JWTAuthentication")
+    @patch("core.middleware.MizanJWTAuthentication")
     def test_jwt_user_gets_tenant_injected(self, mock_jwt_cls):
         user = MagicMock()
         user.is_authenticated = True
@@ -123,7 +123,7 @@ class TenantContextMiddlewareTests(SimpleTestCase):
         self.assertEqual(req.tenant_id, "abc-123")
         self.assertEqual(req.tenant_name, "Casablanca")
 
-    @patch("core.middleware.JWTAuthentication")
+    @patch("core.middleware.MizanJWTAuthentication")
     def test_jwt_user_without_restaurant_gets_403(self, mock_jwt_cls):
         user = MagicMock()
         user.is_authenticated = True
@@ -58,7 +58,6 @@ logger = logging.getLogger(__name__)
 _GOOGLE_EVENTS_INSERT = (
     "https://www.googleapis.com/calendar/v3/calendars/primary/events"
 )
-_GOOGLE_EVENTS_LIST = _GOOGLE_EVENTS_INSERT
 _GOOGLE_EVENTS_PATCH = _GOOGLE_EVENTS_INSERT + "/{event_id}"
 _GOOGLE_EVENTS_DELETE = _GOOGLE_EVENTS_PATCH
 _AGENT_SEARCH_PAST_HOURS = 24 * 7
@@ -400,6 +399,8 @@ def _delete_single_calendar_event(
         msg += f" ({when_display})"
     msg += " from your calendar."
 
+    _mirror_write(restaurant, {"id": event_id, "status": "cancelled"})
+
     try:
         from scheduling.calendar_reminder_sync import cancel_calendar_event_reminder
 
@@ -419,6 +420,16 @@ def _delete_single_calendar_event(
     }
 
 
+def _mirror_write(restaurant, event: dict[str, Any]) -> None:
+    """Reflect a calendar write in the local mirror right away."""
+    try:
+        from dashboard.calendar_mirror import apply_events
+
+        apply_events(restaurant, [event])
+    except Exception:
+        logger.exception("calendar mirror write failed restaurant=%s", restaurant.id)
+
+
 def _calendar_search_tokens(raw_q: str) -> list[str]:
     import re
 
@@ -454,55 +465,26 @@ def _event_matches_query(row: dict[str, Any], *, q_lower: str, tokens: list[str]
 
 
 def _fetch_calendar_events_for_agent(
-    access_token: str,
+    restaurant,
     acting_user,
     *,
     past_hours: int = _AGENT_SEARCH_PAST_HOURS,
     future_hours: int = _AGENT_SEARCH_FUTURE_HOURS,
     max_results: int = 100,
 ) -> list[dict[str, Any]] | None:
-    """Fetch calendar rows for agent search (wider horizon than dashboard widget)."""
-    from dashboard.api.meetings_reminders import _serialize_event
+    """Calendar rows for agent search (wider horizon than dashboard widget),
+    served from the tenant's calendar mirror. ``None`` on Google auth failure."""
+    from dashboard.calendar_mirror import mirrored_events
 
     now = dj_timezone.now()
-    time_min = (now - timedelta(hours=past_hours)).isoformat()
-    time_max = (now + timedelta(hours=future_hours)).isoformat()
-    try:
-        res = requests.get(
-            _GOOGLE_EVENTS_LIST,
-            headers={"Authorization": f"Bearer {access_token}"},
-            params={
-                "timeMin": time_min,
-                "timeMax": time_max,
-                "singleEvents": "true",
-                "orderBy": "startTime",
-                "maxResults": str(max_results),
-            },
-            timeout=10,
-        )
-    except requests.RequestException as exc:
-        logger.warning("Google Calendar events.list (agent) failed: %s", exc)
-        return []
-
-    if res.status_code == 401:
-        return None
-    if res.status_code != 200:
-        logger.warning(
-            "Google Calendar events.list (agent) non-200: %s %s",
-            res.status_code,
-            res.text[:200],
-        )
-        return []
-
-    user_email = (getattr(acting_user, "email", None) or "").strip() or None
-    out: list[dict[str, Any]] = []
-    for ev in (res.json() or {}).get("items") or []:
-        row = _serialize_event(ev, user_email, now)
-        if row is None:
-            continue
-        row["description"] = (ev.get("description") or "")[:300]
-        out.append(row)
-    return out
+    return mirrored_events(
+        restaurant,
+        acting_user,
+        start=now - timedelta(hours=past_hours),
+        end=now + timedelta(hours=future_hours),
+        limit=max_results,
+        now=now,
+    )
 
 
 def _search_calendar_events(
@@ -523,7 +505,7 @@ def _search_calendar_events(
             ),
         }
 
-    rows = _fetch_calendar_events_for_agent(access_token, acting_user)
+    rows = _fetch_calendar_events_for_agent(restaurant, acting_user)
     if rows is None:
         return [], {
             "error": "google_auth_failed",
@@ -674,6 +656,7 @@ def _update_single_calendar_event(
         }
 
     event = r.json() or {}
+    _mirror_write(restaurant, event)
     summary = event.get("summary") or patch.get("summary") or "meeting"
     when_display = ""
     start_raw = (event.get("start") or {}).get("dateTime") or (event.get("start") or {}).get("date") or ""
@@ -916,6 +899,7 @@ def _create_single_calendar_event(restaurant, data: dict, *, acting_user=None) -
         }
 
     event = r.json() or {}
+    _mirror_write(restaurant, event)
     event_id = event.get("id")
     html_link = event.get("htmlLink")
 
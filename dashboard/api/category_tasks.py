@@ -290,7 +290,9 @@ def _assignee_payload(user) -> dict | None:
     }
 
 
-def _serialize_dashboard_task(task, *, now=None) -> dict[str, Any]:
+def _serialize_dashboard_task(task, *, now=None, absent_ids=None) -> dict[str, Any]:
+    """``absent_ids`` (from ``_absent_user_ids``) lets list views flag absent
+    assignees without a time-off query per row."""
     data = DashboardTaskCompactSerializer(task).data
     data["kind"] = "dashboard"
     # Granular pill_status + relative age_label so the row can show a
@@ -325,13 +327,16 @@ def _serialize_dashboard_task(task, *, now=None) -> dict[str, Any]:
     else:
         data["proof_submitter_name"] = data.get("proof_submitted_by_name")
     assignee_absent = False
-    try:
-        from dashboard.views_ops_memory import _is_user_absent
+    if absent_ids is not None:
+        assignee_absent = getattr(task, "assigned_to_id", None) in absent_ids
+    else:
+        try:
+            from dashboard.views_ops_memory import _is_user_absent
 
-        if getattr(task, "assigned_to_id", None):
-            assignee_absent = _is_user_absent(task.assigned_to, task.restaurant)
-    except Exception:
-        pass
+            if getattr(task, "assigned_to_id", None):
+                assignee_absent = _is_user_absent(task.assigned_to, task.restaurant)
+        except Exception:
+            pass
     data["assignee_absent"] = assignee_absent
     return data
 
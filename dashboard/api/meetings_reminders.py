@@ -2,7 +2,8 @@
 Meetings & Reminders widget endpoint.
 
 Pulls upcoming events from the tenant owner's Google Calendar (connected
-during onboarding, see `accounts.views_onboarding.OnboardingGoogleCalendarView`)
+during onboarding, see `accounts.views_onboarding.OnboardingGoogleCalendarView`),
+read from the local mirror kept in sync by ``dashboard.calendar_mirror``,
 and returns a lightweight shape the dashboard widget can render without a
 second round-trip.
 
@@ -51,7 +52,7 @@ _HORIZON_HOURS = 36
 # Also include things ended in the last 24 h so the widget shows "Done"
 # rows alongside upcoming ones, mirroring the Tasks & Demands card.
 _PAST_LOOKBACK_HOURS = 24
-# Google cap 2500/day per calendar is far above what this widget polls.
+# Rows read from the calendar mirror per request; the widget shows 4–6.
 _GOOGLE_EVENTS_MAX_RESULTS = 25
 
 
@@ -489,7 +490,7 @@ class MeetingsRemindersView(APIView):
                 max_age=30, private=True, stale_while_revalidate=60,
             )
 
-        items = self._fetch_events(access_token, request.user, now) or []
+        items = self._fetch_events(restaurant, request.user, now)
         if items is None:
             # Token likely invalid — force a refresh next call by
             # clearing the expiry. Return the not-connected shape so
@@ -537,53 +538,27 @@ class MeetingsRemindersView(APIView):
 
     def _fetch_events(
         self,
-        access_token: str,
+        restaurant,
         user,
         now: datetime,
     ) -> list[dict[str, Any]] | None:
-        """Call Google Calendar v3 events.list on the primary calendar.
+        """Widget rows from the tenant's calendar mirror (``dashboard.calendar_mirror``).
 
-        Returns a list of serialized rows on success, ``[]`` if the
-        call succeeded with no events, or ``None`` on auth failure so
-        the caller can blank out the token and prompt reconnect.
+        Returns a list of serialized rows, ``[]`` when there are no events,
+        or ``None`` on auth failure so the caller can prompt reconnect.
         """
-        import requests
-
-        time_min = (now - timedelta(hours=_PAST_LOOKBACK_HOURS)).isoformat()
-        time_max = (now + timedelta(hours=_HORIZON_HOURS)).isoformat()
-
-        try:
-            res = requests.get(
-                "https://www.googleapis.com/calendar/v3/calendars/primary/events",
-                headers={"Authorization": f"Bearer {access_token}"},
-                params={
-                    "timeMin": time_min,
-                    "timeMax": time_max,
-                    "singleEvents": "true",
-                    "orderBy": "startTime",
-                    "maxResults": str(_GOOGLE_EVENTS_MAX_RESULTS),
-                },
-                timeout=8,
-            )
-        except requests.RequestException as exc:
-            logger.warning("Google Calendar events.list failed: %s", exc)
-            return []
-
-        if res.status_code == 401:
+        from dashboard.calendar_mirror import mirrored_events
+
+        rows = mirrored_events(
+            restaurant,
+            user,
+            start=now - timedelta(hours=_PAST_LOOKBACK_HOURS),
+            end=now + timedelta(hours=_HORIZON_HOURS),
+            limit=_GOOGLE_EVENTS_MAX_RESULTS,
+            now=now,
+        )
+        if rows is None:
             return None
-        if res.status_code != 200:
-            logger.warning(
-                "Google Calendar events.list non-200: %s %s",
-                res.status_code, res.text[:200],
-            )
-            return []
-
-        raw_events = (res.json() or {}).get("items") or []
-        user_email = (getattr(user, "email", None) or "").strip() or None
-
-        out: list[dict[str, Any]] = []
-        for ev in raw_events:
-            row = _serialize_event(ev, user_email, now)
-            if row is not None:
-                out.append(row)
-        return out
+        for row in rows:
+            row.pop("description", None)
+        return rows
@@ -499,28 +499,49 @@ def build_operations_live_payload(
             "created_by__profile",
             "custom_widget",
             "custom_widget__user",
+            "proof_submitted_by",
         )
+        .prefetch_related("assignees")
         .annotate(priority_rank=_PRIORITY_RANK)
     )
 
-    for task in db_base.filter(status__in=["PENDING", "ACCEPTED"]).filter(
-        Q(due_date__isnull=True) | Q(due_date__lte=future_cutoff)
-    ).order_by("priority_rank", "due_date", "-created_at")[: limit * 4]:
-        data = _serialize_dashboard_task(task, now=now)
+    open_tasks = list(
+        db_base.filter(status__in=["PENDING", "ACCEPTED"])
+        .filter(Q(due_date__isnull=True) | Q(due_date__lte=future_cutoff))
+        .order_by("priority_rank", "due_date", "-created_at")[: limit * 4]
+    )
+    active_tasks = list(
+        db_base.filter(status__in=["IN_PROGRESS", "UNABLE_TO_COMPLETE"]).order_by(
+            "priority_rank", "-updated_at"
+        )[: limit * 4]
+    )
+    done_tasks = list(
+        db_base.filter(status="COMPLETED", updated_at__date__gte=completed_floor).order_by(
+            "-updated_at"
+        )[: limit * 4]
+    )
+    # One time-off lookup for every assignee on the page, not one per row.
+    try:
+        from dashboard.views_ops_memory import _absent_user_ids
+
+        absent_ids = _absent_user_ids(
+            t.assigned_to_id for t in open_tasks + active_tasks + done_tasks
+        )
+    except Exception:
+        absent_ids = set()
+
+    for task in open_tasks:
+        data = _serialize_dashboard_task(task, now=now, absent_ids=absent_ids)
         pending.append(_enrich_row(data, lane="pending", current_user=current_user, obj=task))
 
-    for task in db_base.filter(status__in=["IN_PROGRESS", "UNABLE_TO_COMPLETE"]).order_by(
-        "priority_rank", "-updated_at"
-    )[: limit * 4]:
-        data = _serialize_dashboard_task(task, now=now)
+    for task in active_tasks:
+        data = _serialize_dashboard_task(task, now=now, absent_ids=absent_ids)
         in_progress.append(
             _enrich_row(data, lane="in_progress", current_user=current_user, obj=task)
         )
 
-    for task in db_base.filter(
-        status="COMPLETED", updated_at__date__gte=completed_floor
-    ).order_by("-updated_at")[: limit * 4]:
-        data = _serialize_dashboard_task(task, now=now)
+    for task in done_tasks:
+        data = _serialize_dashboard_task(task, now=now, absent_ids=absent_ids)
         completed.append(
             _enrich_row(data, lane="completed", current_user=current_user, obj=task)
         )
@@ -0,0 +1,248 @@
+"""
+Per-tenant mirror of the shared Google Calendar.
+
+The Meetings & Reminders widget, Miya's calendar search / context and the
+meeting approach sweep used to call ``events.list`` live — the sweep once
+per manager, every 10 minutes, for every tenant. They now read
+:class:`~dashboard.models.CalendarEventMirror` by time window, and the
+mirror follows Google's incremental sync protocol:
+
+* The first sync lists events from :data:`FULL_SYNC_LOOKBACK` ago onwards
+  (``singleEvents`` expanded) and stores ``nextSyncToken``.
+* Later syncs send only the ``syncToken`` and apply the changes; cancelled
+  events are deleted. ``410 Gone`` (token expired) falls back to a full
+  sync, after which rows not seen are dropped.
+* The access token is resolved (and refreshed) once per tenant per sync,
+  and a cache lock keeps concurrent readers from syncing the same tenant.
+
+Readers call :func:`ensure_fresh`, which only talks to Google when the
+mirror is older than :data:`MIRROR_MAX_AGE`; the beat task keeps connected
+tenants warm. Calendar writes made through Miya update the mirror directly
+(:func:`apply_events`).
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from dashboard.models import CalendarEventMirror, CalendarSyncState
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+EVENTS_URL = "https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events"
+PAGE_SIZE = 250
+FULL_SYNC_LOOKBACK = timedelta(days=30)
+MIRROR_MAX_AGE = timedelta(minutes=5)
+SYNC_LOCK_SECONDS = 60
+
+# sync_calendar() outcomes
+SYNCED = "synced"
+FRESH = "fresh"
+BUSY = "busy"
+NOT_CONNECTED = "not_connected"
+AUTH_FAILED = "auth_failed"
+ERROR = "error"
+
+
+def _event_times(ev: Dict[str, Any]):
+    from dashboard.api.meetings_reminders import _parse_iso_any
+
+    start = ev.get("start") or {}
+    end = ev.get("end") or {}
+    start_at = _parse_iso_any(start.get("dateTime") or start.get("date"))
+    end_at = _parse_iso_any(end.get("dateTime") or end.get("date")) or start_at
+    all_day = bool(start.get("date") and not start.get("dateTime"))
+    return start_at, end_at, all_day
+
+
+def apply_events(restaurant, items: Iterable[Dict[str, Any]], *, calendar_id: str = PRIMARY, now=None) -> Dict[str, int]:
+    """Upsert/delete Google event resources into the mirror."""
+    from dashboard.api.meetings_reminders import _parse_iso_any
+
+    now = now or timezone.now()
+    rows: Dict[str, CalendarEventMirror] = {}
+    gone: List[str] = []
+    for ev in items:
+        event_id = str(ev.get("id") or "").strip()
+        if not event_id:
+            continue
+        start_at, end_at, all_day = _event_times(ev)
+        if ev.get("status") == "cancelled" or start_at is None:
+            gone.append(event_id)
+            rows.pop(event_id, None)
+            continue
+        rows[event_id] = CalendarEventMirror(
+            restaurant=restaurant,
+            calendar_id=calendar_id,
+            event_id=event_id,
+            summary=(ev.get("summary") or "")[:1024],
+            location=(ev.get("location") or "")[:1024],
+            start_at=start_at,
+            end_at=end_at,
+            all_day=all_day,
+            payload=ev,
+            google_updated_at=_parse_iso_any(ev.get("updated")),
+            synced_at=now,
+        )
+    if rows:
+        CalendarEventMirror.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=["restaurant", "calendar_id", "event_id"],
+            update_fields=["summary", "location", "start_at", "end_at", "all_day", "payload", "google_updated_at", "synced_at"],
+        )
+    deleted = 0
+    if gone:
+        deleted, _ = CalendarEventMirror.objects.filter(
+            restaurant=restaurant, calendar_id=calendar_id, event_id__in=gone
+        ).delete()
+    return {"upserted": len(rows), "deleted": deleted}
+
+
+def forget_calendar(restaurant) -> None:
+    """Drop the mirror (calendar disconnected)."""
+    CalendarEventMirror.objects.filter(restaurant=restaurant).delete()
+    CalendarSyncState.objects.filter(restaurant=restaurant).delete()
+
+
+def sync_calendar(restaurant, *, http=None, calendar_id: str = PRIMARY, now=None) -> Dict[str, Any]:
+    """Bring the mirror up to date (incremental when we hold a sync token).
+
+    ``http`` is anything with a ``requests``-style ``get``; tests pass a fake
+    Google endpoint.
+    """
+    from dashboard.api.meetings_reminders import _get_valid_access_token, _save_gcal_settings
+
+    if http is None:
+        import requests as http
+
+    lock_key = f"gcal_mirror_lock:{restaurant.id}:{calendar_id}"
+    if not cache.add(lock_key, 1, SYNC_LOCK_SECONDS):
+        return {"status": BUSY}
+    try:
+        access_token, gcal = _get_valid_access_token(restaurant)
+        if not access_token:
+            if not gcal.get("connected"):
+                forget_calendar(restaurant)
+            return {"status": NOT_CONNECTED}
+
+        now = now or timezone.now()
+        state, _ = CalendarSyncState.objects.get_or_create(restaurant=restaurant, calendar_id=calendar_id)
+        full = not state.sync_token
+        page_token = None
+        totals = {"upserted": 0, "deleted": 0, "pages": 0}
+        url = EVENTS_URL.format(calendar_id=calendar_id)
+        while True:
+            params: Dict[str, Any] = {"singleEvents": "true", "maxResults": str(PAGE_SIZE)}
+            if full:
+                params["timeMin"] = (now - FULL_SYNC_LOOKBACK).isoformat()
+            else:
+                params["syncToken"] = state.sync_token
+            if page_token:
+                params["pageToken"] = page_token
+            try:
+                res = http.get(url, headers={"Authorization": f"Bearer {access_token}"}, params=params, timeout=10)
+            except Exception as exc:
+                logger.warning("Google Calendar mirror sync failed restaurant=%s: %s", restaurant.id, exc)
+                state.last_error = str(exc)[:255]
+                state.save(update_fields=["last_error"])
+                return {"status": ERROR}
+
+            if res.status_code == 410 and not full:
+                # Sync token expired: start over with a full listing.
+                full, page_token = True, None
+                state.sync_token = ""
+                continue
+            if res.status_code == 401:
+                # Force a token refresh on the next call (same as the widget).
+                cleared = dict(gcal)
+                cleared["token_expires_at"] = "1970-01-01T00:00:00+00:00"
+                _save_gcal_settings(restaurant, cleared)
+                state.last_error = "auth_failed"
+                state.save(update_fields=["last_error"])
+                return {"status": AUTH_FAILED}
+            if res.status_code != 200:
+                logger.warning(
+                    "Google Calendar mirror sync non-200 restaurant=%s: %s %s",
+                    restaurant.id, res.status_code, res.text[:200],
+                )
+                state.last_error = f"http_{res.status_code}"
+                state.save(update_fields=["last_error"])
+                return {"status": ERROR}
+
+            body = res.json() or {}
+            applied = apply_events(restaurant, body.get("items") or [], calendar_id=calendar_id, now=now)
+            totals["upserted"] += applied["upserted"]
+            totals["deleted"] += applied["deleted"]
+            totals["pages"] += 1
+            page_token = body.get("nextPageToken")
+            if not page_token:
+                break
+
+        if full:
+            # Anything not listed by a full sync no longer exists upstream.
+            totals["deleted"] += CalendarEventMirror.objects.filter(
+                restaurant=restaurant, calendar_id=calendar_id, synced_at__lt=now
+            ).delete()[0]
+            state.last_full_sync_at = now
+        state.sync_token = body.get("nextSyncToken") or ""
+        state.last_synced_at = now
+        state.last_error = ""
+        state.save()
+        return {"status": SYNCED, "full": full, **totals}
+    finally:
+        cache.delete(lock_key)
+
+
+def ensure_fresh(restaurant, *, max_age: timedelta = MIRROR_MAX_AGE, http=None) -> str:
+    """Sync when the mirror is older than ``max_age``; returns the outcome."""
+    last = (
+        CalendarSyncState.objects.filter(restaurant=restaurant, calendar_id=PRIMARY)
+        .values_list("last_synced_at", flat=True)
+        .first()
+    )
+    if last and timezone.now() - last < max_age:
+        return FRESH
+    return sync_calendar(restaurant, http=http)["status"]
+
+
+def mirrored_events(
+    restaurant,
+    acting_user,
+    *,
+    start: datetime,
+    end: datetime,
+    limit: int = 100,
+    now: Optional[datetime] = None,
+    http=None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Widget-shaped rows for events overlapping ``[start, end)``.
+
+    ``None`` when Google rejected our credentials (callers show the
+    reconnect prompt); otherwise served from the mirror, even if a refresh
+    could not reach Google this time.
+    """
+    from dashboard.api.meetings_reminders import _serialize_event
+
+    if ensure_fresh(restaurant, http=http) == AUTH_FAILED:
+        return None
+    now = now or timezone.now()
+    user_email = (getattr(acting_user, "email", None) or "").strip() or None
+    out: List[Dict[str, Any]] = []
+    qs = (
+        CalendarEventMirror.objects.filter(restaurant=restaurant, start_at__lt=end, end_at__gt=start)
+        .order_by("start_at")
+        .values_list("payload", flat=True)[:limit]
+    )
+    for ev in qs:
+        row = _serialize_event(ev, user_email, now)
+        if row is None:
+            continue
+        row["description"] = (ev.get("description") or "")[:300]
+        out.append(row)
+    return out
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.16 on 2026-10-18 21:32
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('dashboard', '0027_remove_task_dash_task_rest_loc_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarEventMirror',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('calendar_id', models.CharField(default='primary', max_length=255)),
+                ('event_id', models.CharField(max_length=255)),
+                ('summary', models.CharField(blank=True, default='', max_length=1024)),
+                ('location', models.CharField(blank=True, default='', max_length=1024)),
+                ('start_at', models.DateTimeField()),
+                ('end_at', models.DateTimeField()),
+                ('all_day', models.BooleanField(default=False)),
+                ('payload', models.JSONField(default=dict)),
+                ('google_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField()),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_event_mirrors', to='accounts.restaurant')),
+            ],
+            options={
+                'db_table': 'dashboard_calendar_event_mirrors',
+                'ordering': ['start_at'],
+                'indexes': [models.Index(fields=['restaurant', 'start_at'], name='dashboard_c_restaur_a99a74_idx'), models.Index(fields=['restaurant', 'end_at'], name='dashboard_c_restaur_d698db_idx')],
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'calendar_id', 'event_id'), name='uniq_calendar_event_mirror')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CalendarSyncState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('calendar_id', models.CharField(default='primary', max_length=255)),
+                ('sync_token', models.TextField(blank=True, default='')),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_full_sync_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.CharField(blank=True, default='', max_length=255)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='calendar_sync_states', to='accounts.restaurant')),
+            ],
+            options={
+                'db_table': 'dashboard_calendar_sync_states',
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'calendar_id'), name='uniq_calendar_sync_state')],
+            },
+        ),
+    ]
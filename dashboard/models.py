@@ -457,3 +457,76 @@ class StaffDailyProgressReport(models.Model):
 
     def __str__(self):
         return f"{self.staff_name} {self.report_date} ({self.done}/{self.total})"
+
+
+class CalendarSyncState(models.Model):
+    """
+    Incremental sync cursor for a tenant's Google Calendar mirror
+    (see ``dashboard.calendar_mirror``). Empty ``sync_token`` = full sync next.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="calendar_sync_states",
+    )
+    calendar_id = models.CharField(max_length=255, default="primary")
+    sync_token = models.TextField(blank=True, default="")
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_full_sync_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.CharField(max_length=255, blank=True, default="")
+
+    class Meta:
+        db_table = "dashboard_calendar_sync_states"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["restaurant", "calendar_id"],
+                name="uniq_calendar_sync_state",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Calendar sync {self.restaurant_id}/{self.calendar_id} @ {self.last_synced_at}"
+
+
+class CalendarEventMirror(models.Model):
+    """
+    Local copy of one Google Calendar event (expanded instance), queried by
+    time window instead of calling the events API on every read.
+    ``payload`` keeps the Google resource for per-viewer serialization.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(
+        "accounts.Restaurant",
+        on_delete=models.CASCADE,
+        related_name="calendar_event_mirrors",
+    )
+    calendar_id = models.CharField(max_length=255, default="primary")
+    event_id = models.CharField(max_length=255)
+    summary = models.CharField(max_length=1024, blank=True, default="")
+    location = models.CharField(max_length=1024, blank=True, default="")
+    start_at = models.DateTimeField()
+    end_at = models.DateTimeField()
+    all_day = models.BooleanField(default=False)
+    payload = models.JSONField(default=dict)
+    google_updated_at = models.DateTimeField(null=True, blank=True)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "dashboard_calendar_event_mirrors"
+        ordering = ["start_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["restaurant", "calendar_id", "event_id"],
+                name="uniq_calendar_event_mirror",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["restaurant", "start_at"]),
+            models.Index(fields=["restaurant", "end_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.summary or self.event_id} @ {self.start_at}"
@@ -149,7 +149,7 @@ def run_ops_search(
             access_token, _gcal = _get_valid_access_token(restaurant)
             if access_token:
                 view = MeetingsRemindersView()
-                events = view._fetch_events(access_token, user, dj_tz.now())
+                events = view._fetch_events(restaurant, user, dj_tz.now())
                 q_l = q.lower()
                 for e in events or []:
                     title = e.get("title") or ""
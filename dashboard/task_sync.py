@@ -31,29 +31,25 @@ def broadcast_tasks_invalidate(
     if restaurant is None:
         return
     try:
-        from accounts.models import CustomUser
+        from core.realtime import managers_group, user_group
 
         channel_layer = get_channel_layer()
         if channel_layer is None:
             return
 
-        if user_ids is None:
-            qs = CustomUser.objects.filter(
-                restaurant=restaurant,
-                is_active=True,
-                role__in=("SUPER_ADMIN", "OWNER", "ADMIN", "MANAGER"),
-            ).values_list("id", flat=True)
-            user_ids = list(qs)
-
         payload = {
             "type": "tasks_invalidate",
             "reason": reason,
             "task_id": str(task_id) if task_id else None,
             "restaurant_id": str(getattr(restaurant, "id", restaurant)),
         }
+        if user_ids is None:
+            # Every manager socket joined this group at connect: one send,
+            # no recipient query.
+            async_to_sync(channel_layer.group_send)(managers_group(getattr(restaurant, "id", restaurant)), payload)
+            return
         for uid in user_ids:
-            group = f"user_{uid}_notifications"
-            async_to_sync(channel_layer.group_send)(group, payload)
+            async_to_sync(channel_layer.group_send)(user_group(uid), payload)
     except Exception:
         logger.exception("broadcast_tasks_invalidate failed restaurant=%s", getattr(restaurant, "id", restaurant))
 
@@ -16,6 +16,7 @@ from celery import shared_task
 from django.db.models import F
 from django.utils import timezone
 
+from core.metrics import timed_per_tenant
 from staff.follow_up_helpers import (
     build_task_follow_up_message,
     escalate_task_to_managers,
@@ -128,7 +129,7 @@ def snapshot_staff_daily_progress_task() -> dict:
     report_date = timezone.localdate() - timedelta(days=1)
     summary = {"date": str(report_date), "restaurants": 0, "staff_rows": 0, "errors": 0, "stale_checklists_closed": 0}
 
-    for restaurant in Restaurant.objects.all().iterator(chunk_size=50):
+    for restaurant in timed_per_tenant("snapshot_staff_daily_progress_task", Restaurant.objects.all().iterator(chunk_size=50)):
         try:
             summary["stale_checklists_closed"] += close_stale_shift_checklists(restaurant=restaurant)
             count = snapshot_staff_daily_progress(restaurant, report_date)
@@ -176,7 +177,7 @@ def ops_live_stale_sweep() -> dict:
         "errors": 0,
     }
 
-    for restaurant in Restaurant.objects.all().iterator(chunk_size=40):
+    for restaurant in timed_per_tenant("ops_live_stale_sweep", Restaurant.objects.all().iterator(chunk_size=40)):
         summary["restaurants"] += 1
         try:
             feed = build_operations_live_payload(
@@ -298,7 +299,7 @@ def operations_live_manager_briefing_sweep(period: str = "morning") -> dict:
         "restaurants": 0,
     }
 
-    for restaurant in Restaurant.objects.all().iterator(chunk_size=40):
+    for restaurant in timed_per_tenant("operations_live_manager_briefing_sweep", Restaurant.objects.all().iterator(chunk_size=40)):
         summary["restaurants"] += 1
         try:
             payload = build_operations_live_payload(restaurant, limit=40)
@@ -368,3 +369,23 @@ def operations_live_morning_brief() -> dict:
 @shared_task(name="dashboard.tasks.operations_live_evening_debrief")
 def operations_live_evening_debrief() -> dict:
     return operations_live_manager_briefing_sweep(period="evening")
+
+
+@shared_task(name="dashboard.tasks.sync_calendar_mirrors")
+def sync_calendar_mirrors() -> dict:
+    """Keep each connected tenant's Google Calendar mirror warm (incremental sync)."""
+    from accounts.models import Restaurant
+    from dashboard.calendar_mirror import MIRROR_MAX_AGE, ensure_fresh
+
+    outcomes: dict = {}
+    connected = Restaurant.objects.filter(
+        is_active=True, general_settings__google_calendar__connected=True
+    ).iterator()
+    for restaurant in timed_per_tenant("sync_calendar_mirrors", connected):
+        try:
+            status = ensure_fresh(restaurant, max_age=MIRROR_MAX_AGE / 2)
+        except Exception:
+            logger.exception("sync_calendar_mirrors restaurant=%s", restaurant.id)
+            status = "error"
+        outcomes[status] = outcomes.get(status, 0) + 1
+    return outcomes
@@ -0,0 +1,91 @@
+"""In-memory stand-in for the Google Calendar ``events.list`` endpoint.
+
+Implements what the mirror relies on: full listing with ``timeMin``, paging
+(``pageToken`` / ``nextPageToken``), incremental changes since a
+``syncToken`` (cancelled events included), ``410`` for expired tokens and
+``401`` for a bad access token. Pass it as ``http=`` to
+``dashboard.calendar_mirror.sync_calendar``.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: Dict[str, Any] | None = None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+
+class FakeGoogleCalendar:
+    def __init__(self, access_token: str = "token", page_size: int = 2):
+        self.access_token = access_token
+        self.page_size = page_size
+        self.events: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self.changes: List[tuple] = []  # (version, event_id)
+        self.expired_before = 0  # sync tokens older than this version get 410
+        self.requests: List[Dict[str, Any]] = []
+
+    # --- test controls -------------------------------------------------
+    def put(self, event_id: str, summary: str, start: datetime, end: datetime, **extra):
+        self.version += 1
+        self.events[event_id] = {
+            "id": event_id,
+            "status": "confirmed",
+            "summary": summary,
+            "start": {"dateTime": start.isoformat()},
+            "end": {"dateTime": end.isoformat()},
+            "updated": start.isoformat(),
+            **extra,
+        }
+        self.changes.append((self.version, event_id))
+
+    def cancel(self, event_id: str):
+        self.version += 1
+        self.events[event_id] = {"id": event_id, "status": "cancelled"}
+        self.changes.append((self.version, event_id))
+
+    def expire_sync_tokens(self):
+        self.expired_before = self.version + 1
+
+    # --- requests-style API --------------------------------------------
+    def get(self, url, headers=None, params=None, timeout=None):
+        params = dict(params or {})
+        self.requests.append(params)
+        if (headers or {}).get("Authorization") != f"Bearer {self.access_token}":
+            return FakeResponse(401, {"error": {"code": 401}})
+
+        token = params.get("syncToken")
+        if token:
+            if "timeMin" in params or "timeMax" in params:
+                return FakeResponse(400, {"error": {"message": "syncToken is incompatible with timeMin"}})
+            since = int(token.split("-", 1)[1])
+            if since < self.expired_before:
+                return FakeResponse(410, {"error": {"code": 410, "message": "Sync token is no longer valid"}})
+            ids: List[str] = []
+            for version, event_id in self.changes:
+                if version > since and event_id not in ids:
+                    ids.append(event_id)
+            items = [self.events[i] for i in ids]
+        else:
+            time_min = params.get("timeMin")
+            items = [
+                ev for ev in self.events.values()
+                if ev.get("status") != "cancelled"
+                and (not time_min or ev["end"]["dateTime"] > time_min)
+            ]
+
+        offset = int(params.get("pageToken") or 0)
+        page = items[offset:offset + self.page_size]
+        body: Dict[str, Any] = {"items": page}
+        if offset + self.page_size < len(items):
+            body["nextPageToken"] = str(offset + self.page_size)
+        else:
+            body["nextSyncToken"] = f"v-{self.version}"
+        return FakeResponse(200, body)
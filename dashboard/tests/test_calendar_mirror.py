@@ -0,0 +1,104 @@
+"""Google Calendar mirror: full + incremental sync against a fake events.list."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Restaurant
+from dashboard.calendar_mirror import (
+    AUTH_FAILED,
+    FRESH,
+    SYNCED,
+    ensure_fresh,
+    mirrored_events,
+    sync_calendar,
+)
+from dashboard.models import CalendarEventMirror, CalendarSyncState
+from dashboard.tests.google_calendar_fake import FakeGoogleCalendar
+
+
+class CalendarMirrorTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        self.restaurant = Restaurant.objects.create(
+            name="Mirror Cafe",
+            email="mirror@cafe.test",
+            general_settings={
+                "google_calendar": {
+                    "connected": True,
+                    "access_token": "token",
+                    "token_expires_at": (self.now + timedelta(hours=1)).isoformat(),
+                }
+            },
+        )
+        self.google = FakeGoogleCalendar()
+        for i in range(5):
+            start = self.now + timedelta(hours=i + 1)
+            self.google.put(f"ev{i}", f"Meeting {i}", start, start + timedelta(minutes=30))
+
+    def _ids(self):
+        return set(
+            CalendarEventMirror.objects.filter(restaurant=self.restaurant).values_list("event_id", flat=True)
+        )
+
+    def test_full_sync_pages_through_and_stores_sync_token(self):
+        result = sync_calendar(self.restaurant, http=self.google, now=self.now)
+        self.assertEqual(result["status"], SYNCED)
+        self.assertTrue(result["full"])
+        self.assertEqual(result["pages"], 3)
+        self.assertEqual(self._ids(), {f"ev{i}" for i in range(5)})
+        state = CalendarSyncState.objects.get(restaurant=self.restaurant)
+        self.assertEqual(state.sync_token, "v-5")
+        self.assertIn("timeMin", self.google.requests[0])
+
+    def test_incremental_sync_applies_updates_and_cancellations(self):
+        sync_calendar(self.restaurant, http=self.google, now=self.now)
+        start = self.now + timedelta(days=1)
+        self.google.put("ev1", "Moved", start, start + timedelta(hours=1))
+        self.google.cancel("ev2")
+        self.google.requests.clear()
+
+        result = sync_calendar(self.restaurant, http=self.google, now=self.now + timedelta(minutes=6))
+        self.assertFalse(result["full"])
+        self.assertEqual(self.google.requests, [{"singleEvents": "true", "maxResults": "250", "syncToken": "v-5"}])
+        self.assertEqual(self._ids(), {"ev0", "ev1", "ev3", "ev4"})
+        moved = CalendarEventMirror.objects.get(restaurant=self.restaurant, event_id="ev1")
+        self.assertEqual(moved.summary, "Moved")
+        self.assertEqual(moved.start_at, start)
+
+    def test_expired_sync_token_falls_back_to_full_sync(self):
+        sync_calendar(self.restaurant, http=self.google, now=self.now)
+        # Deleted upstream while the token was still valid, but we never saw it.
+        del self.google.events["ev4"]
+        self.google.expire_sync_tokens()
+
+        result = sync_calendar(self.restaurant, http=self.google, now=self.now + timedelta(minutes=6))
+        self.assertEqual(result["status"], SYNCED)
+        self.assertTrue(result["full"])
+        self.assertEqual(self._ids(), {"ev0", "ev1", "ev2", "ev3"})
+
+    def test_rejected_access_token_forces_refresh(self):
+        self.google.access_token = "rotated"
+        result = sync_calendar(self.restaurant, http=self.google, now=self.now)
+        self.assertEqual(result["status"], AUTH_FAILED)
+        self.restaurant.refresh_from_db()
+        self.assertTrue(
+            self.restaurant.general_settings["google_calendar"]["token_expires_at"].startswith("1970")
+        )
+
+    def test_readers_use_the_window_and_skip_google_while_fresh(self):
+        sync_calendar(self.restaurant, http=self.google)
+        self.google.requests.clear()
+        self.assertEqual(ensure_fresh(self.restaurant, http=self.google), FRESH)
+
+        rows = mirrored_events(
+            self.restaurant,
+            None,
+            start=self.now + timedelta(hours=2),
+            end=self.now + timedelta(hours=4),
+            http=self.google,
+        )
+        self.assertEqual([r["title"] for r in rows], ["Meeting 1", "Meeting 2"])
+        self.assertEqual(self.google.requests, [])
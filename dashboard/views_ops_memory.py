@@ -37,6 +37,25 @@ def _is_user_absent(user, restaurant, on_date=None) -> bool:
     ).exists()
 
 
+def _absent_user_ids(user_ids, on_date=None) -> set:
+    """Batch form of :func:`_is_user_absent`: ids of ``user_ids`` on approved
+    time off covering ``on_date`` (today), in one query."""
+    ids = {uid for uid in user_ids if uid}
+    if not ids:
+        return set()
+    from scheduling.models import TimeOffRequest
+
+    day = on_date or timezone.localdate()
+    return set(
+        TimeOffRequest.objects.filter(
+            staff_id__in=ids,
+            status="APPROVED",
+            start_date__lte=day,
+            end_date__gte=day,
+        ).values_list("staff_id", flat=True)
+    )
+
+
 @api_view(["POST"])
 @authentication_classes([])
 @permission_classes([permissions.AllowAny])
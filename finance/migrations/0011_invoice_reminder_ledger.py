@@ -0,0 +1,32 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('finance', '0010_invoice_audit_event_choices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceReminder',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('reminder_date', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='finance.invoice')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_reminders', to=settings.AUTH_USER_MODEL)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoice_reminders', to='accounts.restaurant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['restaurant', 'reminder_date'], name='finance_inv_restaur_290e0f_idx')],
+                'constraints': [models.UniqueConstraint(fields=('invoice', 'reminder_date', 'recipient'), name='uniq_invoice_reminder_per_day')],
+            },
+        ),
+    ]
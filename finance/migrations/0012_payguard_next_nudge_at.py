@@ -0,0 +1,47 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:07
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def schedule_pending_nudges(apps, schema_editor):
+    """Give in-flight PayGuard runs a next_nudge_at from their tenant policy."""
+    InvoicePaymentApproval = apps.get_model("finance", "InvoicePaymentApproval")
+    Restaurant = apps.get_model("accounts", "Restaurant")
+    pending = InvoicePaymentApproval.objects.filter(status="PENDING")
+    restaurant_ids = pending.values_list("restaurant_id", flat=True).distinct()
+    for restaurant in Restaurant.objects.filter(id__in=restaurant_ids).only("id", "general_settings"):
+        gs = restaurant.general_settings if isinstance(restaurant.general_settings, dict) else {}
+        policy = gs.get("payment_approval")
+        if not isinstance(policy, dict) or not policy.get("enabled"):
+            continue
+        stuck_hours = int(policy.get("stuck_hours") or 4)
+        max_reminders = int(policy.get("max_reminders") or 3)
+        pending.filter(restaurant_id=restaurant.id, reminder_count__lt=max_reminders).update(
+            next_nudge_at=Coalesce("last_reminded_at", "started_at") + timedelta(hours=stuck_hours)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('finance', '0011_invoice_reminder_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicepaymentapproval',
+            name='next_nudge_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='invoicepaymentapproval',
+            index=models.Index(fields=['status', 'next_nudge_at'], name='finance_inv_status_f8b5da_idx'),
+        ),
+        migrations.RunPython(schedule_pending_nudges, migrations.RunPython.noop),
+    ]
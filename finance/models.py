@@ -458,6 +458,10 @@ class InvoicePaymentApproval(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     last_reminded_at = models.DateTimeField(null=True, blank=True)
     reminder_count = models.PositiveSmallIntegerField(default=0)
+    # When the stuck sweep should next nudge the current rung; null when no
+    # reminder is due (finished run, PayGuard off, or max_reminders reached).
+    # Kept current by ``payment_approval.schedule_next_nudge``.
+    next_nudge_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -465,6 +469,8 @@ class InvoicePaymentApproval(models.Model):
         ordering = ["-started_at"]
         indexes = [
             models.Index(fields=["restaurant", "status", "started_at"]),
+            # Powers the stuck sweep: "pending runs whose nudge is due".
+            models.Index(fields=["status", "next_nudge_at"]),
         ]
 
     def __str__(self) -> str:
@@ -522,5 +528,43 @@ class InvoicePaymentApprovalStep(models.Model):
         return f"Step {self.step_order} {self.label or self.required_role} ({self.status})"
 
 
+class InvoiceReminder(models.Model):
+    """
+    Ledger of payment reminders: one row per invoice, manager and day.
+
+    The daily sweep claims rows here before sending, so the unique
+    constraint is what stops a manager getting the same invoice twice in a
+    day — including when two sweeps overlap.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey(
+        Restaurant, on_delete=models.CASCADE, related_name="invoice_reminders"
+    )
+    invoice = models.ForeignKey(
+        Invoice, on_delete=models.CASCADE, related_name="reminders"
+    )
+    recipient = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="invoice_reminders"
+    )
+    reminder_date = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "reminder_date", "recipient"],
+                name="uniq_invoice_reminder_per_day",
+            ),
+        ]
+        indexes = [
+            # "Which (invoice, manager) pairs were already reminded today?"
+            models.Index(fields=["restaurant", "reminder_date"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Reminder {self.invoice_id} → {self.recipient_id} on {self.reminder_date}"
+
+
 # Immutable invoice audit trail (defined in audit.py, re-exported for Django).
 from finance.audit import InvoiceAuditEvent  # noqa: E402, F401
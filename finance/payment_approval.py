@@ -6,18 +6,28 @@ Runtime state: InvoicePaymentApproval + InvoicePaymentApprovalStep.
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import uuid
+from datetime import datetime, timedelta
 from decimal import Decimal, InvalidOperation
 from typing import Any
 
 from django.db import transaction
 from django.utils import timezone
 
+from core.read_through_cache import safe_cache_get, safe_cache_set
+
 logger = logging.getLogger(__name__)
 
 SETTINGS_KEY = "payment_approval"
 
+# Approver lists per (tenant, step config). Any staff save bumps the tenant's
+# generation (see finance.signals), so a role change is seen immediately.
+APPROVERS_CACHE_TTL = 300
+_APPROVERS_GEN_TTL = 24 * 3600
+
 DEFAULT_POLICY: dict[str, Any] = {
     "enabled": False,
     "currency": "MAD",
@@ -84,9 +94,67 @@ def save_policy(restaurant, policy: dict[str, Any]) -> dict[str, Any]:
     gs[SETTINGS_KEY] = cleaned
     restaurant.general_settings = gs
     restaurant.save(update_fields=["general_settings"])
+    reschedule_nudges(restaurant, cleaned)
     return cleaned
 
 
+def _stuck_hours(policy: dict[str, Any]) -> int:
+    return int(policy.get("stuck_hours") or 4)
+
+
+def _max_reminders(policy: dict[str, Any]) -> int:
+    return int(policy.get("max_reminders") or 3)
+
+
+def next_nudge_due(approval, policy: dict[str, Any]) -> datetime | None:
+    """
+    When the current rung should next be reminded: ``stuck_hours`` after the
+    last nudge (or the run's start). None once the run is finished, PayGuard
+    is off, or ``max_reminders`` have been sent for this rung.
+    """
+    if approval.status != approval.STATUS_PENDING or not policy.get("enabled"):
+        return None
+    if (approval.reminder_count or 0) >= _max_reminders(policy):
+        return None
+    anchor = approval.last_reminded_at or approval.started_at
+    if not anchor:
+        return None
+    return anchor + timedelta(hours=_stuck_hours(policy))
+
+
+def schedule_next_nudge(approval, policy: dict[str, Any] | None = None) -> list[str]:
+    """Refresh ``approval.next_nudge_at``; returns the update_fields to save."""
+    if policy is None:
+        policy = get_policy(approval.restaurant)
+    due = next_nudge_due(approval, policy)
+    if due == approval.next_nudge_at:
+        return []
+    approval.next_nudge_at = due
+    return ["next_nudge_at"]
+
+
+def reschedule_nudges(restaurant, policy: dict[str, Any] | None = None) -> int:
+    """Recompute ``next_nudge_at`` for every pending run after a policy change."""
+    from django.db.models.functions import Coalesce
+
+    from finance.models import InvoicePaymentApproval
+
+    if policy is None:
+        policy = get_policy(restaurant)
+    pending = InvoicePaymentApproval.objects.filter(
+        restaurant=restaurant, status=InvoicePaymentApproval.STATUS_PENDING
+    )
+    if not policy.get("enabled"):
+        return pending.update(next_nudge_at=None)
+    max_reminders = _max_reminders(policy)
+    updated = pending.filter(reminder_count__gte=max_reminders).update(next_nudge_at=None)
+    updated += pending.filter(reminder_count__lt=max_reminders).update(
+        next_nudge_at=Coalesce("last_reminded_at", "started_at")
+        + timedelta(hours=_stuck_hours(policy))
+    )
+    return updated
+
+
 def sanitize_policy(policy: dict[str, Any]) -> dict[str, Any]:
     default_currency = str(policy.get("currency") or "MAD")[:8].upper() or "MAD"
     currencies_in = policy.get("currencies")
@@ -175,8 +243,46 @@ def resolve_tier(
     return tiers[-1]
 
 
+def _approvers_gen_key(restaurant_id) -> str:
+    return f"payguard:approvers:gen:{restaurant_id}"
+
+
+def invalidate_approver_cache(restaurant_id) -> None:
+    """Drop cached approver lists for a tenant (staff added, role/active changed)."""
+    if restaurant_id:
+        safe_cache_set(_approvers_gen_key(restaurant_id), uuid.uuid4().hex, _APPROVERS_GEN_TTL)
+
+
+def _approvers_cache_key(restaurant_id, step_cfg: dict) -> str:
+    gen = safe_cache_get(_approvers_gen_key(restaurant_id)) or "0"
+    cfg = json.dumps(
+        {
+            "role": str(step_cfg.get("role") or "").upper(),
+            "user_id": str(step_cfg.get("user_id") or "").strip(),
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha1(cfg.encode()).hexdigest()[:16]
+    return f"payguard:approvers:{restaurant_id}:{gen}:{digest}"
+
+
 def resolve_approvers_for_step(restaurant, step_cfg: dict, *, exclude_ids=None):
-    """Return list of CustomUser who can act on this step."""
+    """Return list of CustomUser who can act on this step.
+
+    Without ``exclude_ids`` the result is cached per tenant and step config.
+    """
+    if exclude_ids:
+        return _query_approvers(restaurant, step_cfg, exclude_ids=exclude_ids)
+    key = _approvers_cache_key(restaurant.pk, step_cfg)
+    cached = safe_cache_get(key)
+    if cached is not None:
+        return list(cached)
+    approvers = _query_approvers(restaurant, step_cfg)
+    safe_cache_set(key, approvers, APPROVERS_CACHE_TTL)
+    return approvers
+
+
+def _query_approvers(restaurant, step_cfg: dict, *, exclude_ids=None):
     from accounts.models import CustomUser
 
     exclude_ids = set(exclude_ids or [])
@@ -186,7 +292,7 @@ def resolve_approvers_for_step(restaurant, step_cfg: dict, *, exclude_ids=None):
     if user_id:
         u = CustomUser.objects.filter(
             id=user_id, restaurant=restaurant, is_active=True
-        ).first()
+        ).defer("password").first()
         return [u] if u and str(u.id) not in exclude_ids else []
 
     role_map = {
@@ -199,7 +305,7 @@ def resolve_approvers_for_step(restaurant, step_cfg: dict, *, exclude_ids=None):
     roles = role_map.get(role, [role] if role else ["MANAGER", "ADMIN", "OWNER"])
     qs = CustomUser.objects.filter(
         restaurant=restaurant, role__in=roles, is_active=True
-    ).exclude(id__in=exclude_ids)
+    ).exclude(id__in=exclude_ids).defer("password")
     return list(qs[:8])
 
 
@@ -268,8 +374,14 @@ def build_approver_nudge(
     )
 
 
-def notify_current_step(approval, *, is_reminder: bool = False) -> int:
-    """WhatsApp + in-app nudge to current-step approvers. Returns # notified."""
+def notify_current_step(
+    approval, *, is_reminder: bool = False, policy: dict[str, Any] | None = None
+) -> int:
+    """WhatsApp + in-app nudge to current-step approvers. Returns # notified.
+
+    Also reschedules ``next_nudge_at``; pass ``policy`` when the caller has
+    already parsed it (the stuck sweep).
+    """
     from notifications.models import Notification
     from notifications.services import notification_service
 
@@ -329,6 +441,13 @@ def notify_current_step(approval, *, is_reminder: bool = False) -> int:
                     "is_reminder": is_reminder,
                 },
             )
+        except Exception:
+            logger.exception("PayGuard notify failed approver=%s", approver.pk)
+            continue
+        # The in-app notification is the nudge of record: a push or WhatsApp
+        # failure after it must not trigger a retry that duplicates it.
+        notified += 1
+        try:
             notification_service.send_custom_notification(
                 recipient=approver,
                 message=body,
@@ -339,9 +458,8 @@ def notify_current_step(approval, *, is_reminder: bool = False) -> int:
             phone = getattr(approver, "phone", "") or ""
             if phone.strip():
                 notification_service.send_whatsapp_text(phone, body)
-            notified += 1
         except Exception:
-            logger.exception("PayGuard notify failed approver=%s", approver.pk)
+            logger.exception("PayGuard push/WhatsApp failed approver=%s", approver.pk)
 
     if notified:
         step.status = step.STATUS_NOTIFIED
@@ -350,7 +468,10 @@ def notify_current_step(approval, *, is_reminder: bool = False) -> int:
         approval.last_reminded_at = now
         if is_reminder:
             approval.reminder_count = (approval.reminder_count or 0) + 1
-        approval.save(update_fields=["last_reminded_at", "reminder_count", "updated_at"])
+        schedule_next_nudge(approval, policy)
+        approval.save(
+            update_fields=["last_reminded_at", "reminder_count", "next_nudge_at", "updated_at"]
+        )
         try:
             from finance.audit import InvoiceAuditEvent, log_invoice_event
 
@@ -383,6 +504,18 @@ def notify_current_step(approval, *, is_reminder: bool = False) -> int:
             )
         except Exception:
             logger.exception("PayGuard audit notify failed")
+    else:
+        if policy is None:
+            policy = get_policy(approval.restaurant)
+        due = next_nudge_due(approval, policy)
+        if due is not None and approval.next_nudge_at is not None and approval.next_nudge_at > due:
+            # Nothing was sent: keep the later retry already scheduled (the
+            # stuck sweep's claim lease) rather than a due time that has
+            # passed and would be re-claimed at once.
+            return notified
+        fields = schedule_next_nudge(approval, policy)
+        if fields:
+            approval.save(update_fields=fields)
     return notified
 
 
@@ -567,7 +700,8 @@ def act_on_approval(
         step.save()
         approval.status = InvoicePaymentApproval.STATUS_CANCELLED
         approval.completed_at = now
-        approval.save(update_fields=["status", "completed_at", "updated_at"])
+        approval.next_nudge_at = None
+        approval.save(update_fields=["status", "completed_at", "next_nudge_at", "updated_at"])
         invoice.approval_status = Invoice.APPROVAL_NONE
         invoice.status = Invoice.STATUS_RETURNED
         invoice.returned_reason = (note or "More information is needed before approval.")[:4000]
@@ -602,7 +736,8 @@ def act_on_approval(
         step.save()
         approval.status = InvoicePaymentApproval.STATUS_REJECTED
         approval.completed_at = now
-        approval.save(update_fields=["status", "completed_at", "updated_at"])
+        approval.next_nudge_at = None
+        approval.save(update_fields=["status", "completed_at", "next_nudge_at", "updated_at"])
         invoice.approval_status = Invoice.APPROVAL_REJECTED
         invoice.status = Invoice.STATUS_REJECTED
         invoice.save(update_fields=["approval_status", "status", "updated_at"])
@@ -642,8 +777,15 @@ def act_on_approval(
         approval.status = InvoicePaymentApproval.STATUS_APPROVED
         approval.completed_at = now
         approval.current_step_index = next_idx
+        approval.next_nudge_at = None
         approval.save(
-            update_fields=["status", "completed_at", "current_step_index", "updated_at"]
+            update_fields=[
+                "status",
+                "completed_at",
+                "current_step_index",
+                "next_nudge_at",
+                "updated_at",
+            ]
         )
         invoice.approval_status = Invoice.APPROVAL_APPROVED
         invoice.status = Invoice.STATUS_APPROVED
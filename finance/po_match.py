@@ -3,25 +3,41 @@ Light purchase-order ↔ invoice matching.
 
 Suggests open POs whose supplier name is similar to the invoice vendor and
 whose total_amount is within a tolerance of the invoice amount.
+
+Matching is indexed rather than a scan of the latest POs:
+
+* each ``Supplier`` keeps a normalized name and its trigram signature
+  (``match_name`` / ``match_trigrams``, maintained by ``finance.signals``), so
+  a tenant's suppliers are narrowed to those sharing a trigram with the
+  vendor before any fuzzy scoring;
+* candidate POs are then read with one query per tenant on the
+  ``(restaurant, supplier, order_date)`` index — every open PO of those
+  suppliers in the date window, not only the most recent ones.
+
+:func:`suggest_po_matches_batch` does this for a whole upload of invoices
+in one pass; :func:`suggest_po_matches` is the single-invoice form.
 """
 from __future__ import annotations
 
 import re
+from collections import defaultdict
 from datetime import timedelta
 from decimal import Decimal
 from difflib import SequenceMatcher
-from typing import Any
+from typing import Any, Dict, Iterable, List
 
-from django.db.models import Q
 from django.utils import timezone
 
-from inventory.models import PurchaseOrder
+from inventory.models import PurchaseOrder, Supplier
 
 from .models import Invoice
 
 _DEFAULT_AMOUNT_TOLERANCE = Decimal("0.05")  # 5%
 _DEFAULT_NAME_THRESHOLD = 0.55
+# Suggestions below this supplier-name score are never shown.
+_MIN_NAME_SCORE = 0.35
 _DATE_WINDOW_DAYS = 45
+_OPEN_STATUSES = ("PENDING", "ORDERED", "RECEIVED")
 
 
 def _norm_name(value: str) -> str:
@@ -31,6 +47,21 @@ def _norm_name(value: str) -> str:
     return s
 
 
+def _trigrams(normalized: str) -> set:
+    """pg_trgm-style trigrams: each token padded with two leading blanks and one trailing."""
+    grams = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def supplier_signature(name: str) -> tuple[str, list]:
+    """``(match_name, match_trigrams)`` stored on ``Supplier``."""
+    normalized = _norm_name(name)
+    return normalized, sorted(_trigrams(normalized))
+
+
 def _name_score(a: str, b: str) -> float:
     na, nb = _norm_name(a), _norm_name(b)
     if not na or not nb:
@@ -47,85 +78,150 @@ def _amount_close(po_total: Decimal, inv_amount: Decimal, tol: Decimal) -> bool:
     return diff <= (Decimal(str(inv_amount)) * tol)
 
 
-def suggest_po_matches(
-    invoice: Invoice,
+def _po_row(po, supplier: str, score: float, reasons: list, already_linked: bool = False) -> dict[str, Any]:
+    return {
+        "purchase_order_id": str(po.id),
+        "supplier_name": supplier,
+        "total_amount": float(po.total_amount or 0),
+        "status": po.status,
+        "order_date": po.order_date.isoformat() if po.order_date else None,
+        "score": score,
+        "already_linked": already_linked,
+        "reasons": reasons,
+    }
+
+
+class _SupplierIndex:
+    """A tenant's supplier signatures, loaded with one query."""
+
+    def __init__(self, restaurant_id):
+        self.entries = []
+        self.grams: Dict[str, set] = defaultdict(set)
+        for sid, name, match_name, grams in Supplier.objects.filter(restaurant_id=restaurant_id).values_list(
+            "id", "name", "match_name", "match_trigrams"
+        ):
+            if not match_name:
+                match_name, grams = supplier_signature(name)
+            self.entries.append((sid, name))
+            for gram in grams or ():
+                self.grams[gram].add(len(self.entries) - 1)
+
+    def candidates(self, vendor_name: str) -> Dict:
+        """``{supplier_id: (name, score)}`` for suppliers worth suggesting."""
+        hits = set()
+        for gram in _trigrams(_norm_name(vendor_name)):
+            hits |= self.grams.get(gram, set())
+        out = {}
+        for idx in hits:
+            sid, name = self.entries[idx]
+            score = _name_score(vendor_name, name)
+            if score >= _MIN_NAME_SCORE:
+                out[sid] = (name, score)
+        return out
+
+
+def _window_start(invoice, today):
+    return (invoice.issue_date or today) - timedelta(days=_DATE_WINDOW_DAYS)
+
+
+def _score_po(invoice, po, supplier: str, name_s: float, amount_tolerance, name_threshold):
+    amt_ok = _amount_close(po.total_amount or Decimal("0"), invoice.amount, amount_tolerance)
+    if name_s < name_threshold and not amt_ok:
+        return None
+
+    reasons = []
+    score = name_s * 0.6
+    if amt_ok:
+        score += 0.35
+        reasons.append("Amount within 5%")
+    elif invoice.amount and po.total_amount:
+        pct = float(
+            abs(Decimal(str(po.total_amount)) - invoice.amount) / invoice.amount * 100
+        )
+        reasons.append(f"Amount differs by {pct:.1f}%")
+    if name_s >= 0.8:
+        reasons.append("Supplier name strong match")
+    elif name_s >= name_threshold:
+        reasons.append("Supplier name partial match")
+
+    # Prefer ORDERED/RECEIVED slightly
+    if po.status in ("ORDERED", "RECEIVED"):
+        score += 0.05
+    return _po_row(po, supplier, round(min(score, 1.0), 3), reasons or ["Possible match"])
+
+
+def suggest_po_matches_batch(
+    invoices: Iterable[Invoice],
     *,
     limit: int = 5,
     amount_tolerance: Decimal = _DEFAULT_AMOUNT_TOLERANCE,
     name_threshold: float = _DEFAULT_NAME_THRESHOLD,
-) -> list[dict[str, Any]]:
-    """Return ranked PO suggestions for an invoice (does not persist)."""
-    if invoice.purchase_order_id:
-        po = invoice.purchase_order
-        return [
-            {
-                "purchase_order_id": str(po.id),
-                "supplier_name": po.supplier.name if po.supplier_id else "",
-                "total_amount": float(po.total_amount or 0),
-                "status": po.status,
-                "order_date": po.order_date.isoformat() if po.order_date else None,
-                "score": 1.0,
-                "already_linked": True,
-                "reasons": ["Already linked to this invoice"],
-            }
-        ]
+) -> Dict[Any, List[dict[str, Any]]]:
+    """Ranked PO suggestions for many invoices: ``{invoice.id: [...]}``.
 
+    Two queries per tenant in the batch (suppliers, then candidate POs),
+    however many invoices and POs there are. Does not persist.
+    """
+    limit = max(1, min(int(limit or 5), 20))
     today = timezone.now().date()
-    window_start = today - timedelta(days=_DATE_WINDOW_DAYS)
-
-    pos = (
-        PurchaseOrder.objects.filter(restaurant_id=invoice.restaurant_id)
-        .exclude(status="CANCELLED")
-        .filter(Q(status__in=["PENDING", "ORDERED", "RECEIVED"]))
-        .filter(order_date__gte=window_start)
-        .select_related("supplier")
-        .order_by("-order_date")[:80]
-    )
-
-    suggestions: list[dict[str, Any]] = []
-    for po in pos:
-        supplier = po.supplier.name if po.supplier_id else ""
-        name_s = _name_score(invoice.vendor_name, supplier)
-        amt_ok = _amount_close(po.total_amount or Decimal("0"), invoice.amount, amount_tolerance)
-        if name_s < name_threshold and not amt_ok:
-            continue
-        if name_s < 0.35:
-            continue
+    out: Dict[Any, List[dict[str, Any]]] = {}
+    by_restaurant: Dict[Any, list] = defaultdict(list)
+    for invoice in invoices:
+        if invoice.purchase_order_id:
+            po = invoice.purchase_order
+            out[invoice.id] = [
+                _po_row(po, po.supplier.name if po.supplier_id else "", 1.0,
+                        ["Already linked to this invoice"], already_linked=True)
+            ]
+        else:
+            out[invoice.id] = []
+            by_restaurant[invoice.restaurant_id].append(invoice)
 
-        reasons = []
-        score = name_s * 0.6
-        if amt_ok:
-            score += 0.35
-            reasons.append("Amount within 5%")
-        elif invoice.amount and po.total_amount:
-            pct = float(
-                abs(Decimal(str(po.total_amount)) - invoice.amount) / invoice.amount * 100
+    for restaurant_id, batch in by_restaurant.items():
+        index = _SupplierIndex(restaurant_id)
+        wanted = {inv.id: index.candidates(inv.vendor_name) for inv in batch}
+        supplier_ids = set().union(*wanted.values())
+        if not supplier_ids:
+            continue
+        pos_by_supplier: Dict[Any, list] = defaultdict(list)
+        for po in (
+            PurchaseOrder.objects.filter(
+                restaurant_id=restaurant_id,
+                supplier_id__in=supplier_ids,
+                status__in=_OPEN_STATUSES,
+                order_date__gte=min(_window_start(inv, today) for inv in batch),
             )
-            reasons.append(f"Amount differs by {pct:.1f}%")
-        if name_s >= 0.8:
-            reasons.append("Supplier name strong match")
-        elif name_s >= name_threshold:
-            reasons.append("Supplier name partial match")
-
-        # Prefer ORDERED/RECEIVED slightly
-        if po.status in ("ORDERED", "RECEIVED"):
-            score += 0.05
-
-        suggestions.append(
-            {
-                "purchase_order_id": str(po.id),
-                "supplier_name": supplier,
-                "total_amount": float(po.total_amount or 0),
-                "status": po.status,
-                "order_date": po.order_date.isoformat() if po.order_date else None,
-                "score": round(min(score, 1.0), 3),
-                "already_linked": False,
-                "reasons": reasons or ["Possible match"],
-            }
-        )
+            .only("id", "supplier_id", "total_amount", "status", "order_date")
+            .order_by("-order_date")
+        ):
+            pos_by_supplier[po.supplier_id].append(po)
+
+        for inv in batch:
+            start = _window_start(inv, today)
+            suggestions = []
+            for sid, (supplier, name_s) in wanted[inv.id].items():
+                for po in pos_by_supplier.get(sid, ()):
+                    if po.order_date and po.order_date < start:
+                        continue
+                    row = _score_po(inv, po, supplier, name_s, amount_tolerance, name_threshold)
+                    if row is not None:
+                        suggestions.append(row)
+            suggestions.sort(key=lambda s: -s["score"])
+            out[inv.id] = suggestions[:limit]
+    return out
+
 
-    suggestions.sort(key=lambda s: -s["score"])
-    return suggestions[: max(1, min(int(limit or 5), 20))]
+def suggest_po_matches(
+    invoice: Invoice,
+    *,
+    limit: int = 5,
+    amount_tolerance: Decimal = _DEFAULT_AMOUNT_TOLERANCE,
+    name_threshold: float = _DEFAULT_NAME_THRESHOLD,
+) -> list[dict[str, Any]]:
+    """Return ranked PO suggestions for an invoice (does not persist)."""
+    return suggest_po_matches_batch(
+        [invoice], limit=limit, amount_tolerance=amount_tolerance, name_threshold=name_threshold
+    )[invoice.id]
 
 
 def apply_po_match(invoice: Invoice, purchase_order: PurchaseOrder, *, confidence: float | None = None) -> Invoice:
@@ -138,29 +234,44 @@ def apply_po_match(invoice: Invoice, purchase_order: PurchaseOrder, *, confidenc
     return invoice
 
 
-def suggest_and_record_status(invoice: Invoice) -> dict[str, Any]:
-    """Rank PO candidates and stamp SUGGESTED status (no silent auto-confirm)."""
-    suggestions = suggest_po_matches(invoice)
-    if invoice.purchase_order_id:
-        return {
-            "invoice_id": str(invoice.id),
-            "suggestions": suggestions,
-            "match_status": invoice.match_status,
-            "purchase_order_id": str(invoice.purchase_order_id),
-        }
-
+def _stamp(invoice: Invoice, suggestions: list) -> None:
     if suggestions:
         invoice.match_status = Invoice.MATCH_SUGGESTED
         invoice.match_confidence = Decimal(str(suggestions[0]["score"]))
-        invoice.save(update_fields=["match_status", "match_confidence", "updated_at"])
     else:
         invoice.match_status = Invoice.MATCH_UNMATCHED
         invoice.match_confidence = None
-        invoice.save(update_fields=["match_status", "match_confidence", "updated_at"])
 
+
+def _result(invoice: Invoice, suggestions: list) -> dict[str, Any]:
     return {
         "invoice_id": str(invoice.id),
         "suggestions": suggestions,
         "match_status": invoice.match_status,
-        "purchase_order_id": None,
+        "purchase_order_id": str(invoice.purchase_order_id) if invoice.purchase_order_id else None,
     }
+
+
+def suggest_and_record_status(invoice: Invoice) -> dict[str, Any]:
+    """Rank PO candidates and stamp SUGGESTED status (no silent auto-confirm)."""
+    suggestions = suggest_po_matches(invoice)
+    if not invoice.purchase_order_id:
+        _stamp(invoice, suggestions)
+        invoice.save(update_fields=["match_status", "match_confidence", "updated_at"])
+    return _result(invoice, suggestions)
+
+
+def suggest_and_record_status_batch(invoices: Iterable[Invoice]) -> List[dict[str, Any]]:
+    """:func:`suggest_and_record_status` for a whole upload, with one ``bulk_update``."""
+    invoices = list(invoices)
+    matches = suggest_po_matches_batch(invoices)
+    now = timezone.now()
+    changed = []
+    for invoice in invoices:
+        if not invoice.purchase_order_id:
+            _stamp(invoice, matches[invoice.id])
+            invoice.updated_at = now
+            changed.append(invoice)
+    if changed:
+        Invoice.objects.bulk_update(changed, ["match_status", "match_confidence", "updated_at"], batch_size=500)
+    return [_result(invoice, matches[invoice.id]) for invoice in invoices]
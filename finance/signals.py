@@ -7,13 +7,20 @@ webhook, a scheduled task, or the Django admin. Without this hook
 Miya's read cache can serve up to ``_INVOICES_CACHE_TTL`` seconds of
 stale data after a ``record_invoice`` / ``mark_invoice_paid``, which
 confuses manager-facing confirmations.
+
+Staff saves likewise drop PayGuard's cached approver lists for the
+tenant (``finance.payment_approval.resolve_approvers_for_step``), and
+supplier saves refresh the name signature the PO matcher indexes
+(``finance.po_match``).
 """
 from __future__ import annotations
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from accounts.models import CustomUser
 from finance.models import Invoice
+from inventory.models import Supplier
 
 
 @receiver(post_save, sender=Invoice)
@@ -35,3 +42,28 @@ def bust_agent_invoices_cache_on_save(sender, instance, **kwargs):
             # let it raise from a model save and turn a successful
             # write into a 500.
             pass
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def bust_payguard_approvers_cache(sender, instance, **kwargs):
+    """Role, active flag or tenant changed — PayGuard re-resolves approvers."""
+    from finance.payment_approval import invalidate_approver_cache
+
+    invalidate_approver_cache(getattr(instance, "restaurant_id", None))
+
+
+@receiver(pre_save, sender=Supplier)
+def refresh_supplier_match_signature(sender, instance, **kwargs):
+    from finance.po_match import supplier_signature
+
+    instance.match_name, instance.match_trigrams = supplier_signature(instance.name)
+
+
+@receiver(post_save, sender=Supplier)
+def persist_partial_supplier_signature(sender, instance, update_fields=None, **kwargs):
+    """``save(update_fields=['name'])`` skips the signature columns; write them."""
+    if update_fields and "name" in update_fields and "match_name" not in update_fields:
+        Supplier.objects.filter(pk=instance.pk).update(
+            match_name=instance.match_name, match_trigrams=instance.match_trigrams
+        )
@@ -5,73 +5,24 @@ import logging
 from datetime import timedelta
 
 from celery import shared_task
+from django.db import transaction
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# PayGuard stuck sweep: rows claimed per batch, batches per run, and how long
+# a claimed row stays hidden from other sweeps if its worker dies mid-send.
+NUDGE_BATCH_SIZE = 100
+NUDGE_MAX_BATCHES = 50
+NUDGE_CLAIM_LEASE = timedelta(minutes=15)
+
 
 @shared_task(name="finance.tasks.invoice_overdue_reminder_sweep")
 def invoice_overdue_reminder_sweep() -> dict:
-    """Notify managers about OPEN invoices due within 3 days or already overdue."""
-    from accounts.models import CustomUser
-    from finance.models import Invoice
-    from notifications.models import Notification
-    from notifications.services import notification_service
-
-    today = timezone.now().date()
-    horizon = today + timedelta(days=3)
-    summary = {"notified": 0, "checked": 0}
-
-    invoices = Invoice.objects.filter(
-        status__in=Invoice.UNPAID_ACTIVE_STATUSES,
-        due_date__lte=horizon,
-    ).select_related("restaurant")
-
-    for inv in invoices.iterator(chunk_size=100):
-        summary["checked"] += 1
-        already = Notification.objects.filter(
-            notification_type="INVOICE_REMINDER",
-            data__invoice_id=str(inv.id),
-            created_at__date=today,
-        ).exists()
-        if already:
-            continue
-
-        managers = CustomUser.objects.filter(
-            restaurant_id=inv.restaurant_id,
-            role__in=["MANAGER", "ADMIN", "OWNER"],
-            is_active=True,
-        )
-        overdue = inv.due_date < today
-        label = "OVERDUE" if overdue else f"due {inv.due_date.isoformat()}"
-        body = (
-            f"💰 Invoice reminder: {inv.vendor_name}"
-            + (f" #{inv.invoice_number}" if inv.invoice_number else "")
-            + f" — {inv.amount} {inv.currency} ({label})."
-        )
-        for manager in managers:
-            try:
-                Notification.objects.create(
-                    recipient=manager,
-                    title="Invoice payment reminder",
-                    message=body.replace("💰 ", ""),
-                    notification_type="INVOICE_REMINDER",
-                    data={"invoice_id": str(inv.id)},
-                )
-                notification_service.send_custom_notification(
-                    recipient=manager,
-                    message=body.replace("💰 ", ""),
-                    notification_type="INVOICE_REMINDER",
-                    title="Invoice payment reminder",
-                    channels=["app", "push"],
-                )
-                if manager.phone:
-                    notification_service.send_whatsapp_text(manager.phone, body)
-            except Exception:
-                logger.exception("Invoice reminder failed for manager %s", manager.pk)
-
-        summary["notified"] += 1
+    """Send managers one digest of OPEN invoices due within 3 days or overdue."""
+    from finance.reminders import run_invoice_reminder_sweep
 
+    summary = run_invoice_reminder_sweep()
     if summary["notified"]:
         logger.info("invoice_overdue_reminder_sweep: %s", summary)
     return summary
@@ -83,41 +34,62 @@ def payment_approval_stuck_sweep() -> dict:
     Nudge approvers when a PayGuard rung is stuck (Miya WhatsApp reminders).
 
     Example: "Hi Hamza, Driss is waiting for the approval to pay an invoice of 150,000 MAD…"
-    """
-    from datetime import timedelta
 
+    Only runs whose ``next_nudge_at`` has passed are read. Each batch is
+    claimed by pushing ``next_nudge_at`` out by ``NUDGE_CLAIM_LEASE`` so an
+    overlapping sweep skips it; ``notify_current_step`` then sets the real
+    next due time, or leaves the lease in place to retry a failed send on a
+    later run. Rows already handled in this run are never claimed again.
+    """
     from finance.models import InvoicePaymentApproval
     from finance.payment_approval import get_policy, notify_current_step
 
     now = timezone.now()
     summary = {"checked": 0, "reminded": 0}
-
-    qs = InvoicePaymentApproval.objects.filter(
-        status=InvoicePaymentApproval.STATUS_PENDING
-    ).select_related("invoice", "restaurant", "requested_by")
-
-    for approval in qs.iterator(chunk_size=50):
-        summary["checked"] += 1
-        policy = get_policy(approval.restaurant)
-        if not policy.get("enabled"):
-            continue
-        stuck_hours = int(policy.get("stuck_hours") or 4)
-        max_reminders = int(policy.get("max_reminders") or 3)
-        if (approval.reminder_count or 0) >= max_reminders:
-            continue
-        # First nudge after stuck_hours from start (or last reminder)
-        anchor = approval.last_reminded_at or approval.started_at
-        if not anchor:
-            continue
-        if now - anchor < timedelta(hours=stuck_hours):
-            continue
-        try:
-            n = notify_current_step(approval, is_reminder=True)
-            if n:
-                summary["reminded"] += 1
-        except Exception:
-            logger.exception("PayGuard stuck sweep failed approval=%s", approval.pk)
+    policies: dict = {}
+    seen: set = set()
+
+    for _ in range(NUDGE_MAX_BATCHES):
+        batch = _claim_due_approvals(now, exclude=seen)
+        if not batch:
+            break
+        for approval in batch:
+            seen.add(approval.pk)
+            summary["checked"] += 1
+            policy = policies.get(approval.restaurant_id)
+            if policy is None:
+                policy = policies[approval.restaurant_id] = get_policy(approval.restaurant)
+            if not policy.get("enabled"):
+                InvoicePaymentApproval.objects.filter(pk=approval.pk).update(next_nudge_at=None)
+                continue
+            try:
+                n = notify_current_step(approval, is_reminder=True, policy=policy)
+                if n:
+                    summary["reminded"] += 1
+            except Exception:
+                logger.exception("PayGuard stuck sweep failed approval=%s", approval.pk)
 
     if summary["reminded"]:
         logger.info("payment_approval_stuck_sweep: %s", summary)
     return summary
+
+
+def _claim_due_approvals(now, exclude=()) -> list:
+    from finance.models import InvoicePaymentApproval
+
+    with transaction.atomic():
+        ids = list(
+            InvoicePaymentApproval.objects.select_for_update(skip_locked=True)
+            .filter(status=InvoicePaymentApproval.STATUS_PENDING, next_nudge_at__lte=now)
+            .exclude(id__in=list(exclude))
+            .order_by("next_nudge_at")
+            .values_list("id", flat=True)[:NUDGE_BATCH_SIZE]
+        )
+        if not ids:
+            return []
+        InvoicePaymentApproval.objects.filter(id__in=ids).update(next_nudge_at=now + NUDGE_CLAIM_LEASE)
+    return list(
+        InvoicePaymentApproval.objects.filter(id__in=ids).select_related(
+            "invoice", "restaurant", "requested_by"
+        )
+    )
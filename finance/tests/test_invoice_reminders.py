@@ -0,0 +1,122 @@
+"""Invoice reminder sweep: one digest per manager per day, deduped through
+the InvoiceReminder ledger, in a query count independent of invoice volume."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from accounts.models import CustomUser, Restaurant
+from core.query_profile import profile_queries
+from finance.models import Invoice, InvoiceReminder
+from finance.reminders import DIGEST_MAX_LINES, build_digest, run_invoice_reminder_sweep
+
+TODAY = date(2026, 3, 10)
+
+
+@patch("notifications.services.notification_service.send_whatsapp_text")
+@patch("notifications.services.notification_service.send_custom_notification")
+class InvoiceReminderSweepTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Ledger Cafe", email="ledger@cafe.test")
+        self.managers = [
+            CustomUser.objects.create_user(
+                email=f"{role.lower()}@cafe.test",
+                password="pass12345",
+                role=role,
+                restaurant=self.restaurant,
+                phone=phone,
+            )
+            for role, phone in (("MANAGER", "+212600000010"), ("OWNER", ""))
+        ]
+        CustomUser.objects.create_user(
+            email="waiter@cafe.test", password="pass12345", role="WAITER", restaurant=self.restaurant
+        )
+
+    def _invoices(self, n, restaurant=None):
+        return Invoice.objects.bulk_create(
+            [
+                Invoice(
+                    restaurant=restaurant or self.restaurant,
+                    vendor_name=f"Vendor {i}",
+                    amount=Decimal("100.00"),
+                    currency="MAD",
+                    due_date=TODAY + timedelta(days=i % 5 - 1),
+                    status=Invoice.STATUS_OPEN,
+                )
+                for i in range(n)
+            ]
+        )
+
+    def test_one_digest_per_manager_and_nothing_twice(self, custom, whatsapp):
+        self._invoices(10)  # due_date offsets -1..3 are in range, none beyond the horizon
+        summary = run_invoice_reminder_sweep(today=TODAY)
+
+        self.assertEqual(summary, {"checked": 10, "notified": 10, "digests": 2})
+        self.assertEqual(custom.call_count, 2)
+        whatsapp.assert_called_once()
+        self.assertIn("10 invoices to pay (2 overdue)", whatsapp.call_args.args[1])
+        self.assertEqual(len(custom.call_args.kwargs["data"]["invoice_ids"]), 10)
+        data = custom.call_args.kwargs["data"]
+        self.assertEqual(data["invoice_id"], data["invoice_ids"][0])
+        self.assertEqual(InvoiceReminder.objects.count(), 20)
+
+        custom.reset_mock()
+        whatsapp.reset_mock()
+        self.assertEqual(run_invoice_reminder_sweep(today=TODAY)["digests"], 0)
+        custom.assert_not_called()
+        whatsapp.assert_not_called()
+
+    def test_only_new_invoices_are_sent_later_the_same_day(self, custom, whatsapp):
+        self._invoices(3)
+        run_invoice_reminder_sweep(today=TODAY)
+        custom.reset_mock()
+        new = self._invoices(1)[0]
+
+        summary = run_invoice_reminder_sweep(today=TODAY)
+        self.assertEqual(summary["notified"], 1)
+        self.assertEqual(
+            {tuple(c.kwargs["data"]["invoice_ids"]) for c in custom.call_args_list}, {(str(new.id),)}
+        )
+
+    def test_query_count_does_not_grow_with_invoices(self, custom, whatsapp):
+        counts = []
+        for n in (5, 200):
+            restaurant = Restaurant.objects.create(name=f"Cafe {n}", email=f"cafe{n}@cafe.test")
+            CustomUser.objects.create_user(
+                email=f"boss{n}@cafe.test", password="pass12345", role="MANAGER", restaurant=restaurant
+            )
+            self._invoices(n, restaurant=restaurant)
+            InvoiceReminder.objects.all().delete()
+            Invoice.objects.exclude(restaurant=restaurant).update(status=Invoice.STATUS_PAID)
+            with profile_queries() as profile:
+                run_invoice_reminder_sweep(today=TODAY)
+            counts.append(profile.count)
+        # SQLite may split the 200-row ledger insert by its parameter limit.
+        self.assertLessEqual(counts[1], counts[0] + 1)
+
+    def test_paid_and_far_future_invoices_are_skipped(self, custom, whatsapp):
+        Invoice.objects.create(
+            restaurant=self.restaurant, vendor_name="Paid", amount=1, due_date=TODAY, status=Invoice.STATUS_PAID
+        )
+        Invoice.objects.create(
+            restaurant=self.restaurant, vendor_name="Later", amount=1, due_date=TODAY + timedelta(days=9),
+            status=Invoice.STATUS_OPEN,
+        )
+        self.assertEqual(run_invoice_reminder_sweep(today=TODAY)["checked"], 0)
+
+
+class DigestTextTests(TestCase):
+    def test_single_invoice_keeps_the_short_form(self):
+        inv = Invoice(vendor_name="Metro", invoice_number="A1", amount=Decimal("5.00"), currency="MAD", due_date=TODAY)
+        self.assertEqual(build_digest([inv], TODAY), "💰 Invoice reminder: Metro #A1 — 5.00 MAD (due 2026-03-10).")
+
+    def test_long_digest_is_truncated(self):
+        invs = [
+            Invoice(vendor_name=f"V{i}", amount=Decimal("1"), currency="MAD", due_date=TODAY - timedelta(days=1))
+            for i in range(DIGEST_MAX_LINES + 3)
+        ]
+        text = build_digest(invs, TODAY)
+        self.assertEqual(text.count("• "), DIGEST_MAX_LINES)
+        self.assertTrue(text.endswith("…and 3 more in the Finance dashboard."))
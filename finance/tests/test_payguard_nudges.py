@@ -0,0 +1,139 @@
+"""PayGuard escalation: next_nudge_at bookkeeping, the due-row sweep and the
+approver cache."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import CustomUser, Restaurant
+from finance.models import Invoice, InvoicePaymentApproval
+from finance.payment_approval import (
+    act_on_approval,
+    get_policy,
+    resolve_approvers_for_step,
+    save_policy,
+    start_payment_approval,
+)
+from finance.tasks import NUDGE_CLAIM_LEASE, payment_approval_stuck_sweep
+from notifications.models import Notification
+
+
+class PayGuardNudgeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ("send_whatsapp_text", "send_custom_notification"):
+            patcher = patch(f"notifications.services.notification_service.{name}")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.restaurant = Restaurant.objects.create(name="Nudge Bistro", email="nudge@bistro.test")
+        self.manager = CustomUser.objects.create_user(
+            email="manager@bistro.test",
+            password="pass12345",
+            restaurant=self.restaurant,
+            role="MANAGER",
+            first_name="Sara",
+            phone="+212600000020",
+        )
+        save_policy(
+            self.restaurant,
+            {
+                "enabled": True,
+                "stuck_hours": 4,
+                "max_reminders": 2,
+                "tiers": [{"currency": "MAD", "max_amount": None, "steps": [{"role": "MANAGER"}]}],
+            },
+        )
+        invoice = Invoice.objects.create(
+            restaurant=self.restaurant,
+            vendor_name="Sysco",
+            amount=Decimal("900.00"),
+            currency="MAD",
+            due_date=timezone.localdate(),
+            status=Invoice.STATUS_OPEN,
+        )
+        start_payment_approval(invoice=invoice)
+        self.invoice = invoice
+        self.approval = InvoicePaymentApproval.objects.get(invoice=invoice)
+
+    def _make_due(self):
+        InvoicePaymentApproval.objects.filter(pk=self.approval.pk).update(
+            next_nudge_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def test_start_schedules_first_nudge(self):
+        self.assertEqual(self.approval.next_nudge_at, self.approval.last_reminded_at + timedelta(hours=4))
+
+    def test_sweep_only_touches_due_rows_and_stops_at_max(self):
+        self.assertEqual(payment_approval_stuck_sweep(), {"checked": 0, "reminded": 0})
+
+        for expected_count in (1, 2):
+            self._make_due()
+            self.assertEqual(payment_approval_stuck_sweep(), {"checked": 1, "reminded": 1})
+            self.approval.refresh_from_db()
+            self.assertEqual(self.approval.reminder_count, expected_count)
+        self.assertIsNone(self.approval.next_nudge_at)
+
+    def test_whatsapp_failure_does_not_duplicate_the_in_app_nudge(self):
+        before = Notification.objects.filter(recipient=self.manager).count()
+        self._make_due()
+        with patch(
+            "notifications.services.notification_service.send_whatsapp_text",
+            side_effect=RuntimeError("provider down"),
+        ):
+            self.assertEqual(payment_approval_stuck_sweep(), {"checked": 1, "reminded": 1})
+        self.assertEqual(Notification.objects.filter(recipient=self.manager).count(), before + 1)
+        self.approval.refresh_from_db()
+        self.assertEqual(self.approval.reminder_count, 1)
+
+    def test_unsent_nudge_keeps_the_claim_lease(self):
+        CustomUser.objects.filter(pk=self.manager.pk).update(is_active=False)
+        cache.clear()
+        InvoicePaymentApproval.objects.filter(pk=self.approval.pk).update(
+            last_reminded_at=timezone.now() - timedelta(hours=5)
+        )
+        self._make_due()
+        started = timezone.now()
+        self.assertEqual(payment_approval_stuck_sweep(), {"checked": 1, "reminded": 0})
+        self.approval.refresh_from_db()
+        self.assertGreater(self.approval.next_nudge_at, started + NUDGE_CLAIM_LEASE - timedelta(minutes=1))
+        self.assertEqual(payment_approval_stuck_sweep(), {"checked": 0, "reminded": 0})
+
+    def test_policy_change_reschedules_in_bulk(self):
+        policy = get_policy(self.restaurant)
+        save_policy(self.restaurant, {**policy, "stuck_hours": 10})
+        self.approval.refresh_from_db()
+        self.assertEqual(self.approval.next_nudge_at, self.approval.last_reminded_at + timedelta(hours=10))
+
+        save_policy(self.restaurant, {**policy, "enabled": False})
+        self.approval.refresh_from_db()
+        self.assertIsNone(self.approval.next_nudge_at)
+
+    def test_finished_run_is_never_nudged(self):
+        act_on_approval(invoice=self.invoice, actor=self.manager, action="approve")
+        self.approval.refresh_from_db()
+        self.assertIsNone(self.approval.next_nudge_at)
+
+
+class ApproverCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Cache Bistro", email="cache@bistro.test")
+        self.owner = CustomUser.objects.create_user(
+            email="owner@bistro.test", password="pass12345", restaurant=self.restaurant, role="OWNER"
+        )
+
+    def test_cached_until_staff_changes(self):
+        step = {"role": "OWNER"}
+        self.assertEqual(resolve_approvers_for_step(self.restaurant, step), [self.owner])
+        with self.assertNumQueries(0):
+            resolve_approvers_for_step(self.restaurant, step)
+
+        self.owner.is_active = False
+        self.owner.save()
+        self.assertEqual(resolve_approvers_for_step(self.restaurant, step), [])
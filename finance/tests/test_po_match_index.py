@@ -0,0 +1,72 @@
+"""Indexed PO matching: supplier signatures, no recency cap, batch mode."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Restaurant
+from finance.models import Invoice
+from finance.po_match import suggest_and_record_status_batch, suggest_po_matches, suggest_po_matches_batch
+from inventory.models import PurchaseOrder, Supplier
+
+
+class PoMatchIndexTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Match Bistro", email="match@bistro.test")
+        self.metro = Supplier.objects.create(restaurant=self.restaurant, name="Metro Cash & Carry")
+        self.sysco = Supplier.objects.create(restaurant=self.restaurant, name="Sysco Foods")
+        self.today = timezone.now().date()
+
+    def _po(self, supplier, amount, days_ago=0, status="ORDERED"):
+        po = PurchaseOrder.objects.create(
+            restaurant=self.restaurant, supplier=supplier, total_amount=Decimal(amount), status=status
+        )
+        PurchaseOrder.objects.filter(pk=po.pk).update(order_date=self.today - timedelta(days=days_ago))
+        return po
+
+    def _invoice(self, vendor, amount):
+        return Invoice.objects.create(
+            restaurant=self.restaurant, vendor_name=vendor, amount=Decimal(amount),
+            currency="MAD", due_date=self.today, status=Invoice.STATUS_OPEN,
+        )
+
+    def test_signature_follows_supplier_name(self):
+        self.assertEqual(self.metro.match_name, "metro cash carry")
+        self.assertIn("  m", self.metro.match_trigrams)
+        self.metro.name = "Makro"
+        self.metro.save(update_fields=["name"])
+        self.metro.refresh_from_db()
+        self.assertEqual(self.metro.match_name, "makro")
+
+    def test_older_matching_po_is_not_hidden_by_busy_suppliers(self):
+        target = self._po(self.metro, "480.00", days_ago=30)
+        PurchaseOrder.objects.bulk_create(
+            [PurchaseOrder(restaurant=self.restaurant, supplier=self.sysco, total_amount=Decimal("480.00"),
+                           status="ORDERED") for _ in range(100)]
+        )
+        self._po(self.metro, "480.00", days_ago=60)  # outside the window
+        self._po(self.metro, "480.00", status="CANCELLED")
+
+        suggestions = suggest_po_matches(self._invoice("METRO", "490.00"))
+        self.assertEqual([s["purchase_order_id"] for s in suggestions], [str(target.id)])
+        self.assertEqual(suggestions[0]["reasons"], ["Amount within 5%", "Supplier name strong match"])
+
+    def test_batch_matches_an_upload_in_two_queries(self):
+        metro_po = self._po(self.metro, "100.00")
+        sysco_po = self._po(self.sysco, "250.00")
+        invoices = [self._invoice("Metro", "100.00"), self._invoice("Sysco Food", "250.00"),
+                    self._invoice("Unknown Vendor", "99.00")]
+        invoices += [self._invoice("Sysco", str(200 + i)) for i in range(10)]
+
+        with self.assertNumQueries(2):
+            matches = suggest_po_matches_batch(invoices)
+        self.assertEqual(matches[invoices[0].id][0]["purchase_order_id"], str(metro_po.id))
+        self.assertEqual(matches[invoices[1].id][0]["purchase_order_id"], str(sysco_po.id))
+        self.assertEqual(matches[invoices[2].id], [])
+
+        results = suggest_and_record_status_batch(invoices[:3])
+        self.assertEqual([r["match_status"] for r in results],
+                         [Invoice.MATCH_SUGGESTED, Invoice.MATCH_SUGGESTED, Invoice.MATCH_UNMATCHED])
+        self.assertEqual(Invoice.objects.get(pk=invoices[0].pk).match_status, Invoice.MATCH_SUGGESTED)
@@ -1209,16 +1209,34 @@ def agent_match_invoice_po(request):
     POST /api/finance/agent/invoices/match-po/
 
     Suggest purchase orders that may match an invoice (vendor + amount).
-    Body: invoice_id OR vendor + invoice_number
+    Body: invoice_id OR vendor + invoice_number, or invoice_ids (a list) to
+    match a whole upload in one pass.
     """
     from scheduling.views_agent import _resolve_restaurant_for_agent
-    from .po_match import suggest_and_record_status
+    from .po_match import suggest_and_record_status, suggest_and_record_status_batch
 
     restaurant, _, err = _resolve_restaurant_for_agent(request)
     if err:
         return Response({"success": False, "error": err["error"]}, status=err["status"])
 
     data = request.data if isinstance(getattr(request, "data", None), dict) else {}
+    invoice_ids = data.get("invoice_ids")
+    if isinstance(invoice_ids, list) and invoice_ids:
+        invoices = list(
+            Invoice.objects.filter(restaurant=restaurant, id__in=[str(i) for i in invoice_ids[:200]])
+            .exclude(status=Invoice.STATUS_VOIDED)
+            .select_related("purchase_order__supplier")
+        )
+        results = suggest_and_record_status_batch(invoices)
+        matched = sum(1 for r in results if r["suggestions"])
+        return Response(
+            {
+                "success": True,
+                "results": results,
+                "message_for_user": f"Checked {len(results)} invoice(s) against open POs: {matched} with suggested matches.",
+            }
+        )
+
     invoice = _find_invoice(restaurant, data)
     if invoice is None:
         return Response(
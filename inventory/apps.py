@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        # Stock ledger opening movements and agent read model refreshes.
+        import inventory.signals  # noqa: F401
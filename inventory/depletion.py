@@ -0,0 +1,395 @@
+"""
+Theoretical inventory depletion from POS sales.
+
+Synced POS sales land in ``pos.POSItemSalesDaily`` (one row per day, item and
+location, however many order lines the provider sent). Each pass here takes a
+window of those days and, in a fixed number of queries:
+
+1. builds every sold menu item's bill of materials once — recipe lines
+   exploded through prep recipes (``Ingredient.prep_recipe`` /
+   ``prep_yield``) down to stock items, converted into the stock item's unit
+   with :mod:`inventory.unit_conversion`;
+2. multiplies the day's item quantities through it into per-stock-item usage;
+3. replaces the window's :class:`~inventory.models.TheoreticalUsage` rows and
+   books the *difference* from the rows it replaced as ``POS_DEPLETION``
+   movements in the stock ledger (:mod:`inventory.stock_ledger`).
+
+Because only differences are applied, re-syncing a day (late voids, refunds,
+a webhook refresh) converges instead of depleting twice, and ``current_stock``
+is the running theoretical on-hand between counts. Count sessions record
+``expected`` from it, so their variance is actual vs theoretical; see
+:func:`variance_report`.
+
+Only days from :func:`depletion_start` on are depleted: sales from before the
+tenant started tracking, or up to its last completed count, are already in
+the on-hand figure and would otherwise be taken off it a second time. The
+count's own day stays open: usage already booked when the count completed is
+part of what was counted, so only sales synced after it move stock.
+
+Recipe lines that resolve to no stock item, or whose units cannot be
+converted, are skipped and reported rather than guessed at.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Max, Prefetch, Q, Sum
+from django.db.models.functions import Lower
+
+from .stock_ledger import record_movements
+from .unit_conversion import convert
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+USAGE_PLACES = Decimal("0.0001")
+# ``InventoryItem.current_stock`` precision; deltas are taken at this
+# precision so repeated passes never drift by rounding.
+STOCK_PLACES = Decimal("0.01")
+# Prep levels followed when exploding a recipe (guards against data loops).
+MAX_DEPTH = 8
+# ``Restaurant.general_settings`` key: first day (ISO date) whose sales
+# deplete stock. Stamped with the tenant's today on the first pass if unset.
+DEPLETION_START_KEY = "inventory_depletion_start"
+
+
+def _dec(value) -> Decimal:
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+@dataclass
+class BillOfMaterials:
+    """Stock usage per portion, keyed by lower-cased menu item name."""
+
+    per_portion: Dict[str, Dict] = field(default_factory=dict)
+    items: Dict = field(default_factory=dict)
+    # Ingredient names that matched no stock item / had unconvertible units.
+    unmapped: Set[str] = field(default_factory=set)
+    unconverted: Set[str] = field(default_factory=set)
+
+
+def build_bill_of_materials(restaurant_id) -> BillOfMaterials:
+    """Explode every recipe of the tenant into ``{item_id: qty}`` per portion.
+
+    Three queries: recipes with their lines, and the tenant's stock items.
+    """
+    from menu.models import Recipe, RecipeIngredient
+
+    from .models import InventoryItem
+
+    recipes = {
+        r.pk: r
+        for r in Recipe.objects.filter(menu_item__restaurant_id=restaurant_id)
+        .select_related("menu_item")
+        .prefetch_related(
+            Prefetch("ingredients", queryset=RecipeIngredient.objects.select_related("ingredient"))
+        )
+    }
+    bom = BillOfMaterials()
+    stock = {
+        item.pk: item
+        for item in InventoryItem.objects.filter(restaurant_id=restaurant_id, is_active=True).only(
+            "id", "name", "unit", "pack_size", "cost_per_unit"
+        )
+    }
+    bom.items = stock
+    by_name = {item.name.lower(): item for item in stock.values()}
+
+    def explode(recipe, factor: Decimal, out: Dict, stack: Tuple) -> None:
+        if recipe.pk in stack or len(stack) >= MAX_DEPTH:
+            logger.warning("Recipe depletion cycle through recipe %s", recipe.pk)
+            return
+        stack = (*stack, recipe.pk)
+        for ri in recipe.ingredients.all():
+            ing = ri.ingredient
+            qty = _dec(ri.quantity) * factor
+            unit = ri.unit or ing.unit
+            prep = recipes.get(ing.prep_recipe_id) if ing.prep_recipe_id else None
+            if prep is not None:
+                in_ing_unit, ok = convert(qty, unit, ing.unit)
+                if not ok:
+                    bom.unconverted.add(ing.name)
+                    continue
+                explode(prep, in_ing_unit / (_dec(ing.prep_yield) or Decimal("1")), out, stack)
+                continue
+            item = stock.get(ing.inventory_item_id) or by_name.get(ing.name.lower())
+            if item is None:
+                bom.unmapped.add(ing.name)
+                continue
+            in_item_unit, ok = convert(qty, unit, item.unit, item.pack_size)
+            if not ok:
+                bom.unconverted.add(ing.name)
+                continue
+            out[item.pk] = out.get(item.pk, ZERO) + in_item_unit
+
+    for recipe in recipes.values():
+        per_portion: Dict = {}
+        explode(recipe, Decimal("1"), per_portion, ())
+        if per_portion:
+            bom.per_portion[recipe.menu_item.name.lower()] = per_portion
+    return bom
+
+
+def _sales_by_day(restaurant_id, start_date: date, end_date: date) -> Dict[date, Dict[str, Decimal]]:
+    """``{day: {lower item name: quantity}}`` summed across locations."""
+    from pos.models import POSItemSalesDaily
+
+    out: Dict[date, Dict[str, Decimal]] = defaultdict(dict)
+    rows = (
+        POSItemSalesDaily.objects.filter(
+            restaurant_id=restaurant_id, sales_date__gte=start_date, sales_date__lte=end_date
+        )
+        .annotate(lname=Lower("item_name"))
+        .values("sales_date", "lname")
+        .annotate(qty=Sum("quantity"))
+        .values_list("sales_date", "lname", "qty")
+    )
+    for day, name, qty in rows:
+        out[day][name] = out[day].get(name, ZERO) + _dec(qty)
+    return out
+
+
+def compute_usage(bom: BillOfMaterials, sales: Dict[date, Dict[str, Decimal]]) -> Dict[Tuple, Dict]:
+    """``{(day, item_id): {'quantity', 'portions'}}`` for the given sales."""
+    usage: Dict[Tuple, Dict] = {}
+    for day, items in sales.items():
+        for name, sold in items.items():
+            per_portion = bom.per_portion.get(name)
+            if not per_portion or not sold:
+                continue
+            for item_id, qty in per_portion.items():
+                row = usage.setdefault((day, item_id), {"quantity": ZERO, "portions": ZERO})
+                row["quantity"] += qty * sold
+                row["portions"] += sold
+    return usage
+
+
+def _stock_qty(value) -> Decimal:
+    return _dec(value).quantize(STOCK_PLACES)
+
+
+def _stored_start(restaurant) -> Optional[date]:
+    gs = restaurant.general_settings if isinstance(restaurant.general_settings, dict) else {}
+    try:
+        return date.fromisoformat(str(gs.get(DEPLETION_START_KEY)))
+    except ValueError:
+        return None
+
+
+def _stamp_depletion_start(restaurant_id) -> date:
+    """Record the tenant's today as its depletion start, unless a concurrent
+    pass got there first. Locks the row so other settings aren't clobbered."""
+    from accounts.models import Restaurant
+    from core.tenant_time import tenant_today
+
+    with transaction.atomic():
+        restaurant = Restaurant.objects.select_for_update().get(pk=restaurant_id)
+        start = _stored_start(restaurant)
+        if start is None:
+            # First pass for this tenant: anything synced so far (the history
+            # backfilled when the POS was connected) predates the stock on hand.
+            start = tenant_today(restaurant)
+            gs = restaurant.general_settings if isinstance(restaurant.general_settings, dict) else {}
+            restaurant.general_settings = {**gs, DEPLETION_START_KEY: start.isoformat()}
+            restaurant.save(update_fields=["general_settings"])
+    return start
+
+
+def depletion_start(restaurant_id) -> Optional[date]:
+    """First day whose sales may move this tenant's stock.
+
+    The later of the tenant's depletion start and the local day its last
+    count completed (the day after ``count_date`` for counts without a
+    completion time). None when the tenant does not exist.
+    """
+    from accounts.models import Restaurant
+    from core.tenant_time import local_day
+
+    from .models import InventoryCountSession
+
+    restaurant = Restaurant.objects.filter(pk=restaurant_id).only("id", "timezone", "general_settings").first()
+    if restaurant is None:
+        return None
+    start = _stored_start(restaurant) or _stamp_depletion_start(restaurant_id)
+    last = InventoryCountSession.objects.filter(restaurant_id=restaurant_id, status="COMPLETED").aggregate(
+        completed=Max("completed_at"),
+        undated=Max("count_date", filter=Q(completed_at__isnull=True)),
+    )
+    if last["completed"] is not None:
+        start = max(start, local_day(restaurant, last["completed"]))
+    if last["undated"] is not None:
+        start = max(start, last["undated"] + timedelta(days=1))
+    return start
+
+
+def deplete_sales_window(restaurant_id, start_date: date, end_date: date) -> Dict:
+    """Rebuild theoretical usage for ``[start_date, end_date]`` and apply it to stock.
+
+    The window is clipped to :func:`depletion_start`. Idempotent: running it
+    again over unchanged sales writes the same rows and moves no stock.
+    Returns a small summary for logs and task results.
+    """
+    from pos.models import POSItemSalesCoverage
+
+    from .models import StockMovement, TheoreticalUsage
+
+    floor = depletion_start(restaurant_id)
+    if floor is None or floor > end_date:
+        return {"rows": 0, "items_moved": 0, "unmapped": [], "unconverted": []}
+    start_date = max(start_date, floor)
+
+    bom = build_bill_of_materials(restaurant_id)
+    summary = {"rows": 0, "items_moved": 0, "unmapped": sorted(bom.unmapped), "unconverted": sorted(bom.unconverted)}
+
+    with transaction.atomic():
+        # Serialize passes over the same days (sync task vs webhook refresh).
+        list(
+            POSItemSalesCoverage.objects.select_for_update()
+            .filter(restaurant_id=restaurant_id, sales_date__gte=start_date, sales_date__lte=end_date)
+            .values_list("id", flat=True)
+        )
+        usage = compute_usage(bom, _sales_by_day(restaurant_id, start_date, end_date))
+
+        window = TheoreticalUsage.objects.filter(
+            restaurant_id=restaurant_id, usage_date__gte=start_date, usage_date__lte=end_date
+        )
+        delta: Dict = defaultdict(lambda: ZERO)
+        for item_id, qty in window.values_list("inventory_item_id", "quantity"):
+            delta[item_id] -= _stock_qty(qty)
+        rows: List[TheoreticalUsage] = []
+        for (day, item_id), vals in usage.items():
+            qty = vals["quantity"].quantize(USAGE_PLACES)
+            delta[item_id] += _stock_qty(qty)
+            rows.append(
+                TheoreticalUsage(
+                    restaurant_id=restaurant_id,
+                    inventory_item_id=item_id,
+                    usage_date=day,
+                    quantity=qty,
+                    cost=(qty * _dec(bom.items[item_id].cost_per_unit)).quantize(USAGE_PLACES),
+                    portions=vals["portions"],
+                )
+            )
+        window.delete()
+        TheoreticalUsage.objects.bulk_create(rows, batch_size=1000)
+
+        moved = record_movements(
+            StockMovement(
+                restaurant_id=restaurant_id,
+                inventory_item_id=item_id,
+                kind=StockMovement.KIND_POS_DEPLETION,
+                quantity=-d,
+                reference=f"pos:{start_date.isoformat()}..{end_date.isoformat()}",
+            )
+            for item_id, d in delta.items()
+            if d
+        )
+    summary["rows"] = len(rows)
+    summary["items_moved"] = len(moved)
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Variance
+# ---------------------------------------------------------------------------
+
+
+def _count_variances(restaurant_id, start_date: date, end_date: date) -> Dict[str, Decimal]:
+    """Summed ``counted - expected`` per item from completed counts in the window."""
+    from .models import InventoryCountSession
+
+    out: Dict[str, Decimal] = defaultdict(lambda: ZERO)
+    sessions = InventoryCountSession.objects.filter(
+        restaurant_id=restaurant_id,
+        status="COMPLETED",
+        count_date__gte=start_date,
+        count_date__lte=end_date,
+    ).values_list("count_data", flat=True)
+    for data in sessions:
+        for item_id, row in ((data or {}).get("counts") or {}).items():
+            out[str(item_id)] += _dec(row.get("variance"))
+    return out
+
+
+def variance_report(restaurant, start_date: date, end_date: date, *, items: Optional[Iterable] = None) -> Dict:
+    """Theoretical vs actual usage per stock item for a date window.
+
+    * ``theoretical`` — sales exploded through recipes (:class:`TheoreticalUsage`);
+    * ``waste`` — logged :class:`~inventory.models.WasteEntry` quantities;
+    * ``count_variance`` — ``counted - expected`` from completed counts, where
+      expected already reflects POS depletion, so a shortfall is stock that
+      left without a sale or a waste entry;
+    * ``actual`` — ``theoretical + waste - count_variance``.
+
+    Items are sorted by the cost of unexplained variance, worst first.
+    """
+    from .models import InventoryItem, TheoreticalUsage, WasteEntry
+
+    qs = InventoryItem.objects.filter(restaurant=restaurant)
+    if items is not None:
+        qs = qs.filter(pk__in=list(items))
+    stock = {item.pk: item for item in qs.only("id", "name", "unit", "pack_size", "cost_per_unit")}
+
+    theoretical: Dict = defaultdict(lambda: ZERO)
+    theoretical_cost: Dict = defaultdict(lambda: ZERO)
+    for item_id, qty, cost in (
+        TheoreticalUsage.objects.filter(
+            restaurant=restaurant, usage_date__gte=start_date, usage_date__lte=end_date, inventory_item_id__in=list(stock)
+        )
+        .values("inventory_item_id")
+        .annotate(qty=Sum("quantity"), cost=Sum("cost"))
+        .values_list("inventory_item_id", "qty", "cost")
+    ):
+        theoretical[item_id] = _dec(qty)
+        theoretical_cost[item_id] = _dec(cost)
+
+    waste: Dict = defaultdict(lambda: ZERO)
+    for item_id, qty, unit in WasteEntry.objects.filter(
+        restaurant=restaurant, waste_date__gte=start_date, waste_date__lte=end_date, inventory_item_id__in=list(stock)
+    ).values_list("inventory_item_id", "quantity", "unit"):
+        item = stock[item_id]
+        converted, _ = convert(qty, unit or item.unit, item.unit, item.pack_size)
+        waste[item_id] += converted
+
+    counts = _count_variances(restaurant.id, start_date, end_date)
+
+    rows = []
+    totals = {"theoretical_cost": ZERO, "waste_cost": ZERO, "variance_cost": ZERO}
+    for item_id, item in stock.items():
+        t, w, cv = theoretical[item_id], waste[item_id], counts.get(str(item_id), ZERO)
+        if not (t or w or cv):
+            continue
+        unit_cost = _dec(item.cost_per_unit)
+        actual = t + w - cv
+        row = {
+            "inventory_item_id": str(item_id),
+            "name": item.name,
+            "unit": item.unit,
+            "theoretical": float(t.quantize(USAGE_PLACES)),
+            "waste": float(w.quantize(USAGE_PLACES)),
+            "count_variance": float(cv.quantize(USAGE_PLACES)),
+            "actual": float(actual.quantize(USAGE_PLACES)),
+            "theoretical_cost": float(theoretical_cost[item_id].quantize(STOCK_PLACES)),
+            "waste_cost": float((w * unit_cost).quantize(STOCK_PLACES)),
+            "variance_cost": float((-cv * unit_cost).quantize(STOCK_PLACES)),
+            "variance_pct": float((-cv / t * 100).quantize(Decimal("0.1"))) if t else None,
+        }
+        totals["theoretical_cost"] += theoretical_cost[item_id]
+        totals["waste_cost"] += w * unit_cost
+        totals["variance_cost"] += -cv * unit_cost
+        rows.append(row)
+    rows.sort(key=lambda r: r["variance_cost"], reverse=True)
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "items": rows,
+        "totals": {k: float(v.quantize(STOCK_PLACES)) for k, v in totals.items()},
+    }
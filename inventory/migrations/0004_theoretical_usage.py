@@ -0,0 +1,33 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('inventory', '0003_prep_planning_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TheoreticalUsage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usage_date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=4, help_text="In the stock item's unit", max_digits=14)),
+                ('cost', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('portions', models.DecimalField(decimal_places=3, default=0, help_text='Menu portions sold that used this item', max_digits=14)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='theoretical_usage', to='inventory.inventoryitem')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='theoretical_usage', to='accounts.restaurant')),
+            ],
+            options={
+                'db_table': 'inventory_theoretical_usage',
+                'indexes': [models.Index(fields=['restaurant', 'usage_date'], name='inventory_t_restaur_a5c565_idx')],
+                'constraints': [models.UniqueConstraint(fields=('inventory_item', 'usage_date'), name='uniq_theoretical_usage_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    """One OPENING movement per item so each ledger sums to current_stock."""
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    StockMovement = apps.get_model("inventory", "StockMovement")
+    batch = []
+    for item_id, restaurant_id, stock in (
+        InventoryItem.objects.exclude(current_stock=0).values_list("id", "restaurant_id", "current_stock").iterator()
+    ):
+        batch.append(
+            StockMovement(
+                restaurant_id=restaurant_id, inventory_item_id=item_id, kind="OPENING", quantity=stock
+            )
+        )
+        if len(batch) >= 1000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('inventory', '0004_theoretical_usage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('OPENING', 'Opening balance'), ('RECEIPT', 'Purchase order receipt'), ('WASTE', 'Waste'), ('ADJUSTMENT', 'Manual adjustment'), ('COUNT', 'Count correction'), ('POS_DEPLETION', 'POS depletion')], max_length=20)),
+                ('quantity', models.DecimalField(decimal_places=2, help_text="Signed, in the item's unit", max_digits=12)),
+                ('reference', models.CharField(blank=True, default='', help_text="Source row, e.g. 'po:<id>'", max_length=64)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'inventory_stock_movements',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('taken_at', models.DateTimeField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('last_movement_id', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'inventory_stock_snapshots',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockadjustment',
+            index=models.Index(fields=['inventory_item', 'created_at'], name='inventory_s_invento_6f9984_idx'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='inventory_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='restaurant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='accounts.restaurant'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='inventory_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='stocksnapshot',
+            name='restaurant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='accounts.restaurant'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['inventory_item', 'created_at'], name='inventory_s_invento_2db6fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['restaurant', 'created_at'], name='inventory_s_restaur_816dc3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocksnapshot',
+            index=models.Index(fields=['inventory_item', 'taken_at'], name='inventory_s_invento_580dd6_idx'),
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:24
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_supplier_signatures(apps, schema_editor):
+    # Frozen copy of finance.po_match.supplier_signature.
+    Supplier = apps.get_model("inventory", "Supplier")
+    batch = []
+    for supplier in Supplier.objects.only("id", "name").iterator():
+        name = re.sub(r"\s+", " ", re.sub(r"[^a-z0-9\s]", " ", (supplier.name or "").lower().strip()))
+        grams = set()
+        for token in name.split():
+            padded = f"  {token} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        supplier.match_name, supplier.match_trigrams = name, sorted(grams)
+        batch.append(supplier)
+    Supplier.objects.bulk_update(batch, ["match_name", "match_trigrams"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('inventory', '0005_stock_movement_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='match_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='supplier',
+            name='match_trigrams',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['restaurant', 'supplier', 'order_date'], name='inventory_p_restaur_f39e01_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['restaurant', 'status', 'order_date'], name='inventory_p_restaur_c72af8_idx'),
+        ),
+        migrations.RunPython(backfill_supplier_signatures, migrations.RunPython.noop),
+    ]
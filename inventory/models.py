@@ -1,6 +1,7 @@
 from django.db import models
 import uuid
 from django.conf import settings
+from django.utils import timezone
 
 class InventoryItem(models.Model):
     UNIT_CHOICES = (
@@ -48,6 +49,35 @@ class InventoryItem(models.Model):
     def __str__(self):
         return f"{self.name} ({self.current_stock} {self.unit})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_cost_key = instance.cost_key()
+        instance._loaded_read_model_key = instance.read_model_key()
+        return instance
+
+    def save(self, *args, **kwargs):
+        # current_stock moves only through inventory.stock_ledger (atomic F()
+        # updates); a full save of a stale instance must not write it back.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.attname for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname != 'current_stock'
+            ]
+        super().save(*args, **kwargs)
+
+    def cost_key(self):
+        """Fields that feed menu recipe costs (menu.cost_graph)."""
+        d = self.__dict__
+        return tuple(d.get(f) for f in ('cost_per_unit', 'unit', 'pack_size', 'name', 'is_active'))
+
+    def read_model_key(self):
+        """Fields a save can change in the agent read model (inventory.read_model)."""
+        d = self.__dict__
+        return tuple(d.get(f) for f in (
+            'name', 'unit', 'reorder_level', 'cost_per_unit', 'last_restock_date', 'supplier_id', 'is_active',
+        ))
+
 class Supplier(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='suppliers')
@@ -60,6 +90,10 @@ class Supplier(models.Model):
         default=2,
         help_text="Days between placing an order and receiving it. Drives the prep list's 'order-by' date.",
     )
+    # Invoice ↔ PO matching signature, kept in step with ``name`` by
+    # finance.signals (see finance.po_match).
+    match_name = models.CharField(max_length=255, blank=True, default='')
+    match_trigrams = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -92,6 +126,12 @@ class PurchaseOrder(models.Model):
 
     class Meta:
         ordering = ['-order_date']
+        indexes = [
+            # Invoice matching scans a tenant's open POs per supplier over a
+            # date window (finance.po_match).
+            models.Index(fields=['restaurant', 'supplier', 'order_date']),
+            models.Index(fields=['restaurant', 'status', 'order_date']),
+        ]
 
     def __str__(self):
         return f"PO#{self.id.hex[:8]} - {self.supplier.name} ({self.order_date})"
@@ -195,6 +235,107 @@ class StockAdjustment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['inventory_item', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.adjustment_type} {self.quantity_changed} {self.inventory_item.unit} of {self.inventory_item.name}"
+
+
+class TheoreticalUsage(models.Model):
+    """Stock consumed by one day of POS sales, per stock item (inventory.depletion).
+
+    Rows for a day are rebuilt whenever that day's POS item sales are
+    re-synced, and only the difference against the previous rows is booked
+    to the stock ledger, so re-running a day is harmless.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='theoretical_usage')
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='theoretical_usage')
+    usage_date = models.DateField()
+    quantity = models.DecimalField(max_digits=14, decimal_places=4, help_text="In the stock item's unit")
+    cost = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    portions = models.DecimalField(max_digits=14, decimal_places=3, default=0, help_text="Menu portions sold that used this item")
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'inventory_theoretical_usage'
+        indexes = [
+            models.Index(fields=['restaurant', 'usage_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['inventory_item', 'usage_date'],
+                name='uniq_theoretical_usage_day',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.usage_date} {self.inventory_item_id} -{self.quantity}"
+
+
+class StockMovement(models.Model):
+    """Append-only stock ledger (inventory.stock_ledger).
+
+    Every change to ``InventoryItem.current_stock`` is recorded here as a
+    signed quantity in the item's unit, in the same transaction as an atomic
+    ``F()`` update of the balance. Rows are never edited; a correction is a
+    new row. The sum of an item's movements is its current stock.
+    """
+    KIND_OPENING = 'OPENING'
+    KIND_RECEIPT = 'RECEIPT'
+    KIND_WASTE = 'WASTE'
+    KIND_ADJUSTMENT = 'ADJUSTMENT'
+    KIND_COUNT = 'COUNT'
+    KIND_POS_DEPLETION = 'POS_DEPLETION'
+    KIND_CHOICES = (
+        (KIND_OPENING, 'Opening balance'),
+        (KIND_RECEIPT, 'Purchase order receipt'),
+        (KIND_WASTE, 'Waste'),
+        (KIND_ADJUSTMENT, 'Manual adjustment'),
+        (KIND_COUNT, 'Count correction'),
+        (KIND_POS_DEPLETION, 'POS depletion'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='stock_movements')
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='movements')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.DecimalField(max_digits=12, decimal_places=2, help_text="Signed, in the item's unit")
+    reference = models.CharField(max_length=64, blank=True, default='', help_text="Source row, e.g. 'po:<id>'")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'inventory_stock_movements'
+        indexes = [
+            models.Index(fields=['inventory_item', 'created_at']),
+            models.Index(fields=['restaurant', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity:+} {self.inventory_item_id}"
+
+
+class StockSnapshot(models.Model):
+    """An item's balance after every movement up to ``last_movement_id``.
+
+    Taken periodically so point-in-time stock is the latest snapshot before
+    the instant plus the (short) tail of movements after it.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='stock_snapshots')
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='snapshots')
+    taken_at = models.DateTimeField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    last_movement_id = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'inventory_stock_snapshots'
+        indexes = [
+            models.Index(fields=['inventory_item', 'taken_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory_item_id} {self.balance} @ {self.taken_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,230 @@
+"""
+Versioned per-tenant inventory read model for Miya.
+
+The agent inventory list used to be rebuilt from the DB (every row turned
+into floats) on each miss of a 45-second cache, and stock writes did not
+invalidate it. So right after a count Miya could answer from a stale list.
+Now:
+
+* Every tenant has a version counter in the shared cache.
+  :func:`mark_items_changed` bumps it after the writing transaction
+  commits. Stock movements (``inventory.stock_ledger``), item and
+  adjustment saves (``inventory.signals``) and the queryset updates in the
+  purchase-order and cost paths all call it.
+* :class:`InventorySnapshot` holds one precomputed compact row per active
+  item, the set of low-stock items and an index by supplier. It is stored
+  under ``(tenant, version)``, so a bump makes readers skip the old entry
+  without deleting it.
+* A write does not throw the snapshot away. It re-reads only the items it
+  touched (one query), patches their rows and low-stock flags, and stores
+  the result under the new version. When another write bumped the version
+  in between, the patch is dropped and the next reader rebuilds.
+
+Filtered reads (low stock, by supplier, by name) are served from the
+snapshot with no query. ``SNAPSHOT_TTL`` bounds staleness for writes that
+bypass all of the above (raw SQL, another app's ``update()``).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.read_through_cache import safe_cache_get, safe_cache_set
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL = 600
+_VERSION_TTL = 24 * 3600
+
+_ROW_FIELDS = (
+    "id", "name", "current_stock", "unit", "reorder_level", "cost_per_unit",
+    "last_restock_date", "supplier_id", "is_active",
+)
+
+
+def _version_key(restaurant_id) -> str:
+    return f"inventory:readmodel:ver:{restaurant_id}"
+
+
+def _snapshot_key(restaurant_id, version) -> str:
+    return f"inventory:readmodel:{restaurant_id}:{version}"
+
+
+def _seed() -> int:
+    # A counter that was evicted must not restart below a version whose
+    # snapshot is still cached, so it restarts from the clock (microseconds).
+    return time.time_ns() // 1000
+
+
+def current_version(restaurant_id) -> Optional[int]:
+    """The tenant's read-model version; ``None`` when the cache is down."""
+    key = _version_key(restaurant_id)
+    try:
+        cache.add(key, _seed(), _VERSION_TTL)
+        return cache.get(key)
+    except Exception as exc:
+        logger.warning("inventory version read failed key=%s: %s", key, exc)
+        return None
+
+
+def bump_version(restaurant_id) -> Optional[int]:
+    """Move the tenant to a new version; returns it (``None`` on cache errors)."""
+    key = _version_key(restaurant_id)
+    try:
+        cache.add(key, _seed(), _VERSION_TTL)
+        version = cache.incr(key)
+        cache.touch(key, _VERSION_TTL)
+        return version
+    except Exception as exc:
+        logger.warning("inventory version bump failed key=%s: %s", key, exc)
+        return None
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def compact_row(values: Dict) -> Dict:
+    """Agent-facing row for one ``InventoryItem.values(*_ROW_FIELDS)`` dict."""
+    stock = float(values["current_stock"] or 0)
+    reorder = _float(values["reorder_level"])
+    restocked = values.get("last_restock_date")
+    return {
+        "id": str(values["id"]),
+        "name": values["name"],
+        "current_stock": stock,
+        "unit": values["unit"],
+        "reorder_level": reorder,
+        "cost_per_unit": float(values["cost_per_unit"] or 0),
+        "last_restock_date": restocked.isoformat() if restocked else None,
+        "supplier_id": str(values["supplier_id"]) if values.get("supplier_id") else None,
+        "low_stock": reorder is not None and stock <= reorder,
+    }
+
+
+def _fetch_rows(restaurant_id, item_ids=None) -> List[Dict]:
+    from .models import InventoryItem
+
+    qs = InventoryItem.objects.filter(restaurant_id=restaurant_id)
+    if item_ids is None:
+        qs = qs.filter(is_active=True)
+    else:
+        qs = qs.filter(pk__in=list(item_ids))
+    return [compact_row(v) for v in qs.order_by("name").values(*_ROW_FIELDS) if v["is_active"]]
+
+
+class InventorySnapshot:
+    """Compact rows of a tenant's active items, in name order, plus indexes."""
+
+    def __init__(self, restaurant_id, version, rows: List[Dict], low_stock=None):
+        self.restaurant_id = str(restaurant_id)
+        self.version = version
+        self.rows = rows
+        # Maintained row by row on patches; computed once on a full build.
+        self.low_stock = set(low_stock) if low_stock is not None else {r["id"] for r in rows if r["low_stock"]}
+        self.by_supplier: Dict[str, set] = {}
+        for row in rows:
+            if row["supplier_id"]:
+                self.by_supplier.setdefault(row["supplier_id"], set()).add(row["id"])
+
+    @classmethod
+    def build(cls, restaurant_id, version) -> "InventorySnapshot":
+        return cls(restaurant_id, version, _fetch_rows(restaurant_id))
+
+    def patched(self, version, item_ids: Iterable, fresh_rows: List[Dict]) -> "InventorySnapshot":
+        """Copy with ``item_ids`` replaced by ``fresh_rows`` (absent = removed)."""
+        touched = {str(i) for i in item_ids}
+        rows = [r for r in self.rows if r["id"] not in touched] + fresh_rows
+        rows.sort(key=lambda r: r["name"])
+        low = (self.low_stock - touched) | {r["id"] for r in fresh_rows if r["low_stock"]}
+        return InventorySnapshot(self.restaurant_id, version, rows, low)
+
+    def items(self, *, low_stock: bool = False, supplier_id=None, query: str = "") -> List[Dict]:
+        """Rows in name order, narrowed by the given filters."""
+        wanted = None
+        if low_stock:
+            wanted = self.low_stock
+        if supplier_id:
+            ids = self.by_supplier.get(str(supplier_id), set())
+            wanted = ids if wanted is None else wanted & ids
+        rows = self.rows if wanted is None else [r for r in self.rows if r["id"] in wanted]
+        needle = (query or "").strip().casefold()
+        if needle:
+            rows = [r for r in rows if needle in r["name"].casefold()]
+        return rows
+
+
+def inventory_snapshot(restaurant_id) -> InventorySnapshot:
+    """The tenant's snapshot at its current version (no query when cached)."""
+    version = current_version(restaurant_id)
+    if version is None:
+        return InventorySnapshot.build(restaurant_id, None)
+    key = _snapshot_key(restaurant_id, version)
+    snapshot = safe_cache_get(key)
+    if snapshot is None:
+        snapshot = InventorySnapshot.build(restaurant_id, version)
+        safe_cache_set(key, snapshot, SNAPSHOT_TTL)
+    return snapshot
+
+
+def apply_item_changes(restaurant_id, item_ids: Iterable) -> Optional[int]:
+    """Bump the tenant's version, carrying the cached snapshot forward.
+
+    Only the touched items are re-read. Returns the new version.
+    """
+    item_ids = {str(i) for i in item_ids}
+    base = current_version(restaurant_id)
+    snapshot = safe_cache_get(_snapshot_key(restaurant_id, base)) if base is not None else None
+    fresh = _fetch_rows(restaurant_id, item_ids) if snapshot is not None and item_ids else None
+    version = bump_version(restaurant_id)
+    if version is not None and fresh is not None and version == base + 1:
+        safe_cache_set(
+            _snapshot_key(restaurant_id, version), snapshot.patched(version, item_ids, fresh), SNAPSHOT_TTL
+        )
+    return version
+
+
+# ---------------------------------------------------------------------------
+# Deferred bumps (one per tenant per transaction)
+# ---------------------------------------------------------------------------
+
+_pending = threading.local()
+
+
+def mark_items_changed(restaurant_id, item_ids: Iterable = ()) -> None:
+    """Queue a version bump for after the current transaction commits.
+
+    With no ``item_ids`` the next reader rebuilds the whole snapshot (use
+    for writes whose reach is unknown, e.g. a supplier delete nulling
+    ``supplier`` on its items).
+    """
+    if not restaurant_id:
+        return
+    state = getattr(_pending, "state", None)
+    if state is None:
+        state = _pending.state = {}
+    rid = str(restaurant_id)
+    ids = {str(i) for i in item_ids}
+    queued = state.get(rid, set())
+    state[rid] = None if queued is None or not ids else queued | ids
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    state = getattr(_pending, "state", None)
+    if not state:
+        return
+    _pending.state = None
+    for restaurant_id, item_ids in state.items():
+        try:
+            if item_ids is None:
+                bump_version(restaurant_id)
+            else:
+                apply_item_changes(restaurant_id, item_ids)
+        except Exception:
+            logger.exception("Inventory read model update failed restaurant=%s", restaurant_id)
@@ -0,0 +1,54 @@
+"""Stock ledger opening rows (``inventory.stock_ledger``) and agent read
+model refreshes (``inventory.read_model``)."""
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import InventoryItem, StockAdjustment, StockMovement, Supplier
+from .read_model import mark_items_changed
+
+
+@receiver(post_save, sender=InventoryItem)
+def open_stock_ledger(sender, instance, created, raw=False, **kwargs):
+    """Record the stock an item was created with, so its movements sum to
+    ``current_stock`` from the start. The balance is already set, so this
+    row is written directly rather than through ``record_movements``."""
+    if not created or raw or not instance.current_stock:
+        return
+    StockMovement.objects.create(
+        restaurant_id=instance.restaurant_id,
+        inventory_item=instance,
+        kind=StockMovement.KIND_OPENING,
+        quantity=instance.current_stock,
+    )
+
+
+@receiver(post_save, sender=InventoryItem)
+def refresh_item_read_model(sender, instance, created, raw=False, **kwargs):
+    # Saves never write current_stock (stock moves through the ledger), so
+    # one that leaves the agent-visible fields alone changes nothing there.
+    before = getattr(instance, "_loaded_read_model_key", None)
+    instance._loaded_read_model_key = instance.read_model_key()
+    if raw or (not created and before == instance._loaded_read_model_key):
+        return
+    mark_items_changed(instance.restaurant_id, [instance.pk])
+
+
+@receiver(post_delete, sender=InventoryItem)
+def drop_item_from_read_model(sender, instance, **kwargs):
+    mark_items_changed(instance.restaurant_id, [instance.pk])
+
+
+@receiver(post_save, sender=StockAdjustment)
+@receiver(post_delete, sender=StockAdjustment)
+def refresh_adjusted_item_read_model(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    mark_items_changed(instance.restaurant_id, [instance.inventory_item_id])
+
+
+@receiver(post_delete, sender=Supplier)
+def rebuild_read_model_on_supplier_delete(sender, instance, **kwargs):
+    # SET_NULL clears ``supplier`` on its items with a queryset update.
+    mark_items_changed(instance.restaurant_id)
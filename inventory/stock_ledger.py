@@ -0,0 +1,239 @@
+"""
+Append-only stock movement ledger.
+
+``InventoryItem.current_stock`` is the O(1) running balance; every change to
+it goes through :func:`record_movements`, which appends
+:class:`~inventory.models.StockMovement` rows and moves the balances with a
+single ``UPDATE ... SET current_stock = current_stock + delta`` in the same
+transaction. No read-modify-write, so a WhatsApp count and a dashboard
+adjustment landing together can no longer overwrite each other.
+
+Point-in-time stock ("what did we have last Sunday") is the item's latest
+:class:`~inventory.models.StockSnapshot` before the instant plus the
+movements after it — an index seek and a short tail instead of a replay of
+the item's history. :func:`take_snapshots` runs hourly; items created
+later are covered by their ``OPENING`` movement until their first snapshot.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .read_model import mark_items_changed
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+STOCK_PLACES = Decimal("0.01")
+# Movements younger than this may still belong to open transactions, so a
+# snapshot stops short of them (its id bound must never skip a late commit).
+SNAPSHOT_SETTLE = timedelta(minutes=5)
+SNAPSHOT_BATCH_SIZE = 1000
+
+_STOCK = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _dec(value) -> Decimal:
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def movement(item, quantity, kind: str, *, reference: str = "", user=None):
+    """Unsaved :class:`StockMovement` for ``item`` (``quantity`` is signed)."""
+    from .models import StockMovement
+
+    return StockMovement(
+        restaurant_id=item.restaurant_id,
+        inventory_item_id=item.pk,
+        kind=kind,
+        quantity=_dec(quantity).quantize(STOCK_PLACES),
+        reference=(reference or "")[:64],
+        created_by=user,
+    )
+
+
+def record_movements(movements: Iterable) -> List:
+    """Append movements and apply them to ``current_stock`` atomically.
+
+    One ``bulk_create`` plus one ``UPDATE`` however many rows and items.
+    Zero-quantity rows are dropped. Returns the rows written. The touched
+    items are refreshed in the agent read model on commit
+    (``inventory.read_model``).
+    """
+    from .models import InventoryItem, StockMovement
+
+    rows = [m for m in movements if m.quantity]
+    if not rows:
+        return []
+    deltas: Dict = {}
+    for m in rows:
+        deltas[m.inventory_item_id] = deltas.get(m.inventory_item_id, ZERO) + m.quantity
+    deltas = {item_id: d for item_id, d in deltas.items() if d}
+    with transaction.atomic():
+        StockMovement.objects.bulk_create(rows, batch_size=1000)
+        if deltas:
+            InventoryItem.objects.filter(pk__in=list(deltas)).update(
+                current_stock=Case(
+                    *[When(pk=item_id, then=F("current_stock") + Value(d)) for item_id, d in deltas.items()],
+                    output_field=_STOCK,
+                ),
+                updated_at=timezone.now(),
+            )
+        touched: Dict = {}
+        for m in rows:
+            touched.setdefault(m.restaurant_id, set()).add(m.inventory_item_id)
+        for restaurant_id, item_ids in touched.items():
+            mark_items_changed(restaurant_id, item_ids)
+    return rows
+
+
+def record_movement(item, quantity, kind: str, *, reference: str = "", user=None):
+    """Single-row :func:`record_movements`; refreshes ``item.current_stock``."""
+    rows = record_movements([movement(item, quantity, kind, reference=reference, user=user)])
+    item.refresh_from_db(fields=["current_stock"])
+    return rows[0] if rows else None
+
+
+# ---------------------------------------------------------------------------
+# Point-in-time balances
+# ---------------------------------------------------------------------------
+
+
+def _with_balance_at(items, when: datetime):
+    """Annotate ``balance_at``: latest snapshot at/before ``when`` + later movements."""
+    from .models import StockMovement, StockSnapshot
+
+    latest = StockSnapshot.objects.filter(inventory_item=OuterRef("pk"), taken_at__lte=when).order_by(
+        "-taken_at", "-id"
+    )
+    tail = (
+        StockMovement.objects.filter(
+            inventory_item=OuterRef("pk"), created_at__lte=when, id__gt=OuterRef("snap_last")
+        )
+        .order_by()
+        .values("inventory_item")
+        .annotate(s=Sum("quantity"))
+        .values("s")
+    )
+    return items.annotate(
+        snap_balance=Coalesce(Subquery(latest.values("balance")[:1]), Value(ZERO), output_field=_STOCK),
+        snap_last=Coalesce(Subquery(latest.values("last_movement_id")[:1]), Value(0)),
+    ).annotate(
+        balance_at=F("snap_balance") + Coalesce(Subquery(tail), Value(ZERO), output_field=_STOCK),
+    )
+
+
+def stock_levels_at(restaurant, when: datetime, *, active_only: bool = True) -> Dict:
+    """``{item_id: balance}`` for every stock item of the tenant at ``when``.
+
+    One query: two index seeks on snapshots and one on movements per item.
+    """
+    from .models import InventoryItem
+
+    items = InventoryItem.objects.filter(restaurant=restaurant)
+    if active_only:
+        items = items.filter(is_active=True)
+    return {item_id: _dec(balance) for item_id, balance in _with_balance_at(items, when).values_list("id", "balance_at")}
+
+
+def stock_at(item, when: datetime) -> Decimal:
+    """Balance of one item at ``when``."""
+    from .models import InventoryItem
+
+    row = _with_balance_at(InventoryItem.objects.filter(pk=item.pk), when).values_list("balance_at", flat=True).first()
+    return _dec(row)
+
+
+def take_snapshots(now: Optional[datetime] = None, restaurant_id=None) -> int:
+    """Snapshot every item that has settled movements since its last snapshot.
+
+    Balances are rolled forward from the previous snapshot through the ledger
+    (never read from ``current_stock``), up to the newest movement older than
+    ``SNAPSHOT_SETTLE``. Returns the number of snapshots written.
+    """
+    from .models import InventoryItem, StockMovement, StockSnapshot
+
+    taken_at = (now or timezone.now()) - SNAPSHOT_SETTLE
+    settled = StockMovement.objects.filter(created_at__lte=taken_at)
+    if restaurant_id is not None:
+        settled = settled.filter(restaurant_id=restaurant_id)
+    upto = settled.aggregate(m=Max("id"))["m"]
+    if upto is None:
+        return 0
+
+    latest = StockSnapshot.objects.filter(inventory_item=OuterRef("pk")).order_by("-taken_at", "-id")
+    pending = (
+        StockMovement.objects.filter(inventory_item=OuterRef("pk"), id__gt=OuterRef("snap_last"), id__lte=upto)
+        .order_by()
+        .values("inventory_item")
+    )
+    items = InventoryItem.objects.all()
+    if restaurant_id is not None:
+        items = items.filter(restaurant_id=restaurant_id)
+    items = (
+        items.annotate(
+            snap_balance=Coalesce(Subquery(latest.values("balance")[:1]), Value(ZERO), output_field=_STOCK),
+            snap_last=Coalesce(Subquery(latest.values("last_movement_id")[:1]), Value(0)),
+        )
+        .annotate(
+            moved=Subquery(pending.annotate(s=Sum("quantity")).values("s")),
+            n=Coalesce(Subquery(pending.annotate(c=Count("id")).values("c")), Value(0)),
+        )
+        .filter(n__gt=0)
+        .values_list("id", "restaurant_id", "snap_balance", "moved")
+    )
+
+    written = 0
+    batch: List[StockSnapshot] = []
+    for item_id, rid, balance, moved in items.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+        batch.append(
+            StockSnapshot(
+                restaurant_id=rid,
+                inventory_item_id=item_id,
+                taken_at=taken_at,
+                balance=_dec(balance) + _dec(moved),
+                last_movement_id=upto,
+            )
+        )
+        if len(batch) >= SNAPSHOT_BATCH_SIZE:
+            StockSnapshot.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        StockSnapshot.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def inventory_valuation(restaurant, when: datetime) -> Dict:
+    """Stock value and below-reorder items at ``when``, from snapshots."""
+    from .models import InventoryItem
+
+    levels = stock_levels_at(restaurant, when)
+    total = ZERO
+    low = []
+    for item_id, name, unit, cost, reorder in InventoryItem.objects.filter(pk__in=list(levels)).values_list(
+        "id", "name", "unit", "cost_per_unit", "reorder_level"
+    ):
+        balance = levels[item_id]
+        total += balance * _dec(cost)
+        if reorder is not None and balance <= reorder:
+            low.append(
+                {
+                    "id": str(item_id),
+                    "name": name,
+                    "current_stock": float(balance),
+                    "reorder_level": float(reorder),
+                    "unit": unit,
+                }
+            )
+    low.sort(key=lambda row: row["name"])
+    return {"total_value": total.quantize(STOCK_PLACES), "low_stock_items": low}
@@ -0,0 +1,14 @@
+"""Periodic stock ledger maintenance (see ``inventory.stock_ledger``)."""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from celery import shared_task
+
+from .stock_ledger import take_snapshots
+
+
+@shared_task
+def snapshot_stock_balances() -> Dict[str, Any]:
+    """Snapshot every item that moved since its last snapshot."""
+    return {"success": True, "snapshots": take_snapshots()}
@@ -0,0 +1,155 @@
+"""Theoretical depletion: POS item sales exploded through recipes into stock
+usage, applied to on-hand stock idempotently, and the variance report."""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Restaurant
+from inventory.depletion import (
+    DEPLETION_START_KEY,
+    build_bill_of_materials,
+    deplete_sales_window,
+    depletion_start,
+    variance_report,
+)
+from inventory.models import InventoryCountSession, InventoryItem, TheoreticalUsage, WasteEntry
+from menu.models import Ingredient, MenuItem, Recipe, RecipeIngredient
+from pos.sales_facts import item_sales_facts_by_date, store_item_sales_facts
+
+DAY = date(2026, 3, 2)
+
+
+class DepletionTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(
+            name="Depletion Pizzeria", email="deplete@pizza.test",
+            general_settings={DEPLETION_START_KEY: "2026-03-01"},
+        )
+        self.flour = self._stock("Flour", "KG", "20.00", "1.00")
+        self.cheese = self._stock("Mozzarella", "KG", "10.00", "8.00")
+
+        flour = self._ingredient("Flour", "GRAM")
+        cheese = self._ingredient("Cheese", "GRAM", inventory_item=self.cheese)
+        # 500 g flour makes 1 kg of dough.
+        dough_recipe = self._recipe("Dough (prep)", [(flour, "500", "g")])
+        dough = self._ingredient("Dough", "KG", prep_recipe=dough_recipe, prep_yield=Decimal("1"))
+        self._recipe("Pizza", [(dough, "250", "g"), (cheese, "100", "g")])
+        self._recipe("Salad", [(self._ingredient("Lettuce", "GRAM"), "80", "g")])
+
+    def _stock(self, name, unit, on_hand, cost):
+        return InventoryItem.objects.create(
+            restaurant=self.restaurant, name=name, unit=unit,
+            current_stock=Decimal(on_hand), cost_per_unit=Decimal(cost),
+        )
+
+    def _ingredient(self, name, unit, **extra):
+        return Ingredient.objects.create(restaurant=self.restaurant, name=name, unit=unit, **extra)
+
+    def _recipe(self, name, lines):
+        item = MenuItem.objects.create(restaurant=self.restaurant, name=name, price=10)
+        recipe = Recipe.objects.create(menu_item=item, instructions="-")
+        for ingredient, qty, unit in lines:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=Decimal(qty), unit=unit)
+        return recipe
+
+    def _sell(self, **items):
+        facts = {DAY: {name.replace("_", " ").title(): {"quantity": qty, "revenue": 0} for name, qty in items.items()}}
+        store_item_sales_facts(self.restaurant, facts, DAY, DAY)
+
+    def _on_hand(self, item):
+        item.refresh_from_db()
+        return item.current_stock
+
+    def test_bill_of_materials_follows_prep_recipes_and_converts_units(self):
+        bom = build_bill_of_materials(self.restaurant.id)
+        # 0.25 kg dough -> 125 g flour; 100 g cheese
+        self.assertEqual(bom.per_portion["pizza"], {self.flour.pk: Decimal("0.125"), self.cheese.pk: Decimal("0.1")})
+        self.assertEqual(bom.unmapped, {"Lettuce"})
+
+    def test_sync_depletes_stock_and_resync_applies_only_the_difference(self):
+        self._sell(pizza=40)
+        self.assertEqual(self._on_hand(self.flour), Decimal("15.00"))
+        self.assertEqual(self._on_hand(self.cheese), Decimal("6.00"))
+        usage = TheoreticalUsage.objects.get(inventory_item=self.flour, usage_date=DAY)
+        self.assertEqual((usage.quantity, usage.cost, usage.portions), (Decimal("5"), Decimal("5"), Decimal("40")))
+
+        self.assertEqual(deplete_sales_window(self.restaurant.id, DAY, DAY)["items_moved"], 0)
+        self.assertEqual(self._on_hand(self.flour), Decimal("15.00"))
+
+        # A late void: 32 pizzas, not 40.
+        self._sell(pizza=32)
+        self.assertEqual(self._on_hand(self.flour), Decimal("16.00"))
+        self.assertEqual(TheoreticalUsage.objects.filter(restaurant=self.restaurant).count(), 2)
+
+        self._sell()
+        self.assertEqual(self._on_hand(self.cheese), Decimal("10.00"))
+        self.assertFalse(TheoreticalUsage.objects.exists())
+
+    def test_query_count_is_independent_of_sales_volume(self):
+        self._sell(pizza=4)
+        with self.assertNumQueries(12):
+            deplete_sales_window(self.restaurant.id, DAY, DAY)
+        for n in range(30):
+            MenuItem.objects.create(restaurant=self.restaurant, name=f"Special {n}", price=1)
+        self._sell(pizza=4000, **{f"special_{n}": n for n in range(30)})
+        with self.assertNumQueries(12):
+            deplete_sales_window(self.restaurant.id, DAY, DAY)
+
+    def test_sales_synced_after_the_count_completes_still_deplete(self):
+        self._sell(pizza=40)
+        self.assertEqual(self._on_hand(self.flour), Decimal("15.00"))
+        completed_at = timezone.make_aware(datetime.combine(DAY, time(15, 0)))
+        InventoryCountSession.objects.create(
+            restaurant=self.restaurant, status="COMPLETED", count_date=DAY, completed_at=completed_at,
+        )
+        self.assertEqual(depletion_start(self.restaurant.id), DAY)
+        # Eight more pizzas rung up that evening: 1 kg of flour.
+        self._sell(pizza=48)
+        self.assertEqual(self._on_hand(self.flour), Decimal("14.00"))
+
+    def test_days_up_to_an_undated_count_are_not_depleted(self):
+        InventoryCountSession.objects.create(restaurant=self.restaurant, status="COMPLETED", count_date=DAY)
+        self.assertEqual(depletion_start(self.restaurant.id), DAY + timedelta(days=1))
+        self._sell(pizza=40)
+        self.assertEqual(self._on_hand(self.flour), Decimal("20.00"))
+        self.assertFalse(TheoreticalUsage.objects.exists())
+
+    def test_first_pass_stamps_the_start_so_history_is_not_depleted(self):
+        self.restaurant.general_settings = {}
+        self.restaurant.save(update_fields=["general_settings"])
+        self._sell(pizza=40)
+        self.assertEqual(self._on_hand(self.flour), Decimal("20.00"))
+        self.restaurant.refresh_from_db()
+        self.assertIn(DEPLETION_START_KEY, self.restaurant.general_settings)
+
+    def test_reader_backfill_stores_facts_without_depleting(self):
+        integration = SimpleNamespace(
+            get_item_sales_facts_for_date_range=lambda start, end: {DAY: {"Pizza": {"quantity": 40, "revenue": 0}}},
+            sales_location_id=lambda: "",
+        )
+        facts = item_sales_facts_by_date(self.restaurant, DAY, DAY, integration=integration)
+        self.assertEqual(facts[DAY]["Pizza"]["quantity"], 40.0)
+        self.assertEqual(self._on_hand(self.flour), Decimal("20.00"))
+
+    def test_variance_report_explains_count_shortfall(self):
+        self._sell(pizza=40)  # theoretical flour on hand: 15 kg
+        WasteEntry.objects.create(
+            restaurant=self.restaurant, inventory_item=self.flour, item_name="Flour",
+            quantity=Decimal("500"), unit="GRAM", waste_date=DAY,
+        )
+        InventoryCountSession.objects.create(
+            restaurant=self.restaurant, status="COMPLETED", count_date=DAY,
+            count_data={"counts": {str(self.flour.pk): {"counted": 13.5, "expected": 15.0, "variance": -1.5}}},
+        )
+        report = variance_report(self.restaurant, DAY, DAY)
+        flour = next(row for row in report["items"] if row["name"] == "Flour")
+        self.assertEqual(flour["theoretical"], 5.0)
+        self.assertEqual(flour["waste"], 0.5)
+        self.assertEqual(flour["actual"], 7.0)
+        self.assertEqual(flour["variance_cost"], 1.5)
+        self.assertEqual(flour["variance_pct"], 30.0)
+        self.assertEqual(report["items"][0]["name"], "Flour")
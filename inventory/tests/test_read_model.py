@@ -0,0 +1,84 @@
+"""Versioned agent inventory read model: bumps on writes, patched snapshots
+and filtered reads without queries."""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Restaurant
+from inventory.models import InventoryItem, StockAdjustment, StockMovement, Supplier
+from inventory.read_model import current_version, inventory_snapshot
+from inventory.stock_ledger import record_movement
+from inventory.views_agent import agent_list_inventory_items
+
+
+@override_settings(MIYA_MASTRA_API_KEY="agent-key")
+class InventoryReadModelTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Read Model Deli", email="read@deli.test")
+        self.supplier = Supplier.objects.create(restaurant=self.restaurant, name="Atlas Oils")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.oil = InventoryItem.objects.create(
+                restaurant=self.restaurant, name="Olive oil", unit="LITER", supplier=self.supplier,
+                current_stock=Decimal("10"), cost_per_unit=Decimal("5.00"), reorder_level=Decimal("4"),
+            )
+            self.salt = InventoryItem.objects.create(
+                restaurant=self.restaurant, name="Salt", unit="KG", current_stock=Decimal("1"),
+                cost_per_unit=Decimal("1.00"), reorder_level=Decimal("2"),
+            )
+
+    def _list(self, **params):
+        request = APIRequestFactory().get(
+            "/api/inventory/agent/items/", {"restaurant_id": str(self.restaurant.id), **params},
+            HTTP_AUTHORIZATION="Bearer agent-key",
+        )
+        return agent_list_inventory_items(request).data
+
+    def test_filters_are_served_from_the_cached_snapshot(self):
+        everything = self._list()
+        self.assertEqual([i["name"] for i in everything["items"]], ["Olive oil", "Salt"])
+        self.assertEqual(everything["items"][0]["current_stock"], 10.0)
+
+        with self.assertNumQueries(0):
+            snapshot = inventory_snapshot(self.restaurant.id)
+            self.assertEqual([i["name"] for i in snapshot.items(low_stock=True)], ["Salt"])
+            self.assertEqual([i["name"] for i in snapshot.items(supplier_id=self.supplier.id)], ["Olive oil"])
+            self.assertEqual([i["name"] for i in snapshot.items(query="OIL")], ["Olive oil"])
+        self.assertEqual(self._list(low_stock="true")["count"], 1)
+
+    def test_stock_and_adjustment_writes_bump_the_version_and_patch_the_snapshot(self):
+        before = inventory_snapshot(self.restaurant.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            record_movement(self.oil, -7, StockMovement.KIND_COUNT)
+        self.assertEqual(current_version(self.restaurant.id), before.version + 1)
+
+        with self.assertNumQueries(0):
+            after = inventory_snapshot(self.restaurant.id)
+        self.assertEqual(after.items(low_stock=True)[0]["name"], "Olive oil")
+        self.assertEqual(after.items(query="olive")[0]["current_stock"], 3.0)
+        self.assertEqual(len(after.items(low_stock=True)), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockAdjustment.objects.create(
+                restaurant=self.restaurant, inventory_item=self.salt, adjustment_type="ADD",
+                quantity_changed=Decimal("5"),
+            )
+            record_movement(self.salt, 5, StockMovement.KIND_ADJUSTMENT)
+        self.assertEqual(current_version(self.restaurant.id), before.version + 2)
+        self.assertEqual([i["name"] for i in self._list(low_stock="1")["items"]], ["Olive oil"])
+
+    def test_deactivated_items_and_deleted_suppliers_leave_the_snapshot(self):
+        inventory_snapshot(self.restaurant.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.is_active = False
+            self.salt.save()
+        self.assertEqual([i["name"] for i in inventory_snapshot(self.restaurant.id).items()], ["Olive oil"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.supplier.delete()
+        listed = self._list(supplier_id=str(self.supplier.id))
+        self.assertEqual(listed["count"], 0)
+        self.assertIsNone(self._list()["items"][0]["supplier_id"])
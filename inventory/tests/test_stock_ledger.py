@@ -0,0 +1,86 @@
+"""Stock movement ledger: atomic balance updates, snapshots and point-in-time
+stock."""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Restaurant
+from inventory.models import InventoryItem, StockMovement, StockSnapshot
+from inventory.stock_ledger import (
+    SNAPSHOT_SETTLE,
+    inventory_valuation,
+    movement,
+    record_movement,
+    record_movements,
+    stock_at,
+    stock_levels_at,
+    take_snapshots,
+)
+
+
+class StockLedgerTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Ledger Deli", email="ledger@deli.test")
+        self.oil = InventoryItem.objects.create(
+            restaurant=self.restaurant, name="Olive oil", unit="LITER",
+            current_stock=Decimal("10"), cost_per_unit=Decimal("5.00"), reorder_level=Decimal("4"),
+        )
+        self.salt = InventoryItem.objects.create(
+            restaurant=self.restaurant, name="Salt", unit="KG", current_stock=Decimal("2"), cost_per_unit=Decimal("1.00"),
+        )
+
+    def _backdate(self, rows, when):
+        StockMovement.objects.filter(pk__in=[r.pk for r in rows]).update(created_at=when)
+
+    def test_creation_opens_the_ledger(self):
+        opening = StockMovement.objects.get(inventory_item=self.oil)
+        self.assertEqual((opening.kind, opening.quantity), (StockMovement.KIND_OPENING, Decimal("10.00")))
+
+    def test_movements_apply_atomically_and_stale_saves_keep_the_balance(self):
+        stale = InventoryItem.objects.get(pk=self.oil.pk)
+        with self.assertNumQueries(4):  # savepoint, insert, update, release
+            record_movements([
+                movement(self.oil, -3, StockMovement.KIND_WASTE),
+                movement(self.salt, "1.5", StockMovement.KIND_RECEIPT),
+                movement(self.oil, "0.25", StockMovement.KIND_COUNT),
+            ])
+        stale.name = "Extra virgin olive oil"
+        stale.save()
+
+        self.oil.refresh_from_db()
+        self.salt.refresh_from_db()
+        self.assertEqual((self.oil.name, self.oil.current_stock), ("Extra virgin olive oil", Decimal("7.25")))
+        self.assertEqual(self.salt.current_stock, Decimal("3.50"))
+
+    def test_snapshots_roll_forward_from_the_ledger(self):
+        now = timezone.now()
+        self._backdate(StockMovement.objects.all(), now - timedelta(days=2))
+        self.assertEqual(take_snapshots(now=now - timedelta(days=1)), 2)
+        self.assertEqual(take_snapshots(now=now - timedelta(days=1)), 0)
+
+        record_movement(self.oil, -4, StockMovement.KIND_ADJUSTMENT)
+        self.assertEqual(take_snapshots(now=now), 0)  # not settled yet
+        self.assertEqual(take_snapshots(now=now + SNAPSHOT_SETTLE + timedelta(seconds=1)), 1)
+        latest = StockSnapshot.objects.filter(inventory_item=self.oil).latest("taken_at")
+        self.assertEqual(latest.balance, Decimal("6.00"))
+
+    def test_point_in_time_stock_uses_snapshot_plus_tail(self):
+        now = timezone.now()
+        self._backdate(StockMovement.objects.all(), now - timedelta(days=3))
+        take_snapshots(now=now - timedelta(days=2))
+        sunday = now - timedelta(days=1)
+        self._backdate([record_movement(self.oil, -2, StockMovement.KIND_WASTE)], sunday - timedelta(hours=1))
+        record_movement(self.oil, -5, StockMovement.KIND_POS_DEPLETION)
+
+        self.assertEqual(stock_at(self.oil, now - timedelta(days=4)), Decimal("0"))
+        self.assertEqual(stock_at(self.oil, sunday), Decimal("8.00"))
+        with self.assertNumQueries(1):
+            levels = stock_levels_at(self.restaurant, now + timedelta(seconds=1))
+        self.assertEqual(levels, {self.oil.pk: Decimal("3.00"), self.salt.pk: Decimal("2.00")})
+
+        valuation = inventory_valuation(self.restaurant, now + timedelta(seconds=1))
+        self.assertEqual(valuation["total_value"], Decimal("17.00"))
+        self.assertEqual([row["name"] for row in valuation["low_stock_items"]], ["Olive oil"])
@@ -10,6 +10,7 @@ from .views import (
     PurchaseOrderItemRetrieveUpdateDestroyAPIView,
     StockAdjustmentListCreateAPIView,
     StockAdjustmentRetrieveUpdateDestroyAPIView,
+    InventoryVarianceReportAPIView,
 )
 from .views_agent import agent_list_inventory_items
 from . import views_agent_morocco as morocco
@@ -46,4 +47,7 @@ urlpatterns = [
     # Stock Adjustments
     path('stock-adjustments/', StockAdjustmentListCreateAPIView.as_view(), name='stock-adjustment-list-create'),
     path('stock-adjustments/<uuid:pk>/', StockAdjustmentRetrieveUpdateDestroyAPIView.as_view(), name='stock-adjustment-detail'),
+
+    # Theoretical vs actual usage (POS depletion)
+    path('variance/', InventoryVarianceReportAPIView.as_view(), name='inventory-variance-report'),
 ]
@@ -1,12 +1,18 @@
+from datetime import timedelta
+
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.db import transaction
 from django.db.models import F, Prefetch
 from django.utils import timezone
 from rest_framework import serializers
 
-from .models import InventoryItem, Supplier, PurchaseOrder, PurchaseOrderItem, StockAdjustment
+from .depletion import variance_report
+from .models import InventoryItem, Supplier, PurchaseOrder, PurchaseOrderItem, StockAdjustment, StockMovement
+from .read_model import mark_items_changed
+from .stock_ledger import movement, record_movement, record_movements
 from .serializers import (
     InventoryItemSerializer,
     SupplierSerializer,
@@ -35,6 +41,19 @@ class InventoryItemRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAP
     def get_queryset(self):
         return InventoryItem.objects.filter(restaurant=self.request.user.restaurant)
 
+    def perform_update(self, serializer):
+        # Stock edited on the item form is booked as an adjustment against the
+        # ledger instead of overwriting the balance.
+        target = serializer.validated_data.pop('current_stock', None)
+        with transaction.atomic():
+            item = serializer.save()
+            if target is not None:
+                current = InventoryItem.objects.select_for_update().values_list(
+                    'current_stock', flat=True
+                ).get(pk=item.pk)
+                record_movement(item, target - current, StockMovement.KIND_ADJUSTMENT,
+                                reference='item-edit', user=self.request.user)
+
 class SupplierListCreateAPIView(generics.ListCreateAPIView):
     serializer_class = SupplierSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdmin]
@@ -112,14 +131,29 @@ class PurchaseOrderRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAP
                 instance.delivery_date = timezone.now().date()
                 instance.save()
 
-                # Update inventory for each item in the purchase order
-                for order_item in instance.items.all():
+                # Receive every line into the stock ledger in one batch.
+                prices = {}
+                movements = []
+                for order_item in instance.items.select_related('inventory_item'):
                     item = order_item.inventory_item
-                    item.current_stock = F('current_stock') + order_item.quantity
-                    item.last_restock_date = timezone.now().date()
-                    item.save()
-                    # Reload the item to get the updated stock value
-                    item.refresh_from_db()
+                    movements.append(
+                        movement(item, order_item.quantity, StockMovement.KIND_RECEIPT,
+                                 reference=f'po:{instance.id}', user=request.user)
+                    )
+                    if order_item.unit_price and order_item.unit_price != item.cost_per_unit:
+                        prices[item.id] = order_item.unit_price
+                record_movements(movements)
+                InventoryItem.objects.filter(pk__in=[m.inventory_item_id for m in movements]).update(
+                    last_restock_date=instance.delivery_date
+                )
+                mark_items_changed(instance.restaurant_id, [m.inventory_item_id for m in movements])
+
+                # The price actually paid becomes the item's cost, and flows
+                # into the recipes that use it.
+                if prices:
+                    from menu.cost_graph import bulk_update_inventory_costs
+
+                    bulk_update_inventory_costs(prices)
 
                 serializer = self.get_serializer(instance)
                 return Response(serializer.data)
@@ -189,16 +223,22 @@ class StockAdjustmentListCreateAPIView(generics.ListCreateAPIView):
         quantity_changed = serializer.validated_data['quantity_changed']
 
         with transaction.atomic():
+            adjustment = serializer.save(restaurant=self.request.user.restaurant, adjusted_by=self.request.user)
             if adjustment_type == 'ADD':
-                inventory_item.current_stock = F('current_stock') + quantity_changed
+                delta, kind = quantity_changed, StockMovement.KIND_ADJUSTMENT
             elif adjustment_type == 'REMOVE' or adjustment_type == 'WASTE':
-                if inventory_item.current_stock < quantity_changed:
+                # Lock the row so the check and the decrement see the same balance.
+                current = InventoryItem.objects.select_for_update().values_list(
+                    'current_stock', flat=True
+                ).get(pk=inventory_item.pk)
+                if current < quantity_changed:
                     raise serializers.ValidationError("Not enough stock to remove.")
-                inventory_item.current_stock = F('current_stock') - quantity_changed
-            # For 'TRANSFER', more complex logic would be needed for multi-location
-            inventory_item.save()
-            inventory_item.refresh_from_db() # Reload to get updated stock
-            serializer.save(restaurant=self.request.user.restaurant, adjusted_by=self.request.user)
+                delta = -quantity_changed
+                kind = StockMovement.KIND_WASTE if adjustment_type == 'WASTE' else StockMovement.KIND_ADJUSTMENT
+            else:
+                # For 'TRANSFER', more complex logic would be needed for multi-location
+                return
+            record_movement(inventory_item, delta, kind, reference=f'adjustment:{adjustment.id}', user=self.request.user)
 
 class StockAdjustmentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = StockAdjustmentSerializer
@@ -207,3 +247,26 @@ class StockAdjustmentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroy
 
     def get_queryset(self):
         return StockAdjustment.objects.filter(restaurant=self.request.user.restaurant)
+
+
+class InventoryVarianceReportAPIView(APIView):
+    """Theoretical (POS-depleted) vs actual usage per stock item.
+
+    Query: start_date, end_date (YYYY-MM-DD; default the last 7 days).
+    """
+    permission_classes = [permissions.IsAuthenticated, IsManagerOrAdmin]
+
+    def get(self, request):
+        from datetime import date
+
+        today = timezone.now().date()
+        try:
+            end_date = date.fromisoformat(request.query_params.get('end_date') or today.isoformat())
+            start_date = date.fromisoformat(
+                request.query_params.get('start_date') or (end_date - timedelta(days=6)).isoformat()
+            )
+        except ValueError:
+            return Response({'detail': 'Dates must be YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'detail': 'start_date must be on or before end_date.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(variance_report(request.user.restaurant, start_date, end_date))
@@ -7,8 +7,7 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from .models import InventoryItem
-from core.read_through_cache import get_or_set
+from .read_model import inventory_snapshot
 
 
 @api_view(["GET"])
@@ -16,8 +15,10 @@ from core.read_through_cache import get_or_set
 @permission_classes([AllowAny])
 def agent_list_inventory_items(request):
     """
-    GET /api/inventory/agent/items/?restaurant_id=<uuid>
-    Returns list of inventory items for the restaurant. Auth: Bearer MIYA_MASTRA_API_KEY.
+    GET /api/inventory/agent/items/?restaurant_id=<uuid>[&low_stock=1][&supplier_id=<uuid>][&query=<text>]
+    Returns list of inventory items for the restaurant, served from the
+    versioned read model (``inventory.read_model``). ``query`` (or
+    ``category``) matches item names. Auth: Bearer MIYA_MASTRA_API_KEY.
     """
     auth_header = request.headers.get("Authorization")
     expected_key = getattr(settings, "MIYA_MASTRA_API_KEY", None)
@@ -38,26 +39,16 @@ def agent_list_inventory_items(request):
     except Restaurant.DoesNotExist:
         return Response({"detail": "Restaurant not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    ck = f"agent:inventory:items:{restaurant.id}"
-
-    def _inventory_items_payload():
-        rows = InventoryItem.objects.filter(restaurant=restaurant, is_active=True).order_by("name").values(
-            "id", "name", "current_stock", "unit", "reorder_level", "cost_per_unit", "last_restock_date"
-        )
-        data = []
-        for i in rows:
-            d = dict(i)
-            d["id"] = str(d["id"])
-            if d.get("last_restock_date"):
-                d["last_restock_date"] = d["last_restock_date"].isoformat()
-            d["reorder_level"] = float(d["reorder_level"]) if d.get("reorder_level") is not None else None
-            d["current_stock"] = float(d["current_stock"])
-            d["cost_per_unit"] = float(d["cost_per_unit"])
-            data.append(d)
-        return {
-            "restaurant_id": str(restaurant.id),
-            "items": data,
-            "count": len(data),
-        }
-
-    return Response(get_or_set(ck, 45, _inventory_items_payload))
+    params = request.query_params
+    snapshot = inventory_snapshot(restaurant.id)
+    items = snapshot.items(
+        low_stock=str(params.get("low_stock", "")).lower() in ("1", "true", "yes"),
+        supplier_id=params.get("supplier_id"),
+        query=params.get("query") or params.get("category") or "",
+    )
+    return Response({
+        "restaurant_id": str(restaurant.id),
+        "items": items,
+        "count": len(items),
+        "version": snapshot.version,
+    })
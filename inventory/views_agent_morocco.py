@@ -7,6 +7,7 @@ Agent-authenticated endpoints for Morocco-specific features:
 import logging
 from decimal import Decimal, InvalidOperation
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Sum, Q
 from rest_framework import status
@@ -14,7 +15,8 @@ from rest_framework.decorators import api_view, permission_classes, authenticati
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from .models import InventoryItem, WasteEntry, InventoryCountSession, Supplier, PurchaseOrder, PurchaseOrderItem
+from .models import InventoryItem, WasteEntry, InventoryCountSession, Supplier, PurchaseOrder, PurchaseOrderItem, StockMovement
+from .stock_ledger import record_movement
 
 logger = logging.getLogger(__name__)
 
@@ -96,8 +98,13 @@ def agent_report_waste(request):
     )
 
     if inv_item:
-        inv_item.current_stock = max(Decimal("0"), inv_item.current_stock - quantity)
-        inv_item.save(update_fields=["current_stock"])
+        with transaction.atomic():
+            # Never take stock below zero; lock so the clamp sees the live balance.
+            on_hand = InventoryItem.objects.select_for_update().values_list("current_stock", flat=True).get(pk=inv_item.pk)
+            record_movement(
+                inv_item, -min(quantity, max(on_hand, Decimal("0"))), StockMovement.KIND_WASTE,
+                reference=f"waste:{entry.id}", user=staff,
+            )
 
     cost_str = f"{cost:.2f} MAD" if cost > 0 else "unknown cost"
     return Response({
@@ -234,12 +241,19 @@ def agent_count_item(request):
         return Response({"success": False, "error": "No more items"}, status=status.HTTP_400_BAD_REQUEST)
 
     current_item_id = items_order[idx]
-    inv_item = InventoryItem.objects.filter(id=current_item_id).first()
+    with transaction.atomic():
+        inv_item = InventoryItem.objects.select_for_update().filter(id=current_item_id).first()
+        expected = float(inv_item.current_stock) if inv_item else 0
+        if inv_item:
+            # The count is the truth: book the difference as a correction.
+            record_movement(
+                inv_item, counted - inv_item.current_stock, StockMovement.KIND_COUNT,
+                reference=f"count:{session.id}", user=session.counted_by,
+            )
 
     count_data = session.count_data
     if "counts" not in count_data:
         count_data["counts"] = {}
-    expected = float(inv_item.current_stock) if inv_item else 0
     variance = float(counted) - expected
     count_data["counts"][current_item_id] = {"counted": float(counted), "expected": expected, "variance": variance, "name": inv_item.name if inv_item else "Unknown"}
 
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menu'
+
+    def ready(self):
+        # Recipe cost graph: recompute RecipeCost when prices or recipes change.
+        import menu.signals  # noqa: F401
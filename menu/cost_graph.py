@@ -0,0 +1,327 @@
+"""
+Materialized recipe cost graph.
+
+Every recipe has a :class:`~menu.models.RecipeCost` row with its portion cost
+and each ingredient's contribution. Costs only change along the graph's
+edges, so recomputation is incremental:
+
+* stock item → ingredient (``Ingredient.inventory_item``, or a same-name
+  item when not linked);
+* ingredient → recipe (``RecipeIngredient``);
+* prep recipe → ingredient (``Ingredient.prep_recipe``), which is how
+  sauces, doughs and other sub-recipes feed the dishes that use them.
+
+A price change on a stock item walks those edges upwards and recomputes
+just the recipes above it (including dishes two prep levels up). Recipe
+quantities are converted into the unit the cost is quoted in with
+:mod:`inventory.unit_conversion`.
+
+Saves are picked up by ``menu.signals``; bulk price updates should go
+through :func:`bulk_update_inventory_costs` (``bulk_update`` sends no
+signals).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Prefetch, Q
+from django.db.models.functions import Lower
+
+from inventory.unit_conversion import convert
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+FOURPLACES = Decimal("0.0001")
+# Prep levels walked when propagating a change (guards against data loops).
+MAX_DEPTH = 8
+
+SOURCE_PREP = "prep"
+SOURCE_INVENTORY = "inventory"
+SOURCE_INGREDIENT = "ingredient"
+
+
+@dataclass
+class _UnitCost:
+    cost: Decimal
+    unit: str
+    pack_size: Optional[Decimal]
+    source: str
+    complete: bool = True
+
+
+def _dec(value) -> Decimal:
+    if value is None:
+        return ZERO
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+# ---------------------------------------------------------------------------
+# Graph walks
+# ---------------------------------------------------------------------------
+
+
+def ingredients_for_inventory_items(items) -> Set:
+    """Ingredient ids priced from these stock items (linked or same-name)."""
+    from .models import Ingredient
+
+    items = list(items)
+    if not items:
+        return set()
+    names = {item.name.lower() for item in items if item.name}
+    restaurant_ids = {item.restaurant_id for item in items}
+    return set(
+        Ingredient.objects.annotate(lname=Lower("name"))
+        .filter(
+            Q(inventory_item_id__in=[item.pk for item in items])
+            | Q(inventory_item__isnull=True, restaurant_id__in=restaurant_ids, lname__in=names)
+        )
+        .values_list("id", flat=True)
+    )
+
+
+def recipes_affected_by(ingredient_ids: Iterable = (), recipe_ids: Iterable = ()) -> Set:
+    """Recipes whose cost depends on the given ingredients or recipes,
+    following prep recipes up to ``MAX_DEPTH`` levels."""
+    from .models import Ingredient, RecipeIngredient
+
+    affected: Set = set(recipe_ids)
+    frontier_ings: Set = set(ingredient_ids)
+    if affected:
+        frontier_ings |= set(
+            Ingredient.objects.filter(prep_recipe_id__in=affected).values_list("id", flat=True)
+        )
+    for _ in range(MAX_DEPTH):
+        if not frontier_ings:
+            break
+        recipes = (
+            set(
+                RecipeIngredient.objects.filter(ingredient_id__in=frontier_ings).values_list(
+                    "recipe_id", flat=True
+                )
+            )
+            - affected
+        )
+        if not recipes:
+            break
+        affected |= recipes
+        frontier_ings = set(
+            Ingredient.objects.filter(prep_recipe_id__in=recipes).values_list("id", flat=True)
+        )
+    return affected
+
+
+# ---------------------------------------------------------------------------
+# Recompute
+# ---------------------------------------------------------------------------
+
+
+class _Calculator:
+    """Computes portion costs for a set of recipes loaded in a few queries."""
+
+    def __init__(self, recipe_ids: Iterable):
+        from inventory.models import InventoryItem
+
+        from .models import Recipe, RecipeCost, RecipeIngredient
+
+        self.recipes: Dict = {
+            r.pk: r
+            for r in Recipe.objects.filter(pk__in=list(recipe_ids))
+            .select_related("menu_item")
+            .prefetch_related(
+                Prefetch(
+                    "ingredients",
+                    queryset=RecipeIngredient.objects.select_related(
+                        "ingredient", "ingredient__inventory_item"
+                    ),
+                )
+            )
+        }
+        ingredients = [ri.ingredient for r in self.recipes.values() for ri in r.ingredients.all()]
+
+        # Stock items matched by name for ingredients that aren't linked.
+        unlinked = {ing.name.lower() for ing in ingredients if not ing.inventory_item_id}
+        self.by_name: Dict[Tuple, object] = {}
+        if unlinked:
+            restaurant_ids = {r.menu_item.restaurant_id for r in self.recipes.values()}
+            for item in (
+                InventoryItem.objects.annotate(lname=Lower("name"))
+                .filter(restaurant_id__in=restaurant_ids, lname__in=unlinked, is_active=True)
+                .only("id", "restaurant_id", "name", "unit", "cost_per_unit", "pack_size")
+            ):
+                self.by_name[(item.restaurant_id, item.name.lower())] = item
+
+        # Prep recipes outside this batch are read from their stored cost.
+        outside = {ing.prep_recipe_id for ing in ingredients if ing.prep_recipe_id} - set(self.recipes)
+        self.stored: Dict = {
+            rc.recipe_id: (rc.portion_cost, rc.complete)
+            for rc in RecipeCost.objects.filter(recipe_id__in=outside)
+        }
+        self.results: Dict = {}
+
+    def unit_cost(self, ingredient, restaurant_id, stack) -> _UnitCost:
+        if ingredient.prep_recipe_id:
+            if ingredient.prep_recipe_id in self.recipes:
+                batch_cost, _, complete = self.compute(ingredient.prep_recipe_id, stack)
+            else:
+                batch_cost, complete = self.stored.get(ingredient.prep_recipe_id, (ZERO, False))
+            batch_yield = _dec(ingredient.prep_yield) or Decimal("1")
+            return _UnitCost(_dec(batch_cost) / batch_yield, ingredient.unit, None, SOURCE_PREP, complete)
+        item = ingredient.inventory_item or self.by_name.get((restaurant_id, ingredient.name.lower()))
+        if item is not None and _dec(item.cost_per_unit) > 0:
+            return _UnitCost(_dec(item.cost_per_unit), item.unit, item.pack_size, SOURCE_INVENTORY)
+        return _UnitCost(_dec(ingredient.cost_per_unit), ingredient.unit, None, SOURCE_INGREDIENT)
+
+    def compute(self, recipe_id, stack=()) -> Tuple[Decimal, List[dict], bool]:
+        if recipe_id in self.results:
+            return self.results[recipe_id]
+        if recipe_id in stack:
+            logger.warning("Recipe cost cycle through recipe %s", recipe_id)
+            return ZERO, [], False
+        stack = (*stack, recipe_id)
+        recipe = self.recipes[recipe_id]
+        restaurant_id = recipe.menu_item.restaurant_id
+        total = ZERO
+        complete = True
+        lines = []
+        for ri in recipe.ingredients.all():
+            ing = ri.ingredient
+            uc = self.unit_cost(ing, restaurant_id, stack)
+            qty, converted = convert(ri.quantity or ZERO, ri.unit or ing.unit, uc.unit, uc.pack_size)
+            cost = (qty * uc.cost).quantize(FOURPLACES)
+            total += cost
+            complete = complete and converted and uc.complete
+            lines.append(
+                {
+                    "ingredient_id": str(ing.pk),
+                    "name": ing.name,
+                    "quantity": float(qty),
+                    "unit": uc.unit,
+                    "unit_cost": float(uc.cost.quantize(FOURPLACES)),
+                    "cost": float(cost),
+                    "source": uc.source,
+                    "converted": converted,
+                }
+            )
+        self.results[recipe_id] = (total.quantize(FOURPLACES), lines, complete)
+        return self.results[recipe_id]
+
+
+def recompute_recipe_costs(recipe_ids: Iterable) -> int:
+    """Recompute and store ``RecipeCost`` for exactly these recipes."""
+    from .models import RecipeCost
+
+    calc = _Calculator(set(recipe_ids))
+    if not calc.recipes:
+        return 0
+    existing = {rc.recipe_id: rc for rc in RecipeCost.objects.filter(recipe_id__in=list(calc.recipes))}
+    to_create, to_update = [], []
+    for recipe_id, recipe in calc.recipes.items():
+        portion, lines, complete = calc.compute(recipe_id)
+        row = existing.get(recipe_id)
+        if row is None:
+            to_create.append(
+                RecipeCost(
+                    recipe_id=recipe_id,
+                    restaurant_id=recipe.menu_item.restaurant_id,
+                    portion_cost=portion,
+                    lines=lines,
+                    complete=complete,
+                )
+            )
+        elif (row.portion_cost, row.lines, row.complete) != (portion, lines, complete):
+            row.portion_cost, row.lines, row.complete = portion, lines, complete
+            to_update.append(row)
+    if to_create:
+        RecipeCost.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+    if to_update:
+        # bulk_update skips auto_now, so stamp computed_at explicitly.
+        from django.utils import timezone
+
+        now = timezone.now()
+        for row in to_update:
+            row.computed_at = now
+        RecipeCost.objects.bulk_update(
+            to_update, ["portion_cost", "lines", "complete", "computed_at"], batch_size=500
+        )
+    return len(to_create) + len(to_update)
+
+
+def propagate(*, ingredient_ids: Iterable = (), recipe_ids: Iterable = ()) -> int:
+    """Recompute every recipe downstream of these ingredients / recipes."""
+    affected = recipes_affected_by(ingredient_ids, recipe_ids)
+    return recompute_recipe_costs(affected) if affected else 0
+
+
+def ensure_recipe_costs(recipe_ids: Iterable) -> int:
+    """Compute costs for recipes that have never been costed (backfill)."""
+    from .models import RecipeCost
+
+    ids = set(recipe_ids)
+    missing = ids - set(RecipeCost.objects.filter(recipe_id__in=ids).values_list("recipe_id", flat=True))
+    return recompute_recipe_costs(missing) if missing else 0
+
+
+def bulk_update_inventory_costs(prices: Dict) -> int:
+    """Apply ``{inventory_item_id: cost_per_unit}`` and recompute only the
+    recipes that use those items. Returns the number of recipes rewritten."""
+    from inventory.models import InventoryItem
+    from inventory.read_model import mark_items_changed
+
+    from django.utils import timezone
+
+    items = list(InventoryItem.objects.filter(pk__in=list(prices)))
+    changed = []
+    # bulk_update skips auto_now, so stamp updated_at explicitly.
+    now = timezone.now()
+    for item in items:
+        new = _dec(prices[item.pk] if item.pk in prices else prices.get(str(item.pk)))
+        if new != _dec(item.cost_per_unit):
+            item.cost_per_unit = new
+            item.updated_at = now
+            changed.append(item)
+    if not changed:
+        return 0
+    with transaction.atomic():
+        InventoryItem.objects.bulk_update(changed, ["cost_per_unit", "updated_at"])
+        for item in changed:
+            mark_items_changed(item.restaurant_id, [item.pk])
+        return propagate(ingredient_ids=ingredients_for_inventory_items(changed))
+
+
+# ---------------------------------------------------------------------------
+# Deferred recompute (used by menu.signals)
+# ---------------------------------------------------------------------------
+
+_dirty = threading.local()
+
+
+def mark_dirty(*, ingredient_ids: Iterable = (), recipe_ids: Iterable = ()) -> None:
+    """Queue a recompute for after the current transaction commits.
+
+    Saves within one transaction share a single pass; ids queued by a
+    transaction that rolls back are recomputed with the next one, which is
+    harmless.
+    """
+    state = getattr(_dirty, "state", None)
+    if state is None:
+        state = _dirty.state = {"ingredients": set(), "recipes": set()}
+    state["ingredients"].update(ingredient_ids)
+    state["recipes"].update(recipe_ids)
+    transaction.on_commit(_flush)
+
+
+def _flush() -> None:
+    state = getattr(_dirty, "state", None)
+    if not state or not (state["ingredients"] or state["recipes"]):
+        return
+    _dirty.state = None
+    try:
+        propagate(ingredient_ids=state["ingredients"], recipe_ids=state["recipes"])
+    except Exception:
+        logger.exception("Recipe cost recompute failed")
@@ -1,18 +1,19 @@
 """
 Recipe / BOM food-cost helpers for manager copilot.
 
-Uses menu.RecipeIngredient + Ingredient.cost_per_unit (same BOM as prep-list).
-Unit mismatches are treated as same-unit for MVP (no conversion); callers
-should treat high food_cost_pct as a signal to review recipe data.
+Portion costs come from the materialized recipe cost graph
+(``menu.cost_graph``: stock-item prices, unit conversion, prep sub-recipes);
+this module only ranks them against menu prices. ``cost_complete`` is False
+when some recipe line could not be unit-converted — callers should treat a
+high food_cost_pct on such rows as a signal to review recipe data.
 """
 from __future__ import annotations
 
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Any
 
-from django.db.models import Prefetch
-
-from .models import MenuItem, Recipe, RecipeIngredient
+from .cost_graph import ensure_recipe_costs
+from .models import MenuItem, Recipe, RecipeCost
 
 TWOPLACES = Decimal("0.01")
 
@@ -23,13 +24,17 @@ def _q(value: Decimal | float | int | None) -> Decimal:
     return Decimal(str(value)).quantize(TWOPLACES, rounding=ROUND_HALF_UP)
 
 
+def _stored_cost(recipe: Recipe) -> RecipeCost | None:
+    try:
+        return recipe.cost
+    except RecipeCost.DoesNotExist:
+        ensure_recipe_costs([recipe.pk])
+        return RecipeCost.objects.filter(recipe_id=recipe.pk).first()
+
+
 def portion_cost_for_recipe(recipe: Recipe) -> Decimal:
-    total = Decimal("0")
-    for ri in recipe.ingredients.all():
-        cost = ri.ingredient.cost_per_unit or Decimal("0")
-        qty = ri.quantity or Decimal("0")
-        total += Decimal(str(qty)) * Decimal(str(cost))
-    return _q(total)
+    cost = _stored_cost(recipe)
+    return _q(cost.portion_cost if cost else None)
 
 
 def food_cost_row(menu_item: MenuItem, recipe: Recipe | None = None) -> dict[str, Any]:
@@ -47,7 +52,8 @@ def food_cost_row(menu_item: MenuItem, recipe: Recipe | None = None) -> dict[str
             "ingredient_lines": 0,
         }
 
-    portion = portion_cost_for_recipe(recipe)
+    cost = _stored_cost(recipe)
+    portion = _q(cost.portion_cost if cost else None)
     margin = _q(price - portion) if price else None
     pct = None
     if price > 0:
@@ -61,9 +67,8 @@ def food_cost_row(menu_item: MenuItem, recipe: Recipe | None = None) -> dict[str
         "margin": float(margin) if margin is not None else None,
         "food_cost_pct": pct,
         "has_recipe": True,
-        "ingredient_lines": recipe.ingredients.count()
-        if hasattr(recipe, "ingredients")
-        else 0,
+        "ingredient_lines": len(cost.lines) if cost else 0,
+        "cost_complete": cost.complete if cost else False,
     }
 
 
@@ -72,15 +77,13 @@ def compute_food_cost_report(restaurant, *, limit: int = 25, sort: str = "food_c
     Return menu items with recipes, ranked by food-cost % (highest first)
     or by margin (lowest first when sort=margin).
     """
+    # Recipes created before the cost graph existed are costed once here.
+    ensure_recipe_costs(
+        Recipe.objects.filter(menu_item__restaurant=restaurant, cost__isnull=True).values_list("pk", flat=True)
+    )
     qs = (
         MenuItem.objects.filter(restaurant=restaurant, is_active=True)
-        .select_related("recipe", "category")
-        .prefetch_related(
-            Prefetch(
-                "recipe__ingredients",
-                queryset=RecipeIngredient.objects.select_related("ingredient"),
-            )
-        )
+        .select_related("recipe", "recipe__cost", "category")
         .order_by("name")
     )
 
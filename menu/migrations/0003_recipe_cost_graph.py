@@ -0,0 +1,42 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('inventory', '0003_prep_planning_fields'),
+        ('menu', '0002_alter_menucategory_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='inventory_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='menu_ingredients', to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='prep_recipe',
+            field=models.ForeignKey(blank=True, help_text='Sub-recipe (sauce, dough…) this ingredient is prepared from.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='produces', to='menu.recipe'),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='prep_yield',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='Quantity of this ingredient, in its unit, one batch of prep_recipe makes.', max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='RecipeCost',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost', serialize=False, to='menu.recipe')),
+                ('portion_cost', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('lines', models.JSONField(blank=True, default=list)),
+                ('complete', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_costs', to='accounts.restaurant')),
+            ],
+        ),
+    ]
@@ -68,6 +68,21 @@ class Ingredient(models.Model):
     name = models.CharField(max_length=100, unique=True)
     unit = models.CharField(max_length=20) # e.g., 'grams', 'ml', 'pieces'
     cost_per_unit = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Cost sources, in priority order (see menu.cost_graph): a prep recipe this
+    # ingredient is made from, then the stock item it is bought as (matched
+    # by name when not linked), then cost_per_unit above.
+    inventory_item = models.ForeignKey(
+        'inventory.InventoryItem', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='menu_ingredients',
+    )
+    prep_recipe = models.ForeignKey(
+        'Recipe', on_delete=models.SET_NULL, null=True, blank=True, related_name='produces',
+        help_text="Sub-recipe (sauce, dough…) this ingredient is prepared from.",
+    )
+    prep_yield = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True,
+        help_text="Quantity of this ingredient, in its unit, one batch of prep_recipe makes.",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -78,6 +93,17 @@ class Ingredient(models.Model):
     def __str__(self):
         return f"{self.name} ({self.unit})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_cost_key = instance.cost_key()
+        return instance
+
+    def cost_key(self):
+        """Fields that feed recipe costs; a change triggers recomputation."""
+        d = self.__dict__
+        return tuple(d.get(f) for f in ('cost_per_unit', 'unit', 'inventory_item_id', 'prep_recipe_id', 'prep_yield', 'name'))
+
 class Recipe(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     menu_item = models.OneToOneField(MenuItem, on_delete=models.CASCADE, related_name='recipe')
@@ -102,3 +128,24 @@ class RecipeIngredient(models.Model):
 
     def __str__(self):
         return f"{self.quantity} {self.unit} of {self.ingredient.name}"
+
+
+class RecipeCost(models.Model):
+    """
+    Materialized portion cost of a recipe (menu.cost_graph keeps it current).
+
+    ``lines`` holds each ingredient's contribution: ``{ingredient_id, name,
+    quantity, unit, unit_cost, cost, source, converted}`` with ``quantity``
+    already converted into the unit the cost is quoted in. ``complete`` is
+    False when a line could not be unit-converted (its raw quantity was used)
+    or a prep recipe loops back on itself.
+    """
+    recipe = models.OneToOneField(Recipe, on_delete=models.CASCADE, primary_key=True, related_name='cost')
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='recipe_costs')
+    portion_cost = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    lines = models.JSONField(default=list, blank=True)
+    complete = models.BooleanField(default=True)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.recipe_id}: {self.portion_cost}"
@@ -21,6 +21,17 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('restaurant', 'created_at', 'updated_at')
 
+    def validate(self, attrs):
+        request = self.context.get('request')
+        restaurant_id = getattr(getattr(request, 'user', None), 'restaurant_id', None)
+        item = attrs.get('inventory_item')
+        if item is not None and item.restaurant_id != restaurant_id:
+            raise serializers.ValidationError({'inventory_item': 'Unknown inventory item.'})
+        prep = attrs.get('prep_recipe')
+        if prep is not None and prep.menu_item.restaurant_id != restaurant_id:
+            raise serializers.ValidationError({'prep_recipe': 'Unknown recipe.'})
+        return attrs
+
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     ingredient_info = IngredientSerializer(source='ingredient', read_only=True)
 
@@ -0,0 +1,59 @@
+"""Keep ``RecipeCost`` current (see ``menu.cost_graph``).
+
+Handlers only queue work: the recompute runs once per transaction, on
+commit, over the recipes downstream of whatever changed.
+"""
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from inventory.models import InventoryItem
+
+from .cost_graph import ingredients_for_inventory_items, mark_dirty
+from .models import Ingredient, Recipe, RecipeIngredient
+
+
+def _cost_changed(instance, created) -> bool:
+    before = getattr(instance, "_loaded_cost_key", None)
+    after = instance.cost_key()
+    instance._loaded_cost_key = after
+    return created or before != after
+
+
+@receiver(post_save, sender=InventoryItem)
+def inventory_item_cost_changed(sender, instance, created, **kwargs):
+    before = getattr(instance, "_loaded_cost_key", None)
+    if not _cost_changed(instance, created):
+        return
+    items = [instance]
+    old_name = before[3] if before else None
+    if old_name and old_name != instance.name:
+        # Ingredients matched by the old name now fall back to their own cost.
+        items.append(InventoryItem(pk=instance.pk, restaurant_id=instance.restaurant_id, name=old_name))
+    mark_dirty(ingredient_ids=ingredients_for_inventory_items(items))
+
+
+@receiver(pre_delete, sender=InventoryItem)
+def inventory_item_deleted(sender, instance, **kwargs):
+    mark_dirty(ingredient_ids=ingredients_for_inventory_items([instance]))
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_cost_changed(sender, instance, created, **kwargs):
+    # A new ingredient isn't used by any recipe yet.
+    if _cost_changed(instance, False) and not created:
+        mark_dirty(ingredient_ids=[instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_line_changed(sender, instance, **kwargs):
+    mark_dirty(recipe_ids=[instance.recipe_id])
+
+
+@receiver(pre_delete, sender=Recipe)
+def prep_recipe_deleted(sender, instance, **kwargs):
+    produced = list(Ingredient.objects.filter(prep_recipe=instance).values_list("id", flat=True))
+    if produced:
+        mark_dirty(ingredient_ids=produced)
@@ -0,0 +1,87 @@
+"""Recipe cost graph: unit conversion, prep sub-recipes and incremental
+propagation of stock-item price changes."""
+
+from decimal import Decimal
+
+from django.test import TestCase
+
+from accounts.models import Restaurant
+from inventory.models import InventoryItem
+from menu.cost_graph import bulk_update_inventory_costs
+from menu.food_cost import compute_food_cost_report
+from menu.models import Ingredient, MenuItem, Recipe, RecipeCost, RecipeIngredient
+
+
+class RecipeCostGraphTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Graph Pizzeria", email="graph@pizza.test")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour_stock = InventoryItem.objects.create(
+                restaurant=self.restaurant, name="Flour", unit="KG", cost_per_unit=Decimal("10.00")
+            )
+            flour = self._ingredient("Flour", "GRAM")
+            cheese = self._ingredient("Cheese", "GRAM", cost=Decimal("0.05"))
+
+            # 500 g flour (5.00) makes 1 kg of dough.
+            self.dough_recipe = self._recipe("Dough (prep)", price=0, active=False, lines=[(flour, "500", "g")])
+            dough = self._ingredient("Dough", "KG", prep_recipe=self.dough_recipe, prep_yield=Decimal("1"))
+
+            self.pizza = self._recipe("Pizza", price=50, lines=[(dough, "250", "g"), (cheese, "100", "g")])
+            self.salad = self._recipe("Salad", price=20, lines=[(cheese, "40", "g")])
+
+    def _ingredient(self, name, unit, cost=Decimal("0"), **extra):
+        return Ingredient.objects.create(restaurant=self.restaurant, name=name, unit=unit, cost_per_unit=cost, **extra)
+
+    def _recipe(self, name, *, price, lines, active=True):
+        item = MenuItem.objects.create(restaurant=self.restaurant, name=name, price=price, is_active=active)
+        recipe = Recipe.objects.create(menu_item=item, instructions="-")
+        for ingredient, qty, unit in lines:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=Decimal(qty), unit=unit)
+        return recipe
+
+    def _cost(self, recipe):
+        return RecipeCost.objects.get(recipe=recipe).portion_cost
+
+    def test_costs_are_converted_and_include_sub_recipes(self):
+        self.assertEqual(self._cost(self.dough_recipe), Decimal("5.0000"))
+        # 0.25 kg dough at 5.00/kg + 100 g cheese at 0.05/g
+        self.assertEqual(self._cost(self.pizza), Decimal("6.2500"))
+        lines = {line["name"]: line for line in RecipeCost.objects.get(recipe=self.pizza).lines}
+        self.assertEqual(lines["Dough"]["source"], "prep")
+        self.assertEqual(lines["Dough"]["quantity"], 0.25)
+
+    def test_stock_price_change_propagates_through_prep_recipes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour_stock.cost_per_unit = Decimal("20.00")
+            self.flour_stock.save()
+        self.assertEqual(self._cost(self.dough_recipe), Decimal("10.0000"))
+        self.assertEqual(self._cost(self.pizza), Decimal("7.5000"))
+
+    def test_stock_save_without_price_change_recomputes_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.flour_stock.current_stock = Decimal("3")
+            self.flour_stock.save()
+        self.assertEqual(callbacks, [])
+
+    def test_bulk_price_update_touches_only_affected_recipes(self):
+        salad_stamp = RecipeCost.objects.get(recipe=self.salad).computed_at
+        stock_stamp = self.flour_stock.updated_at
+        self.assertEqual(bulk_update_inventory_costs({self.flour_stock.pk: Decimal("12.00")}), 2)
+        self.assertEqual(self._cost(self.pizza), Decimal("6.5000"))
+        self.flour_stock.refresh_from_db()
+        self.assertGreater(self.flour_stock.updated_at, stock_stamp)
+        self.assertEqual(RecipeCost.objects.get(recipe=self.salad).computed_at, salad_stamp)
+
+    def test_report_reads_stored_costs(self):
+        with self.assertNumQueries(2):
+            report = compute_food_cost_report(self.restaurant)
+        rows = {row["name"]: row for row in report["items"]}
+        self.assertEqual(set(rows), {"Pizza", "Salad"})
+        self.assertEqual(rows["Pizza"]["portion_cost"], 6.25)
+        self.assertEqual(rows["Pizza"]["food_cost_pct"], 12.5)
+        self.assertTrue(rows["Pizza"]["cost_complete"])
+
+    def test_report_backfills_uncosted_recipes(self):
+        RecipeCost.objects.all().delete()
+        report = compute_food_cost_report(self.restaurant)
+        self.assertEqual({row["name"]: row["portion_cost"] for row in report["items"]}, {"Pizza": 6.25, "Salad": 2.0})
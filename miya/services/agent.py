@@ -11,6 +11,7 @@ from typing import Any
 import requests
 from django.conf import settings
 
+from core.metrics import miya_stage
 from miya.services.reply_format import format_miya_reply
 from miya.services.message_pipeline import (
     ExecutionStage,
@@ -991,7 +992,8 @@ def run_miya_chat(
     idle = _generic_fallback(lang)
 
     for _ in range(MAX_TOOL_STEPS + 1):
-        data = _openai_chat(messages, tools=active_tools or None)
+        with miya_stage("llm", channel):
+            data = _openai_chat(messages, tools=active_tools or None)
         choice = (data.get("choices") or [{}])[0]
         message = choice.get("message") or {}
         tool_calls = message.get("tool_calls") or []
@@ -1031,13 +1033,14 @@ def run_miya_chat(
             if isinstance(args, dict):
                 args = {**args, "_operation_id": op_id, "_message_id": turn.message_id}
 
-            result = execute_tool(
-                name,
-                args,
-                access_token=access_token,
-                session_context=session_context,
-                user=user,
-            )
+            with miya_stage("tool", channel):
+                result = execute_tool(
+                    name,
+                    args,
+                    access_token=access_token,
+                    session_context=session_context,
+                    user=user,
+                )
             turn.record_tool_result(
                 tool_name=name,
                 tool_call_id=tool_call_id or op_id,
@@ -1075,7 +1078,8 @@ def run_miya_chat(
                     ),
                 }
             )
-            data = _openai_chat(messages, tools=None)
+            with miya_stage("llm", channel):
+                data = _openai_chat(messages, tools=None)
             choice = (data.get("choices") or [{}])[0]
             message = choice.get("message") or {}
             reply = (message.get("content") or "").strip()
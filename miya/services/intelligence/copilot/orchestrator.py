@@ -71,6 +71,7 @@ def run_copilot_turn(
         channel=channel,
     )
     stages.append(CopilotStage.UNDERSTAND.value)
+    timer.mark("understand")
     hint = routing_hint(user_message or message, classified)
     trace.intent = classified.intent.value
     trace.entity_type = classified.entity_type.value if classified.entity_type else ""
@@ -99,6 +100,7 @@ def run_copilot_turn(
         restaurant=restaurant,
         session_context=session_context,
     )
+    timer.mark("context")
 
     # Resume COMPLETE/ASSIGN after establishment clarification (Phase 12 follow-up).
     resumed = _try_pending_task_mutation_resume(
@@ -262,7 +264,9 @@ def _finish_copilot_turn(
                 outcome = "failed"
     elif not outcome:
         outcome = "defer"
-    timer.finish(outcome=outcome)
+    # Whatever ran after CONTEXT: routing checks, and for handled turns the
+    # plan/tool execution that produced the result.
+    timer.finish(outcome=outcome, stage="execute" if result else "route")
     return result
 
 
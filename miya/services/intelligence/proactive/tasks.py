@@ -7,6 +7,8 @@ from celery import shared_task
 from django.db.models import Q
 from django.utils import timezone
 
+from core.metrics import timed_per_tenant
+
 logger = logging.getLogger("miya.intelligence.proactive.tasks")
 
 _MANAGER_ROLES = ("SUPER_ADMIN", "OWNER", "ADMIN", "MANAGER")
@@ -34,7 +36,7 @@ def daily_ops_intelligence_sweep(period: str = "morning") -> dict:
         "at": timezone.now().isoformat(),
     }
 
-    for restaurant in Restaurant.objects.all().iterator(chunk_size=40):
+    for restaurant in timed_per_tenant("daily_ops_intelligence_sweep", Restaurant.objects.all().iterator(chunk_size=40)):
         summary["restaurants"] += 1
         managers = CustomUser.objects.filter(
             restaurant_id=restaurant.id,
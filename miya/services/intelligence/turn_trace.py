@@ -7,6 +7,8 @@ import uuid
 from dataclasses import asdict, dataclass, field
 from typing import Any
 
+from core.metrics import observe_miya_turn
+
 logger = logging.getLogger("miya.turn_trace")
 
 
@@ -34,6 +36,7 @@ class TurnTrace:
     notification_sent: bool | None = None
     outcome: str = ""  # success | clarify | denied | failed | defer
     elapsed_ms: float = 0.0
+    stage_ms: dict[str, float] = field(default_factory=dict)
     llm_calls: int = 0
     tokens_in: int = 0
     tokens_out: int = 0
@@ -78,9 +81,23 @@ class TurnTraceTimer:
     def __init__(self, trace: TurnTrace):
         self.trace = trace
         self._start = time.perf_counter()
+        self._last = self._start
+
+    def mark(self, stage: str) -> None:
+        """Close ``stage``: the time since the previous mark (or the start)."""
+        now = time.perf_counter()
+        self.trace.stage_ms[stage] = self.trace.stage_ms.get(stage, 0.0) + (now - self._last) * 1000
+        self._last = now
 
-    def finish(self, *, outcome: str = "success") -> TurnTrace:
+    def finish(self, *, outcome: str = "success", stage: str = "") -> TurnTrace:
+        """Record the turn; time since the last mark is booked to ``stage``."""
+        if stage:
+            self.mark(stage)
         self.trace.elapsed_ms = (time.perf_counter() - self._start) * 1000
         self.trace.outcome = outcome
         record_turn_trace(self.trace)
+        try:
+            observe_miya_turn(outcome, self.trace.channel, self.trace.stage_ms)
+        except Exception:
+            pass
         return self.trace
@@ -30,7 +30,7 @@ def build_manager_schedule_block(user, restaurant) -> str:
         access_token, gcal = _get_valid_access_token(restaurant)
         if access_token:
             rows = _fetch_calendar_events_for_agent(
-                access_token,
+                restaurant,
                 user,
                 past_hours=6,
                 future_hours=24 * 14,
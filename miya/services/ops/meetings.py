@@ -106,7 +106,7 @@ def list_meetings(
             calendar_connected = True
             rows = (
                 _fetch_calendar_events_for_agent(
-                    access_token,
+                    ctx.restaurant,
                     ctx.user,
                     past_hours=6,
                     future_hours=24 * horizon_days,
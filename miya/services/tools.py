@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from typing import Any
 
 import requests
@@ -11,6 +12,7 @@ from django.conf import settings
 
 from accounts.rbac_enforce import allowed_tools_for_user
 from core.agent_auth import is_agent_bearer, primary_agent_bearer_token
+from core.metrics import observe_tool
 from miya.services.tenant import bind_tool_payload_to_tenant, resolve_active_tenant
 
 logger = logging.getLogger(__name__)
@@ -1547,12 +1549,14 @@ TOOL_SCHEMAS: list[dict[str, Any]] = [
         "type": "function",
         "function": {
             "name": "list_inventory",
-            "description": "List inventory items for the workspace.",
+            "description": "List inventory items for the workspace. Filter by name, supplier or low stock (at or below reorder level).",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "restaurant_id": {"type": "string"},
                     "query": {"type": "string"},
+                    "low_stock": {"type": "boolean"},
+                    "supplier_id": {"type": "string"},
                 },
                 "required": ["restaurant_id"],
             },
@@ -2387,6 +2391,39 @@ def execute_tool(
     access_token: str | None,
     session_context: dict[str, Any],
     user=None,
+) -> dict[str, Any]:
+    """Run one Miya tool; dispatch latency is recorded per tool name."""
+    started = time.perf_counter()
+    result: Any = None
+    try:
+        result = _execute_tool(
+            name,
+            arguments,
+            access_token=access_token,
+            session_context=session_context,
+            user=user,
+        )
+        return result
+    finally:
+        observe_tool(_tool_metric_label(name), time.perf_counter() - started, result)
+
+
+def _tool_metric_label(name: str) -> str:
+    """Known tool names only, so a hallucinated name can't mint new series."""
+    from miya.services.ops import CANONICAL_TOOL_NAMES
+
+    if name in _ROUTE_MAP or name in CANONICAL_TOOL_NAMES or name in ("parse_photo", "parse_document", "dashboard_widgets"):
+        return name
+    return "unknown"
+
+
+def _execute_tool(
+    name: str,
+    arguments: dict[str, Any],
+    *,
+    access_token: str | None,
+    session_context: dict[str, Any],
+    user=None,
 ) -> dict[str, Any]:
     if name == "dashboard_widgets":
         name = "list_dashboard_widgets"
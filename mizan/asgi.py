@@ -3,19 +3,27 @@ import os
 from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
+from django.urls import path
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mizan.settings")
 
 # Initialize Django before importing routing files
 django_asgi_app = get_asgi_application()
 
+import chat.routing
 import notifications.routing
+from core.realtime import JWTQueryAuthMiddleware
+
+websocket_urlpatterns = notifications.routing.websocket_urlpatterns + [
+    path("ws/chat/", URLRouter(chat.routing.websocket_urlpatterns)),
+]
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
+    # ?token= JWTs resolve through the HTTP principal cache (core.realtime).
     "websocket": AuthMiddlewareStack(
-        URLRouter(
-            notifications.routing.websocket_urlpatterns
+        JWTQueryAuthMiddleware(
+            URLRouter(websocket_urlpatterns)
         )
     ),
 })
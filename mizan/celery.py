@@ -6,3 +6,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mizan.settings')
 app = Celery('mizan')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 app.autodiscover_tasks()
+
+from core.metrics import connect_celery_signals  # noqa: E402
+
+connect_celery_signals()
@@ -105,6 +105,7 @@ if not firebase_admin._apps and FIREBASE_SERVICE_ACCOUNT_KEY != '{}':
 # ---------------------------
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',                      # MUST be first for CORS
+    'core.middleware.MetricsMiddleware',                          # Route latency + DB query count
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',       # REQUIRED before auth
     'django.middleware.common.CommonMiddleware',
@@ -115,10 +116,21 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',       # REQUIRED for admin
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.middleware.AuditLoggingMiddleware',                     # Persists "who did what"
+    'core.middleware.AuditBatchMiddleware',                       # One insert for a request's scheduling audit rows
 ]
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Prometheus: /metrics requires "Authorization: Bearer <METRICS_TOKEN>" (DEBUG
+# serves it without one). Celery workers export on CELERY_METRICS_PORT when
+# set; see core.metrics for PROMETHEUS_MULTIPROC_DIR.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+CELERY_METRICS_PORT = config('CELERY_METRICS_PORT', default=0, cast=int)
+# Per-request query profile (core.query_profile): X-Query-Profile response
+# header, and the share of requests logged with their repeated query shapes.
+QUERY_PROFILE_HEADER = config('QUERY_PROFILE_HEADER', default=DEBUG, cast=bool)
+QUERY_PROFILE_SAMPLE_RATE = config('QUERY_PROFILE_SAMPLE_RATE', default=0.01, cast=float)
+
 # ---------------------------
 # URLs
 # ---------------------------
@@ -314,6 +326,9 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
 }
+# Seconds a verified JWT principal (user + tenant lifecycle verdict) stays cached;
+# user/restaurant saves invalidate it early (accounts.signals).
+AUTH_PRINCIPAL_CACHE_TTL = config('AUTH_PRINCIPAL_CACHE_TTL', default=60, cast=int)
 
 # ---------------------------
 # CORS Settings
@@ -683,6 +698,36 @@ CELERY_BEAT_SCHEDULE = {
         "task": "pos.tasks.sync_orders_for_connected_pos_restaurants",
         "schedule": crontab(minute=0),  # Every hour: pull orders for all connected POS
     },
+    # Rebuild hour-of-week demand buckets touched since the last pass so
+    # forecasts don't pay the rebuild on the request path.
+    "refresh_stale_demand_curves": {
+        "task": "pos.tasks.refresh_stale_demand_curves",
+        "schedule": crontab(minute='*/15'),
+    },
+    # Daily sales / attendance / inventory reports: each tenant's closed day
+    # is materialized at its local nightly hour; stale rows (late data) are
+    # rebuilt on the next tick.
+    "materialize_daily_reports_hourly": {
+        "task": "reporting.tasks.materialize_daily_reports",
+        "schedule": crontab(minute=20),
+    },
+    # Stock ledger snapshots bound point-in-time stock lookups to an hour of
+    # movements; taken before the 20-past report materialization.
+    "snapshot_stock_balances_hourly": {
+        "task": "inventory.tasks.snapshot_stock_balances",
+        "schedule": crontab(minute=10),
+    },
+    # Seat counters are kept by signals; the nightly recount catches writes
+    # that bypass them (queryset updates) and abandoned import reservations.
+    "reconcile_staff_seats_daily": {
+        "task": "billing.tasks.reconcile_staff_seats",
+        "schedule": crontab(hour=3, minute=40),
+    },
+    # Background report exports are download handles, not archives.
+    "purge_expired_report_exports_daily": {
+        "task": "reporting.tasks.purge_expired_report_exports",
+        "schedule": crontab(hour=4, minute=40),
+    },
     # Wakes parked / stale staff requests so the inbox doesn't rot.
     # Hourly is the right cadence — finer than this just hammers the DB
     # without any user-visible change (managers don't refresh that often).
@@ -742,6 +787,10 @@ CELERY_BEAT_SCHEDULE = {
         "task": "scheduling.memory_tasks.calendar_event_approach_sweep",
         "schedule": crontab(minute='*/10'),  # meeting pings (30m / 1h / 1d before)
     },
+    "sync_calendar_mirrors": {
+        "task": "dashboard.tasks.sync_calendar_mirrors",
+        "schedule": crontab(minute='*/5'),  # incremental Google Calendar sync (syncToken)
+    },
     "daily_briefing_sweep": {
         "task": "scheduling.memory_tasks.daily_briefing_sweep",
         "schedule": crontab(minute=30, hour=7),  # 07:30 local — personal memory briefing
@@ -23,9 +23,12 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.routers import DefaultRouter
 
 from accounts.views import redirect_to_wa_activation, redirect_to_wa_chat
+from core.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Prometheus scrape endpoint (bearer METRICS_TOKEN)
+    path('metrics', metrics_view, name='metrics'),
     # Short public WhatsApp redirects (shareable activation / chat links)
     path('wa', redirect_to_wa_activation, name='wa_activation_short'),
     path('wa/hi', redirect_to_wa_chat, name='wa_chat_short'),
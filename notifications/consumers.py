@@ -1,70 +1,44 @@
 # notifications/consumers.py
 
-import json, sys
-from urllib.parse import parse_qs
+import json
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from rest_framework_simplejwt.tokens import AccessToken, UntypedToken
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
-# User = get_user_model()
+from core.realtime import TenantSocketMixin, token_from_scope, user_group
 
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(TenantSocketMixin, AsyncWebsocketConsumer):
+    """Per-user notifications plus tenant / role / branch fan-out groups.
 
-    @database_sync_to_async
-    def get_user_from_token(self, token_key):
-        """
-        Authenticate user from JWT, imported only after Django setup.
-        """
-        from rest_framework_simplejwt.tokens import AccessToken, UntypedToken
-        from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-        from django.contrib.auth import get_user_model
-
-        User = get_user_model()
-        try:
-            # Validate token
-            AccessToken(token_key)
-            token = UntypedToken(token_key)
-            user = User.objects.get(id=token["user_id"])
-            return user
-        except (InvalidToken, TokenError, User.DoesNotExist):
-            return None
+    Authentication and group membership come from
+    ``core.realtime.JWTQueryAuthMiddleware``, which resolves the token
+    through the principal cache shared with HTTP auth.
+    """
 
     async def connect(self):
         """
         Called when WebSocket is connecting.
         """
-        from django.conf import settings  # safe to import here
-        print("WebSocket connection attempt", file=sys.stderr)
-        query_params = parse_qs(self.scope["query_string"].decode())
-        token = query_params.get("token", [None])[0]
-
-        if not token:
+        if not token_from_scope(self.scope):
             await self.close(code=4001)
             return
 
-        self.user = await self.get_user_from_token(token)
-        username = self.user.first_name if self.user else "Anonymous"
-        print(f"Authenticated user: {username}", file=sys.stderr)
-
+        self.user = self.scope.get("user")
         if not self.user or not self.user.is_authenticated:
             await self.close(code=4002)
             return
 
-        self.group_name = f"user_{self.user.id}_notifications"
-        print(f"Joining group: {self.group_name}", file=sys.stderr)
-        await self.channel_layer.group_add(self.group_name, self.channel_name)
-        print(f"layer: {self.channel_layer}", file=sys.stderr)
+        self.group_name = user_group(self.user.id)
+        await self.join_connection_groups()
         await self.accept()
 
     async def disconnect(self, close_code):
         if hasattr(self, "group_name"):
-            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await self.leave_connection_groups()
 
     async def receive(self, text_data):
-        # Not handling messages from client side
-        pass
+        # Not handling messages from client side; any frame (e.g. a ping)
+        # keeps the user's presence fresh.
+        await self.touch_presence()
 
 
     async def send_notification(self, event):
@@ -14,6 +14,7 @@ import tempfile
 import shutil
 import subprocess
 
+from core.metrics import graph_request
 from core.whatsapp_config import (
     get_whatsapp_access_token,
     get_whatsapp_phone_number_id,
@@ -609,7 +610,8 @@ class NotificationService:
                 "text": {"body": body}
             }
 
-            resp = requests.post(
+            resp = graph_request(
+                "POST",
                 url,
                 headers={'Authorization': f"Bearer {token}"},
                 json=payload
@@ -890,7 +892,7 @@ class NotificationService:
                 "text": {"body": body}
             }
             
-            resp = requests.post(url, headers={'Authorization': f"Bearer {token}"}, json=payload)
+            resp = graph_request("POST", url, headers={'Authorization': f"Bearer {token}"}, json=payload)
             try:
                 data = resp.json()
             except Exception:
@@ -1189,7 +1191,8 @@ class NotificationService:
                     lang,
                     phone,
                 )
-                resp = requests.post(
+                resp = graph_request(
+                    "POST",
                     url, headers={"Authorization": f"Bearer {token}"}, json=payload
                 )
                 try:
@@ -1481,10 +1484,19 @@ class NotificationService:
         }
 
     def _ensure_shift_tasks_from_templates(self, user, active_shift):
-        """Create ShiftTasks from task templates (including standing assignees)."""
+        """Create ShiftTasks from task templates (including standing assignees).
+
+        Runs on every clock-in: existing tasks are read once, missing ones are
+        inserted with one ``bulk_create``, so a repeat clock-in costs a couple
+        of reads and no writes.
+        """
         try:
             from scheduling.models import ShiftTask
-            from scheduling.shift_auto_templates import _normalize_task_item
+            from scheduling.shift_auto_templates import (
+                _normalize_task_item,
+                bulk_create_shift_tasks,
+                clock_in_template_steps,
+            )
             from scheduling.standing_checklist import (
                 attach_standing_templates_to_shift,
                 user_can_run_template,
@@ -1499,16 +1511,23 @@ class NotificationService:
         except Exception:
             return
 
+        by_title = {}
+        by_template_title = {}
+        for task in ShiftTask.objects.filter(shift=active_shift, assigned_to=user):
+            by_title.setdefault(task.title, task)
+            cfg = task.branch_config if isinstance(task.branch_config, dict) else {}
+            tpl_key = str(cfg.get("template_id") or "")
+            if tpl_key:
+                by_template_title.setdefault((tpl_key, task.title), task)
+        templates_with_tasks = {tpl_key for tpl_key, _ in by_template_title}
+
+        new_tasks = []
+        new_titles = set()
         for tpl in templates:
             if not user_can_run_template(user, tpl):
                 continue
             tpl_id = str(getattr(tpl, "id", "") or "")
-            existing_for_tpl = ShiftTask.objects.filter(
-                shift=active_shift,
-                assigned_to=user,
-                branch_config__template_id=tpl_id,
-            )
-            if tpl_id and existing_for_tpl.exists():
+            if tpl_id and tpl_id in templates_with_tasks:
                 steps = list(getattr(tpl, "tasks", None) or [])
                 for step in steps:
                     if not isinstance(step, dict):
@@ -1522,51 +1541,19 @@ class NotificationService:
                     title = str(title or "").strip()[:255]
                     if not title:
                         continue
-                    match = existing_for_tpl.filter(title=title).first()
+                    match = by_template_title.get((tpl_id, title))
                     if match:
                         apply_verification_fields_to_shift_task(match, step)
                 continue
-            existing_titles = set(
-                ShiftTask.objects.filter(shift=active_shift, assigned_to=user)
-                .values_list("title", flat=True)
-                .distinct()
-            )
-            steps = []
-            try:
-                if getattr(tpl, "sop_steps", None):
-                    steps = list(tpl.sop_steps or [])
-                elif getattr(tpl, "tasks", None):
-                    steps = list(tpl.tasks or [])
-            except Exception:
-                steps = []
-            if not steps:
-                steps = [{"title": getattr(tpl, "name", "Task"), "description": getattr(tpl, "description", "") or ""}]
-            for step in steps:
-                if isinstance(step, str):
-                    title = (step.strip()[:255] or getattr(tpl, "name", "Task")).strip()
-                    desc = ""
-                    raw = {"title": title, "description": desc}
-                elif isinstance(step, dict):
-                    title = (step.get("title") or step.get("name") or step.get("task") or getattr(tpl, "name", "Task"))[:255].strip()
-                    desc = (step.get("description") or step.get("details") or "").strip()
-                    raw = step
-                else:
-                    title = (getattr(tpl, "name", "Task") or "Task").strip()
-                    desc = ""
-                    raw = {"title": title, "description": desc}
-                if not title:
-                    title = getattr(tpl, "name", "Task") or "Task"
-                raw_item = raw if isinstance(raw, dict) else {"title": title, "description": desc}
-                if title in existing_titles:
-                    existing_task = ShiftTask.objects.filter(
-                        shift=active_shift,
-                        assigned_to=user,
-                        title=title,
-                    ).first()
-                    if existing_task:
-                        apply_verification_fields_to_shift_task(existing_task, raw_item)
+            for step in clock_in_template_steps(tpl):
+                title = step["title"]
+                raw_item = step["raw"]
+                existing_task = by_title.get(title)
+                if existing_task is not None:
+                    apply_verification_fields_to_shift_task(existing_task, raw_item)
+                    continue
+                if title in new_titles:
                     continue
-                existing_titles.add(title)
                 try:
                     t = _normalize_task_item(raw_item)
                     vfields = verification_fields_from_item(raw_item)
@@ -1574,24 +1561,35 @@ class NotificationService:
                         "template_task_id": t.get("template_task_id") or "",
                         "response_type": t.get("response_type") or "yes_no",
                         "branches": t.get("branches") or {},
-                        "template_id": str(getattr(tpl, "id", "") or ""),
+                        "template_id": tpl_id,
                         "template_name": getattr(tpl, "name", "") or "",
                         "requires_photo": bool(vfields["requires_photo"]),
                         "verification_type": vfields["verification_type"],
                     }
-                    ShiftTask.objects.create(
-                        shift=active_shift,
-                        title=title,
-                        description=desc,
-                        status="TODO",
-                        assigned_to=user,
-                        branch_config=branch_config,
-                        verification_required=vfields["verification_required"],
-                        verification_type=vfields["verification_type"],
+                    new_titles.add(title)
+                    new_tasks.append(
+                        ShiftTask(
+                            shift=active_shift,
+                            title=title,
+                            description=step["description"],
+                            status="TODO",
+                            assigned_to=user,
+                            branch_config=branch_config,
+                            verification_required=vfields["verification_required"],
+                            verification_type=vfields["verification_type"],
+                        )
                     )
                 except Exception as e:
                     logger.warning("_ensure_shift_tasks_from_templates: %s", e)
 
+        if new_tasks:
+            try:
+                bulk_create_shift_tasks(
+                    shift=active_shift, assignee=user, tasks=new_tasks, source="clock_in"
+                )
+            except Exception as e:
+                logger.warning("_ensure_shift_tasks_from_templates: %s", e)
+
     def start_conversational_checklist_after_clock_in(self, user, active_shift, phone_digits=None):
         """
         Start the step-by-step conversational checklist (WhatsApp) for a staff who just clocked in.
@@ -1863,7 +1861,7 @@ class NotificationService:
                     "action": {"buttons": action_buttons}
                 }
             }
-            resp = requests.post(url, headers={'Authorization': f"Bearer {token}"}, json=payload)
+            resp = graph_request("POST", url, headers={'Authorization': f"Bearer {token}"}, json=payload)
             try:
                 data = resp.json()
             except Exception:
@@ -1900,7 +1898,7 @@ class NotificationService:
                     "action": {"name": "send_location"}
                 }
             }
-            resp = requests.post(url, headers={'Authorization': f"Bearer {token}"}, json=payload)
+            resp = graph_request("POST", url, headers={'Authorization': f"Bearer {token}"}, json=payload)
             try:
                 data = resp.json()
             except Exception:
@@ -1993,7 +1991,8 @@ class NotificationService:
                 "type": "location",
                 "location": location_payload,
             }
-            resp = requests.post(
+            resp = graph_request(
+                "POST",
                 url, headers={"Authorization": f"Bearer {token}"}, json=payload, timeout=15
             )
             try:
@@ -2039,7 +2038,7 @@ class NotificationService:
                 return None, None
 
             url = f"https://graph.facebook.com/{getattr(settings, 'WHATSAPP_API_VERSION', 'v22.0')}/{media_id}"
-            resp = requests.get(url, headers={'Authorization': f"Bearer {token}"}, timeout=10)
+            resp = graph_request("GET", url, headers={'Authorization': f"Bearer {token}"}, timeout=10)
             if resp.status_code != 200:
                 logger.warning(f"WhatsApp media lookup failed: {resp.status_code} - {resp.text}")
                 return None, None
@@ -2057,7 +2056,7 @@ class NotificationService:
             if not token or not media_url:
                 return None
 
-            resp = requests.get(media_url, headers={'Authorization': f"Bearer {token}"}, timeout=30)
+            resp = graph_request("GET", media_url, headers={'Authorization': f"Bearer {token}"}, timeout=30)
             if resp.status_code != 200:
                 logger.warning(f"WhatsApp media download failed: {resp.status_code} - {resp.text[:200]}")
                 return None
@@ -2415,7 +2414,8 @@ class NotificationService:
                 'messaging_product': 'whatsapp',
                 'type': mime_type,
             }
-            resp = requests.post(
+            resp = graph_request(
+                "POST",
                 url,
                 headers={'Authorization': f"Bearer {token}"},
                 files=files,
@@ -2483,7 +2483,8 @@ class NotificationService:
         }
 
         try:
-            resp = requests.post(
+            resp = graph_request(
+                "POST",
                 url,
                 headers={'Authorization': f"Bearer {token}"},
                 json=payload,
@@ -2581,7 +2582,8 @@ class NotificationService:
         }
 
         try:
-            resp = requests.post(
+            resp = graph_request(
+                "POST",
                 url,
                 headers={"Authorization": f"Bearer {token}"},
                 json=payload,
@@ -7,6 +7,8 @@ from datetime import timedelta
 from celery import shared_task
 from django.utils import timezone
 
+from core.metrics import timed_per_tenant
+
 logger = logging.getLogger(__name__)
 
 # Re-notify at most this often while a document stays in the reminder window
@@ -24,7 +26,7 @@ def compliance_reminder_sweep() -> dict:
     today = timezone.now().date()
     summary = {"notified": 0, "checked": 0}
 
-    for restaurant in Restaurant.objects.filter(is_active=True).iterator(chunk_size=50):
+    for restaurant in timed_per_tenant("compliance_reminder_sweep", Restaurant.objects.filter(is_active=True).iterator(chunk_size=50)):
         qs = ComplianceReminder.objects.filter(
             restaurant=restaurant,
             status=ComplianceReminder.STATUS_UPCOMING,
@@ -88,7 +90,7 @@ def compliance_document_expiry_sweep() -> dict:
     now = timezone.now()
     summary = {"notified_docs": 0, "checked": 0, "managers_pinged": 0}
 
-    for restaurant in Restaurant.objects.filter(is_active=True).iterator(chunk_size=50):
+    for restaurant in timed_per_tenant("compliance_document_expiry_sweep", Restaurant.objects.filter(is_active=True).iterator(chunk_size=50)):
         qs = ComplianceDocument.objects.filter(
             restaurant=restaurant,
             status__in=[ComplianceDocument.STATUS_ACTIVE, ComplianceDocument.STATUS_EXPIRED],
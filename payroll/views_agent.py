@@ -108,7 +108,9 @@ def agent_generate_payslips(request):
 
     for staff in staff_qs.iterator():
         sid = str(staff.id)
-        hours_override = hours_map.get(sid)
+        # The map covers everyone with clock activity in one pass; no
+        # activity means zero hours, not a per-staff re-query.
+        hours_override = hours_map.get(sid, Decimal("0.00"))
         payslip, created, pdf_bytes = generate_payslip_for_staff(
             staff=staff,
             restaurant=restaurant,
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class PosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pos'
-    verbose_name = 'Point of Sale'
\ No newline at end of file
+    verbose_name = 'Point of Sale'
+
+    def ready(self):
+        import pos.signals  # noqa: F401
@@ -0,0 +1,272 @@
+"""
+Per-tenant hour-of-week demand curve and the shared demand forecast.
+
+Scheduling, labor recommendations and prep lists each used to aggregate
+orders on their own (the scheduler with seven ``order_time__date__in``
+counts that could not use the ``(restaurant, order_time)`` index). They now
+read one store and one forecast:
+
+* :class:`~pos.models.DemandCurveDay` keeps 24 hourly buckets of completed
+  orders, revenue and reserved covers per local day. Saving an order or an
+  EatNow reservation flags its day stale (``pos.signals``); the next reader
+  or the periodic sweep rebuilds stale/missing days with one range query per
+  source (:func:`refresh_demand_days`).
+* :func:`demand_forecast` lays the last four weeks out as 168-slot curves and
+  runs the slot-wise EWMA/buffer maths from :mod:`pos.forecast`. The result
+  is cached per tenant and start date until the tenant's curve changes.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from core.read_through_cache import safe_cache_get, safe_cache_set
+from core.tenant_time import restaurant_tz
+
+from .forecast import curve_buffer, ewma_curve, ewma_mean
+from .models import DemandCurveDay
+
+logger = logging.getLogger(__name__)
+
+HOURS = 24
+DAYS = 7
+HISTORY_WEEKS = 4
+FORECAST_CACHE_TTL = 6 * 3600
+# Reservations without a usable time are booked into the dinner hour so the
+# daily totals stay right.
+DEFAULT_RESERVATION_HOUR = 19
+SERIES = ("orders", "covers", "revenue")
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _reservation_hour(raw) -> int:
+    try:
+        hour = int(str(raw or "").strip().split(":")[0])
+    except (TypeError, ValueError):
+        return DEFAULT_RESERVATION_HOUR
+    return hour if 0 <= hour < HOURS else DEFAULT_RESERVATION_HOUR
+
+
+def _version_key(restaurant_id) -> str:
+    return f"demand:curve_version:{restaurant_id}"
+
+
+def refresh_demand_days(restaurant, start: date, end: date) -> int:
+    """Rebuild ``[start, end]`` from orders and reservations. Returns days written."""
+    from accounts.models import EatNowReservation
+    from .models import Order
+
+    days = _days(start, end)
+    if not days:
+        return 0
+    tz = restaurant_tz(restaurant)
+    buckets = {d: {name: [0.0] * HOURS for name in SERIES} for d in days}
+
+    lo = timezone.make_aware(datetime.combine(start, datetime.min.time()), tz)
+    hi = timezone.make_aware(datetime.combine(end + timedelta(days=1), datetime.min.time()), tz)
+    rows = (
+        Order.objects.filter(restaurant=restaurant, order_time__gte=lo, order_time__lt=hi, status='COMPLETED')
+        .annotate(d=TruncDate('order_time', tzinfo=tz), h=ExtractHour('order_time', tzinfo=tz))
+        .values('d', 'h')
+        .annotate(n=Count('id'), rev=Sum('total_amount'))
+    )
+    for row in rows:
+        slot = buckets.get(row['d'])
+        if slot is not None:
+            slot['orders'][row['h']] += row['n']
+            slot['revenue'][row['h']] += float(row['rev'] or 0)
+
+    for day, rt, size in EatNowReservation.objects.filter(
+        restaurant=restaurant,
+        is_deleted=False,
+        reservation_date__gte=start,
+        reservation_date__lte=end,
+    ).values_list('reservation_date', 'reservation_time', 'group_size'):
+        slot = buckets.get(day)
+        if slot is not None:
+            slot['covers'][_reservation_hour(rt)] += int(size or 0)
+
+    now = timezone.now()
+    DemandCurveDay.objects.bulk_create(
+        [
+            DemandCurveDay(
+                restaurant=restaurant,
+                day=d,
+                orders=b['orders'],
+                covers=b['covers'],
+                revenue=[round(v, 2) for v in b['revenue']],
+                is_stale=False,
+                refreshed_at=now,
+            )
+            for d, b in buckets.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['restaurant', 'day'],
+        update_fields=['orders', 'covers', 'revenue', 'is_stale', 'refreshed_at'],
+    )
+    safe_cache_set(_version_key(restaurant.id), time.time_ns(), None)
+    return len(days)
+
+
+def mark_demand_days_stale(restaurant_id, days: Iterable[date]) -> int:
+    """Flag days for rebuild after their orders/reservations changed."""
+    days = {d for d in days if d}
+    if not days:
+        return 0
+    return DemandCurveDay.objects.filter(
+        restaurant_id=restaurant_id, day__in=days, is_stale=False
+    ).update(is_stale=True)
+
+
+def demand_history(restaurant, start: date, end: date) -> Dict[date, Dict[str, List[float]]]:
+    """``{day: {'orders'|'covers'|'revenue': [24 floats]}}`` for the window,
+    rebuilding missing or stale days first."""
+    rows = {
+        r.day: r
+        for r in DemandCurveDay.objects.filter(restaurant=restaurant, day__gte=start, day__lte=end)
+    }
+    todo = [d for d in _days(start, end) if d not in rows or rows[d].is_stale]
+    if todo:
+        refresh_demand_days(restaurant, todo[0], todo[-1])
+        rows.update({
+            r.day: r
+            for r in DemandCurveDay.objects.filter(restaurant=restaurant, day__gte=todo[0], day__lte=todo[-1])
+        })
+    return {
+        d: {name: list(getattr(r, name) or [0.0] * HOURS) for name in SERIES}
+        for d, r in rows.items()
+    }
+
+
+@dataclass
+class DemandForecast:
+    """Expected demand for seven consecutive days from ``start``.
+
+    Every series is 168 floats: slot ``day_offset * 24 + hour`` in the
+    restaurant's local time. ``*_upper`` add the variance-driven buffer;
+    ``booked_covers`` are reservations already on the books for those days.
+    """
+    start: date
+    orders: List[float] = field(default_factory=list)
+    covers: List[float] = field(default_factory=list)
+    revenue: List[float] = field(default_factory=list)
+    orders_upper: List[float] = field(default_factory=list)
+    booked_covers: List[float] = field(default_factory=list)
+    history_weeks: int = 0
+
+    def daily_totals(self, series: str = "orders") -> List[float]:
+        values = getattr(self, series) or [0.0] * (HOURS * DAYS)
+        return [sum(values[d * HOURS:(d + 1) * HOURS]) for d in range(DAYS)]
+
+    def hourly(self, day_offset: int, series: str = "orders") -> List[float]:
+        values = getattr(self, series) or [0.0] * (HOURS * DAYS)
+        return values[day_offset * HOURS:(day_offset + 1) * HOURS]
+
+
+def _week_curve(history: Dict[date, Dict[str, List[float]]], start: date, series: str) -> Optional[List[float]]:
+    """168-slot curve for the 7 days from ``start``; ``None`` if no day has data."""
+    out: List[float] = []
+    seen = False
+    for offset in range(DAYS):
+        row = history.get(start + timedelta(days=offset))
+        if row is not None and (any(row['orders']) or any(row['covers'])):
+            seen = True
+        out.extend((row or {}).get(series) or [0.0] * HOURS)
+    return out if seen else None
+
+
+def build_forecast(history: Dict[date, Dict[str, List[float]]], start: date) -> DemandForecast:
+    """Pure part of :func:`demand_forecast` (no DB, no cache)."""
+    week_starts = [start - timedelta(weeks=w) for w in range(1, HISTORY_WEEKS + 1)]
+    curves = {name: [_week_curve(history, ws, name) for ws in week_starts] for name in SERIES}
+    orders = ewma_curve(curves['orders']) or [0.0] * (HOURS * DAYS)
+    buffers = curve_buffer(curves['orders']) or [0.0] * (HOURS * DAYS)
+    booked = []
+    for offset in range(DAYS):
+        row = history.get(start + timedelta(days=offset))
+        booked.extend((row or {}).get('covers') or [0.0] * HOURS)
+    return DemandForecast(
+        start=start,
+        orders=[round(v, 3) for v in orders],
+        covers=[round(v, 3) for v in (ewma_curve(curves['covers']) or [0.0] * (HOURS * DAYS))],
+        revenue=[round(v, 2) for v in (ewma_curve(curves['revenue']) or [0.0] * (HOURS * DAYS))],
+        orders_upper=[round(m * (1 + b), 3) for m, b in zip(orders, buffers)],
+        booked_covers=booked,
+        history_weeks=sum(1 for c in curves['orders'] if c is not None),
+    )
+
+
+def demand_forecast(restaurant, start: date) -> DemandForecast:
+    """Shared forecast for the seven days from ``start`` (cached per curve version)."""
+    version = safe_cache_get(_version_key(restaurant.id)) or 0
+    key = f"demand:forecast:{restaurant.id}:{start.isoformat()}:{version}"
+    cached = safe_cache_get(key)
+    if cached is not None:
+        return DemandForecast(**cached)
+    history = demand_history(
+        restaurant,
+        start - timedelta(weeks=HISTORY_WEEKS),
+        start + timedelta(days=DAYS - 1),
+    )
+    forecast = build_forecast(history, start)
+    # The refresh above may have bumped the version; store under the new one.
+    version = safe_cache_get(_version_key(restaurant.id)) or 0
+    safe_cache_set(f"demand:forecast:{restaurant.id}:{start.isoformat()}:{version}", asdict(forecast), FORECAST_CACHE_TTL)
+    return forecast
+
+
+def covers_for_dates(restaurant, target_dates: Iterable[date]) -> Tuple[float, float]:
+    """``(booked, baseline)`` covers across ``target_dates`` for the prep-list
+    overlay: reservations already on the books versus the EWMA of the same
+    weekdays over the previous four weeks."""
+    dates = sorted(set(target_dates))
+    if not dates:
+        return 0.0, 0.0
+    history = demand_history(restaurant, dates[0] - timedelta(weeks=HISTORY_WEEKS), dates[-1])
+    booked = 0.0
+    baseline = 0.0
+    for d in dates:
+        booked += sum((history.get(d) or {}).get('covers') or [])
+        samples = []
+        for w in range(1, HISTORY_WEEKS + 1):
+            row = history.get(d - timedelta(weeks=w))
+            samples.append(sum(row['covers']) if row and any(row['covers']) else None)
+        baseline += ewma_mean(samples)
+    return float(booked), float(baseline)
+
+
+def refresh_stale_demand_days(limit: int = 500) -> int:
+    """Rebuild stale rows across tenants (periodic sweep). Returns days written."""
+    from accounts.models import Restaurant
+
+    spans: Dict[str, List[date]] = {}
+    for rid, day in DemandCurveDay.objects.filter(is_stale=True).values_list('restaurant_id', 'day')[:limit]:
+        spans.setdefault(str(rid), []).append(day)
+    written = 0
+    for restaurant in Restaurant.objects.filter(id__in=list(spans)):
+        days = sorted(spans[str(restaurant.id)])
+        # Rebuild each contiguous run separately so one old edit doesn't
+        # drag a month of untouched days along.
+        run_start = prev = days[0]
+        for d in days[1:] + [None]:
+            if d is not None and d == prev + timedelta(days=1):
+                prev = d
+                continue
+            try:
+                written += refresh_demand_days(restaurant, run_start, prev)
+            except Exception as exc:
+                logger.warning("demand curve refresh failed restaurant=%s: %s", restaurant.id, exc)
+            if d is not None:
+                run_start = prev = d
+    return written
@@ -1,9 +1,10 @@
 """
 Forecasting helpers for the prep-list engine.
 
-This module isolates the pure maths (EWMA mean, coefficient-of-variation,
-EatNow covers overlay, pack rounding) from the POS integration plumbing so
-the logic is testable and can be reused by Miya agents.
+This module isolates the pure maths (EWMA mean and curves, coefficient-of-
+variation, covers overlay, pack rounding) from the POS integration plumbing
+so the logic is testable and can be reused by Miya agents. Covers history
+comes from the demand curve store in :mod:`pos.demand_curve`.
 """
 
 from __future__ import annotations
@@ -11,7 +12,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, timedelta
 from decimal import ROUND_CEILING, Decimal
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 # Weights for the last 4 weeks (week-1 = most recent) — geometric decay.
 # Sum is normalised at compute-time so the weighted mean remains unbiased.
@@ -81,6 +82,37 @@ def dynamic_buffer(samples: Sequence[Optional[float]]) -> float:
     return max(MIN_BUFFER, min(MAX_BUFFER, cv))
 
 
+def ewma_curve(
+    weeks: Sequence[Optional[Sequence[float]]],
+    weights: Sequence[float] = DEFAULT_EWMA_WEIGHTS,
+) -> List[float]:
+    """Slot-wise :func:`ewma_mean` over whole curves (week-1 first).
+
+    Each entry of ``weeks`` is a full curve (e.g. the 168 hour-of-week
+    buckets) or ``None`` when that week has no data. Missing weeks drop out
+    for every slot at once, so the weight sum is computed a single time and
+    each slot is one dot product.
+    """
+    present = [(weights[i] if i < len(weights) else weights[-1], w) for i, w in enumerate(weeks) if w is not None]
+    if not present:
+        return []
+    wsum = sum(w for w, _ in present)
+    if wsum <= 0:
+        return [0.0] * len(present[0][1])
+    return [
+        sum(w * float(v or 0) for (w, _), v in zip(present, column)) / wsum
+        for column in zip(*(curve for _, curve in present))
+    ]
+
+
+def curve_buffer(weeks: Sequence[Optional[Sequence[float]]]) -> List[float]:
+    """Slot-wise :func:`dynamic_buffer` for the same week-major layout."""
+    present = [w for w in weeks if w is not None]
+    if not present:
+        return []
+    return [dynamic_buffer(column) for column in zip(*present)]
+
+
 def forecast_item(
     samples: Sequence[Optional[float]],
     covers_multiplier: float = 1.0,
@@ -125,55 +157,6 @@ def covers_multiplier(
     return max(0.5, min(2.0, ratio))
 
 
-# ---------------------------------------------------------------------------
-# EatNow covers lookup — per-tenant, scoped to the target dates.
-# ---------------------------------------------------------------------------
-
-
-def _sum_covers(queryset) -> int:
-    """Sum ``group_size`` defensively (old rows may have NULL)."""
-    return sum(int(r.group_size or 0) for r in queryset)
-
-
-def eatnow_covers_for_dates(restaurant, target_dates: Iterable[date]) -> Tuple[float, float]:
-    """Return ``(expected_total, baseline_total)`` across ``target_dates``.
-
-    * expected = sum of ``group_size`` on the target dates themselves.
-    * baseline = sum over the same weekdays for the 4 preceding weeks,
-      divided by 4 (so it's directly comparable to a single-week total).
-
-    Returns ``(0, 0)`` if the tenant has no EatNow data — the caller then
-    treats the multiplier as 1.0.
-    """
-    from accounts.models import EatNowReservation
-
-    dates = list(target_dates)
-    if not dates:
-        return 0.0, 0.0
-
-    expected_qs = EatNowReservation.objects.filter(
-        restaurant=restaurant,
-        is_deleted=False,
-        reservation_date__in=dates,
-    )
-    expected_total = _sum_covers(expected_qs)
-
-    # Baseline: same weekday for weeks -1..-4, summed then averaged to one
-    # week equivalent so it's comparable to the expected total.
-    baseline_dates = [d - timedelta(weeks=w) for d in dates for w in range(1, 5)]
-    if not baseline_dates:
-        return float(expected_total), 0.0
-    baseline_qs = EatNowReservation.objects.filter(
-        restaurant=restaurant,
-        is_deleted=False,
-        reservation_date__in=baseline_dates,
-    )
-    baseline_total_raw = _sum_covers(baseline_qs)
-    baseline_total = baseline_total_raw / 4.0
-
-    return float(expected_total), float(baseline_total)
-
-
 # ---------------------------------------------------------------------------
 # Pack-rounding / lead-time helpers (Phase 1 purchasing math).
 # ---------------------------------------------------------------------------
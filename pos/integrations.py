@@ -5,13 +5,13 @@ Handles synchronization with external POS providers (Toast, Square, Clover)
 
 import requests
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Tuple
 from .models import Order, OrderLineItem, Payment
 from menu.models import MenuItem, MenuCategory
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta, timezone as dt_timezone
 import time
 import random
 import uuid
@@ -185,11 +185,212 @@ class BasePOSIntegration(ABC):
         """Process payment through external POS"""
         pass
 
+    # Set by a date-window fetch (``sync_orders`` /
+    # ``get_item_sales_facts_for_date_range``) that stopped at its page or row
+    # cap, so callers don't record the window as fully synced.
+    fetch_truncated = False
+
     def get_item_sales_for_date_range(self, start_date, end_date) -> Dict:
         """Fetch item-level sales from POS for prep list forecasting.
-        Returns {date: {item_name: quantity}}. Override in providers that support it."""
+        Returns {date: {item_name: quantity}}."""
+        facts = self.get_item_sales_facts_for_date_range(start_date, end_date)
+        return {
+            day: {name: row['quantity'] for name, row in items.items()}
+            for day, items in facts.items()
+        }
+
+    def get_item_sales_facts_for_date_range(self, start_date, end_date) -> Dict:
+        """Live POS fetch of per-day item sales.
+        Returns {date: {item_name: {'quantity': float, 'revenue': float}}}."""
+        try:
+            orders = self.sync_orders(start_date, end_date)
+        except Exception:
+            return {}
+        return self.item_sales_facts_from_orders(orders, start_date, end_date)
+
+    def item_sales_facts_from_orders(self, orders, start_date, end_date) -> Dict:
+        """Fold raw provider orders (as returned by ``sync_orders``) into
+        {date: {item_name: {'quantity', 'revenue'}}}. Override in providers
+        that support item-level sales."""
         return {}
 
+    def sales_location_id(self) -> str:
+        """Location key stored on local sales facts for this connection."""
+        return str(self.location_id or '')
+
+    # Pages fetched per incremental run before handing a token to the next run.
+    SYNC_PAGE_BUDGET = 10
+
+    def fetch_orders_since(self, since, until, page_token: str = '') -> Tuple[List[Dict], str]:
+        """Orders created or modified in ``[since, until]`` (aware datetimes).
+
+        Returns ``(orders, next_page_token)``; a non-empty token means the page
+        budget ran out and the caller should resume the same window with it.
+        Providers without a modified-time filter fall back to a date-window
+        ``sync_orders``.
+        """
+        return self.sync_orders(since.date(), until.date()), ''
+
+    def order_external_id(self, raw: Dict) -> str:
+        """Provider id of a raw order."""
+        return str(raw.get('guid') or raw.get('id') or '')
+
+    def order_sales_date(self, raw: Dict):
+        """Business day a raw order's item sales count towards, or None when
+        it contributes none (voided, no lines)."""
+        days = self.item_sales_facts_from_orders([raw], date.min, date.max)
+        return min(days) if days else None
+
+    def persist_orders(self, orders: List[Dict]) -> int:
+        """Upsert raw provider orders as ``POSExternalObject`` snapshots.
+
+        One ``INSERT ... ON CONFLICT`` per batch, keyed on the provider order id.
+        Returns the number of orders written.
+        """
+        return self._persist_order_snapshots(orders)
+
+    def _persist_order_snapshots(self, orders: List[Dict]) -> int:
+        from .models import POSExternalObject
+
+        provider = (self.restaurant.pos_provider or '').upper()
+        now = timezone.now()
+        rows = {}
+        for raw in orders or []:
+            ext_id = self.order_external_id(raw)
+            if ext_id:
+                rows[ext_id] = POSExternalObject(
+                    restaurant=self.restaurant,
+                    provider=provider,
+                    object_type='order',
+                    object_id=ext_id,
+                    payload=raw,
+                    sales_date=self.order_sales_date(raw),
+                    updated_at=now,
+                )
+        if rows:
+            POSExternalObject.objects.bulk_create(
+                list(rows.values()),
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['restaurant', 'provider', 'object_type', 'object_id'],
+                update_fields=['payload', 'sales_date', 'updated_at'],
+            )
+        return len(rows)
+
+    def local_item_sales_facts(self, start_date, end_date) -> Dict:
+        """``item_sales_facts_from_orders`` over the order snapshots already
+        stored for ``[start_date, end_date]``; no provider call."""
+        from .models import POSExternalObject
+
+        payloads = POSExternalObject.objects.filter(
+            restaurant=self.restaurant,
+            provider=(self.restaurant.pos_provider or '').upper(),
+            object_type='order',
+            sales_date__gte=start_date,
+            sales_date__lte=end_date,
+        ).values_list('payload', flat=True)
+        return self.item_sales_facts_from_orders(list(payloads), start_date, end_date)
+
+
+def _add_item_sale(result: Dict, day, name: str, qty: float, revenue: float = 0.0) -> None:
+    """Accumulate one line into a ``{date: {item: {'quantity', 'revenue'}}}`` map."""
+    row = result.setdefault(day, {}).setdefault(name, {'quantity': 0.0, 'revenue': 0.0})
+    row['quantity'] += qty
+    row['revenue'] += revenue
+
+
+def _money(value) -> float:
+    """Provider money fields are either plain numbers or ``{'amount': cents}``."""
+    if isinstance(value, dict):
+        try:
+            return float(value.get('amount') or 0) / 100.0
+        except (TypeError, ValueError):
+            return 0.0
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _bulk_upsert_menu_items(restaurant, provider: str, rows: List[Dict]) -> int:
+    """Set-based menu upsert keyed on ``(provider, external_id)``.
+
+    One read of the tenant's menu, then one ``bulk_update`` and one
+    ``bulk_create`` — instead of an ``update_or_create`` round-trip per item.
+    Unlinked local items with the same name are adopted rather than colliding
+    on ``(restaurant, name)``. Each row carries ``external_id`` plus the
+    MenuItem fields to set. Returns the number of items written.
+    """
+    by_ext: Dict[str, Dict] = {}
+    for row in rows:
+        ext_id = str(row.get('external_id') or '')
+        if ext_id:
+            by_ext[ext_id] = row
+    if not by_ext:
+        return 0
+
+    existing = list(MenuItem.objects.filter(restaurant=restaurant))
+    linked = {
+        str(mi.external_id): mi
+        for mi in existing
+        if mi.external_provider == provider and mi.external_id
+    }
+    by_name = {mi.name.lower(): mi for mi in existing}
+
+    to_update: List[MenuItem] = []
+    to_create: List[MenuItem] = []
+    fields: set = set()
+    for ext_id, row in by_ext.items():
+        values = {k: v for k, v in row.items() if k != 'external_id'}
+        fields.update(values)
+        mi = linked.get(ext_id)
+        if mi is None:
+            candidate = by_name.get(str(values.get('name') or '').lower())
+            if candidate is not None and not candidate.external_id:
+                mi = candidate
+                mi.external_provider = provider
+                mi.external_id = ext_id
+        if mi is not None:
+            for k, v in values.items():
+                setattr(mi, k, v)
+            to_update.append(mi)
+            continue
+        name_key = str(values.get('name') or '').lower()
+        if name_key in by_name:
+            logger.info("%s menu sync: skipping %s — name already used by another item", provider, ext_id)
+            continue
+        mi = MenuItem(restaurant=restaurant, external_provider=provider, external_id=ext_id, **values)
+        by_name[name_key] = mi
+        to_create.append(mi)
+
+    if to_update:
+        # bulk_update skips auto_now, so stamp updated_at explicitly.
+        now = timezone.now()
+        for mi in to_update:
+            mi.updated_at = now
+        MenuItem.objects.bulk_update(
+            to_update,
+            sorted(fields | {'external_provider', 'external_id', 'updated_at'}),
+            batch_size=500,
+        )
+    if to_create:
+        MenuItem.objects.bulk_create(to_create, batch_size=500)
+    return len(to_update) + len(to_create)
+
+
+def _upsert_menu_category(restaurant, provider: str, external_id: str, seen: Dict, **defaults):
+    """``update_or_create`` a provider category once per sync run."""
+    if external_id in seen:
+        return seen[external_id]
+    category, _ = MenuCategory.objects.update_or_create(
+        restaurant=restaurant,
+        external_provider=provider,
+        external_id=external_id,
+        defaults=defaults,
+    )
+    seen[external_id] = category
+    return category
+
 
 class ToastIntegration(BasePOSIntegration):
     """Toast POS Integration — Partner Credentials auth.
@@ -311,15 +512,14 @@ class ToastIntegration(BasePOSIntegration):
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-        synced_items: list = []
+        rows: list = []
+        categories: Dict = {}
         for menu in menus.get("menus", []) or []:
             for group in menu.get("menuGroups", []) or []:
                 cat_name = group.get("name") or "Uncategorized"
-                category, _ = MenuCategory.objects.update_or_create(
-                    restaurant=self.restaurant,
-                    external_provider="TOAST",
-                    external_id=group.get("guid") or cat_name,
-                    defaults={"name": cat_name, "is_active": True},
+                category = _upsert_menu_category(
+                    self.restaurant, "TOAST", group.get("guid") or cat_name, categories,
+                    name=cat_name, is_active=True,
                 )
                 for item in group.get("menuItems", []) or group.get("items", []) or []:
                     # Toast returns top-level price when there are no
@@ -328,21 +528,17 @@ class ToastIntegration(BasePOSIntegration):
                     # depending on the endpoint — normalize both.
                     raw_price = item.get("price") or item.get("defaultPrice") or 0
                     price = float(raw_price) / 100 if isinstance(raw_price, int) and raw_price > 1000 else float(raw_price)
-                    menu_item, _ = MenuItem.objects.update_or_create(
-                        restaurant=self.restaurant,
-                        external_provider="TOAST",
-                        external_id=item.get("guid"),
-                        defaults={
-                            "category": category,
-                            "name": item.get("name") or "Item",
-                            "description": item.get("description") or "",
-                            "price": price,
-                            "is_active": (item.get("visibility") or "").upper() != "HIDDEN",
-                        },
-                    )
-                    synced_items.append(menu_item.id)
-
-        return {"success": True, "items_synced": len(synced_items), "provider": "Toast"}
+                    rows.append({
+                        "external_id": item.get("guid"),
+                        "category": category,
+                        "name": item.get("name") or "Item",
+                        "description": item.get("description") or "",
+                        "price": price,
+                        "is_active": (item.get("visibility") or "").upper() != "HIDDEN",
+                    })
+
+        synced = _bulk_upsert_menu_items(self.restaurant, "TOAST", rows)
+        return {"success": True, "items_synced": synced, "provider": "Toast"}
 
     def sync_orders(self, start_date=None, end_date=None) -> List[Dict]:
         """Pull orders via the `/orders/v2/ordersBulk` read endpoint.
@@ -374,17 +570,35 @@ class ToastIntegration(BasePOSIntegration):
             page_token = (body.get("nextPageToken") if isinstance(body, dict) else None) or resp.headers.get("Toast-Next-Page-Token")
             if not page_token:
                 break
+        self.fetch_truncated = bool(page_token)
         return all_orders
 
-    def get_item_sales_for_date_range(self, start_date, end_date) -> Dict:
-        """Returns {date: {item_name: quantity}} for prep-list forecasting."""
+    def fetch_orders_since(self, since, until, page_token: str = '') -> Tuple[List[Dict], str]:
+        """``ordersBulk`` filters ``startDate``/``endDate`` on modified date, so
+        the window is just the time since the last cursor."""
+        fmt = "%Y-%m-%dT%H:%M:%S.000+0000"
+        base = {
+            "startDate": since.astimezone(dt_timezone.utc).strftime(fmt),
+            "endDate": until.astimezone(dt_timezone.utc).strftime(fmt),
+            "pageSize": 100,
+        }
+        all_orders: list = []
+        token = page_token or None
+        for _ in range(self.SYNC_PAGE_BUDGET):
+            params = dict(base)
+            if token:
+                params["pageToken"] = token
+            resp = self._request("GET", "/orders/v2/ordersBulk", params=params)
+            body = resp.json() or {}
+            all_orders.extend(body if isinstance(body, list) else body.get("orders") or [])
+            token = (body.get("nextPageToken") if isinstance(body, dict) else None) or resp.headers.get("Toast-Next-Page-Token")
+            if not token:
+                return all_orders, ''
+        return all_orders, token or ''
+
+    def item_sales_facts_from_orders(self, orders, start_date, end_date) -> Dict:
         from django.utils.dateparse import parse_datetime
 
-        try:
-            orders = self.sync_orders(start_date, end_date)
-        except Exception:
-            return {}
-
         result: Dict = {}
         for order in orders or []:
             created = order.get("openedDate") or order.get("createdDate") or order.get("modifiedDate")
@@ -407,7 +621,7 @@ class ToastIntegration(BasePOSIntegration):
                     if not name:
                         continue
                     qty = float(sel.get("quantity") or 1)
-                    result[order_date][name] = result[order_date].get(name, 0) + qty
+                    _add_item_sale(result, order_date, name, qty, _money(sel.get("price")))
         return result
 
     def create_order(self, order: Order) -> Dict:
@@ -566,28 +780,23 @@ class SquareIntegration(BasePOSIntegration):
                         if variation_name and variation_name.lower() not in ("regular", "default"):
                             name = f"{name} ({variation_name})"
 
-                        menu_item, _ = MenuItem.objects.update_or_create(
-                            restaurant=self.restaurant,
-                            external_provider="SQUARE",
-                            external_id=variation.get('id'),
-                            defaults={
-                                'category': category,
-                                'name': name,
-                                'description': item_data.get('description', ''),
-                                'price': price_amount / 100,
-                                'is_active': not bool(obj.get('is_deleted', False)),
-                                'external_metadata': {
-                                    "square_item_id": obj.get("id"),
-                                    "square_variation_id": variation.get("id"),
-                                    "square_version": self._square_version(),
-                                },
-                            }
-                        )
-                        synced_items.append(menu_item.id)
-            
+                        synced_items.append({
+                            'external_id': variation.get('id'),
+                            'category': category,
+                            'name': name,
+                            'description': item_data.get('description', ''),
+                            'price': price_amount / 100,
+                            'is_active': not bool(obj.get('is_deleted', False)),
+                            'external_metadata': {
+                                "square_item_id": obj.get("id"),
+                                "square_variation_id": variation.get("id"),
+                                "square_version": self._square_version(),
+                            },
+                        })
+
             return {
                 'success': True,
-                'items_synced': len(synced_items),
+                'items_synced': _bulk_upsert_menu_items(self.restaurant, "SQUARE", synced_items),
                 'categories_synced': synced_categories,
                 'provider': 'Square'
             }
@@ -604,13 +813,43 @@ class SquareIntegration(BasePOSIntegration):
             query['end_at'] = end_date.isoformat() if hasattr(end_date, "isoformat") else str(end_date)
 
         body = {'query': query} if query else {}
-        response = self._request("POST", "/orders/search", json=body)
-        return (response.json() or {}).get('orders', [])
+        data = self._request("POST", "/orders/search", json=body).json() or {}
+        self.fetch_truncated = bool(data.get('cursor'))
+        return data.get('orders', [])
 
-    def get_item_sales_for_date_range(self, start_date, end_date) -> Dict:
-        """Fetch item-level sales from Square for prep list forecasting.
-        Returns {date: {item_name: quantity}}."""
-        from django.utils.dateparse import parse_datetime
+    def fetch_orders_since(self, since, until, page_token: str = '') -> Tuple[List[Dict], str]:
+        """``/orders/search`` on ``updated_at``, oldest first, cursor-paginated."""
+        location_id = self.location_id or self.merchant_id
+        body: Dict = {
+            'query': {
+                'filter': {
+                    'date_time_filter': {
+                        'updated_at': {
+                            'start_at': since.isoformat(),
+                            'end_at': until.isoformat(),
+                        },
+                    },
+                },
+                'sort': {'sort_field': 'UPDATED_AT', 'sort_order': 'ASC'},
+            },
+            'limit': 500,
+        }
+        if location_id:
+            body['location_ids'] = [location_id]
+        all_orders: list = []
+        cursor = page_token or None
+        for _ in range(self.SYNC_PAGE_BUDGET):
+            if cursor:
+                body['cursor'] = cursor
+            data = self._request("POST", "/orders/search", json=body).json() or {}
+            all_orders.extend(data.get('orders') or [])
+            cursor = data.get('cursor')
+            if not cursor:
+                return all_orders, ''
+        return all_orders, cursor or ''
+
+    def get_item_sales_facts_for_date_range(self, start_date, end_date) -> Dict:
+        """Fetch item-level sales from Square for prep list forecasting."""
         location_id = self.location_id or self.merchant_id
         if not location_id:
             return {}
@@ -626,13 +865,19 @@ class SquareIntegration(BasePOSIntegration):
             'sort': {'sort_field': 'CREATED_AT', 'sort_order': 'DESC'},
         }
         body = {'location_ids': [location_id], 'query': query, 'limit': 500}
-        result = {}
         try:
             resp = self._request("POST", "/orders/search", json=body)
             data = resp.json() if hasattr(resp, 'json') else {}
         except Exception:
             return {}
-        for order in (data.get('orders') or []):
+        self.fetch_truncated = bool(data.get('cursor'))
+        return self.item_sales_facts_from_orders(data.get('orders') or [], start_date, end_date)
+
+    def item_sales_facts_from_orders(self, orders, start_date, end_date) -> Dict:
+        from django.utils.dateparse import parse_datetime
+
+        result: Dict = {}
+        for order in orders or []:
             created_at = order.get('created_at')
             order_date = timezone.now().date()
             if created_at:
@@ -641,14 +886,14 @@ class SquareIntegration(BasePOSIntegration):
                     order_date = dt.date() if hasattr(dt, 'date') else timezone.now().date()
             if order_date < start_date or order_date > end_date:
                 continue
-            if order_date not in result:
-                result[order_date] = {}
+            result.setdefault(order_date, {})
             for li in (order.get('line_items') or []):
                 name = (li.get('name') or '').strip()
                 if not name:
                     continue
                 qty = float(li.get('quantity', 1) or 1)
-                result[order_date][name] = result[order_date].get(name, 0) + qty
+                revenue = _money(li.get('gross_sales_money') or li.get('total_money'))
+                _add_item_sale(result, order_date, name, qty, revenue)
         return result
 
     def create_order(self, order: Order) -> Dict:
@@ -800,40 +1045,33 @@ class CloverIntegration(BasePOSIntegration):
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-        synced_items = []
-        synced_categories = 0
+        rows = []
+        categories: Dict = {}
         for item in items:
             # Clover categories live per-item under `categories.elements`.
             cat = None
             for c in ((item.get("categories") or {}).get("elements") or []):
-                cat, _ = MenuCategory.objects.update_or_create(
-                    restaurant=self.restaurant,
-                    external_provider="CLOVER",
-                    external_id=c.get("id") or "uncategorized",
-                    defaults={"name": c.get("name") or "Uncategorized", "is_active": True},
+                cat = _upsert_menu_category(
+                    self.restaurant, "CLOVER", c.get("id") or "uncategorized", categories,
+                    name=c.get("name") or "Uncategorized", is_active=True,
                 )
-                synced_categories += 1
                 break  # Mizan treats the first category as primary.
 
             price_cents = int(item.get("price") or 0)
-            menu_item, _ = MenuItem.objects.update_or_create(
-                restaurant=self.restaurant,
-                external_provider="CLOVER",
-                external_id=item.get("id"),
-                defaults={
-                    "category": cat,
-                    "name": item.get("name") or "Item",
-                    "description": item.get("alternateName") or "",
-                    "price": price_cents / 100,
-                    "is_active": not bool(item.get("hidden", False)),
-                },
-            )
-            synced_items.append(menu_item.id)
+            rows.append({
+                "external_id": item.get("id"),
+                "category": cat,
+                "name": item.get("name") or "Item",
+                "description": item.get("alternateName") or "",
+                "price": price_cents / 100,
+                "is_active": not bool(item.get("hidden", False)),
+            })
 
+        synced = _bulk_upsert_menu_items(self.restaurant, "CLOVER", rows)
         return {
             "success": True,
-            "items_synced": len(synced_items),
-            "categories_synced": synced_categories,
+            "items_synced": synced,
+            "categories_synced": len(categories),
             "provider": "Clover",
         }
 
@@ -854,26 +1092,51 @@ class CloverIntegration(BasePOSIntegration):
         start_ms = int(datetime.combine(sd, dtime.min).timestamp() * 1000)
         end_ms = int(datetime.combine(ed, dtime.max).timestamp() * 1000)
 
+        limit = 1000
         params = {
             "filter": f"createdTime>={start_ms} AND createdTime<={end_ms}",
             "expand": "lineItems,payments,lineItems.modifications",
-            "limit": 1000,
+            "limit": limit,
         }
         try:
             resp = self._request("GET", f"/v3/merchants/{self._merchant_id()}/orders", params=params)
         except Exception:
             return []
-        return ((resp.json() or {}).get("elements") or [])
+        elements = (resp.json() or {}).get("elements") or []
+        self.fetch_truncated = len(elements) >= limit
+        return elements
 
-    def get_item_sales_for_date_range(self, start_date, end_date) -> Dict:
-        """Returns {date: {item_name: quantity}} for prep-list forecasting."""
-        try:
-            orders = self.sync_orders(start_date, end_date)
-        except Exception:
-            return {}
-        result: Dict = {}
+    def fetch_orders_since(self, since, until, page_token: str = '') -> Tuple[List[Dict], str]:
+        """Orders filtered on ``modifiedTime`` (epoch millis), offset-paginated;
+        the page token is the next offset."""
+        if not self._merchant_id():
+            return [], ''
+        page_size = 1000
+        params = {
+            "filter": [
+                f"modifiedTime>={int(since.timestamp() * 1000)}",
+                f"modifiedTime<={int(until.timestamp() * 1000)}",
+            ],
+            "expand": "lineItems,payments,lineItems.modifications",
+            "limit": page_size,
+        }
+        offset = int(page_token or 0)
+        all_orders: list = []
+        for _ in range(self.SYNC_PAGE_BUDGET):
+            params["offset"] = offset
+            resp = self._request("GET", f"/v3/merchants/{self._merchant_id()}/orders", params=params)
+            elements = (resp.json() or {}).get("elements") or []
+            all_orders.extend(elements)
+            if len(elements) < page_size:
+                return all_orders, ''
+            offset += page_size
+        return all_orders, str(offset)
+
+    def item_sales_facts_from_orders(self, orders, start_date, end_date) -> Dict:
         from datetime import datetime
 
+        result: Dict = {}
+
         for o in orders or []:
             created_ms = o.get("createdTime") or 0
             try:
@@ -889,7 +1152,9 @@ class CloverIntegration(BasePOSIntegration):
                     continue
                 # Clover represents partial quantities with `unitQty` (millis).
                 qty = float(li.get("unitQty") or 0) / 1000 if li.get("unitQty") else 1.0
-                result[order_date][name] = result[order_date].get(name, 0) + qty
+                # `price` is the per-unit price in cents.
+                revenue = float(li.get("price") or 0) / 100.0 * qty
+                _add_item_sale(result, order_date, name, qty, revenue)
         return result
 
     def create_order(self, order: Order) -> Dict:
@@ -989,32 +1254,6 @@ class CustomAPIIntegration(BasePOSIntegration):
                 return v
         return default
 
-    def _resolve_menu_item(self, item_name: str):
-        """Find or auto-create a MenuItem for this restaurant so we can attach line items."""
-        if not item_name:
-            item_name = "Unknown Item"
-        mi = MenuItem.objects.filter(restaurant=self.restaurant, name__iexact=item_name).first()
-        if not mi:
-            try:
-                mi = MenuItem.objects.create(
-                    restaurant=self.restaurant,
-                    name=item_name,
-                    price=0,
-                    external_provider='CUSTOM',
-                    external_id=f'auto-{uuid.uuid4().hex[:8]}',
-                )
-            except Exception:
-                mi = MenuItem.objects.filter(restaurant=self.restaurant, name__iexact=item_name).first()
-                if not mi:
-                    mi = MenuItem.objects.create(
-                        restaurant=self.restaurant,
-                        name=f"{item_name} ({uuid.uuid4().hex[:4]})",
-                        price=0,
-                        external_provider='CUSTOM',
-                        external_id=f'auto-{uuid.uuid4().hex[:8]}',
-                    )
-        return mi
-
     def _parse_order_time(self, raw):
         """Best-effort parse of an ISO-ish datetime string."""
         if not raw:
@@ -1025,9 +1264,8 @@ class CustomAPIIntegration(BasePOSIntegration):
             dt = timezone.make_aware(dt)
         return dt
 
-    def get_item_sales_for_date_range(self, start_date, end_date) -> Dict:
-        """Fetch item-level sales from Custom API for prep list forecasting.
-        Returns {date: {item_name: quantity}}."""
+    def get_item_sales_facts_for_date_range(self, start_date, end_date) -> Dict:
+        """Fetch item-level sales from Custom API without persisting orders."""
         params = {
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
@@ -1040,8 +1278,12 @@ class CustomAPIIntegration(BasePOSIntegration):
         raw_orders = data.get('orders') or data.get('data') or data.get('results') or []
         if not isinstance(raw_orders, list):
             raw_orders = []
-        result = {}
-        for raw in raw_orders:
+        self.fetch_truncated = bool(data.get('next_cursor') or data.get('cursor'))
+        return self.item_sales_facts_from_orders(raw_orders, start_date, end_date)
+
+    def item_sales_facts_from_orders(self, orders, start_date, end_date) -> Dict:
+        result: Dict = {}
+        for raw in orders or []:
             raw_status = str(self._pick(raw, 'status', default='COMPLETED')).lower()
             if raw_status in ('cancelled', 'void'):
                 continue
@@ -1049,117 +1291,245 @@ class CustomAPIIntegration(BasePOSIntegration):
             order_date = order_time.date() if order_time else timezone.now().date()
             if order_date < start_date or order_date > end_date:
                 continue
-            if order_date not in result:
-                result[order_date] = {}
+            result.setdefault(order_date, {})
             for li in (self._pick(raw, 'items', 'line_items', 'order_items', default=[]) or []):
                 name = str(self._pick(li, 'name', 'menu_item', 'item_name', 'product', default='')).strip()
                 if not name:
                     continue
                 qty = float(self._pick(li, 'quantity', 'qty', default=1))
-                result[order_date][name] = result[order_date].get(name, 0) + qty
+                price = _money(self._pick(li, 'price', 'unit_price', default=0))
+                _add_item_sale(result, order_date, name, qty, price * qty)
         return result
 
+    def _fetch_orders(self, params: Dict, page_token: str = '') -> Tuple[List[Dict], str]:
+        """GET /orders, following ``next_cursor`` when the API paginates."""
+        all_orders: List[Dict] = []
+        cursor = page_token or None
+        for _ in range(self.SYNC_PAGE_BUDGET):
+            page = dict(params)
+            if cursor:
+                page['cursor'] = cursor
+            resp = self._request('GET', '/orders', params=page)
+            data = resp.json() if resp.content else {}
+            raw_orders = data.get('orders') or data.get('data') or data.get('results') or []
+            if isinstance(raw_orders, list):
+                all_orders.extend(raw_orders)
+            cursor = data.get('next_cursor') or data.get('cursor')
+            if not cursor:
+                return all_orders, ''
+        return all_orders, cursor or ''
+
+    def fetch_orders_since(self, since, until, page_token: str = '') -> Tuple[List[Dict], str]:
+        """``updated_since``/``updated_until`` for APIs that support them; the
+        date params keep older APIs to the same (day-granular) window."""
+        return self._fetch_orders({
+            'updated_since': since.isoformat(),
+            'updated_until': until.isoformat(),
+            'start_date': since.date().isoformat(),
+            'end_date': until.date().isoformat(),
+        }, page_token)
+
     def sync_orders(self, start_date=None, end_date=None) -> List[Dict]:
         """Fetch orders from the external Custom API and persist them into Mizan's Order model."""
-        import logging
-        logger = logging.getLogger(__name__)
         params: Dict = {}
         if start_date:
             params['start_date'] = start_date.isoformat() if hasattr(start_date, 'isoformat') else str(start_date)
         if end_date:
             params['end_date'] = end_date.isoformat() if hasattr(end_date, 'isoformat') else str(end_date)
         try:
-            resp = self._request('GET', '/orders', params=params)
-            data = resp.json() if resp.content else {}
+            raw_orders, next_cursor = self._fetch_orders(params)
         except Exception as exc:
             logger.warning("Custom API /orders fetch failed: %s", exc)
             return []
+        self.fetch_truncated = bool(next_cursor)
+        self.persist_orders(raw_orders)
+        return raw_orders
 
-        raw_orders = data.get('orders') or data.get('data') or data.get('results') or []
-        if not isinstance(raw_orders, list):
-            raw_orders = []
+    def order_external_id(self, raw: Dict) -> str:
+        return str(self._pick(raw, 'id', 'order_id', 'external_id', default=''))
 
-        imported = []
-        for raw in raw_orders:
-            ext_id = str(self._pick(raw, 'id', 'order_id', 'external_id', default=uuid.uuid4().hex[:12]))
+    def persist_orders(self, orders: List[Dict]) -> int:
+        """Upsert orders, line items and payments with one bulk statement each.
 
-            existing = Order.objects.filter(restaurant=self.restaurant, order_number=f'CUST-{ext_id}').first()
-            if existing:
-                imported.append(raw)
-                continue
+        Orders are keyed on ``(restaurant, external_id)``, line items on
+        ``(order, line id or position)`` and payments on their order, so
+        re-pulling a modified order updates rows in place. Menu items are
+        resolved from a single preload of the tenant's menu; unknown names are
+        created in one batch.
+        """
+        order_type_map = {'dine_in': 'DINE_IN', 'takeout': 'TAKEOUT', 'delivery': 'DELIVERY', 'catering': 'CATERING'}
+        status_map = {'completed': 'COMPLETED', 'served': 'SERVED', 'cancelled': 'CANCELLED', 'pending': 'PENDING', 'paid': 'COMPLETED'}
+        pay_method_map = {'cash': 'CASH', 'card': 'CARD', 'credit_card': 'CARD', 'debit': 'CARD', 'digital_wallet': 'DIGITAL_WALLET', 'mobile': 'DIGITAL_WALLET'}
 
+        parsed: Dict[str, Dict] = {}
+        for raw in orders or []:
+            ext_id = self.order_external_id(raw) or uuid.uuid4().hex[:12]
             total = float(self._pick(raw, 'total', 'total_amount', 'amount', 'grand_total', default=0))
             subtotal = float(self._pick(raw, 'subtotal', 'sub_total', default=total))
             tax = float(self._pick(raw, 'tax', 'tax_amount', default=0))
             discount = float(self._pick(raw, 'discount', 'discount_amount', default=0))
-
-            order_type_map = {'dine_in': 'DINE_IN', 'takeout': 'TAKEOUT', 'delivery': 'DELIVERY', 'catering': 'CATERING'}
             raw_type = str(self._pick(raw, 'type', 'order_type', default='DINE_IN')).lower().replace('-', '_').replace(' ', '_')
-            order_type = order_type_map.get(raw_type, 'DINE_IN')
-
-            status_map = {'completed': 'COMPLETED', 'served': 'SERVED', 'cancelled': 'CANCELLED', 'pending': 'PENDING', 'paid': 'COMPLETED'}
             raw_status = str(self._pick(raw, 'status', default='COMPLETED')).lower()
-            order_status = status_map.get(raw_status, 'COMPLETED')
-
-            order_time = self._parse_order_time(self._pick(raw, 'created_at', 'order_time', 'date', 'timestamp'))
-
-            order = Order(
-                restaurant=self.restaurant,
-                order_number=f'CUST-{ext_id}',
-                order_type=order_type,
-                status=order_status,
-                subtotal=subtotal,
-                tax_amount=tax,
-                discount_amount=discount,
-                total_amount=total or (subtotal + tax - discount),
-                customer_name=self._pick(raw, 'customer_name', 'customer', default=''),
-                notes=f'Imported from Custom API (ext_id={ext_id})',
-            )
-            if order_time:
-                order.order_time = order_time
-            order.save()
+            raw_pm = str(self._pick(raw, 'payment_method', 'pay_method', 'payment_type', default='CASH')).lower().replace('-', '_').replace(' ', '_')
 
+            lines = []
             line_items = self._pick(raw, 'items', 'line_items', 'order_items', default=[])
             if isinstance(line_items, list):
-                for li in line_items:
-                    item_name = str(self._pick(li, 'name', 'menu_item', 'item_name', 'product', default='Item'))
-                    qty = int(self._pick(li, 'quantity', 'qty', default=1))
-                    price = float(self._pick(li, 'price', 'unit_price', default=0))
-                    mi = self._resolve_menu_item(item_name)
-                    if mi.price == 0 and price > 0:
-                        mi.price = price
-                        mi.save(update_fields=['price'])
-                    OrderLineItem.objects.create(
-                        order=order,
-                        menu_item=mi,
-                        quantity=qty,
-                        unit_price=price,
-                        total_price=round(price * qty, 2),
-                    )
-
-            # Create a Payment record so cash/card breakdowns work
-            pay_method_map = {'cash': 'CASH', 'card': 'CARD', 'credit_card': 'CARD', 'debit': 'CARD', 'digital_wallet': 'DIGITAL_WALLET', 'mobile': 'DIGITAL_WALLET'}
-            raw_pm = str(self._pick(raw, 'payment_method', 'pay_method', 'payment_type', default='CASH')).lower().replace('-', '_').replace(' ', '_')
-            pay_method = pay_method_map.get(raw_pm, 'CASH')
+                for idx, li in enumerate(line_items):
+                    lines.append({
+                        'external_id': str(self._pick(li, 'id', 'line_id', default=f'#{idx}')),
+                        'name': str(self._pick(li, 'name', 'menu_item', 'item_name', 'product', default='Item')) or 'Unknown Item',
+                        'quantity': int(self._pick(li, 'quantity', 'qty', default=1)),
+                        'price': float(self._pick(li, 'price', 'unit_price', default=0)),
+                    })
+
+            parsed[ext_id] = {
+                'order_type': order_type_map.get(raw_type, 'DINE_IN'),
+                'status': status_map.get(raw_status, 'COMPLETED'),
+                'subtotal': subtotal,
+                'tax_amount': tax,
+                'discount_amount': discount,
+                'total': total,
+                'total_amount': total or (subtotal + tax - discount),
+                'customer_name': self._pick(raw, 'customer_name', 'customer', default=''),
+                'order_time': self._parse_order_time(self._pick(raw, 'created_at', 'order_time', 'date', 'timestamp')),
+                'pay_method': pay_method_map.get(raw_pm, 'CASH'),
+                'tip': float(self._pick(raw, 'tip', 'tip_amount', default=0)),
+                'lines': lines,
+            }
+        if not parsed:
+            return 0
+
+        with transaction.atomic():
+            # Raw snapshots too, so the order sync can re-fold touched days.
+            self._persist_order_snapshots(orders)
+            menu_by_name = self._menu_items_for_lines(
+                [line for p in parsed.values() for line in p['lines']]
+            )
 
-            if order_status in ('COMPLETED', 'SERVED') and total > 0:
-                tip = float(self._pick(raw, 'tip', 'tip_amount', default=0))
-                Payment.objects.create(
+            now = timezone.now()
+            order_rows = []
+            for ext_id, p in parsed.items():
+                # Order numbers are global; only new rows use this one.
+                order = Order(
                     restaurant=self.restaurant,
-                    order=order,
-                    payment_method=pay_method,
-                    amount=total,
-                    tip_amount=tip,
-                    status='COMPLETED',
+                    order_number=f'CUST-{uuid.uuid4().hex[:12].upper()}',
+                    external_id=ext_id,
+                    order_type=p['order_type'],
+                    status=p['status'],
+                    subtotal=p['subtotal'],
+                    tax_amount=p['tax_amount'],
+                    discount_amount=p['discount_amount'],
+                    total_amount=p['total_amount'],
+                    customer_name=p['customer_name'],
+                    notes=f"Imported from Custom API (ext_id={ext_id})",
+                    updated_at=now,
                 )
+                if p['order_time']:
+                    order.order_time = p['order_time']
+                order_rows.append(order)
+            Order.objects.bulk_create(
+                order_rows,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['restaurant', 'external_id'],
+                update_fields=[
+                    'order_type', 'status', 'subtotal', 'tax_amount', 'discount_amount',
+                    'total_amount', 'customer_name', 'updated_at',
+                ],
+            )
+            # Conflicting rows keep their existing primary key; read them back.
+            order_ids = dict(
+                Order.objects.filter(restaurant=self.restaurant, external_id__in=list(parsed))
+                .values_list('external_id', 'id')
+            )
 
-            imported.append(raw)
+            line_rows = []
+            payment_rows = []
+            for ext_id, p in parsed.items():
+                order_id = order_ids.get(ext_id)
+                if order_id is None:
+                    continue
+                for line in p['lines']:
+                    line_rows.append(OrderLineItem(
+                        order_id=order_id,
+                        menu_item=menu_by_name[line['name'].lower()],
+                        external_id=line['external_id'],
+                        quantity=line['quantity'],
+                        unit_price=line['price'],
+                        total_price=round(line['price'] * line['quantity'], 2),
+                        updated_at=now,
+                    ))
+                # Payment record so cash/card breakdowns work
+                if p['status'] in ('COMPLETED', 'SERVED') and p['total'] > 0:
+                    payment_rows.append(Payment(
+                        restaurant=self.restaurant,
+                        order_id=order_id,
+                        payment_method=p['pay_method'],
+                        amount=p['total'],
+                        tip_amount=p['tip'],
+                        status='COMPLETED',
+                        updated_at=now,
+                    ))
+            # Lines imported before they carried an external id would otherwise
+            # be duplicated by the keyed upsert below.
+            OrderLineItem.objects.filter(
+                order_id__in=list(order_ids.values()), external_id__isnull=True
+            ).delete()
+            if line_rows:
+                OrderLineItem.objects.bulk_create(
+                    line_rows,
+                    batch_size=1000,
+                    update_conflicts=True,
+                    unique_fields=['order', 'external_id'],
+                    update_fields=['menu_item', 'quantity', 'unit_price', 'total_price', 'updated_at'],
+                )
+            if payment_rows:
+                Payment.objects.bulk_create(
+                    payment_rows,
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=['order'],
+                    update_fields=['payment_method', 'amount', 'tip_amount', 'status', 'updated_at'],
+                )
 
-        if imported:
+        if not self.restaurant.pos_is_connected:
             self.restaurant.pos_is_connected = True
             self.restaurant.save(update_fields=['pos_is_connected'])
+        return len(parsed)
 
-        return imported
+    def _menu_items_for_lines(self, lines: List[Dict]) -> Dict[str, MenuItem]:
+        """Map lowercased line names to MenuItems, creating missing ones in bulk.
+
+        Zero-priced items pick up the first non-zero price seen on a line.
+        """
+        existing = {
+            mi.name.lower(): mi
+            for mi in MenuItem.objects.filter(restaurant=self.restaurant)
+        }
+        to_create: Dict[str, MenuItem] = {}
+        to_reprice: Dict[str, MenuItem] = {}
+        for line in lines:
+            key = line['name'].lower()
+            mi = existing.get(key) or to_create.get(key)
+            if mi is None:
+                to_create[key] = MenuItem(
+                    restaurant=self.restaurant,
+                    name=line['name'],
+                    price=line['price'],
+                    external_provider='CUSTOM',
+                    external_id=f'auto-{uuid.uuid4().hex[:8]}',
+                )
+            elif mi.price == 0 and line['price'] > 0:
+                mi.price = line['price']
+                if key in existing:
+                    to_reprice[key] = mi
+        if to_create:
+            MenuItem.objects.bulk_create(list(to_create.values()), batch_size=500)
+        if to_reprice:
+            MenuItem.objects.bulk_update(list(to_reprice.values()), ['price'], batch_size=500)
+        existing.update(to_create)
+        return existing
 
     def create_order(self, order: Order) -> Dict:
         return {'success': False, 'error': 'Order creation not supported for custom API'}
@@ -1215,23 +1585,22 @@ class LightSpeedIntegration(BasePOSIntegration):
         data = self._request('GET', f'/f/v2/business-location/{bl_id}/sales', params={'from': from_str, 'to': to_str, 'include': 'payments'})
         return data.get('sales', [])
 
-    def get_item_sales_for_date_range(self, start_date, end_date) -> Dict:
-        """Returns {date: {item_name: quantity}} for prep list forecasting."""
+    def sales_location_id(self) -> str:
         if self._line() == 'RETAIL_X':
-            return self._retail_x_item_sales_for_date_range(start_date, end_date)
-        from django.utils.dateparse import parse_datetime
-        bl_id = self._business_location_id()
-        if not bl_id:
-            return {}
-        from_str = start_date.isoformat() + 'T00:00:00Z'
-        to_str = end_date.isoformat() + 'T23:59:59Z'
-        try:
-            data = self._request('GET', f'/f/v2/business-location/{bl_id}/sales', params={'from': from_str, 'to': to_str, 'include': 'payments'})
-        except Exception:
+            return ''
+        return self._business_location_id()
+
+    def get_item_sales_facts_for_date_range(self, start_date, end_date) -> Dict:
+        if self._line() == 'RETAIL_X' and not _lightspeed_domain_prefix(self.restaurant):
             return {}
-        sales = data.get('sales', [])
-        result = {}
-        for sale in sales:
+        return super().get_item_sales_facts_for_date_range(start_date, end_date)
+
+    def item_sales_facts_from_orders(self, orders, start_date, end_date) -> Dict:
+        if self._line() == 'RETAIL_X':
+            return self._retail_x_item_sales_facts(orders, start_date, end_date)
+        from django.utils.dateparse import parse_datetime
+        result: Dict = {}
+        for sale in orders or []:
             if sale.get('cancelled'):
                 continue
             time_closed = sale.get('timeClosed') or sale.get('timeOfOpening')
@@ -1242,23 +1611,20 @@ class LightSpeedIntegration(BasePOSIntegration):
                     sale_date = dt.date() if hasattr(dt, 'date') else timezone.now().date()
             if not sale_date or sale_date < start_date or sale_date > end_date:
                 sale_date = timezone.now().date()
-            if sale_date not in result:
-                result[sale_date] = {}
+            result.setdefault(sale_date, {})
             for line in sale.get('salesLines', []):
                 name = (line.get('nameOverride') or line.get('name') or '').strip()
                 if not name:
                     continue
                 qty = float(line.get('quantity', 1) or 1)
-                result[sale_date][name] = result[sale_date].get(name, 0) + qty
+                revenue = _money(line.get('totalNetAmountWithTax') or line.get('amountWithTax'))
+                _add_item_sale(result, sale_date, name, qty, revenue)
         return result
 
-    def _retail_x_item_sales_for_date_range(self, start_date, end_date) -> Dict:
+    def _retail_x_item_sales_facts(self, sales, start_date, end_date) -> Dict:
         from django.utils.dateparse import parse_datetime
-        if not _lightspeed_domain_prefix(self.restaurant):
-            return {}
-        sales = _retail_x_fetch_sales_search(self.restaurant, start_date, end_date)
         result: Dict = {}
-        for sale in sales:
+        for sale in sales or []:
             st = (sale.get('state') or '').lower()
             if st == 'voided' or (st and st != 'closed'):
                 continue
@@ -1270,14 +1636,16 @@ class LightSpeedIntegration(BasePOSIntegration):
                     sale_date = dt.date()
             if not sale_date or sale_date < start_date or sale_date > end_date:
                 continue
-            if sale_date not in result:
-                result[sale_date] = {}
+            result.setdefault(sale_date, {})
             for line in sale.get('line_items') or []:
                 name = _retail_x_sale_line_label(line)
                 qty = float(line.get('quantity') or 0)
                 if qty <= 0:
                     continue
-                result[sale_date][name] = result[sale_date].get(name, 0) + qty
+                revenue = _money(line.get('total_price'))
+                if not revenue:
+                    revenue = _money(line.get('price')) * qty
+                _add_item_sale(result, sale_date, name, qty, revenue)
         return result
 
     def create_order(self, order: Order) -> Dict:
@@ -1361,9 +1729,12 @@ class IntegrationManager:
             return {'success': False, 'error': str(e)}
 
     @classmethod
-    def get_daily_sales_summary(cls, restaurant, date=None) -> Dict:
+    def get_daily_sales_summary(cls, restaurant, date=None, live=False) -> Dict:
         """Aggregate daily sales from Mizan POS orders (tenant-isolated by restaurant FK).
-        For LightSpeed, fetches directly from the K-Series API."""
+        For LightSpeed, fetches directly from the K-Series API.
+
+        Closed days are served from the nightly ``DailySalesReport`` when it
+        has a fresh row; ``live=True`` always recomputes (the materializer)."""
         from django.db.models import Sum, Count, Avg
 
         provider = (restaurant.pos_provider or '').strip().upper()
@@ -1372,6 +1743,13 @@ class IntegrationManager:
 
         target_date = date or timezone.now().date()
 
+        if not live and date is not None:
+            from reporting.materialize import materialized_sales_summaries
+
+            stored = materialized_sales_summaries(restaurant, target_date, target_date).get(target_date)
+            if stored is not None:
+                return stored
+
         # Lightspeed: K-Series Restaurant API or Retail X-Series Search API
         if provider == 'LIGHTSPEED':
             line = _lightspeed_product_line(restaurant)
@@ -1745,22 +2123,26 @@ class IntegrationManager:
         if provider not in ('NONE', '') and restaurant.pos_is_connected:
             integration = cls.get_integration(restaurant)
             if integration:
+                from .sales_facts import item_sales_facts_by_date
+
                 end_date = timezone.now().date()
                 start_date = end_date - timedelta(days=days)
-                pos_sales = integration.get_item_sales_for_date_range(start_date, end_date)
+                pos_sales = item_sales_facts_by_date(restaurant, start_date, end_date, integration=integration)
                 item_totals = {}
                 for day_data in pos_sales.values():
-                    for name, qty in day_data.items():
+                    for name, row in day_data.items():
                         if not name:
                             continue
-                        item_totals[name] = item_totals.get(name, 0) + qty
-                sorted_items = sorted(item_totals.items(), key=lambda x: -x[1])[:limit]
+                        slot = item_totals.setdefault(name, [0.0, 0.0])
+                        slot[0] += row['quantity']
+                        slot[1] += row['revenue']
+                sorted_items = sorted(item_totals.items(), key=lambda x: -x[1][0])[:limit]
                 return {
                     'success': True,
                     'days': days,
                     'items': [
-                        {'item_id': name, 'name': name, 'quantity': int(qty), 'revenue': 0, 'order_count': 0}
-                        for name, qty in sorted_items
+                        {'item_id': name, 'name': name, 'quantity': int(qty), 'revenue': round(rev, 2), 'order_count': 0}
+                        for name, (qty, rev) in sorted_items
                     ],
                 }
 
@@ -1801,11 +2183,16 @@ class IntegrationManager:
         provider = (restaurant.pos_provider or '').strip().upper()
         if provider in ('NONE', '') or not restaurant.pos_is_connected:
             return None
+        from reporting.materialize import materialized_sales_summaries
+
+        # Closed days come from the nightly reports in one query; only days
+        # without a fresh row (normally just today) are computed live.
+        stored = materialized_sales_summaries(restaurant, start_date, end_date)
         total_sales = 0.0
         order_count = 0
         for d in range((end_date - start_date).days + 1):
             day = start_date + timedelta(days=d)
-            summary = cls.get_daily_sales_summary(restaurant, day)
+            summary = stored.get(day) or cls.get_daily_sales_summary(restaurant, day, live=True)
             if summary.get('connected'):
                 total_sales += float(summary.get('total_sales', 0) or 0)
                 order_count += int(summary.get('order_count', 0) or 0)
@@ -1859,7 +2246,9 @@ class IntegrationManager:
         if pos_current is not None:
             integration = cls.get_integration(restaurant)
             if integration:
-                pos_sales = integration.get_item_sales_for_date_range(period_start.date(), today)
+                from .sales_facts import item_sales_by_date
+
+                pos_sales = item_sales_by_date(restaurant, period_start.date(), today, integration=integration)
                 item_totals = {}
                 for day_data in pos_sales.values():
                     for name, qty in day_data.items():
@@ -1929,9 +2318,9 @@ class IntegrationManager:
         from menu.models import RecipeIngredient
         from inventory.models import InventoryItem
         from inventory.unit_conversion import to_inventory_unit
+        from .demand_curve import covers_for_dates
         from .forecast import (
             covers_multiplier,
-            eatnow_covers_for_dates,
             forecast_item,
             order_by_date,
             samples_by_item,
@@ -1994,7 +2383,11 @@ class IntegrationManager:
                 'No POS integration configured. Connect your POS in Settings.'
             )
 
-        pos_sales_by_date = integration.get_item_sales_for_date_range(start_date, end_date)
+        # History comes from the local fact store; only days it doesn't
+        # cover yet are fetched live from the POS (and persisted).
+        from .sales_facts import item_sales_by_date
+
+        pos_sales_by_date = item_sales_by_date(restaurant, start_date, end_date, integration=integration)
         if not pos_sales_by_date:
             return _empty_response(
                 'No sales history found for this day of week from your POS. '
@@ -2003,7 +2396,7 @@ class IntegrationManager:
 
         # --- Phase 2: EatNow covers overlay -----------------------------------
         try:
-            expected, baseline = eatnow_covers_for_dates(restaurant, target_dates)
+            expected, baseline = covers_for_dates(restaurant, target_dates)
         except Exception:  # keep prep list robust even if reservations FK fails
             expected, baseline = 0.0, 0.0
         covers_mult = covers_multiplier(expected, baseline)
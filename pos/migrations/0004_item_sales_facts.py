@@ -0,0 +1,49 @@
+# Generated by Django 5.2.16 on 2026-10-18 20:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('pos', '0003_alter_table_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='POSItemSalesCoverage',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sales_date', models.DateField()),
+                ('is_complete', models.BooleanField(default=False)),
+                ('synced_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pos_item_sales_coverage', to='accounts.restaurant')),
+            ],
+            options={
+                'db_table': 'pos_item_sales_coverage',
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'sales_date'), name='uniq_pos_item_sales_coverage')],
+            },
+        ),
+        migrations.CreateModel(
+            name='POSItemSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sales_date', models.DateField()),
+                ('item_name', models.CharField(max_length=255)),
+                ('location_id', models.CharField(blank=True, default='', max_length=255)),
+                ('quantity', models.DecimalField(decimal_places=3, default=0, max_digits=14)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('provider', models.CharField(blank=True, default='', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pos_item_sales_daily', to='accounts.restaurant')),
+            ],
+            options={
+                'db_table': 'pos_item_sales_daily',
+                'indexes': [models.Index(fields=['restaurant', 'sales_date'], name='pos_item_sa_restaur_67d3ff_idx')],
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'sales_date', 'item_name', 'location_id'), name='uniq_pos_item_sales_daily')],
+            },
+        ),
+    ]
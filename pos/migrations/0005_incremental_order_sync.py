@@ -0,0 +1,50 @@
+# Generated by Django 5.2.16 on 2026-10-18 21:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('menu', '0002_alter_menucategory_unique_together_and_more'),
+        ('pos', '0004_item_sales_facts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='POSSyncCursor',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('provider', models.CharField(choices=[('SQUARE', 'Square'), ('TOAST', 'Toast'), ('CLOVER', 'Clover'), ('CUSTOM', 'Custom'), ('LIGHTSPEED', 'Lightspeed')], max_length=20)),
+                ('last_modified_at', models.DateTimeField(blank=True, null=True)),
+                ('page_token', models.TextField(blank=True, default='')),
+                ('window_end', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_order_count', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'pos_sync_cursors',
+            },
+        ),
+        migrations.AddField(
+            model_name='orderlineitem',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='orderlineitem',
+            constraint=models.UniqueConstraint(fields=('order', 'external_id'), name='uniq_pos_line_item_external'),
+        ),
+        migrations.AddField(
+            model_name='possynccursor',
+            name='restaurant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pos_sync_cursors', to='accounts.restaurant'),
+        ),
+        migrations.AddConstraint(
+            model_name='possynccursor',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'provider'), name='uniq_pos_sync_cursor'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.16 on 2026-10-18 21:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('pos', '0005_incremental_order_sync'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandCurveDay',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('orders', models.JSONField(default=list)),
+                ('covers', models.JSONField(default=list)),
+                ('revenue', models.JSONField(default=list)),
+                ('is_stale', models.BooleanField(db_index=True, default=False)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='demand_curve_days', to='accounts.restaurant')),
+            ],
+            options={
+                'db_table': 'pos_demand_curve_days',
+                'constraints': [models.UniqueConstraint(fields=('restaurant', 'day'), name='uniq_demand_curve_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.16 on 2026-10-18 22:57
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Substr
+
+
+def backfill_imported_order_ids(apps, schema_editor):
+    # Custom API imports were numbered CUST-<provider id>.
+    Order = apps.get_model("pos", "Order")
+    Order.objects.filter(order_number__startswith="CUST-").update(external_id=Substr("order_number", 6))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('pos', '0006_demand_curve'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.RunPython(backfill_imported_order_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'external_id'), name='uniq_pos_order_external'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.16 on 2026-10-18 23:22
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def start_snapshots_tomorrow(apps, schema_editor):
+    # Snapshots written so far carry no sales_date; only days after this
+    # deploy are fully covered locally.
+    POSSyncCursor = apps.get_model("pos", "POSSyncCursor")
+    POSSyncCursor.objects.update(snapshot_since=timezone.now().date() + timedelta(days=1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('pos', '0007_order_external_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posexternalobject',
+            name='sales_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='possynccursor',
+            name='snapshot_since',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='posexternalobject',
+            index=models.Index(fields=['restaurant', 'provider', 'object_type', 'sales_date'], name='pos_externa_restaur_c57eca_idx'),
+        ),
+        migrations.RunPython(start_snapshots_tomorrow, migrations.RunPython.noop),
+    ]
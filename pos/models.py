@@ -166,6 +166,10 @@ class Order(models.Model):
     refund_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     refund_date = models.DateTimeField(null=True, blank=True)
     source_order = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='refund_orders')
+
+    # Provider order id for imported orders; re-syncs upsert on
+    # (restaurant, external_id), so two tenants may share an id.
+    external_id = models.CharField(max_length=255, blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -178,6 +182,12 @@ class Order(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['order_type']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'external_id'],
+                name='uniq_pos_order_external',
+            )
+        ]
     
     def __str__(self):
         return f"{self.order_number} - {self.status}"
@@ -213,11 +223,20 @@ class OrderLineItem(models.Model):
         ('CANCELLED', 'Cancelled'),
     ], default='PENDING')
     
+    # Provider line id (or positional key) so re-syncs upsert instead of duplicating.
+    external_id = models.CharField(max_length=255, blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'pos_order_line_items'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['order', 'external_id'],
+                name='uniq_pos_line_item_external',
+            )
+        ]
     
     def __str__(self):
         return f"{self.quantity}x {self.menu_item.name} - {self.order.order_number}"
@@ -419,6 +438,9 @@ class POSExternalObject(models.Model):
     object_type = models.CharField(max_length=100)   # e.g. 'order', 'payment', 'catalog_item'
     object_id = models.CharField(max_length=255)     # provider object id
     payload = models.JSONField(default=dict)
+    # Business day an order's item sales count towards (set by the order
+    # sync); lets touched days be re-folded from local snapshots.
+    sales_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -427,10 +449,138 @@ class POSExternalObject(models.Model):
         indexes = [
             models.Index(fields=['restaurant', 'provider', 'object_type']),
             models.Index(fields=['provider', 'object_type', 'object_id']),
+            models.Index(fields=['restaurant', 'provider', 'object_type', 'sales_date']),
         ]
         constraints = [
             models.UniqueConstraint(
                 fields=['restaurant', 'provider', 'object_type', 'object_id'],
                 name='uniq_pos_external_object',
             )
-        ]
\ No newline at end of file
+        ]
+
+class POSItemSalesDaily(models.Model):
+    """Per-tenant daily item sales pulled from the external POS.
+
+    Local fact store for prep lists, forecasts and auto-PO so they read
+    history from the database instead of paging through provider APIs on
+    every request. Rows for a day are replaced wholesale whenever that day is
+    re-synced, so late edits (voids/refunds) converge on the next sync.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='pos_item_sales_daily')
+    sales_date = models.DateField()
+    item_name = models.CharField(max_length=255)
+    location_id = models.CharField(max_length=255, blank=True, default='')
+    quantity = models.DecimalField(max_digits=14, decimal_places=3, default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    provider = models.CharField(max_length=20, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'pos_item_sales_daily'
+        indexes = [
+            models.Index(fields=['restaurant', 'sales_date']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'sales_date', 'item_name', 'location_id'],
+                name='uniq_pos_item_sales_daily',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.sales_date} {self.item_name} x{self.quantity}"
+
+
+class POSItemSalesCoverage(models.Model):
+    """Which days of :class:`POSItemSalesDaily` are synced for a tenant.
+
+    A day with coverage but no fact rows genuinely had no sales (closed),
+    which is different from a day we never fetched. ``is_complete`` is set
+    once the day was synced after it ended; open days are always re-fetched.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='pos_item_sales_coverage')
+    sales_date = models.DateField()
+    is_complete = models.BooleanField(default=False)
+    synced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'pos_item_sales_coverage'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'sales_date'],
+                name='uniq_pos_item_sales_coverage',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant_id} {self.sales_date} ({'complete' if self.is_complete else 'partial'})"
+
+
+class POSSyncCursor(models.Model):
+    """Per-tenant high-water mark for incremental POS order sync.
+
+    ``last_modified_at`` is the provider-side modification time we have fully
+    pulled through. When a run stops at its page budget mid-window,
+    ``page_token`` and ``window_end`` let the next run resume the same query
+    instead of starting over.
+    """
+    PROVIDER_CHOICES = POSExternalEvent.PROVIDER_CHOICES + (('LIGHTSPEED', 'Lightspeed'),)
+
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='pos_sync_cursors')
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES)
+    last_modified_at = models.DateTimeField(null=True, blank=True)
+    page_token = models.TextField(blank=True, default='')
+    window_end = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_order_count = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # First business day whose order snapshots are all stored locally with a
+    # ``sales_date``; touched days from here on are rebuilt without a
+    # provider call.
+    snapshot_since = models.DateField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'pos_sync_cursors'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'provider'],
+                name='uniq_pos_sync_cursor',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.provider} cursor {self.restaurant_id} @ {self.last_modified_at}"
+
+
+class DemandCurveDay(models.Model):
+    """One local day of a tenant's hourly demand (24 buckets per series).
+
+    ``orders``/``revenue`` come from completed POS orders and ``covers`` from
+    EatNow reservations, so future days hold the covers already booked. A row
+    is flagged ``is_stale`` when an order or reservation on that day changes
+    and rebuilt from source by the next reader or the periodic sweep. The
+    hour-of-week demand curve is these rows laid out by weekday.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey('accounts.Restaurant', on_delete=models.CASCADE, related_name='demand_curve_days')
+    day = models.DateField()
+    orders = models.JSONField(default=list)
+    covers = models.JSONField(default=list)
+    revenue = models.JSONField(default=list)
+    is_stale = models.BooleanField(default=False, db_index=True)
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'pos_demand_curve_days'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'day'],
+                name='uniq_demand_curve_day',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.restaurant_id} demand {self.day}"
@@ -0,0 +1,304 @@
+"""
+Local POS item-sales fact store.
+
+Prep lists, forecasts and auto-PO used to page through the provider's sales
+API (Toast, Square, Clover, Lightspeed, Custom) over 4+ weeks of lookback on
+every request. This module keeps a daily ``(date, item, location)`` fact table
+per tenant instead:
+
+* the hourly incremental order sync (``pos.order_sync``) folds its backfill
+  into facts (:func:`ingest_orders`) and rebuilds the days later changed
+  orders touch from the order snapshots it stores
+  (:func:`rebuild_item_sales_facts`), without another provider call;
+* webhooks debounce a refresh of the affected day
+  (:func:`schedule_item_sales_refresh`);
+* readers call :func:`item_sales_by_date` / :func:`item_sales_facts_by_date`,
+  which serve complete days from the database and only fetch the uncovered
+  tail live from the POS (persisting it for the next caller).
+
+Sync writes re-run theoretical stock depletion for the replaced days
+(``inventory.depletion``); readers' backfills only store facts, so opening a
+report never moves stock.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.tenant_time import tenant_today
+
+from .models import POSItemSalesCoverage, POSItemSalesDaily
+
+logger = logging.getLogger(__name__)
+
+# Debounce window for webhook-triggered refreshes of a single day.
+REFRESH_DEBOUNCE_SECONDS = 120
+
+
+def _dates(start_date: date, end_date: date) -> List[date]:
+    out = []
+    d = start_date
+    while d <= end_date:
+        out.append(d)
+        d += timedelta(days=1)
+    return out
+
+
+def _get_integration(restaurant, integration=None):
+    if integration is not None:
+        return integration
+    from .integrations import IntegrationManager
+
+    try:
+        return IntegrationManager.get_integration(restaurant)
+    except ValueError:
+        return None
+
+
+def store_item_sales_facts(
+    restaurant,
+    facts: Dict[date, Dict[str, Dict[str, float]]],
+    start_date: date,
+    end_date: date,
+    *,
+    provider: str = "",
+    location_id: str = "",
+    deplete: bool = True,
+    complete: bool = True,
+) -> int:
+    """Replace fact rows for every day in ``[start_date, end_date]``.
+
+    Days absent from ``facts`` are recorded as covered with no sales. Days
+    that had ended in the restaurant's timezone when this sync ran are marked
+    complete so readers stop re-fetching them, unless ``complete=False`` (a
+    partial source).
+    ``deplete=False`` skips the stock depletion pass. Returns the number of
+    fact rows written.
+    """
+    days = _dates(start_date, end_date)
+    if not days:
+        return 0
+    today = tenant_today(restaurant)
+    now = timezone.now()
+    rows = [
+        POSItemSalesDaily(
+            restaurant=restaurant,
+            sales_date=day,
+            item_name=name[:255],
+            location_id=location_id or "",
+            quantity=Decimal(str(round(vals.get("quantity") or 0, 3))),
+            revenue=Decimal(str(round(vals.get("revenue") or 0, 2))),
+            provider=provider or "",
+        )
+        for day, items in facts.items()
+        if start_date <= day <= end_date
+        for name, vals in items.items()
+        if name
+    ]
+    with transaction.atomic():
+        POSItemSalesDaily.objects.filter(
+            restaurant=restaurant,
+            sales_date__gte=start_date,
+            sales_date__lte=end_date,
+            location_id=location_id or "",
+        ).delete()
+        POSItemSalesDaily.objects.bulk_create(rows, batch_size=1000)
+        POSItemSalesCoverage.objects.bulk_create(
+            [
+                POSItemSalesCoverage(
+                    restaurant=restaurant,
+                    sales_date=day,
+                    is_complete=complete and day < today,
+                    synced_at=now,
+                )
+                for day in days
+            ],
+            update_conflicts=True,
+            unique_fields=["restaurant", "sales_date"],
+            update_fields=["is_complete", "synced_at"],
+        )
+    if deplete:
+        _deplete_inventory(restaurant, start_date, end_date)
+    return len(rows)
+
+
+def _deplete_inventory(restaurant, start_date: date, end_date: date) -> None:
+    """Re-run theoretical stock depletion for the days just replaced."""
+    from inventory.depletion import deplete_sales_window
+
+    try:
+        deplete_sales_window(restaurant.id, start_date, end_date)
+    except Exception as exc:
+        logger.warning("Inventory depletion failed restaurant=%s: %s", restaurant.id, exc)
+
+
+def refresh_item_sales_facts(
+    restaurant, start_date: date, end_date: date, integration=None, *, deplete: bool = True
+) -> Optional[Dict]:
+    """Fetch ``[start_date, end_date]`` live from the POS and persist it.
+
+    Returns the fetched facts, or ``None`` when no integration is configured
+    or the provider call produced nothing usable (coverage is then left
+    untouched so the next reader retries). A fetch cut off at the provider's
+    page cap is stored but left incomplete.
+    """
+    integration = _get_integration(restaurant, integration)
+    if integration is None:
+        return None
+    integration.fetch_truncated = False
+    facts = integration.get_item_sales_facts_for_date_range(start_date, end_date)
+    if not facts:
+        return None
+    store_item_sales_facts(
+        restaurant,
+        facts,
+        start_date,
+        end_date,
+        provider=(restaurant.pos_provider or "").upper(),
+        location_id=integration.sales_location_id(),
+        deplete=deplete,
+        complete=not integration.fetch_truncated,
+    )
+    return facts
+
+
+def ingest_orders(restaurant, orders: Iterable[dict], start_date: date, end_date: date, integration=None) -> int:
+    """Fold raw orders from ``sync_orders`` into the fact store (no extra API call)."""
+    integration = _get_integration(restaurant, integration)
+    if integration is None:
+        return 0
+    orders = list(orders or [])
+    if not orders:
+        return 0
+    facts = integration.item_sales_facts_from_orders(orders, start_date, end_date)
+    return store_item_sales_facts(
+        restaurant,
+        facts,
+        start_date,
+        end_date,
+        provider=(restaurant.pos_provider or "").upper(),
+        location_id=integration.sales_location_id(),
+    )
+
+
+def rebuild_item_sales_facts(restaurant, days: List[date], integration=None, *, complete: bool = True) -> int:
+    """Re-fold ``[days[0], days[-1]]`` from the locally stored order snapshots.
+
+    Used by the incremental sync for the days its changed orders touch, so a
+    run costs its own orders rather than a re-pull of whole days.
+    """
+    integration = _get_integration(restaurant, integration)
+    if integration is None or not days:
+        return 0
+    start_date, end_date = days[0], days[-1]
+    return store_item_sales_facts(
+        restaurant,
+        integration.local_item_sales_facts(start_date, end_date),
+        start_date,
+        end_date,
+        provider=(restaurant.pos_provider or "").upper(),
+        location_id=integration.sales_location_id(),
+        complete=complete,
+    )
+
+
+def mark_item_sales_incomplete(restaurant, days: Iterable[date]) -> int:
+    """Send readers back to the provider for ``days`` on their next lookup."""
+    days = list(days)
+    if not days:
+        return 0
+    return POSItemSalesCoverage.objects.filter(restaurant=restaurant, sales_date__in=days).update(is_complete=False)
+
+
+def uncovered_dates(restaurant, start_date: date, end_date: date) -> List[date]:
+    """Days in the window without a complete sync."""
+    complete = set(
+        POSItemSalesCoverage.objects.filter(
+            restaurant=restaurant,
+            sales_date__gte=start_date,
+            sales_date__lte=end_date,
+            is_complete=True,
+        ).values_list("sales_date", flat=True)
+    )
+    return [d for d in _dates(start_date, end_date) if d not in complete]
+
+
+def item_sales_facts_by_date(
+    restaurant,
+    start_date: date,
+    end_date: date,
+    integration=None,
+) -> Dict[date, Dict[str, Dict[str, float]]]:
+    """Return ``{date: {item_name: {'quantity', 'revenue'}}}`` for the window.
+
+    Complete days come from the local store; the uncovered span (usually just
+    today, or nothing at all for closed-day lookbacks) is fetched live once
+    and persisted without depleting stock; the sync owns depletion. Quantities
+    are summed across locations.
+    """
+    missing = uncovered_dates(restaurant, start_date, end_date)
+    if missing:
+        try:
+            refresh_item_sales_facts(restaurant, missing[0], missing[-1], integration=integration, deplete=False)
+        except Exception as exc:
+            logger.warning("POS sales refresh failed restaurant=%s: %s", restaurant.id, exc)
+
+    out: Dict[date, Dict[str, Dict[str, float]]] = {}
+    for day in POSItemSalesCoverage.objects.filter(
+        restaurant=restaurant,
+        sales_date__gte=start_date,
+        sales_date__lte=end_date,
+    ).values_list("sales_date", flat=True):
+        out.setdefault(day, {})
+    rows = POSItemSalesDaily.objects.filter(
+        restaurant=restaurant,
+        sales_date__gte=start_date,
+        sales_date__lte=end_date,
+    ).values_list("sales_date", "item_name", "quantity", "revenue")
+    for day, name, qty, revenue in rows:
+        slot = out.setdefault(day, {}).setdefault(name, {"quantity": 0.0, "revenue": 0.0})
+        slot["quantity"] += float(qty or 0)
+        slot["revenue"] += float(revenue or 0)
+    # Drop empty covered days so callers keep treating "no data" as missing
+    # history (``samples_by_item`` relies on that for closed weeks).
+    return {day: items for day, items in out.items() if items}
+
+
+def item_sales_by_date(restaurant, start_date: date, end_date: date, integration=None) -> Dict[date, Dict[str, float]]:
+    """Quantity-only view in the ``{date: {item_name: quantity}}`` shape used by
+    ``pos.forecast.samples_by_item``."""
+    facts = item_sales_facts_by_date(restaurant, start_date, end_date, integration=integration)
+    return {day: {name: row["quantity"] for name, row in items.items()} for day, items in facts.items()}
+
+
+def schedule_item_sales_refresh(restaurant, day: Optional[date] = None) -> bool:
+    """Debounced background refresh of one day after a POS order webhook.
+
+    Many webhooks for the same day collapse into a single provider call.
+    Returns True when a refresh was queued.
+    """
+    day = day or tenant_today(restaurant)
+    key = f"pos:sales_facts:refresh:{restaurant.id}:{day.isoformat()}"
+    try:
+        if not cache.add(key, 1, REFRESH_DEBOUNCE_SECONDS):
+            return False
+    except Exception:
+        pass
+    from .tasks import refresh_item_sales_facts_for_restaurant
+
+    try:
+        refresh_item_sales_facts_for_restaurant.apply_async(
+            args=[str(restaurant.id), day.isoformat(), day.isoformat()],
+            countdown=REFRESH_DEBOUNCE_SECONDS // 2,
+        )
+    except Exception as exc:
+        logger.warning("Could not queue POS sales refresh restaurant=%s: %s", restaurant.id, exc)
+        return False
+    return True
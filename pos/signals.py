@@ -0,0 +1,39 @@
+"""Keep the demand curve store in step with orders and reservations.
+
+Handlers only flag the affected local day stale (one indexed UPDATE); the
+rebuild happens in :mod:`pos.demand_curve` on the next read or sweep.
+"""
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import EatNowReservation
+from core.tenant_time import local_day
+
+from .demand_curve import mark_demand_days_stale
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_order_demand_day_stale(sender, instance, **kwargs):
+    if not instance.restaurant_id or not instance.order_time:
+        return
+    try:
+        mark_demand_days_stale(instance.restaurant_id, [local_day(instance.restaurant, instance.order_time)])
+    except Exception as exc:
+        logger.warning("demand curve stale-mark failed order=%s: %s", instance.pk, exc)
+
+
+@receiver(post_save, sender=EatNowReservation)
+@receiver(post_delete, sender=EatNowReservation)
+def mark_reservation_demand_day_stale(sender, instance, **kwargs):
+    if not instance.restaurant_id or not instance.reservation_date:
+        return
+    try:
+        mark_demand_days_stale(instance.restaurant_id, [instance.reservation_date])
+    except Exception as exc:
+        logger.warning("demand curve stale-mark failed reservation=%s: %s", instance.pk, exc)
@@ -1,6 +1,7 @@
 import base64
 import hashlib
 import hmac
+import random
 from typing import Any, Dict, Optional
 
 from celery import shared_task
@@ -10,6 +11,8 @@ from django.utils import timezone
 from accounts.models import Restaurant
 from pos.integrations import IntegrationManager, SquareIntegration
 from pos.models import POSExternalEvent, POSExternalObject
+from pos.order_sync import acquire_provider_slot, continuation_countdown, sync_restaurant_orders
+from pos.sales_facts import refresh_item_sales_facts, schedule_item_sales_refresh
 
 
 def _square_base_host() -> str:
@@ -103,6 +106,10 @@ def process_square_webhook_event(self, payload: Dict[str, Any], restaurant_id: O
         except Exception:
             pass
 
+    # Order activity changes today's item sales — refresh the local facts.
+    if obj_type == "order" or (isinstance(event_type, str) and event_type.startswith("order.")):
+        schedule_item_sales_refresh(restaurant)
+
     # For order/payment events, ensure we have latest representation (best-effort)
     try:
         if obj_type in ("order", "payment") and obj_id:
@@ -160,39 +167,82 @@ def sync_square_orders_for_restaurant(restaurant_id: str) -> Dict[str, Any]:
 @shared_task
 def sync_orders_for_connected_pos_restaurants() -> Dict[str, Any]:
     """
-    Periodic task: sync orders for all restaurants with connected POS.
+    Periodic task: fan out one incremental order sync per connected restaurant.
     Ensures sales reports and prep lists always have fresh data.
     """
-    from datetime import timedelta
-
-    restaurants = Restaurant.objects.filter(
-        pos_is_connected=True
-    ).exclude(pos_provider__in=["NONE", ""])
+    restaurant_ids = list(
+        Restaurant.objects.filter(pos_is_connected=True)
+        .exclude(pos_provider__in=["NONE", ""])
+        .values_list("id", flat=True)
+    )
 
-    synced = 0
+    queued = 0
     errors = []
-    today = timezone.now().date()
-    start_date = today - timedelta(days=7)
-    end_date = today
-
-    for restaurant in restaurants:
+    for restaurant_id in restaurant_ids:
         try:
-            result = IntegrationManager.sync_orders(
-                restaurant,
-                start_date=start_date,
-                end_date=end_date,
-            )
-            if result.get("success"):
-                synced += 1
-            else:
-                errors.append({"restaurant_id": str(restaurant.id), "error": result.get("error", "unknown")})
+            sync_pos_orders_for_restaurant.delay(str(restaurant_id))
+            queued += 1
         except Exception as e:
-            errors.append({"restaurant_id": str(restaurant.id), "error": str(e)})
+            errors.append({"restaurant_id": str(restaurant_id), "error": str(e)})
 
     return {
         "success": True,
-        "restaurants_synced": synced,
-        "total_connected": restaurants.count(),
+        "restaurants_queued": queued,
+        "total_connected": len(restaurant_ids),
         "errors": errors[:10],
     }
 
+
+@shared_task(bind=True, max_retries=10)
+def sync_pos_orders_for_restaurant(self, restaurant_id: str, continuation: int = 0) -> Dict[str, Any]:
+    """Incremental order sync for one tenant, throttled per POS provider.
+
+    While the provider has more pages than one run's budget, the task
+    re-enqueues itself with a growing countdown until the backlog is drained.
+    """
+    try:
+        restaurant = Restaurant.objects.get(id=restaurant_id)
+    except Restaurant.DoesNotExist:
+        return {"success": False, "error": "restaurant_not_found"}
+    if restaurant.pos_provider in ("NONE", "") or not restaurant.pos_is_connected:
+        return {"success": False, "error": "pos_not_connected"}
+
+    wait = acquire_provider_slot(restaurant.pos_provider)
+    if wait:
+        # Jitter so a throttled burst doesn't retry into the same window.
+        raise self.retry(countdown=wait + random.randint(0, 15))
+    result = sync_restaurant_orders(restaurant)
+    if result.get("more"):
+        sync_pos_orders_for_restaurant.apply_async(
+            args=[restaurant_id],
+            kwargs={"continuation": continuation + 1},
+            countdown=continuation_countdown(continuation),
+        )
+    return result
+
+
+@shared_task
+def refresh_item_sales_facts_for_restaurant(restaurant_id: str, start_date: str, end_date: str) -> Dict[str, Any]:
+    """Re-pull item sales for a date window into the local fact store."""
+    from datetime import date
+
+    try:
+        restaurant = Restaurant.objects.get(id=restaurant_id)
+    except Restaurant.DoesNotExist:
+        return {"success": False, "error": "restaurant_not_found"}
+    if restaurant.pos_provider in ("NONE", "") or not restaurant.pos_is_connected:
+        return {"success": False, "error": "pos_not_connected"}
+    facts = refresh_item_sales_facts(
+        restaurant,
+        date.fromisoformat(start_date),
+        date.fromisoformat(end_date),
+    )
+    return {"success": facts is not None, "days": len(facts or {})}
+
+
+@shared_task
+def refresh_stale_demand_curves() -> Dict[str, Any]:
+    """Rebuild demand-curve days flagged stale by order/reservation writes."""
+    from .demand_curve import refresh_stale_demand_days
+
+    return {"success": True, "days": refresh_stale_demand_days()}
@@ -0,0 +1,74 @@
+"""Hour-of-week demand curve: slot-wise EWMA maths and the shared forecast."""
+
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase
+
+from pos.demand_curve import DEFAULT_RESERVATION_HOUR, _reservation_hour, build_forecast
+from pos.forecast import curve_buffer, ewma_curve, ewma_mean
+
+MONDAY = date(2026, 3, 2)
+
+
+def _day(orders=0.0, hour=12, covers=0.0, revenue=0.0):
+    row = {name: [0.0] * 24 for name in ("orders", "covers", "revenue")}
+    row["orders"][hour] = orders
+    row["covers"][hour] = covers
+    row["revenue"][hour] = revenue
+    return row
+
+
+class CurveMathTests(SimpleTestCase):
+    def test_ewma_curve_matches_scalar_ewma_per_slot(self):
+        weeks = [[10.0, 0.0], None, [20.0, 4.0], [30.0, 8.0]]
+        curve = ewma_curve(weeks)
+        for slot in range(2):
+            samples = [w[slot] if w is not None else None for w in weeks]
+            self.assertAlmostEqual(curve[slot], ewma_mean(samples))
+
+    def test_ewma_curve_without_history(self):
+        self.assertEqual(ewma_curve([None, None]), [])
+        self.assertEqual(curve_buffer([None]), [])
+
+    def test_curve_buffer_is_bounded(self):
+        buffers = curve_buffer([[10.0, 1.0], [10.0, 50.0], [10.0, 0.0]])
+        self.assertEqual(buffers[0], 0.05)
+        self.assertEqual(buffers[1], 0.30)
+
+
+class BuildForecastTests(SimpleTestCase):
+    def test_daily_totals_follow_previous_weeks(self):
+        history = {}
+        for w in range(1, 5):
+            history[MONDAY - timedelta(weeks=w)] = _day(orders=40, hour=12, revenue=800)
+            history[MONDAY - timedelta(weeks=w) + timedelta(days=5)] = _day(orders=60, hour=20)
+        fc = build_forecast(history, MONDAY)
+        totals = fc.daily_totals("orders")
+        self.assertEqual(len(fc.orders), 168)
+        self.assertAlmostEqual(totals[0], 40)
+        self.assertAlmostEqual(totals[5], 60)
+        self.assertAlmostEqual(sum(fc.daily_totals("revenue")), 800)
+        self.assertEqual(fc.hourly(5)[20], 60)
+        self.assertEqual(fc.history_weeks, 4)
+
+    def test_recent_weeks_weigh_more(self):
+        history = {
+            MONDAY - timedelta(weeks=1): _day(orders=100),
+            MONDAY - timedelta(weeks=4): _day(orders=10),
+        }
+        fc = build_forecast(history, MONDAY)
+        self.assertGreater(fc.daily_totals()[0], 55)
+        self.assertEqual(fc.history_weeks, 2)
+
+    def test_booked_covers_come_from_target_week(self):
+        history = {MONDAY + timedelta(days=2): _day(covers=12, hour=19)}
+        fc = build_forecast(history, MONDAY)
+        self.assertEqual(sum(fc.booked_covers), 12)
+        self.assertEqual(fc.booked_covers[2 * 24 + 19], 12)
+        self.assertEqual(fc.daily_totals(), [0.0] * 7)
+
+    def test_reservation_hour_parsing(self):
+        self.assertEqual(_reservation_hour("18:30"), 18)
+        self.assertEqual(_reservation_hour(""), DEFAULT_RESERVATION_HOUR)
+        self.assertEqual(_reservation_hour("late"), DEFAULT_RESERVATION_HOUR)
+        self.assertEqual(_reservation_hour("25:00"), DEFAULT_RESERVATION_HOUR)
@@ -0,0 +1,207 @@
+"""Incremental POS order sync: cursor window, provider paging, rate limiting."""
+
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import Restaurant
+from menu.models import MenuItem
+from pos.integrations import (
+    CloverIntegration,
+    CustomAPIIntegration,
+    SquareIntegration,
+    ToastIntegration,
+    _bulk_upsert_menu_items,
+)
+from pos.models import Order, POSItemSalesDaily, POSSyncCursor
+from pos.order_sync import (
+    CURSOR_OVERLAP,
+    acquire_provider_slot,
+    continuation_countdown,
+    sync_restaurant_orders,
+    sync_window,
+)
+from pos.tasks import sync_pos_orders_for_restaurant
+from pos.tests_sales_facts import _restaurant
+
+NOW = datetime(2026, 5, 3, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def _response(body, headers=None):
+    resp = MagicMock()
+    resp.json.return_value = body
+    resp.headers = headers or {}
+    return resp
+
+
+class SyncWindowTests(SimpleTestCase):
+    def test_first_run_backfills_from_midnight_a_week_ago(self):
+        cursor = SimpleNamespace(last_modified_at=None, page_token="", window_end=None)
+        since, until = sync_window(cursor, NOW)
+        self.assertEqual(since, datetime(2026, 4, 26, tzinfo=dt_timezone.utc))
+        self.assertEqual(until, NOW)
+
+    def test_incremental_run_starts_at_cursor_minus_overlap(self):
+        last = NOW - timedelta(hours=1)
+        cursor = SimpleNamespace(last_modified_at=last, page_token="", window_end=None)
+        self.assertEqual(sync_window(cursor, NOW), (last - CURSOR_OVERLAP, NOW))
+
+    def test_resumed_page_keeps_original_window_end(self):
+        last = NOW - timedelta(hours=2)
+        end = NOW - timedelta(hours=1)
+        cursor = SimpleNamespace(last_modified_at=last, page_token="tok", window_end=end)
+        self.assertEqual(sync_window(cursor, NOW)[1], end)
+
+
+class ContinuationTests(SimpleTestCase):
+    def _run(self, more, continuation=0):
+        restaurant = SimpleNamespace(id="r1", pos_provider="TOAST", pos_is_connected=True)
+        with patch("pos.tasks.Restaurant.objects.get", return_value=restaurant), \
+                patch("pos.tasks.acquire_provider_slot", return_value=0), \
+                patch("pos.tasks.sync_restaurant_orders", return_value={"success": True, "more": more}), \
+                patch.object(sync_pos_orders_for_restaurant, "apply_async") as enqueue:
+            sync_pos_orders_for_restaurant("r1", continuation=continuation)
+        return enqueue
+
+    def test_backlog_requeues_with_backoff_until_drained(self):
+        enqueue = self._run(more=True, continuation=2)
+        enqueue.assert_called_once_with(args=["r1"], kwargs={"continuation": 3}, countdown=continuation_countdown(2))
+        self.assertEqual(continuation_countdown(2), 20)
+        self.assertEqual(continuation_countdown(40), 300)
+        self._run(more=False).assert_not_called()
+
+
+class ProviderRateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(POS_PROVIDER_SYNC_RATE_LIMITS={"TOAST": 2})
+    def test_slots_run_out_within_window_and_reset_after(self):
+        t = 60 * 16_667 + 20.0  # 20s into a window
+        self.assertEqual(acquire_provider_slot("TOAST", now=t), 0)
+        self.assertEqual(acquire_provider_slot("TOAST", now=t), 0)
+        self.assertEqual(acquire_provider_slot("TOAST", now=t), 40)
+        self.assertEqual(acquire_provider_slot("TOAST", now=t + 60), 0)
+
+    @override_settings(POS_PROVIDER_SYNC_RATE_LIMITS={"TOAST": 1})
+    def test_providers_are_limited_independently(self):
+        t = 2_000_000.0
+        self.assertEqual(acquire_provider_slot("TOAST", now=t), 0)
+        self.assertEqual(acquire_provider_slot("SQUARE", now=t), 0)
+
+
+class FetchOrdersSinceTests(SimpleTestCase):
+    since = NOW - timedelta(hours=1)
+
+    def test_square_filters_on_updated_at_and_follows_cursor(self):
+        integ = SquareIntegration(_restaurant(pos_provider="SQUARE"))
+        pages = [_response({"orders": [{"id": "a"}], "cursor": "c2"}), _response({"orders": [{"id": "b"}]})]
+        with patch.object(integ, "_request", side_effect=pages) as req:
+            orders, token = integ.fetch_orders_since(self.since, NOW)
+        self.assertEqual([o["id"] for o in orders], ["a", "b"])
+        self.assertEqual(token, "")
+        body = req.call_args_list[0].kwargs["json"]
+        self.assertIn("updated_at", body["query"]["filter"]["date_time_filter"])
+        self.assertEqual(body["query"]["sort"]["sort_field"], "UPDATED_AT")
+        self.assertEqual(req.call_args_list[1].kwargs["json"]["cursor"], "c2")
+
+    def test_toast_hands_back_token_when_page_budget_runs_out(self):
+        integ = ToastIntegration(_restaurant())
+        integ.SYNC_PAGE_BUDGET = 2
+        pages = [_response({"orders": [{"guid": "x"}], "nextPageToken": "p2"}),
+                 _response({"orders": [{"guid": "y"}], "nextPageToken": "p3"})]
+        with patch.object(integ, "_request", side_effect=pages) as req:
+            orders, token = integ.fetch_orders_since(self.since, NOW, page_token="p1")
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(token, "p3")
+        params = req.call_args_list[0].kwargs["params"]
+        self.assertEqual(params["pageToken"], "p1")
+        self.assertEqual(params["startDate"], "2026-05-03T11:00:00.000+0000")
+
+    def test_clover_offset_token(self):
+        integ = CloverIntegration(_restaurant(pos_provider="CLOVER"))
+        integ.SYNC_PAGE_BUDGET = 1
+        full_page = _response({"elements": [{"id": str(i)} for i in range(1000)]})
+        with patch.object(integ, "_merchant_id", return_value="m"), \
+                patch.object(integ, "_request", return_value=full_page) as req:
+            orders, token = integ.fetch_orders_since(self.since, NOW, page_token="2000")
+        self.assertEqual(token, "3000")
+        self.assertEqual(req.call_args.kwargs["params"]["offset"], 2000)
+        self.assertTrue(req.call_args.kwargs["params"]["filter"][0].startswith("modifiedTime>="))
+
+
+class CustomOrderPersistTests(TestCase):
+    def test_tenants_sharing_a_provider_order_id_keep_separate_orders(self):
+        order = {"id": "1001", "total": 12, "items": [{"id": "l1", "name": "Tagine", "quantity": 2, "price": 6}]}
+        tenants = [
+            Restaurant.objects.create(name=f"Tenant {n}", email=f"t{n}@pos.test", pos_provider="CUSTOM")
+            for n in range(2)
+        ]
+        for restaurant in tenants:
+            self.assertEqual(CustomAPIIntegration(restaurant).persist_orders([order]), 1)
+        CustomAPIIntegration(tenants[0]).persist_orders([dict(order, total=15)])
+
+        for restaurant, total in zip(tenants, (15, 12)):
+            row = Order.objects.get(restaurant=restaurant, external_id="1001")
+            self.assertEqual(row.total_amount, total)
+            self.assertEqual(row.line_items.count(), 1)
+            self.assertEqual(row.payment.amount, total)
+
+
+class IncrementalFactsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.restaurant = Restaurant.objects.create(name="Sync Grill", email="sync@grill.test", pos_provider="CUSTOM")
+        self.day = date(2026, 5, 3)
+        POSSyncCursor.objects.create(
+            restaurant=self.restaurant, provider="CUSTOM", last_modified_at=NOW - timedelta(hours=1),
+            snapshot_since=self.day - timedelta(days=1),
+        )
+        self.integration = CustomAPIIntegration(self.restaurant)
+
+    def _order(self, ext_id, qty, status="completed"):
+        return {
+            "id": ext_id, "status": status, "created_at": "2026-05-03T12:00:00Z", "total": qty * 5,
+            "items": [{"id": "l1", "name": "Tagine", "quantity": qty, "price": 5}],
+        }
+
+    def _sync(self, *orders):
+        with patch.object(self.integration, "fetch_orders_since", return_value=(list(orders), "")), \
+                patch.object(self.integration, "get_item_sales_facts_for_date_range") as live:
+            result = sync_restaurant_orders(self.restaurant, integration=self.integration)
+        live.assert_not_called()
+        return result
+
+    def _sold(self):
+        return sum(
+            POSItemSalesDaily.objects.filter(restaurant=self.restaurant, sales_date=self.day)
+            .values_list("quantity", flat=True)
+        )
+
+    def test_touched_days_are_rebuilt_from_stored_snapshots(self):
+        self.assertTrue(self._sync(self._order("A", 2))["success"])
+        self._sync(self._order("B", 1))
+        self.assertEqual(self._sold(), 3)
+
+        self._sync(self._order("A", 2, status="cancelled"))
+        self.assertEqual(self._sold(), 1)
+
+    def test_concurrent_sync_of_the_same_tenant_is_skipped(self):
+        cache.add(f"pos:order_sync:lock:{self.restaurant.id}", 1, 60)
+        with patch.object(self.integration, "fetch_orders_since") as fetch:
+            result = sync_restaurant_orders(self.restaurant, integration=self.integration)
+        self.assertEqual(result, {"success": False, "error": "sync_in_progress"})
+        fetch.assert_not_called()
+
+    def test_menu_upsert_stamps_updated_at(self):
+        item = MenuItem.objects.create(
+            restaurant=self.restaurant, name="Tagine", price=5, external_provider="CUSTOM", external_id="m1",
+        )
+        _bulk_upsert_menu_items(self.restaurant, "CUSTOM", [{"external_id": "m1", "name": "Tagine", "price": 6}])
+        stamp = item.updated_at
+        item.refresh_from_db()
+        self.assertEqual(item.price, 6)
+        self.assertGreater(item.updated_at, stamp)
@@ -0,0 +1,121 @@
+"""Provider order → item-sales fact folding used by the local sales store."""
+
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from pos.integrations import CloverIntegration, CustomAPIIntegration, SquareIntegration, ToastIntegration
+from pos.sales_facts import refresh_item_sales_facts
+
+
+def _restaurant(**extra):
+    base = dict(
+        pos_api_key="k",
+        pos_merchant_id="m",
+        pos_location_id="loc-1",
+        pos_provider="TOAST",
+        get_pos_oauth=lambda: {},
+    )
+    base.update(extra)
+    return SimpleNamespace(**base)
+
+
+DAY = date(2026, 5, 3)
+
+
+class ToastFactsTests(SimpleTestCase):
+    def test_folds_selections_with_revenue_and_skips_voids(self):
+        orders = [{
+            "openedDate": "2026-05-03T12:00:00.000+0000",
+            "checks": [{"selections": [
+                {"displayName": "Tagine", "quantity": 2, "price": 24.0},
+                {"displayName": "Tagine", "quantity": 1, "price": 12.0},
+                {"displayName": "Mint tea", "quantity": 1, "price": 3.0, "voided": True},
+            ]}],
+        }]
+        facts = ToastIntegration(_restaurant()).item_sales_facts_from_orders(orders, DAY, DAY)
+        self.assertEqual(facts[DAY]["Tagine"], {"quantity": 3.0, "revenue": 36.0})
+        self.assertNotIn("Mint tea", facts[DAY])
+
+    def test_legacy_quantity_shape_is_derived_from_facts(self):
+        integ = ToastIntegration(_restaurant())
+        orders = [{
+            "openedDate": "2026-05-03T12:00:00.000+0000",
+            "checks": [{"selections": [{"displayName": "Couscous", "quantity": 4, "price": 40}]}],
+        }]
+        with patch.object(integ, "sync_orders", return_value=orders):
+            self.assertEqual(integ.get_item_sales_for_date_range(DAY, DAY), {DAY: {"Couscous": 4.0}})
+
+    def test_provider_error_yields_empty(self):
+        integ = ToastIntegration(_restaurant())
+        with patch.object(integ, "sync_orders", side_effect=RuntimeError("503")):
+            self.assertEqual(integ.get_item_sales_facts_for_date_range(DAY, DAY), {})
+
+
+class TruncatedFetchTests(SimpleTestCase):
+    def _page(self, body):
+        resp = MagicMock()
+        resp.json.return_value = body
+        resp.headers = {}
+        return resp
+
+    def test_toast_flags_a_window_cut_off_at_the_page_cap(self):
+        integ = ToastIntegration(_restaurant())
+        page = self._page({"orders": [{"guid": "x"}], "nextPageToken": "more"})
+        with patch.object(integ, "_request", return_value=page) as req:
+            integ.sync_orders(DAY, DAY)
+        self.assertEqual(req.call_count, 5)
+        self.assertTrue(integ.fetch_truncated)
+
+        with patch.object(integ, "_request", return_value=self._page({"orders": []})):
+            integ.sync_orders(DAY, DAY)
+        self.assertFalse(integ.fetch_truncated)
+
+    def test_capped_refresh_is_stored_but_left_incomplete(self):
+        integ = SquareIntegration(_restaurant(pos_provider="SQUARE"))
+        page = self._page({"orders": [{
+            "created_at": "2026-05-03T10:00:00Z",
+            "line_items": [{"name": "Harira", "quantity": "1", "gross_sales_money": {"amount": 500}}],
+        }], "cursor": "next"})
+        with patch.object(integ, "_request", return_value=page), \
+                patch("pos.sales_facts.store_item_sales_facts") as store:
+            refresh_item_sales_facts(SimpleNamespace(id="r1", pos_provider="SQUARE"), DAY, DAY, integration=integ)
+        self.assertIs(store.call_args.kwargs["complete"], False)
+
+
+class SquareFactsTests(SimpleTestCase):
+    def test_money_in_cents(self):
+        orders = [{
+            "created_at": "2026-05-03T10:00:00Z",
+            "line_items": [{"name": "Harira", "quantity": "2", "gross_sales_money": {"amount": 1500}}],
+        }]
+        facts = SquareIntegration(_restaurant()).item_sales_facts_from_orders(orders, DAY, DAY)
+        self.assertEqual(facts[DAY]["Harira"], {"quantity": 2.0, "revenue": 15.0})
+
+
+class CloverFactsTests(SimpleTestCase):
+    def test_unit_qty_and_unit_price(self):
+        from datetime import datetime
+
+        ms = int(datetime(2026, 5, 3, 12, 0).timestamp() * 1000)
+        orders = [{
+            "createdTime": ms,
+            "lineItems": {"elements": [{"name": "Olives", "unitQty": 500, "price": 800}]},
+        }]
+        facts = CloverIntegration(_restaurant()).item_sales_facts_from_orders(orders, DAY, DAY)
+        self.assertEqual(facts[DAY]["Olives"], {"quantity": 0.5, "revenue": 4.0})
+
+
+class CustomFactsTests(SimpleTestCase):
+    def test_skips_cancelled_and_multiplies_unit_price(self):
+        orders = [
+            {"created_at": "2026-05-03T09:00:00Z", "items": [{"name": "Pastilla", "quantity": 3, "price": 5}]},
+            {"created_at": "2026-05-03T09:30:00Z", "status": "cancelled", "items": [{"name": "Pastilla", "quantity": 9}]},
+        ]
+        facts = CustomAPIIntegration(_restaurant()).item_sales_facts_from_orders(orders, DAY, DAY)
+        self.assertEqual(facts[DAY]["Pastilla"], {"quantity": 3.0, "revenue": 15.0})
+
+    def test_location_key_defaults_to_pos_location(self):
+        self.assertEqual(CustomAPIIntegration(_restaurant()).sales_location_id(), "loc-1")
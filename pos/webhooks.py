@@ -13,6 +13,7 @@ from rest_framework.views import APIView
 from .integrations import IntegrationManager
 from .models import Order, POSExternalEvent
 from django.conf import settings
+from .sales_facts import schedule_item_sales_refresh
 from .tasks import process_square_webhook_event, verify_square_webhook_signature
 from accounts.models import Restaurant
 
@@ -164,6 +165,9 @@ class TOASTWebhookView(APIView):
             # Already seen — Toast retries on 2xx absence, so ack quickly.
             return Response({"status": "duplicate"})
 
+        if restaurant and "ORDER" in str(event_type).upper():
+            schedule_item_sales_refresh(restaurant)
+
         # At this stage we acknowledge fast and let downstream jobs
         # project the event into Mizan's own models. Ordering-sensitive
         # event types (ORDER_*) should be handled via a dedicated Celery
@@ -318,6 +322,9 @@ class CloverWebhookView(APIView):
             restaurant = Restaurant.objects.filter(
                 pos_provider="CLOVER", pos_merchant_id=merchant_id
             ).first()
+            if restaurant and any(str(ev.get("objectId") or "").startswith("O:") for ev in events or []):
+                # "O:" objects are orders — refresh today's item-sales facts.
+                schedule_item_sales_refresh(restaurant)
             for ev in events or []:
                 seen_any = True
                 _record_external_event(
@@ -0,0 +1,362 @@
+"""
+Streaming report exports (attendance and payroll) in CSV, XLSX and PDF.
+
+Rows are generated lazily from chunked queryset iterators and written
+straight to the response or to a spooled temp file, so a quarter of a
+multi-branch tenant never sits in memory as Python lists:
+
+* CSV is a ``StreamingHttpResponse`` fed one line at a time.
+* XLSX uses openpyxl's write-only workbook (rows are serialized as they
+  are appended) into a spooled temp file, then streamed with ``FileResponse``.
+* PDF is laid out as a sequence of fixed-size tables; one huge ReportLab
+  table is split page by page, which is quadratic in the row count.
+
+Ranges past :data:`ASYNC_MAX_DAYS` or :data:`ASYNC_ROW_THRESHOLD` rows are
+not rendered in the request: :func:`start_export_job` records a
+:class:`~reporting.models.ReportExport` and ``reporting.tasks`` writes the
+file to default storage (private S3 in production) in the background.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.core.files import File
+from django.db import transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from reporting.models import ReportExport
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+PDF_TABLE_ROWS = 250
+# Beyond either limit the export runs as a background job.
+ASYNC_MAX_DAYS = 92
+ASYNC_ROW_THRESHOLD = 5000
+# Temp files stay in memory up to this size, then spill to disk.
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+EXPORT_RETENTION_DAYS = 7
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+
+ATTENDANCE_HEADERS = [
+    'Staff ID', 'First Name', 'Last Name', 'Email',
+    'Start Date', 'End Date', 'Total Hours', 'Hourly Rate', 'Total Earnings',
+    'Late Arrivals', 'No-Shows', 'Status',
+]
+ATTENDANCE_PDF_HEADERS = [
+    'Staff ID', 'First Name', 'Last Name', 'Email',
+    'Start', 'End', 'Hours', 'Rate', 'Earnings',
+    'Lates', 'No-Shows', 'Status',
+]
+PAYROLL_HEADERS = [
+    'Staff ID', 'Email', 'First Name', 'Last Name',
+    'Start Date', 'End Date', 'Total Hours', 'Hourly Rate', 'Total Earnings', 'Status',
+]
+
+
+def normalize_format(value: Optional[str], default: str = 'xlsx') -> Optional[str]:
+    """``excel`` is accepted as an alias of ``xlsx``; ``None`` when unknown."""
+    fmt = (value or default).lower().strip()
+    fmt = 'xlsx' if fmt == 'excel' else fmt
+    return fmt if fmt in CONTENT_TYPES else None
+
+
+# --- Row sources -----------------------------------------------------------
+
+def _timesheets(restaurant, start_date: date, end_date: date):
+    from scheduling.models import Timesheet
+
+    return Timesheet.objects.filter(
+        restaurant=restaurant,
+        start_date__lte=end_date,
+        end_date__gte=start_date,
+    )
+
+
+def iter_attendance_rows(restaurant, start_date: date, end_date: date) -> Iterator[List]:
+    """Timesheets merged with late/no-show counts, one list per row."""
+    from reporting.services_labor import planned_vs_actual_hours
+
+    pv = planned_vs_actual_hours(restaurant, start_date, end_date)
+    by_staff = {str(r['staff_id']): r for r in (pv.get('by_staff') or [])}
+    qs = (
+        _timesheets(restaurant, start_date, end_date)
+        .select_related('staff')
+        .order_by('staff__last_name', 'staff__first_name', 'start_date')
+    )
+    for ts in qs.iterator(chunk_size=CHUNK_SIZE):
+        staff = ts.staff
+        sid = str(staff.id) if staff else ''
+        extra = by_staff.get(sid, {})
+        yield [
+            sid,
+            getattr(staff, 'first_name', '') or '',
+            getattr(staff, 'last_name', '') or '',
+            getattr(staff, 'email', '') or '',
+            ts.start_date.isoformat(),
+            ts.end_date.isoformat(),
+            float(ts.total_hours or 0),
+            float(ts.hourly_rate or 0),
+            float(ts.total_earnings or 0),
+            extra.get('late_count', 0),
+            extra.get('no_show_count', 0),
+            ts.status or '',
+        ]
+
+
+def iter_payroll_rows(restaurant, start_date: date, end_date: date) -> Iterator[List]:
+    qs = (
+        _timesheets(restaurant, start_date, end_date)
+        .select_related('staff')
+        .order_by('staff__last_name', 'start_date')
+    )
+    for ts in qs.iterator(chunk_size=CHUNK_SIZE):
+        staff = ts.staff
+        yield [
+            str(ts.staff_id) if ts.staff_id else '',
+            getattr(staff, 'email', '') or '',
+            getattr(staff, 'first_name', '') or '',
+            getattr(staff, 'last_name', '') or '',
+            ts.start_date.isoformat(),
+            ts.end_date.isoformat(),
+            str(ts.total_hours),
+            str(ts.hourly_rate),
+            str(ts.total_earnings),
+            ts.status or '',
+        ]
+
+
+@dataclass(frozen=True)
+class ExportKind:
+    headers: List[str]
+    pdf_headers: List[str]
+    rows: Callable[..., Iterator[List]]
+    title: str
+    sheet_title: str
+    filename_stem: str
+
+
+EXPORT_KINDS: Dict[str, ExportKind] = {
+    'attendance': ExportKind(
+        ATTENDANCE_HEADERS, ATTENDANCE_PDF_HEADERS, iter_attendance_rows,
+        'Staff Attendance Report (for HR / Payroll)', 'Attendance Report', 'staff_attendance_report',
+    ),
+    'payroll': ExportKind(
+        PAYROLL_HEADERS, PAYROLL_HEADERS, iter_payroll_rows,
+        'Payroll Export', 'Payroll', 'payroll_export',
+    ),
+}
+
+
+def export_filename(kind: str, fmt: str, start_date: date, end_date: date) -> str:
+    return f"{EXPORT_KINDS[kind].filename_stem}_{start_date}_{end_date}.{fmt}"
+
+
+def should_run_async(restaurant, start_date: date, end_date: date) -> bool:
+    if (end_date - start_date).days + 1 > ASYNC_MAX_DAYS:
+        return True
+    return _timesheets(restaurant, start_date, end_date).count() > ASYNC_ROW_THRESHOLD
+
+
+# --- Writers ---------------------------------------------------------------
+
+class _Echo:
+    """File-like object whose ``write`` hands the value back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers: List[str], rows: Iterable[List]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(headers: List[str], rows: Iterable[List], fileobj) -> int:
+    writer = csv.writer(_Echo())
+    fileobj.write(writer.writerow(headers).encode('utf-8'))
+    count = 0
+    for row in rows:
+        fileobj.write(writer.writerow(row).encode('utf-8'))
+        count += 1
+    return count
+
+
+def write_xlsx(headers: List[str], rows: Iterable[List], fileobj, title: str = 'Report') -> int:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:31])
+    bold = Font(bold=True)
+    header_cells = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.font = bold
+        header_cells.append(cell)
+    ws.append(header_cells)
+    count = 0
+    for row in rows:
+        ws.append(row)
+        count += 1
+    wb.save(fileobj)
+    return count
+
+
+def _chunks(rows: Iterable[List], size: int) -> Iterator[List[List]]:
+    chunk: List[List] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_pdf(headers: List[str], rows: Iterable[List], fileobj, title: str, subtitle_lines: Iterable[str] = ()) -> int:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    doc = SimpleDocTemplate(fileobj, pagesize=A4, rightMargin=inch, leftMargin=inch, topMargin=inch, bottomMargin=inch)
+    styles = getSampleStyleSheet()
+    story = [Paragraph(f"<b>{title}</b>", styles['Title']), Spacer(1, 12)]
+    for line in subtitle_lines:
+        story.append(Paragraph(line, styles['Normal']))
+    story.append(Spacer(1, 16))
+
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ])
+    count = 0
+    for chunk in _chunks(rows, PDF_TABLE_ROWS):
+        count += len(chunk)
+        table = Table([headers] + [[str(v) for v in row] for row in chunk], repeatRows=1)
+        table.setStyle(style)
+        story.append(table)
+    if not count:
+        table = Table([headers], repeatRows=1)
+        table.setStyle(style)
+        story.append(table)
+    doc.build(story)
+    return count
+
+
+def render_export(kind: str, fmt: str, restaurant, start_date: date, end_date: date, fileobj) -> int:
+    """Write the export into ``fileobj`` (binary). Returns the data row count."""
+    spec = EXPORT_KINDS[kind]
+    rows = spec.rows(restaurant, start_date, end_date)
+    if fmt == 'csv':
+        return write_csv(spec.headers, rows, fileobj)
+    if fmt == 'xlsx':
+        return write_xlsx(spec.headers, rows, fileobj, title=spec.sheet_title)
+    subtitle = [f"Period: {start_date} to {end_date}"]
+    if getattr(restaurant, 'name', ''):
+        subtitle.append(f"Restaurant: {restaurant.name}")
+    return write_pdf(spec.pdf_headers, rows, fileobj, spec.title, subtitle)
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+
+
+def export_response(kind: str, fmt: str, restaurant, start_date: date, end_date: date):
+    """Streaming download for ranges small enough to serve in the request."""
+    filename = export_filename(kind, fmt, start_date, end_date)
+    if fmt == 'csv':
+        spec = EXPORT_KINDS[kind]
+        resp = StreamingHttpResponse(
+            csv_lines(spec.headers, spec.rows(restaurant, start_date, end_date)),
+            content_type=CONTENT_TYPES['csv'],
+        )
+        resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return resp
+    buf = _spool()
+    render_export(kind, fmt, restaurant, start_date, end_date, buf)
+    buf.seek(0)
+    return FileResponse(buf, as_attachment=True, filename=filename, content_type=CONTENT_TYPES[fmt])
+
+
+# --- Background jobs -------------------------------------------------------
+
+def start_export_job(kind: str, fmt: str, restaurant, start_date: date, end_date: date, requested_by=None) -> ReportExport:
+    """Record a job and queue it once the row is committed."""
+    from reporting.tasks import run_report_export
+
+    job = ReportExport.objects.create(
+        restaurant=restaurant,
+        requested_by=requested_by,
+        kind=kind,
+        format=fmt,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    transaction.on_commit(lambda: run_report_export.delay(str(job.id)))
+    return job
+
+
+def run_export_job(job: ReportExport) -> ReportExport:
+    """Render the job's file into default storage."""
+    job.status = 'RUNNING'
+    job.save(update_fields=['status'])
+    try:
+        with _spool() as buf:
+            job.row_count = render_export(job.kind, job.format, job.restaurant, job.start_date, job.end_date, buf)
+            buf.seek(0)
+            job.file.save(export_filename(job.kind, job.format, job.start_date, job.end_date), File(buf), save=False)
+        job.status = 'DONE'
+        job.error = ''
+    except Exception as exc:
+        logger.exception("report export %s failed", job.id)
+        job.status = 'FAILED'
+        job.error = str(exc)[:1000]
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'file', 'row_count', 'error', 'completed_at'])
+    return job
+
+
+def export_job_payload(job: ReportExport, request=None, status_url: str = '') -> Dict:
+    from core.s3_storage import file_field_download_url
+
+    return {
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'format': job.format,
+        'start_date': job.start_date.isoformat(),
+        'end_date': job.end_date.isoformat(),
+        'status': job.status,
+        'row_count': job.row_count,
+        'error': job.error or None,
+        'status_url': status_url,
+        'download_url': file_field_download_url(job.file, request=request) if job.status == 'DONE' and job.file else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
@@ -0,0 +1,288 @@
+"""
+Set-based labor analytics for a reporting window.
+
+The planned-vs-actual, labor cost and compliance reports used to look up
+clock-ins, users and roles one shift / staff member at a time. Here the
+window's shifts, clock events, first clock-in per (staff, day), names and
+rates are loaded with a fixed number of queries regardless of team size;
+the ``compute_*`` functions are pure and do the per-(staff, day) work.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db.models import Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.tenant_time import restaurant_tz
+from timeclock.intervals import build_intervals, day_bounds, stream_events
+
+DEFAULT_HOURLY_RATE = 15.0
+PLANNED_SHIFT_STATUSES = ['SCHEDULED', 'CONFIRMED', 'COMPLETED', 'IN_PROGRESS']
+
+
+@dataclass
+class ShiftRow:
+    staff_id: str
+    shift_date: date
+    start: Optional[datetime]
+    hours: float
+    role: str = ''
+
+
+@dataclass
+class LaborWindow:
+    """Everything planned-vs-actual needs for one restaurant and window."""
+    shifts: List[ShiftRow] = field(default_factory=list)
+    # (staff_id, event_type, timestamp) ordered by staff then time; may reach
+    # past ``bounds`` so shifts crossing the window edge pair correctly
+    events: List[Tuple[str, str, datetime]] = field(default_factory=list)
+    bounds: Optional[Tuple[datetime, datetime]] = None
+    # First 'in' per (staff_id, local day), across all branches
+    first_in: Dict[Tuple[str, date], datetime] = field(default_factory=dict)
+    roster: Set[str] = field(default_factory=set)
+
+
+def _location_id(location):
+    return getattr(location, 'id', None) or (location if isinstance(location, (str, int)) else None)
+
+
+def _shift_hours(shift) -> float:
+    hrs = getattr(shift, 'actual_hours', 0) or 0
+    if not isinstance(hrs, (int, float)):
+        hrs = float(hrs)
+    return hrs
+
+
+def _shift_start(shift_date: date, start) -> Optional[datetime]:
+    if start is None:
+        return None
+    if hasattr(start, 'date'):
+        return start
+    return timezone.make_aware(datetime.combine(shift_date, start))
+
+
+def staff_names(staff_ids: Iterable) -> Dict[str, str]:
+    """``{staff_id: display name}`` in one query (email when the name is blank)."""
+    from accounts.models import CustomUser
+
+    ids = {str(s) for s in staff_ids if s}
+    if not ids:
+        return {}
+    return {
+        str(uid): f'{first or ""} {last or ""}'.strip() or email
+        for uid, first, last, email in CustomUser.objects.filter(id__in=ids).values_list(
+            'id', 'first_name', 'last_name', 'email'
+        )
+    }
+
+
+def staff_hourly_rates(staff_ids: Iterable) -> Dict[str, float]:
+    """Bulk :func:`reporting.services_labor.get_staff_hourly_rate`: the
+    accounts profile rate wins, then the staff-app profile, then the default."""
+    from accounts.models import StaffProfile as AccountProfile
+
+    ids = {str(s) for s in staff_ids if s}
+    rates = {sid: DEFAULT_HOURLY_RATE for sid in ids}
+    if not ids:
+        return rates
+    found = set()
+    for uid, rate in AccountProfile.objects.filter(user_id__in=ids, hourly_rate__gt=0).values_list('user_id', 'hourly_rate'):
+        rates[str(uid)] = float(rate)
+        found.add(str(uid))
+    missing = ids - found
+    if missing:
+        try:
+            from staff.models import StaffProfile
+
+            for uid, rate in StaffProfile.objects.filter(user_id__in=missing, hourly_rate__gt=0).values_list('user_id', 'hourly_rate'):
+                rates[str(uid)] = float(rate)
+        except Exception:
+            pass
+    return rates
+
+
+def load_labor_window(restaurant, start_date, end_date, location=None) -> LaborWindow:
+    """Four queries: shifts, clock events, first clock-ins, active roster.
+    Clock events use sargable bounds for the business days in the
+    restaurant's timezone (see :mod:`timeclock.intervals`)."""
+    from scheduling.models import AssignedShift
+    from timeclock.models import ClockEvent
+
+    location_id = _location_id(location)
+    window = LaborWindow()
+
+    shifts_qs = AssignedShift.objects.filter(
+        schedule__restaurant=restaurant,
+        shift_date__gte=start_date,
+        shift_date__lte=end_date,
+        status__in=PLANNED_SHIFT_STATUSES,
+        staff__isnull=False,
+    ).only('staff_id', 'shift_date', 'start_time', 'end_time', 'break_duration', 'role')
+    if location_id:
+        shifts_qs = shifts_qs.filter(location_id=location_id)
+    for s in shifts_qs:
+        window.shifts.append(ShiftRow(
+            staff_id=str(s.staff_id),
+            shift_date=s.shift_date,
+            start=_shift_start(s.shift_date, s.start_time),
+            hours=_shift_hours(s),
+            role=s.role or '',
+        ))
+
+    window.bounds = day_bounds(restaurant, start_date, end_date)
+    window.events = list(stream_events(restaurant, *window.bounds, location_id=location_id))
+
+    # Lateness looks at the staff member's first clock-in that day anywhere,
+    # not only at the selected branch.
+    shift_staff = {s.staff_id for s in window.shifts}
+    if shift_staff:
+        firsts = (
+            ClockEvent.objects.filter(
+                staff_id__in=shift_staff,
+                event_type='in',
+                timestamp__gte=window.bounds[0],
+                timestamp__lt=window.bounds[1],
+            )
+            .annotate(day=TruncDate('timestamp', tzinfo=restaurant_tz(restaurant)))
+            .order_by()
+            .values('staff_id', 'day')
+            .annotate(first=Min('timestamp'))
+        )
+        window.first_in = {(str(r['staff_id']), r['day']): r['first'] for r in firsts}
+
+    window.roster = active_roster(restaurant, location)
+    return window
+
+
+def active_roster(restaurant, location=None) -> Set[str]:
+    """Everyone active is listed; branch-scoped reports only list staff based
+    at (or allowed to work at) that branch."""
+    from accounts.models import CustomUser
+
+    location_id = _location_id(location)
+    active_staff = CustomUser.objects.filter(restaurant=restaurant, is_active=True).exclude(role='SUPER_ADMIN')
+    if location_id:
+        active_staff = active_staff.filter(
+            Q(primary_location_id=location_id) | Q(allowed_locations__id=location_id)
+        ).distinct()
+    return {str(uid) for uid in active_staff.values_list('id', flat=True)}
+
+
+def clock_hours_by_staff(
+    events: Iterable[Tuple[str, str, datetime]],
+    bounds: Optional[Tuple[datetime, datetime]] = None,
+) -> Dict[str, float]:
+    """Worked hours (breaks excluded) of intervals starting within ``bounds``."""
+    actual = defaultdict(float)
+    intervals, _ = build_intervals(events)
+    for iv in intervals:
+        if iv.is_closed and (bounds is None or bounds[0] <= iv.start < bounds[1]):
+            actual[iv.staff_id] += iv.worked_seconds() / 3600
+    return actual
+
+
+def attendance_by_staff(
+    shifts: Iterable[ShiftRow],
+    first_in: Dict[Tuple[str, date], datetime],
+    late_minutes: int,
+) -> Dict[str, Tuple[int, int]]:
+    """``{staff_id: (late, no_show)}`` from each shift's first clock-in that day."""
+    grace = timedelta(minutes=late_minutes)
+    out = defaultdict(lambda: [0, 0])
+    for sh in shifts:
+        if sh.start is None:
+            continue
+        clock = first_in.get((sh.staff_id, sh.shift_date))
+        if clock is None:
+            out[sh.staff_id][1] += 1
+        elif clock > sh.start + grace:
+            out[sh.staff_id][0] += 1
+    return {sid: (late, no_show) for sid, (late, no_show) in out.items()}
+
+
+def compute_planned_vs_actual(window: LaborWindow, late_minutes: int, names: Dict[str, str]) -> Dict:
+    planned = defaultdict(float)
+    for sh in window.shifts:
+        planned[sh.staff_id] += sh.hours
+    actual = clock_hours_by_staff(window.events, window.bounds)
+    attendance = attendance_by_staff(window.shifts, window.first_in, late_minutes)
+
+    result = []
+    total_planned = total_actual = 0.0
+    late_count = no_show_count = 0
+    for sid in sorted(set(planned) | set(actual) | window.roster):
+        p = planned.get(sid, 0)
+        a = actual.get(sid, 0)
+        late, no_show = attendance.get(sid, (0, 0))
+        total_planned += p
+        total_actual += a
+        late_count += late
+        no_show_count += no_show
+        result.append({
+            'staff_id': sid,
+            'staff_name': names.get(sid, sid),
+            'planned_hours': round(p, 2),
+            'actual_hours': round(a, 2),
+            'variance': round(a - p, 2),
+            'late_count': late,
+            'no_show_count': no_show,
+        })
+    return {
+        'summary': {
+            'total_planned_hours': round(total_planned, 2),
+            'total_actual_hours': round(total_actual, 2),
+            'total_variance': round(total_actual - total_planned, 2),
+            'late_arrivals': late_count,
+            'no_shows': no_show_count,
+        },
+        'by_staff': result,
+    }
+
+
+def merge_planned_vs_actual(parts: Iterable[List[Dict]], roster: Set[str], names: Dict[str, str]) -> Dict:
+    """Sum per-staff rows of several :func:`compute_planned_vs_actual` results
+    (e.g. materialized days plus a live tail) into one report; everyone in
+    ``roster`` is listed even without activity."""
+    keys = ('planned_hours', 'actual_hours', 'late_count', 'no_show_count')
+    merged: Dict[str, Dict] = {}
+    for rows in parts:
+        for row in rows or []:
+            sid = str(row.get('staff_id'))
+            slot = merged.setdefault(sid, {k: 0 for k in keys})
+            slot.setdefault('staff_name', row.get('staff_name'))
+            for k in keys:
+                slot[k] += row.get(k) or 0
+    for sid in roster:
+        merged.setdefault(sid, {k: 0 for k in keys})
+
+    result = []
+    totals = {k: 0 for k in keys}
+    for sid in sorted(merged):
+        slot = merged[sid]
+        for k in keys:
+            totals[k] += slot[k]
+        p, a = slot['planned_hours'], slot['actual_hours']
+        result.append({
+            'staff_id': sid,
+            'staff_name': names.get(sid) or slot.get('staff_name') or sid,
+            'planned_hours': round(p, 2),
+            'actual_hours': round(a, 2),
+            'variance': round(a - p, 2),
+            'late_count': slot['late_count'],
+            'no_show_count': slot['no_show_count'],
+        })
+    return {
+        'summary': {
+            'total_planned_hours': round(totals['planned_hours'], 2),
+            'total_actual_hours': round(totals['actual_hours'], 2),
+            'total_variance': round(totals['actual_hours'] - totals['planned_hours'], 2),
+            'late_arrivals': totals['late_count'],
+            'no_shows': totals['no_show_count'],
+        },
+        'by_staff': result,
+    }
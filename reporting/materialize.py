@@ -0,0 +1,236 @@
+"""
+Nightly materialization of the daily sales, attendance and inventory reports.
+
+Closed days are immutable enough to compute once: shortly after each
+tenant's local midnight the job writes one :class:`DailySalesReport`,
+:class:`AttendanceReport` (plus one per active branch) and
+:class:`InventoryReport` per day. Late data (a back-dated POS order, a
+manager's clock-in correction, a waste entry logged the next morning)
+flags the affected rows ``is_stale`` via ``reporting.signals`` and the order
+sync; the next pass rebuilds only those rows.
+
+Readers use :func:`materialized_sales_summaries` and
+:func:`materialized_attendance_details` for closed days and compute the
+tenant's current day (and any stale or missing day) live.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from core.tenant_time import restaurant_tz, tenant_today
+from reporting.labor_engine import compute_planned_vs_actual, load_labor_window, staff_names
+from reporting.models import AttendanceReport, DailySalesReport, InventoryReport
+
+logger = logging.getLogger(__name__)
+
+# Local hour at which a tenant's previous day is materialized.
+NIGHTLY_LOCAL_HOUR = 3
+# Closed days re-checked for missing rows on each nightly run.
+CORRECTION_DAYS = 3
+TOP_ITEMS = 10
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(round(float(value or 0), 2)))
+
+
+# --- Builders --------------------------------------------------------------
+
+def build_sales_report(restaurant, day: date) -> Optional[DailySalesReport]:
+    """Unsaved row for ``day``; ``None`` when the POS is not connected."""
+    from pos.integrations import IntegrationManager
+
+    summary = IntegrationManager.get_daily_sales_summary(restaurant, day, live=True)
+    if not summary.get('connected') or summary.get('error'):
+        return None
+    top: List[Dict] = []
+    try:
+        from pos.sales_facts import item_sales_facts_by_date
+
+        items = item_sales_facts_by_date(restaurant, day, day).get(day) or {}
+        top = [
+            {'name': name, 'quantity': round(row['quantity'], 3), 'revenue': round(row['revenue'], 2)}
+            for name, row in sorted(items.items(), key=lambda kv: -kv[1]['quantity'])[:TOP_ITEMS]
+            if name
+        ]
+    except Exception as exc:
+        logger.warning("report top items failed restaurant=%s day=%s: %s", restaurant.id, day, exc)
+    return DailySalesReport(
+        restaurant=restaurant,
+        date=day,
+        total_revenue=_money(summary.get('total_sales')),
+        total_orders=int(summary.get('order_count') or 0),
+        avg_order_value=_money(summary.get('avg_ticket')),
+        top_selling_items=top,
+        summary=summary,
+    )
+
+
+def build_attendance_report(restaurant, day: date, location=None) -> AttendanceReport:
+    """Unsaved row for ``day`` (optionally one branch) from the labor engine."""
+    from reporting.models import LaborPolicy
+
+    policy = LaborPolicy.objects.filter(restaurant=restaurant).first()
+    late_minutes = getattr(policy, 'late_threshold_minutes', 15) if policy else 15
+
+    window = load_labor_window(restaurant, day, day, location=location)
+    window.roster = set()  # rows only for people who were scheduled or clocked
+    active = {sh.staff_id for sh in window.shifts} | {e[0] for e in window.events}
+    report = compute_planned_vs_actual(window, late_minutes, staff_names(active))
+    summary = report['summary']
+    return AttendanceReport(
+        restaurant=restaurant,
+        location=location,
+        date=day,
+        total_staff_hours=_money(summary['total_actual_hours']),
+        staff_on_shift=len({sh.staff_id for sh in window.shifts}),
+        late_arrivals=summary['late_arrivals'],
+        absences=summary['no_shows'],
+        attendance_details=report['by_staff'],
+    )
+
+
+def build_inventory_report(restaurant, day: date) -> InventoryReport:
+    """Unsaved row for ``day``. Stock value and the low-stock list are the
+    balances at the end of the day from the stock ledger's snapshots
+    (``inventory.stock_ledger``), so any day can be rebuilt, not just the one
+    that closed last."""
+    from inventory.models import StockAdjustment, WasteEntry
+    from inventory.stock_ledger import inventory_valuation
+
+    report = InventoryReport(restaurant=restaurant, date=day)
+    day_start = timezone.make_aware(datetime.combine(day, time.min), restaurant_tz(restaurant))
+    valuation = inventory_valuation(restaurant, day_start + timedelta(days=1))
+    report.total_inventory_value = _money(valuation['total_value'])
+    report.low_stock_items = valuation['low_stock_items']
+    report.waste_cost = _money(
+        WasteEntry.objects.filter(restaurant=restaurant, waste_date=day).aggregate(v=Sum('estimated_cost'))['v']
+    )
+    report.stock_adjustment_summary = [
+        {
+            'adjustment_type': row['adjustment_type'],
+            'count': row['n'],
+            'quantity': float(row['qty'] or 0),
+            'value': round(float(row['value'] or 0), 2),
+        }
+        for row in StockAdjustment.objects.filter(
+            restaurant=restaurant, created_at__gte=day_start, created_at__lt=day_start + timedelta(days=1)
+        )
+        .order_by()
+        .values('adjustment_type')
+        .annotate(
+            n=Count('id'),
+            qty=Sum('quantity_changed'),
+            value=Sum(F('quantity_changed') * F('inventory_item__cost_per_unit')),
+        )
+        .order_by('adjustment_type')
+    ]
+    return report
+
+
+# --- Writers ---------------------------------------------------------------
+
+def _save(model, built, lookup: Dict, fields: Iterable[str]):
+    defaults = {f: getattr(built, f) for f in fields}
+    defaults['is_stale'] = False
+    return model.objects.update_or_create(defaults=defaults, **lookup)[0]
+
+
+def materialize_day(restaurant, day: date, locations=None) -> Dict[str, int]:
+    """Write every report for one closed day. Returns rows written per kind."""
+    written = {'sales': 0, 'attendance': 0, 'inventory': 0}
+    sales = build_sales_report(restaurant, day)
+    if sales is not None:
+        _save(DailySalesReport, sales, {'restaurant': restaurant, 'date': day},
+              ['total_revenue', 'total_orders', 'avg_order_value', 'top_selling_items', 'summary'])
+        written['sales'] += 1
+
+    for location in [None] + list(locations or []):
+        att = build_attendance_report(restaurant, day, location=location)
+        _save(AttendanceReport, att, {'restaurant': restaurant, 'location': location, 'date': day},
+              ['total_staff_hours', 'staff_on_shift', 'late_arrivals', 'absences', 'attendance_details'])
+        written['attendance'] += 1
+
+    inv = build_inventory_report(restaurant, day)
+    _save(InventoryReport, inv, {'restaurant': restaurant, 'date': day},
+          ['total_inventory_value', 'low_stock_items', 'waste_cost', 'stock_adjustment_summary'])
+    written['inventory'] += 1
+    return written
+
+
+def days_needing_materialization(restaurant, today: date, days: int = CORRECTION_DAYS) -> List[date]:
+    """Closed days in the correction window that are missing or stale, plus
+    any older stale day."""
+    window = [today - timedelta(days=i) for i in range(days, 0, -1)]
+    fresh = set(
+        AttendanceReport.objects.filter(
+            restaurant=restaurant, location__isnull=True, date__in=window, is_stale=False
+        ).values_list('date', flat=True)
+    )
+    todo = {d for d in window if d not in fresh}
+    for model in (DailySalesReport, AttendanceReport, InventoryReport):
+        todo.update(
+            model.objects.filter(restaurant=restaurant, is_stale=True, date__lt=today).values_list('date', flat=True)
+        )
+    return sorted(todo)
+
+
+def materialize_restaurant(restaurant, days: int = CORRECTION_DAYS) -> Dict:
+    """Materialize the restaurant's missing/stale closed days."""
+    from accounts.models import BusinessLocation
+
+    today = tenant_today(restaurant)
+    locations = list(BusinessLocation.objects.filter(restaurant=restaurant, is_active=True))
+    totals = {'sales': 0, 'attendance': 0, 'inventory': 0}
+    pending = days_needing_materialization(restaurant, today, days)
+    for day in pending:
+        try:
+            written = materialize_day(restaurant, day, locations=locations)
+        except Exception as exc:
+            logger.warning("report materialization failed restaurant=%s day=%s: %s", restaurant.id, day, exc)
+            continue
+        for key, n in written.items():
+            totals[key] += n
+    return {'days': [d.isoformat() for d in pending], 'rows': totals}
+
+
+# --- Late data & readers ---------------------------------------------------
+
+def mark_reports_stale(model, restaurant_id, days: Iterable[date]) -> int:
+    """Flag materialized rows of ``model`` for rebuild (all branch variants)."""
+    days = {d for d in days if d}
+    if not restaurant_id or not days:
+        return 0
+    return model.objects.filter(restaurant_id=restaurant_id, date__in=days, is_stale=False).update(is_stale=True)
+
+
+def materialized_sales_summaries(restaurant, start: date, end: date) -> Dict[date, Dict]:
+    """``{day: summary}`` from fresh materialized rows for closed days only."""
+    end = min(end, tenant_today(restaurant) - timedelta(days=1))
+    if end < start:
+        return {}
+    return {
+        day: summary
+        for day, summary in DailySalesReport.objects.filter(
+            restaurant=restaurant, date__gte=start, date__lte=end, is_stale=False
+        ).values_list('date', 'summary')
+        if summary
+    }
+
+
+def materialized_attendance_details(restaurant, start: date, end: date, location=None) -> Dict[date, List[Dict]]:
+    """``{day: per-staff planned-vs-actual rows}`` from fresh materialized
+    attendance rows (whole restaurant, or one branch) for closed days only."""
+    end = min(end, tenant_today(restaurant) - timedelta(days=1))
+    if end < start:
+        return {}
+    qs = AttendanceReport.objects.filter(restaurant=restaurant, date__gte=start, date__lte=end, is_stale=False)
+    location_id = getattr(location, 'id', None) or location
+    qs = qs.filter(location_id=location_id) if location_id else qs.filter(location__isnull=True)
+    return dict(qs.values_list('date', 'attendance_details'))
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.16 on 2026-10-18 21:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0038_restaurant_automatic_clock_out_default_true'),
+        ('reporting', '0005_morocco_features'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='attendancereport',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='is_stale',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='attendancereport',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_reports', to='accounts.businesslocation'),
+        ),
+        migrations.AddField(
+            model_name='dailysalesreport',
+            name='is_stale',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='dailysalesreport',
+            name='summary',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='inventoryreport',
+            name='is_stale',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name='attendancereport',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='dailysalesreport',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='inventoryreport',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancereport',
+            constraint=models.UniqueConstraint(condition=models.Q(('location__isnull', True)), fields=('restaurant', 'date'), name='uniq_attendance_report_restaurant_day'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendancereport',
+            constraint=models.UniqueConstraint(fields=('restaurant', 'location', 'date'), name='uniq_attendance_report_location_day'),
+        ),
+    ]
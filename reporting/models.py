@@ -1,15 +1,20 @@
 from django.db import models
 import uuid
 from accounts.models import Restaurant, CustomUser
+from core.storage_paths import report_export_upload_path
 
 class DailySalesReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='daily_sales_reports')
-    date = models.DateField(unique=True)
+    date = models.DateField()
     total_revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     total_orders = models.IntegerField(default=0)
     avg_order_value = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     top_selling_items = models.JSONField(default=list)
+    # Full get_daily_sales_summary payload (tax, tips, tender split, order types)
+    summary = models.JSONField(default=dict, blank=True)
+    # Set when late orders land on a closed day; the next run rebuilds the row.
+    is_stale = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -23,18 +28,34 @@ class DailySalesReport(models.Model):
 class AttendanceReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='attendance_reports')
-    date = models.DateField(unique=True)
+    # Null = whole restaurant; otherwise the branch-scoped variant.
+    location = models.ForeignKey(
+        'accounts.BusinessLocation', on_delete=models.CASCADE,
+        null=True, blank=True, related_name='attendance_reports',
+    )
+    date = models.DateField()
     total_staff_hours = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     staff_on_shift = models.IntegerField(default=0)
     late_arrivals = models.IntegerField(default=0)
     absences = models.IntegerField(default=0)
     attendance_details = models.JSONField(default=list)
+    is_stale = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['date']
-        unique_together = ('restaurant', 'date')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['restaurant', 'date'],
+                condition=models.Q(location__isnull=True),
+                name='uniq_attendance_report_restaurant_day',
+            ),
+            models.UniqueConstraint(
+                fields=['restaurant', 'location', 'date'],
+                name='uniq_attendance_report_location_day',
+            ),
+        ]
 
     def __str__(self):
         return f"Attendance Report for {self.restaurant.name} on {self.date}"
@@ -42,11 +63,12 @@ class AttendanceReport(models.Model):
 class InventoryReport(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='inventory_reports')
-    date = models.DateField(unique=True)
+    date = models.DateField()
     total_inventory_value = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     low_stock_items = models.JSONField(default=list)
     waste_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     stock_adjustment_summary = models.JSONField(default=list)
+    is_stale = models.BooleanField(default=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -167,4 +189,47 @@ class LaborPolicy(models.Model):
         return cls.objects.create(restaurant=restaurant, **defaults)
 
     def __str__(self):
-        return f"Labor policy - {self.restaurant.name}"
\ No newline at end of file
+        return f"Labor policy - {self.restaurant.name}"
+
+class ReportExport(models.Model):
+    """Background export of a large report; the file lands in default storage
+    (private S3 in production) and is downloaded through a presigned URL."""
+    KIND_CHOICES = (
+        ('attendance', 'Staff attendance report'),
+        ('payroll', 'Payroll timesheets'),
+    )
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+        ('pdf', 'PDF'),
+    )
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='report_exports')
+    requested_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_exports'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to=report_export_upload_path, blank=True, default='')
+    row_count = models.IntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'report_exports'
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['restaurant', 'created_at'])]
+
+    def __str__(self):
+        return f"{self.kind} export {self.start_date}–{self.end_date} ({self.status})"
@@ -7,10 +7,18 @@ from decimal import Decimal
 from django.db.models import Sum, Q
 from django.utils import timezone
 
-from accounts.models import Restaurant, CustomUser
+from accounts.models import Restaurant
 from scheduling.models import AssignedShift, Timesheet
-from timeclock.models import ClockEvent
 from reporting.models import LaborBudget, LaborPolicy
+from reporting.labor_engine import (
+    DEFAULT_HOURLY_RATE,
+    active_roster,
+    compute_planned_vs_actual,
+    load_labor_window,
+    merge_planned_vs_actual,
+    staff_hourly_rates,
+    staff_names,
+)
 
 
 def get_staff_hourly_rate(user):
@@ -50,10 +58,9 @@ def labor_cost_from_real_data(restaurant, start_date, end_date, location=None):
     )
     if location_id:
         timesheets = timesheets.filter(staff__primary_location_id=location_id)
-    ts_hours = timesheets.aggregate(Sum('total_hours'))['total_hours__sum'] or Decimal('0')
-    ts_earnings = timesheets.aggregate(Sum('total_earnings'))['total_earnings__sum'] or Decimal('0')
-    total_hours = float(ts_hours)
-    total_cost = float(ts_earnings)
+    totals = timesheets.aggregate(hours=Sum('total_hours'), earnings=Sum('total_earnings'))
+    total_hours = float(totals['hours'] or Decimal('0'))
+    total_cost = float(totals['earnings'] or Decimal('0'))
 
     # 2) If no timesheets, fall back to AssignedShift actual_hours * profile hourly_rate
     if total_hours == 0 and total_cost == 0:
@@ -65,6 +72,8 @@ def labor_cost_from_real_data(restaurant, start_date, end_date, location=None):
         ).select_related('staff')
         if location_id:
             shifts = shifts.filter(location_id=location_id)
+        shifts = list(shifts)
+        rates = staff_hourly_rates(s.staff_id for s in shifts)
         by_staff = {}
         by_role = {}
         for s in shifts:
@@ -74,7 +83,7 @@ def labor_cost_from_real_data(restaurant, start_date, end_date, location=None):
             hrs = getattr(s, 'actual_hours', 0) or 0
             if not isinstance(hrs, (int, float)):
                 hrs = float(hrs)
-            rate = get_staff_hourly_rate(staff)
+            rate = rates.get(str(staff.id), DEFAULT_HOURLY_RATE)
             cost = hrs * rate
             total_hours += hrs
             total_cost += cost
@@ -95,15 +104,22 @@ def labor_cost_from_real_data(restaurant, start_date, end_date, location=None):
             'source': 'shifts',
         }
 
+    timesheets = list(timesheets.select_related('staff'))
+    # Role from each staff member's first shift in the window
+    roles = {}
+    for staff_id, role in AssignedShift.objects.filter(
+        staff_id__in={ts.staff_id for ts in timesheets},
+        shift_date__gte=start_date,
+        shift_date__lte=end_date,
+    ).values_list('staff_id', 'role'):
+        roles.setdefault(str(staff_id), role)
     by_staff = {}
     by_role = {}
     for ts in timesheets:
         sid = str(ts.staff_id)
         name = f'{ts.staff.first_name} {ts.staff.last_name}' if ts.staff else sid
         by_staff[sid] = {'hours': float(ts.total_hours), 'cost': float(ts.total_earnings), 'name': name}
-        # Role from recent shift if needed
-        recent = AssignedShift.objects.filter(staff=ts.staff, shift_date__gte=start_date, shift_date__lte=end_date).first()
-        role = getattr(recent, 'role', '') or 'Other'
+        role = roles.get(sid) or 'Other'
         by_role[role] = by_role.get(role, {'hours': 0, 'cost': 0})
         by_role[role]['hours'] += float(ts.total_hours)
         by_role[role]['cost'] += float(ts.total_earnings)
@@ -144,48 +160,12 @@ def planned_vs_actual_hours(restaurant, start_date, end_date, location=None):
     actual hours come from ``ClockEvent.location``. Staff without any
     activity at the selected branch are excluded from the "all active
     staff" fallback so the table isn't padded with zero-hour strangers.
-    """
-    from collections import defaultdict
-    location_id = getattr(location, 'id', None) or (location if isinstance(location, (str, int)) else None)
-
-    planned_by_staff = defaultdict(float)
-    shifts_by_staff = defaultdict(list)
-    shifts_qs = AssignedShift.objects.filter(
-        schedule__restaurant=restaurant,
-        shift_date__gte=start_date,
-        shift_date__lte=end_date,
-        status__in=['SCHEDULED', 'CONFIRMED', 'COMPLETED', 'IN_PROGRESS']
-    ).select_related('staff')
-    if location_id:
-        shifts_qs = shifts_qs.filter(location_id=location_id)
-    for s in shifts_qs:
-        if not s.staff:
-            continue
-        hrs = getattr(s, 'actual_hours', 0) or 0
-        if not isinstance(hrs, (int, float)):
-            hrs = float(hrs)
-        planned_by_staff[str(s.staff_id)] += hrs
-        shifts_by_staff[str(s.staff_id)].append(s)
 
-    # Actual from clock events: pair in/out per day
-    actual_by_staff = defaultdict(float)
-    events_qs = ClockEvent.objects.filter(
-        staff__restaurant=restaurant,
-        timestamp__date__gte=start_date,
-        timestamp__date__lte=end_date
-    )
-    if location_id:
-        events_qs = events_qs.filter(location_id=location_id)
-    events = events_qs.order_by('staff_id', 'timestamp').values('staff_id', 'event_type', 'timestamp')
-    current_in = {}
-    for e in events:
-        sid = str(e['staff_id'])
-        if e['event_type'] == 'in':
-            current_in[sid] = e['timestamp']
-        elif e['event_type'] == 'out' and sid in current_in:
-            delta = e['timestamp'] - current_in[sid]
-            actual_by_staff[sid] += delta.total_seconds() / 3600
-            del current_in[sid]
+    Closed days with a fresh materialized ``AttendanceReport`` are read from
+    it; only the remaining days (today, stale or missing rows) are computed
+    live.
+    """
+    from reporting.materialize import materialized_attendance_details
 
     policy = getattr(restaurant, 'labor_policy', None) or None
     if not policy:
@@ -195,84 +175,35 @@ def planned_vs_actual_hours(restaurant, start_date, end_date, location=None):
             policy = None
     late_minutes = getattr(policy, 'late_threshold_minutes', 15) if policy else 15
 
-    result = []
-    all_staff_ids = set(planned_by_staff.keys()) | set(actual_by_staff.keys())
-    # Include all active restaurant staff so the report lists everyone (paginated on frontend).
-    # When branch-scoped, only include staff whose home branch is the selected
-    # branch (or who are explicitly allowed to work there) — otherwise we
-    # pad the report with unrelated staff from other branches.
-    from accounts.models import CustomUser
-    active_staff = CustomUser.objects.filter(
-        restaurant=restaurant, is_active=True
-    ).exclude(role='SUPER_ADMIN')
-    if location_id:
-        from django.db.models import Q as _Q
-        active_staff = active_staff.filter(
-            _Q(primary_location_id=location_id) | _Q(allowed_locations__id=location_id)
-        ).distinct()
-    for uid in active_staff.values_list('id', flat=True):
-        all_staff_ids.add(str(uid))
-    total_planned = 0
-    total_actual = 0
-    late_count = 0
-    no_show_count = 0
-    for sid in all_staff_ids:
-        planned = planned_by_staff.get(sid, 0)
-        actual = actual_by_staff.get(sid, 0)
-        total_planned += planned
-        total_actual += actual
-        variance = round(actual - planned, 2)
-        shifts = shifts_by_staff.get(sid, [])
-        staff_late = 0
-        staff_no_show = 0
-        for sh in shifts:
-            if not sh.staff:
-                continue
-            shift_start = sh.start_time
-            if shift_start is None:
-                continue
-            if hasattr(shift_start, 'date'):
-                shift_dt = shift_start
+    stored = materialized_attendance_details(restaurant, start_date, end_date, location=location)
+    if not stored:
+        window = load_labor_window(restaurant, start_date, end_date, location=location)
+        staff_ids = window.roster | {sh.staff_id for sh in window.shifts} | {e[0] for e in window.events}
+        return compute_planned_vs_actual(window, late_minutes, staff_names(staff_ids))
+
+    parts = list(stored.values())
+    for run_start, run_end in _unstored_runs(start_date, end_date, stored):
+        window = load_labor_window(restaurant, run_start, run_end, location=location)
+        window.roster = set()
+        active = {sh.staff_id for sh in window.shifts} | {e[0] for e in window.events}
+        parts.append(compute_planned_vs_actual(window, late_minutes, staff_names(active))['by_staff'])
+    roster = active_roster(restaurant, location)
+    listed = {str(row.get('staff_id')) for rows in parts for row in rows or []}
+    return merge_planned_vs_actual(parts, roster, staff_names(roster - listed))
+
+
+def _unstored_runs(start_date, end_date, stored):
+    """Contiguous ``(start, end)`` spans of days missing from ``stored``."""
+    runs = []
+    day = start_date
+    while day <= end_date:
+        if day not in stored:
+            if runs and runs[-1][1] == day - timedelta(days=1):
+                runs[-1][1] = day
             else:
-                shift_dt = timezone.make_aware(timezone.datetime.combine(sh.shift_date, shift_start)) if shift_start else None
-            if not shift_dt:
-                continue
-            first_clock = ClockEvent.objects.filter(
-                staff=sh.staff,
-                event_type='in',
-                timestamp__date=sh.shift_date
-            ).order_by('timestamp').values_list('timestamp', flat=True).first()
-            if not first_clock:
-                staff_no_show += 1
-                no_show_count += 1
-                continue
-            if first_clock > shift_dt + timedelta(minutes=late_minutes):
-                staff_late += 1
-                late_count += 1
-        try:
-            user = CustomUser.objects.get(id=sid)
-            name = f'{user.first_name} {user.last_name}'.strip() or user.email
-        except Exception:
-            name = sid
-        result.append({
-            'staff_id': sid,
-            'staff_name': name,
-            'planned_hours': round(planned, 2),
-            'actual_hours': round(actual, 2),
-            'variance': variance,
-            'late_count': staff_late,
-            'no_show_count': staff_no_show,
-        })
-    return {
-        'summary': {
-            'total_planned_hours': round(total_planned, 2),
-            'total_actual_hours': round(total_actual, 2),
-            'total_variance': round(total_actual - total_planned, 2),
-            'late_arrivals': late_count,
-            'no_shows': no_show_count,
-        },
-        'by_staff': result,
-    }
+                runs.append([day, day])
+        day += timedelta(days=1)
+    return [tuple(run) for run in runs]
 
 
 def overtime_and_compliance(restaurant, start_date, end_date, location=None):
@@ -304,20 +235,20 @@ def overtime_and_compliance(restaurant, start_date, end_date, location=None):
     )
     if location_id:
         ts_qs = ts_qs.filter(staff__primary_location_id=location_id)
-    for ts in ts_qs:
-        sid = str(ts.staff_id)
-        w = ts.start_date.isocalendar()[1]
-        weekly_hours[sid][w] += float(ts.total_hours)
-    overtime_staff = []
-    for sid, weeks in weekly_hours.items():
-        for week_num, hrs in weeks.items():
-            if hrs > max_week:
-                try:
-                    user = CustomUser.objects.get(id=sid)
-                    name = f'{user.first_name} {user.last_name}'.strip() or user.email
-                except Exception:
-                    name = sid
-                overtime_staff.append({'staff_id': sid, 'staff_name': name, 'week': week_num, 'hours': round(hrs, 2), 'threshold': max_week})
+    for staff_id, ts_start, ts_hours in ts_qs.values_list('staff_id', 'start_date', 'total_hours'):
+        w = ts_start.isocalendar()[1]
+        weekly_hours[str(staff_id)][w] += float(ts_hours)
+    flagged = [
+        (sid, week_num, hrs)
+        for sid, weeks in weekly_hours.items()
+        for week_num, hrs in weeks.items()
+        if hrs > max_week
+    ]
+    names = staff_names(sid for sid, _, _ in flagged)
+    overtime_staff = [
+        {'staff_id': sid, 'staff_name': names.get(sid, sid), 'week': week_num, 'hours': round(hrs, 2), 'threshold': max_week}
+        for sid, week_num, hrs in flagged
+    ]
     return {
         'overtime_threshold_hours_per_week': max_week,
         'overtime_incidents': overtime_staff,
@@ -375,18 +306,10 @@ def sales_labor_recommendation(restaurant, week_start=None):
         week_start = week_start - timedelta(days=week_start.weekday())
     scheduler = AIScheduler(restaurant)
     demand = scheduler._get_demand_forecast(week_start)
-    # Estimate revenue for week from POS or historical
+    # Estimate revenue for week from the shared hour-of-week forecast
     try:
-        from pos.models import Order
-        from django.db.models import Sum
-        week_end = week_start + timedelta(days=6)
-        agg = Order.objects.filter(
-            restaurant=restaurant,
-            order_time__date__gte=week_start,
-            order_time__date__lte=week_end,
-            status='COMPLETED'
-        ).aggregate(s=Sum('total_amount'))
-        total_revenue = float(agg['s'] or 0)
+        from pos.demand_curve import demand_forecast
+        total_revenue = sum(demand_forecast(restaurant, week_start).daily_totals('revenue'))
     except Exception:
         total_revenue = 0
     # If no historical revenue, use demand level heuristic
@@ -0,0 +1,92 @@
+"""Flag materialized reports stale when late data lands on a closed day.
+
+Each handler is one UPDATE that only matches rows already materialized (so
+writes for today cost nothing); ``reporting.tasks`` rebuilds flagged rows.
+"""
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from inventory.models import StockAdjustment, WasteEntry
+from core.tenant_time import local_day, tenant_today
+from pos.models import Order
+from scheduling.models import AssignedShift
+from timeclock.models import ClockEvent
+
+from .materialize import mark_reports_stale
+from .models import AttendanceReport, DailySalesReport, InventoryReport
+
+logger = logging.getLogger(__name__)
+
+
+def _maybe_closed(day) -> bool:
+    # No tenant is a full day ahead of UTC, so a day after today in UTC is
+    # still open everywhere: skip the related-row lookups for those writes.
+    return bool(day) and day <= timezone.now().date()
+
+
+def _closed(restaurant, day) -> bool:
+    # Only closed days are ever materialized, keyed by restaurant-local day.
+    return restaurant is not None and bool(day) and day < tenant_today(restaurant)
+
+
+def _mark(model, restaurant_id, day, label, pk):
+    try:
+        mark_reports_stale(model, restaurant_id, [day])
+    except Exception as exc:
+        logger.warning("report stale-mark failed %s=%s: %s", label, pk, exc)
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_sales_report_stale(sender, instance, **kwargs):
+    if not instance.restaurant_id or not instance.order_time or not _maybe_closed(instance.order_time.date()):
+        return
+    restaurant = instance.restaurant
+    day = local_day(restaurant, instance.order_time)
+    if _closed(restaurant, day):
+        _mark(DailySalesReport, instance.restaurant_id, day, 'order', instance.pk)
+
+
+@receiver(post_save, sender=ClockEvent)
+@receiver(post_delete, sender=ClockEvent)
+def mark_attendance_report_stale_for_clock(sender, instance, **kwargs):
+    if not instance.timestamp:
+        return
+    if not _maybe_closed(instance.timestamp.date()):
+        return
+    staff = getattr(instance, 'staff', None)
+    restaurant = getattr(staff, 'restaurant', None)
+    if restaurant is None:
+        return
+    day = local_day(restaurant, instance.timestamp)
+    if _closed(restaurant, day):
+        _mark(AttendanceReport, staff.restaurant_id, day, 'clock_event', instance.pk)
+
+
+@receiver(post_save, sender=AssignedShift)
+@receiver(post_delete, sender=AssignedShift)
+def mark_attendance_report_stale_for_shift(sender, instance, **kwargs):
+    schedule = getattr(instance, 'schedule', None) if _maybe_closed(instance.shift_date) else None
+    if schedule is not None and _closed(schedule.restaurant, instance.shift_date):
+        _mark(AttendanceReport, schedule.restaurant_id, instance.shift_date, 'shift', instance.pk)
+
+
+@receiver(post_save, sender=WasteEntry)
+@receiver(post_delete, sender=WasteEntry)
+def mark_inventory_report_stale_for_waste(sender, instance, **kwargs):
+    if instance.restaurant_id and instance.waste_date:
+        _mark(InventoryReport, instance.restaurant_id, instance.waste_date, 'waste', instance.pk)
+
+
+@receiver(post_save, sender=StockAdjustment)
+@receiver(post_delete, sender=StockAdjustment)
+def mark_inventory_report_stale_for_adjustment(sender, instance, **kwargs):
+    if not instance.restaurant_id or not instance.created_at or not _maybe_closed(instance.created_at.date()):
+        return
+    restaurant = instance.restaurant
+    day = local_day(restaurant, instance.created_at)
+    if _closed(restaurant, day):
+        _mark(InventoryReport, instance.restaurant_id, day, 'adjustment', instance.pk)
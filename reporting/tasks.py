@@ -0,0 +1,115 @@
+"""
+Scheduled materialization of the daily reports (see ``reporting.materialize``).
+
+``materialize_daily_reports`` runs hourly and fans out one task per tenant
+that either just reached its local nightly hour or has stale rows from late
+data, so every tenant is processed once a night in its own timezone and
+corrections land within the hour.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict
+from zoneinfo import ZoneInfo
+
+from celery import shared_task
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import Restaurant
+from reporting.materialize import NIGHTLY_LOCAL_HOUR, materialize_restaurant
+from reporting.models import AttendanceReport, DailySalesReport, InventoryReport
+
+logger = logging.getLogger(__name__)
+
+
+def _timezones_at_nightly_hour(now=None):
+    now = now or timezone.now()
+    due = []
+    for tz_name in Restaurant.objects.order_by().values_list('timezone', flat=True).distinct():
+        try:
+            tz = ZoneInfo(tz_name or '')
+        except Exception:
+            tz = timezone.get_default_timezone()
+        if timezone.localtime(now, tz).hour == NIGHTLY_LOCAL_HOUR:
+            due.append(tz_name)
+    return due
+
+
+def _due_restaurants_filter(now=None) -> Q:
+    due = _timezones_at_nightly_hour(now)
+    query = Q(timezone__in=[tz_name for tz_name in due if tz_name])
+    if any(not tz_name for tz_name in due):
+        # Tenants without a zone run on the settings default, like restaurant_tz.
+        query |= Q(timezone__isnull=True) | Q(timezone='')
+    return query
+
+
+@shared_task
+def materialize_daily_reports() -> Dict[str, Any]:
+    """Hourly: queue tenants at their nightly hour plus tenants with stale rows."""
+    restaurant_ids = set(
+        Restaurant.objects.filter(_due_restaurants_filter()).values_list('id', flat=True)
+    )
+    for model in (DailySalesReport, AttendanceReport, InventoryReport):
+        restaurant_ids.update(
+            model.objects.filter(is_stale=True).order_by().values_list('restaurant_id', flat=True).distinct()
+        )
+
+    queued = 0
+    errors = []
+    for restaurant_id in restaurant_ids:
+        try:
+            materialize_reports_for_restaurant.delay(str(restaurant_id))
+            queued += 1
+        except Exception as e:
+            errors.append({"restaurant_id": str(restaurant_id), "error": str(e)})
+    return {"success": True, "restaurants_queued": queued, "errors": errors[:10]}
+
+
+@shared_task
+def materialize_reports_for_restaurant(restaurant_id: str, days: int = None) -> Dict[str, Any]:
+    """Write missing/stale closed-day reports for one tenant."""
+    try:
+        restaurant = Restaurant.objects.get(id=restaurant_id)
+    except Restaurant.DoesNotExist:
+        return {"success": False, "error": "restaurant_not_found"}
+    result = materialize_restaurant(restaurant, days) if days else materialize_restaurant(restaurant)
+    return {"success": True, **result}
+
+
+@shared_task
+def run_report_export(export_id: str) -> Dict[str, Any]:
+    """Render one queued export into default storage (see ``reporting.exports``)."""
+    from reporting.exports import run_export_job
+    from reporting.models import ReportExport
+
+    try:
+        job = ReportExport.objects.select_related("restaurant").get(id=export_id)
+    except ReportExport.DoesNotExist:
+        return {"success": False, "error": "export_not_found"}
+    if job.status not in ("PENDING", "FAILED"):
+        return {"success": True, "status": job.status, "skipped": True}
+    job = run_export_job(job)
+    return {"success": job.status == "DONE", "status": job.status, "rows": job.row_count}
+
+
+@shared_task
+def purge_expired_report_exports() -> Dict[str, Any]:
+    """Daily: delete export files (and rows) past the retention window."""
+    from datetime import timedelta
+
+    from reporting.exports import EXPORT_RETENTION_DAYS
+    from reporting.models import ReportExport
+
+    cutoff = timezone.now() - timedelta(days=EXPORT_RETENTION_DAYS)
+    purged = 0
+    for job in ReportExport.objects.filter(created_at__lt=cutoff).iterator(chunk_size=500):
+        try:
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
+            purged += 1
+        except Exception as e:
+            logger.warning("report export purge failed id=%s: %s", job.id, e)
+    return {"success": True, "purged": purged}
@@ -0,0 +1,73 @@
+"""Streaming export writers: CSV lines, write-only XLSX and chunked PDF."""
+
+import csv
+import io
+
+from django.test import SimpleTestCase
+
+from reporting.exports import (
+    PAYROLL_HEADERS,
+    csv_lines,
+    normalize_format,
+    write_csv,
+    write_pdf,
+    write_xlsx,
+)
+from reporting.views_export import ExportContentNegotiation
+
+
+def _rows(n):
+    for i in range(n):
+        yield [f"s{i}", f"s{i}@example.com", "Ada", "Lovelace", "2026-01-01", "2026-01-07", "40.00", "15.00", "600.00", "APPROVED"]
+
+
+class ExportWriterTests(SimpleTestCase):
+    def test_format_aliases(self):
+        self.assertEqual(normalize_format("excel"), "xlsx")
+        self.assertEqual(normalize_format(" CSV "), "csv")
+        self.assertEqual(normalize_format(None, default="csv"), "csv")
+        self.assertIsNone(normalize_format("docx"))
+
+    def test_csv_lines_are_generated_lazily(self):
+        lines = csv_lines(PAYROLL_HEADERS, _rows(3))
+        self.assertEqual(next(lines), ",".join(PAYROLL_HEADERS) + "\r\n")
+        parsed = list(csv.reader(io.StringIO("".join(lines))))
+        self.assertEqual(len(parsed), 3)
+        self.assertEqual(parsed[2][0], "s2")
+
+    def test_write_csv_counts_data_rows(self):
+        buf = io.BytesIO()
+        self.assertEqual(write_csv(PAYROLL_HEADERS, _rows(5), buf), 5)
+        self.assertEqual(buf.getvalue().decode().count("\r\n"), 6)
+
+    def test_write_only_xlsx_round_trips(self):
+        import openpyxl
+
+        buf = io.BytesIO()
+        self.assertEqual(write_xlsx(PAYROLL_HEADERS, _rows(10), buf, title="Payroll"), 10)
+        buf.seek(0)
+        ws = openpyxl.load_workbook(buf, read_only=True)["Payroll"]
+        rows = list(ws.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), PAYROLL_HEADERS)
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[10][0], "s9")
+
+    def test_pdf_is_built_from_row_chunks(self):
+        buf = io.BytesIO()
+        self.assertEqual(write_pdf(PAYROLL_HEADERS, _rows(600), buf, "Payroll Export", ["Period: x"]), 600)
+        self.assertTrue(buf.getvalue().startswith(b"%PDF"))
+
+    def test_empty_pdf_still_has_a_header_table(self):
+        buf = io.BytesIO()
+        self.assertEqual(write_pdf(PAYROLL_HEADERS, _rows(0), buf, "Payroll Export"), 0)
+        self.assertTrue(buf.getvalue().startswith(b"%PDF"))
+
+    def test_format_param_does_not_select_a_renderer(self):
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        request = Request(APIRequestFactory().get("/x/", {"format": "pdf"}))
+        renderer, media_type = ExportContentNegotiation().select_renderer(request, [JSONRenderer()])
+        self.assertIsInstance(renderer, JSONRenderer)
+        self.assertEqual(media_type, "application/json")
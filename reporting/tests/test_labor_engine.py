@@ -0,0 +1,155 @@
+"""Set-based planned-vs-actual: per-(staff, day) maths and constant query count."""
+
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from reporting.labor_engine import (
+    LaborWindow,
+    ShiftRow,
+    attendance_by_staff,
+    clock_hours_by_staff,
+    compute_planned_vs_actual,
+)
+
+DAY = date(2026, 2, 2)
+
+
+def _at(hour, minute=0, day=DAY):
+    return datetime.combine(day, time(hour, minute), tzinfo=dt_timezone.utc)
+
+
+class LaborMathTests(SimpleTestCase):
+    def test_clock_pairs_in_and_out_per_staff(self):
+        events = [
+            ("a", "in", _at(9)), ("a", "out", _at(13)),
+            ("a", "in", _at(14)), ("a", "out", _at(17, 30)),
+            ("b", "out", _at(10)),  # orphan out is ignored
+            ("b", "in", _at(11)),   # still clocked in
+        ]
+        self.assertEqual(dict(clock_hours_by_staff(events)), {"a": 7.5})
+
+    def test_late_and_no_show_keyed_by_staff_and_day(self):
+        shifts = [
+            ShiftRow("a", DAY, _at(9), 8.0),
+            ShiftRow("a", DAY + timedelta(days=1), _at(9, day=DAY + timedelta(days=1)), 8.0),
+            ShiftRow("b", DAY, _at(9), 8.0),
+            ShiftRow("c", DAY, None, 8.0),
+        ]
+        first_in = {("a", DAY): _at(9, 20), ("b", DAY): _at(9, 10)}
+        self.assertEqual(attendance_by_staff(shifts, first_in, late_minutes=15), {"a": (1, 1)})
+
+    def test_report_shape_and_totals(self):
+        window = LaborWindow(
+            shifts=[ShiftRow("a", DAY, _at(9), 8.0)],
+            events=[("a", "in", _at(9, 30)), ("a", "out", _at(16, 30))],
+            first_in={("a", DAY): _at(9, 30)},
+            roster={"a", "idle"},
+        )
+        out = compute_planned_vs_actual(window, 15, {"a": "Ada Lovelace"})
+        self.assertEqual(out["summary"], {
+            "total_planned_hours": 8.0,
+            "total_actual_hours": 7.0,
+            "total_variance": -1.0,
+            "late_arrivals": 1,
+            "no_shows": 0,
+        })
+        rows = {r["staff_id"]: r for r in out["by_staff"]}
+        self.assertEqual(rows["a"]["staff_name"], "Ada Lovelace")
+        self.assertEqual(rows["a"]["variance"], -1.0)
+        self.assertEqual(rows["idle"]["staff_name"], "idle")
+        self.assertEqual(rows["idle"]["planned_hours"], 0)
+
+
+class PlannedVsActualQueryCountTests(TestCase):
+    def _team(self, restaurant, schedule, size, offset):
+        from accounts.models import CustomUser
+        from scheduling.models import AssignedShift
+        from timeclock.models import ClockEvent
+
+        for i in range(size):
+            user = CustomUser.objects.create_user(
+                email=f"staff{offset + i}@labor.test",
+                password="pass12345",
+                first_name="Staff",
+                last_name=str(offset + i),
+                role="WAITER",
+                restaurant=restaurant,
+            )
+            for d in range(3):
+                day = DAY + timedelta(days=d)
+                AssignedShift.objects.create(
+                    schedule=schedule,
+                    staff=user,
+                    shift_date=day,
+                    start_time=timezone.make_aware(datetime.combine(day, time(9, 0))),
+                    end_time=timezone.make_aware(datetime.combine(day, time(17, 0))),
+                    role="WAITER",
+                    status="SCHEDULED",
+                )
+                ev = ClockEvent.objects.create(staff=user, event_type="in")
+                ClockEvent.objects.filter(pk=ev.pk).update(
+                    timestamp=timezone.make_aware(datetime.combine(day, time(9, 5)))
+                )
+
+    def test_query_count_does_not_grow_with_team(self):
+        from accounts.models import Restaurant
+        from reporting.services_labor import planned_vs_actual_hours
+        from scheduling.models import WeeklySchedule
+
+        restaurant = Restaurant.objects.create(name="Labor Cafe", email="labor@cafe.test")
+        schedule = WeeklySchedule.objects.create(
+            restaurant=restaurant, week_start=DAY, week_end=DAY + timedelta(days=6)
+        )
+        end = DAY + timedelta(days=6)
+
+        self._team(restaurant, schedule, 3, 0)
+        # Fresh instances: the reverse labor_policy lookup is cached per object.
+        with CaptureQueriesContext(connection) as small:
+            report = planned_vs_actual_hours(Restaurant.objects.get(pk=restaurant.pk), DAY, end)
+        self.assertEqual(report["summary"]["no_shows"], 0)
+
+        self._team(restaurant, schedule, 30, 100)
+        with CaptureQueriesContext(connection) as large:
+            report = planned_vs_actual_hours(Restaurant.objects.get(pk=restaurant.pk), DAY, end)
+        self.assertEqual(len(report["by_staff"]), 33)
+        # 9:00-17:00 less the default 30 minute break
+        self.assertEqual(report["summary"]["total_planned_hours"], 33 * 3 * 7.5)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_closed_days_come_from_materialized_rows(self):
+        from accounts.models import Restaurant
+        from reporting.models import AttendanceReport
+        from reporting.services_labor import planned_vs_actual_hours
+        from scheduling.models import WeeklySchedule
+
+        restaurant = Restaurant.objects.create(name="Stored Cafe", email="stored@cafe.test")
+        schedule = WeeklySchedule.objects.create(
+            restaurant=restaurant, week_start=DAY, week_end=DAY + timedelta(days=6)
+        )
+        self._team(restaurant, schedule, 2, 0)
+        from accounts.models import CustomUser
+
+        first = str(CustomUser.objects.filter(restaurant=restaurant).order_by("id").first().pk)
+        stored = AttendanceReport.objects.create(
+            restaurant=restaurant, date=DAY,
+            attendance_details=[{
+                "staff_id": first, "staff_name": "Stored", "planned_hours": 99, "actual_hours": 0,
+                "variance": -99, "late_count": 0, "no_show_count": 0,
+            }],
+        )
+        end = DAY + timedelta(days=2)
+        with patch("reporting.materialize.tenant_today", return_value=DAY + timedelta(days=3)):
+            report = planned_vs_actual_hours(restaurant, DAY, end)
+            # Day one from the stored row, the other two days live.
+            self.assertEqual(report["summary"]["total_planned_hours"], 99 + 2 * 2 * 7.5)
+            self.assertEqual(len(report["by_staff"]), 2)
+
+            stored.is_stale = True
+            stored.save(update_fields=["is_stale"])
+            report = planned_vs_actual_hours(restaurant, DAY, end)
+        self.assertEqual(report["summary"]["total_planned_hours"], 2 * 3 * 7.5)
@@ -0,0 +1,101 @@
+"""Nightly report materialization: tenant-local scheduling and closed-day reads."""
+
+from datetime import date, datetime, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from pos.integrations import IntegrationManager
+from reporting.materialize import materialized_sales_summaries
+from reporting.signals import mark_attendance_report_stale_for_clock, mark_sales_report_stale
+from reporting.tasks import _due_restaurants_filter, _timezones_at_nightly_hour
+
+TODAY = date(2026, 6, 10)
+
+
+def _restaurant(**extra):
+    values = dict(id="r1", pos_provider="SQUARE", pos_is_connected=True, timezone="UTC", currency="USD")
+    values.update(extra)
+    return SimpleNamespace(**values)
+
+
+class NightlyHourTests(SimpleTestCase):
+    def test_only_timezones_at_their_nightly_hour_are_due(self):
+        qs = MagicMock()
+        qs.order_by.return_value.values_list.return_value.distinct.return_value = [
+            "Africa/Casablanca", "America/New_York", "Asia/Tokyo",
+        ]
+        # 02:00 UTC = 03:00 in Casablanca (UTC+1), 22:00 New York, 11:00 Tokyo.
+        now = datetime(2026, 1, 15, 2, 0, tzinfo=dt_timezone.utc)
+        with patch("reporting.tasks.Restaurant.objects", qs), \
+                patch("reporting.tasks.NIGHTLY_LOCAL_HOUR", 3):
+            self.assertEqual(_timezones_at_nightly_hour(now), ["Africa/Casablanca"])
+
+    def test_tenants_without_a_zone_follow_the_default_zone(self):
+        qs = MagicMock()
+        qs.order_by.return_value.values_list.return_value.distinct.return_value = [None, "", "Asia/Tokyo"]
+        now = datetime(2026, 1, 15, 3, 0, tzinfo=dt_timezone.utc)
+        with patch("reporting.tasks.Restaurant.objects", qs), \
+                patch("reporting.tasks.NIGHTLY_LOCAL_HOUR", 3), \
+                self.settings(TIME_ZONE="UTC"):
+            query = _due_restaurants_filter(now)
+        self.assertIn(("timezone__isnull", True), query.children)
+        self.assertIn(("timezone", ""), query.children)
+        self.assertIn(("timezone__in", []), query.children)
+
+
+class ClosedDayReadTests(SimpleTestCase):
+    def test_today_is_never_read_from_materialized_rows(self):
+        with patch("reporting.materialize.tenant_today", return_value=TODAY), \
+                patch("reporting.materialize.DailySalesReport.objects") as objects:
+            self.assertEqual(materialized_sales_summaries(_restaurant(), TODAY, TODAY), {})
+        objects.filter.assert_not_called()
+
+    def test_range_is_clamped_to_closed_days(self):
+        with patch("reporting.materialize.tenant_today", return_value=TODAY), \
+                patch("reporting.materialize.DailySalesReport.objects") as objects:
+            objects.filter.return_value.values_list.return_value = [(date(2026, 6, 9), {"total_sales": 5.0}), (date(2026, 6, 8), {})]
+            out = materialized_sales_summaries(_restaurant(), date(2026, 6, 8), TODAY)
+        self.assertEqual(out, {date(2026, 6, 9): {"total_sales": 5.0}})
+        self.assertEqual(objects.filter.call_args.kwargs["date__lte"], date(2026, 6, 9))
+
+    def test_daily_summary_prefers_materialized_row(self):
+        stored = {"success": True, "connected": True, "date": "2026-06-09", "total_sales": 812.5}
+        with patch("reporting.materialize.materialized_sales_summaries", return_value={date(2026, 6, 9): stored}):
+            self.assertIs(IntegrationManager.get_daily_sales_summary(_restaurant(), date(2026, 6, 9)), stored)
+
+
+class StaleDayTests(SimpleTestCase):
+    """Late writes flag the restaurant-local day the materializer keyed."""
+
+    now = datetime(2026, 1, 15, 20, 0, tzinfo=dt_timezone.utc)  # Jan 16, 05:00 in Tokyo
+
+    def _marked(self, handler, instance):
+        with patch("reporting.materialize.timezone.now", return_value=self.now), \
+                patch("reporting.signals.timezone.now", return_value=self.now), \
+                patch("reporting.signals.mark_reports_stale") as mark:
+            handler(sender=None, instance=instance)
+        return [c.args[2] for c in mark.call_args_list]
+
+    def test_orders_and_clock_events_use_the_tenant_day(self):
+        tokyo = _restaurant(timezone="Asia/Tokyo")
+        late_order = SimpleNamespace(pk=1, restaurant_id="r1", restaurant=tokyo,
+                                     order_time=datetime(2026, 1, 15, 14, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(self._marked(mark_sales_report_stale, late_order), [[date(2026, 1, 15)]])
+        todays_order = SimpleNamespace(pk=2, restaurant_id="r1", restaurant=tokyo,
+                                       order_time=datetime(2026, 1, 15, 16, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(self._marked(mark_sales_report_stale, todays_order), [])
+
+        clock = SimpleNamespace(pk=3, staff=SimpleNamespace(restaurant_id="r1", restaurant=tokyo),
+                                timestamp=datetime(2026, 1, 15, 14, 30, tzinfo=dt_timezone.utc))
+        self.assertEqual(self._marked(mark_attendance_report_stale_for_clock, clock), [[date(2026, 1, 15)]])
+
+    def test_open_day_order_never_loads_the_restaurant(self):
+        class _Order(SimpleNamespace):
+            @property
+            def restaurant(self):
+                raise AssertionError("restaurant loaded for an open day")
+
+        order = _Order(pk=4, restaurant_id="r1", order_time=datetime(2026, 1, 16, 1, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(self._marked(mark_sales_report_stale, order), [])
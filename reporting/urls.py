@@ -15,7 +15,12 @@ from .views import (
     LaborBudgetListCreateAPIView,
     LaborPolicyAPIView,
 )
-from .views_export import attendance_export, agent_attendance_export
+from .views_export import (
+    attendance_export,
+    agent_attendance_export,
+    report_export_status,
+    agent_report_export_status,
+)
 from .views_agent import agent_create_incident
 
 urlpatterns = [
@@ -46,7 +51,10 @@ urlpatterns = [
     path('labor/budgets/', LaborBudgetListCreateAPIView.as_view(), name='labor_budget_list_create'),
     path('labor/policy/', LaborPolicyAPIView.as_view(), name='labor_policy'),
 
-    # Staff Attendance Report export for HR / payroll (PDF, Excel)
+    # Staff Attendance Report export for HR / payroll (CSV, PDF, Excel)
     path('attendance/export/', attendance_export, name='attendance_export'),
     path('agent/attendance-export/', agent_attendance_export, name='agent_attendance_export'),
+    # Background exports (large ranges): poll for the download URL
+    path('exports/<uuid:export_id>/', report_export_status, name='report_export_status'),
+    path('agent/exports/<uuid:export_id>/', agent_report_export_status, name='agent_report_export_status'),
 ]
\ No newline at end of file
@@ -23,12 +23,63 @@ from rest_framework.decorators import api_view, permission_classes
 from accounts.permissions import IsAdminOrSuperAdmin
 from datetime import datetime
 
-class DailySalesReportListAPIView(generics.ListAPIView):
+class _MaterializedReportListMixin:
+    """List nightly-materialized rows (closed days) and prepend today's row,
+    computed live, on the first page. ``?start_date=`` / ``?end_date=`` narrow
+    the range. Views set ``model`` and define ``build_live(restaurant, day)``."""
+    model = None
+
+    def _range(self):
+        params = self.request.query_params
+        try:
+            start = datetime.strptime(params['start_date'], '%Y-%m-%d').date() if params.get('start_date') else None
+            end = datetime.strptime(params['end_date'], '%Y-%m-%d').date() if params.get('end_date') else None
+        except ValueError:
+            return None, None
+        return start, end
+
+    def get_queryset(self):
+        qs = self.model.objects.filter(restaurant=self.request.user.restaurant)
+        start, end = self._range()
+        if start:
+            qs = qs.filter(date__gte=start)
+        if end:
+            qs = qs.filter(date__lte=end)
+        return qs.order_by('-date')
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if str(request.query_params.get('page') or '1') != '1':
+            return response
+        from core.tenant_time import tenant_today
+
+        restaurant = request.user.restaurant
+        today = tenant_today(restaurant)
+        start, end = self._range()
+        if (start and start > today) or (end and end < today):
+            return response
+        try:
+            live = self.build_live(restaurant, today)
+        except Exception:
+            live = None
+        if live is None:
+            return response
+        row = self.get_serializer(live).data
+        if isinstance(response.data, dict) and 'results' in response.data:
+            response.data['results'].insert(0, row)
+        else:
+            response.data.insert(0, row)
+        return response
+
+
+class DailySalesReportListAPIView(_MaterializedReportListMixin, generics.ListAPIView):
     serializer_class = DailySalesReportSerializer
     permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin]
+    model = DailySalesReport
 
-    def get_queryset(self):
-        return DailySalesReport.objects.filter(restaurant=self.request.user.restaurant).order_by('-date')
+    def build_live(self, restaurant, day):
+        from reporting.materialize import build_sales_report
+        return build_sales_report(restaurant, day)
 
 class DailySalesReportRetrieveAPIView(generics.RetrieveAPIView):
     serializer_class = DailySalesReportSerializer
@@ -38,12 +89,18 @@ class DailySalesReportRetrieveAPIView(generics.RetrieveAPIView):
     def get_queryset(self):
         return DailySalesReport.objects.filter(restaurant=self.request.user.restaurant)
 
-class AttendanceReportListAPIView(generics.ListAPIView):
+class AttendanceReportListAPIView(_MaterializedReportListMixin, generics.ListAPIView):
+    """Whole-restaurant rows by default; ``?location=<uuid>`` for one branch."""
     serializer_class = AttendanceReportSerializer
     permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin]
+    model = AttendanceReport
 
     def get_queryset(self):
-        return AttendanceReport.objects.filter(restaurant=self.request.user.restaurant).order_by('-date')
+        return super().get_queryset().filter(location=_resolve_report_location(self.request))
+
+    def build_live(self, restaurant, day):
+        from reporting.materialize import build_attendance_report
+        return build_attendance_report(restaurant, day, location=_resolve_report_location(self.request))
 
 class AttendanceReportRetrieveAPIView(generics.RetrieveAPIView):
     serializer_class = AttendanceReportSerializer
@@ -53,12 +110,14 @@ class AttendanceReportRetrieveAPIView(generics.RetrieveAPIView):
     def get_queryset(self):
         return AttendanceReport.objects.filter(restaurant=self.request.user.restaurant)
 
-class InventoryReportListAPIView(generics.ListAPIView):
+class InventoryReportListAPIView(_MaterializedReportListMixin, generics.ListAPIView):
     serializer_class = InventoryReportSerializer
     permission_classes = [IsAuthenticated, IsAdminOrSuperAdmin]
+    model = InventoryReport
 
-    def get_queryset(self):
-        return InventoryReport.objects.filter(restaurant=self.request.user.restaurant).order_by('-date')
+    def build_live(self, restaurant, day):
+        from reporting.materialize import build_inventory_report
+        return build_inventory_report(restaurant, day)
 
 class InventoryReportRetrieveAPIView(generics.RetrieveAPIView):
     serializer_class = InventoryReportSerializer
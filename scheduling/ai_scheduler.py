@@ -9,6 +9,7 @@ from django.utils import timezone
 import logging
 
 from .models import AssignedShift, WeeklySchedule, ShiftTask, ScheduleTemplate, TemplateShift
+from .schedule_optimizer import SchedulePolicy, ShiftSlot, StaffCandidate, solve_schedule
 from accounts.models import CustomUser, Restaurant
 
 logger = logging.getLogger(__name__)
@@ -28,9 +29,13 @@ class AIScheduler:
     MIN_REST_HOURS = 11  # Minimum hours between shifts
     MAX_WEEKLY_HOURS = 48  # Maximum hours per week
     MAX_DAILY_HOURS = 12  # Maximum hours per day
+
+    # Wall-clock budget for the week solver; it returns its best schedule so far.
+    SOLVER_TIME_BUDGET = 0.8
     
     def __init__(self, restaurant: Restaurant):
         self.restaurant = restaurant
+        self._template_shifts: Optional[Dict] = None
     
     def generate_optimal_schedule(
         self,
@@ -66,14 +71,19 @@ class AIScheduler:
 
         # Get historical shift patterns (fallback if no template)
         historical_patterns = self._get_historical_patterns(week_start) if not template else {}
-        
-        # Generate shifts
-        generated_shifts = []
-        total_hours = 0
-        estimated_cost = 0
-        warnings = []
-        
-        # For each day of the week
+        if template:
+            self._template_shifts = {
+                (ts.day_of_week, ts.role): ts
+                for ts in TemplateShift.objects.filter(template=template)
+            }
+
+        # Build every slot of the week, then solve it in one pass. Template
+        # and historical demand are tenant-wide (nothing records demand per
+        # branch), so each role's headcount is split across the branches
+        # rather than copied to each; every slot then names its branch and
+        # the solver can honour staff allowed_locations.
+        locations = self._get_schedule_locations()
+        slots: List[ShiftSlot] = []
         for day_offset in range(7):
             shift_date = week_start + timedelta(days=day_offset)
             day_name = shift_date.strftime('%A')
@@ -83,34 +93,69 @@ class AIScheduler:
             current_day_demand = demand_forecast.get(day_name, demand_level)
             
             if template:
-                # Use template shifts for this day
-                day_template_shifts = TemplateShift.objects.filter(template=template, day_of_week=day_num)
                 required_roles = {}
                 # Calculate required roles based on template + demand scaling
                 scale = {'LOW': 0.7, 'MEDIUM': 1.0, 'HIGH': 1.3}.get(current_day_demand, 1.0)
                 
-                for ts in day_template_shifts:
-                    required_roles[ts.role] = max(1, round(ts.required_staff * scale))
+                for (ts_day, ts_role), ts in self._template_shifts.items():
+                    if ts_day == day_num:
+                        required_roles[ts_role] = max(1, round(ts.required_staff * scale))
             else:
                 # Determine required staff by role from history
                 required_roles = self._calculate_required_roles(current_day_demand, historical_patterns)
-            
-            # Assign staff to shifts
-            day_shifts = self._assign_staff_to_shifts(
-                shift_date=shift_date,
-                required_roles=required_roles,
-                available_staff=available_staff,
-                existing_assignments=generated_shifts,
-                template=template if template else None
-            )
-            
-            generated_shifts.extend(day_shifts)
-            
-            # Calculate hours and cost
-            for shift in day_shifts:
-                hours = shift['hours']
-                total_hours += hours
-                estimated_cost += hours * shift['hourly_rate']
+
+            for role, count in required_roles.items():
+                start_time, end_time = self._determine_shift_times(role, shift_date, template)
+                for location_id, share in self._split_headcount(count, locations):
+                    slots.append(ShiftSlot(
+                        shift_date=shift_date,
+                        day_index=day_offset,
+                        role=role,
+                        start_time=start_time,
+                        end_time=end_time,
+                        required=share,
+                        location_id=location_id,
+                    ))
+
+        candidates = self._build_candidates(available_staff, week_start)
+        solution = solve_schedule(
+            slots,
+            candidates,
+            SchedulePolicy(min_rest_hours=self.MIN_REST_HOURS, max_weekly_hours=self.MAX_WEEKLY_HOURS),
+            time_budget=self.SOLVER_TIME_BUDGET,
+        )
+
+        generated_shifts = []
+        total_hours = 0
+        estimated_cost = 0
+        warnings = []
+        for slot_idx, staff_idx in sorted(solution.assignments, key=lambda a: (slots[a[0]].shift_date, slots[a[0]].role)):
+            slot = slots[slot_idx]
+            cand = candidates[staff_idx]
+            generated_shifts.append({
+                'staff_id': cand.staff_id,
+                'staff_name': cand.name,
+                'role': slot.role,
+                'shift_date': slot.shift_date,
+                'start_time': slot.start_time,
+                'end_time': slot.end_time,
+                'hours': slot.hours,
+                'hourly_rate': cand.hourly_rate,
+                'location_id': slot.location_id,
+            })
+            total_hours += slot.hours
+            estimated_cost += slot.hours * cand.hourly_rate
+
+        unfilled: Dict[Tuple, int] = {}
+        for slot_idx in solution.unfilled:
+            key = (slots[slot_idx].shift_date, slots[slot_idx].role)
+            unfilled[key] = unfilled.get(key, 0) + 1
+        for (shift_date, role), count in sorted(unfilled.items()):
+            warnings.append(f"Could not fill {count} {role} shift(s) on {shift_date}: no eligible staff left")
+        if solution.timed_out:
+            warnings.append("Schedule optimizer hit its time budget; returning the best schedule found")
+        if labor_budget is not None and estimated_cost > float(labor_budget):
+            warnings.append(f"Estimated labor cost {estimated_cost:.2f} exceeds budget {float(labor_budget):.2f}")
         
         # Validate constraints
         constraint_warnings = self._validate_constraints(generated_shifts)
@@ -139,27 +184,15 @@ class AIScheduler:
                 ...
             }
         """
-        # Get historical sales data for same week in previous years
-        from pos.models import Order
-        
+        # Same precomputed hour-of-week forecast used by labor
+        # recommendations and prep lists; classified per day here.
+        from pos.demand_curve import demand_forecast
+
+        daily_orders = demand_forecast(self.restaurant, week_start).daily_totals('orders')
+
         forecast = {}
-        
-        for day_offset in range(7):
-            date = week_start + timedelta(days=day_offset)
-            day_name = date.strftime('%A')
-            
-            # Get historical data for this day of week
-            historical_dates = []
-            for weeks_back in range(1, 13):  # Last 12 weeks
-                hist_date = date - timedelta(weeks=weeks_back)
-                historical_dates.append(hist_date)
-            
-            # Calculate average orders for this day
-            avg_orders = Order.objects.filter(
-                restaurant=self.restaurant,
-                order_time__date__in=historical_dates,
-                status='COMPLETED'
-            ).count() / len(historical_dates) if historical_dates else 0
+        for day_offset, avg_orders in enumerate(daily_orders):
+            day_name = (week_start + timedelta(days=day_offset)).strftime('%A')
             
             # Classify demand level
             if avg_orders > 50:
@@ -178,7 +211,84 @@ class AIScheduler:
         return list(CustomUser.objects.filter(
             restaurant=self.restaurant,
             is_active=True
-        ).select_related('profile'))
+        ).select_related('profile').prefetch_related('allowed_locations'))
+
+    def _get_schedule_locations(self) -> List[Optional[str]]:
+        """Active branches, primary first; ``[None]`` for single-site tenants."""
+        from accounts.models import BusinessLocation
+
+        ids = [
+            str(pk) for pk in BusinessLocation.objects.filter(
+                restaurant=self.restaurant, is_active=True
+            ).order_by('-is_primary', 'name').values_list('id', flat=True)
+        ]
+        return ids if len(ids) > 1 else [None]
+
+    @staticmethod
+    def _split_headcount(count: int, locations: List[Optional[str]]) -> List[Tuple[Optional[str], int]]:
+        """Spread ``count`` over ``locations`` (remainder to the first ones),
+        dropping branches that get nobody."""
+        base, extra = divmod(count, len(locations))
+        shares = [(loc, base + (1 if i < extra else 0)) for i, loc in enumerate(locations)]
+        return [(loc, n) for loc, n in shares if n > 0]
+
+    def _build_candidates(self, staff: List[CustomUser], week_start) -> List[StaffCandidate]:
+        """Snapshot staff, weekly availability and approved time-off for the solver."""
+        from .models import StaffAvailability, TimeOffRequest
+
+        week_end = week_start + timedelta(days=6)
+        staff_ids = [s.id for s in staff]
+
+        unavailable: Dict[str, set] = {}
+        for staff_id, start, end in TimeOffRequest.objects.filter(
+            staff_id__in=staff_ids,
+            status='APPROVED',
+            start_date__lte=week_end,
+            end_date__gte=week_start,
+        ).values_list('staff_id', 'start_date', 'end_date'):
+            day = max(start, week_start)
+            while day <= min(end, week_end):
+                unavailable.setdefault(str(staff_id), set()).add(day)
+                day += timedelta(days=1)
+
+        availability: Dict[str, Dict[int, List[Tuple[int, int]]]] = {}
+        blocked_days: Dict[str, set] = {}
+        for staff_id, weekday, is_available, start, end in StaffAvailability.objects.filter(
+            staff_id__in=staff_ids
+        ).values_list('staff_id', 'day_of_week', 'is_available', 'start_time', 'end_time'):
+            key = str(staff_id)
+            if not is_available:
+                blocked_days.setdefault(key, set()).add(weekday)
+                continue
+            windows = availability.setdefault(key, {}).setdefault(weekday, [])
+            if start and end:
+                end_min = end.hour * 60 + end.minute
+                start_min = start.hour * 60 + start.minute
+                windows.append((start_min, end_min if end_min > start_min else end_min + 24 * 60))
+            else:
+                windows.append((0, 48 * 60))
+        for key, days in blocked_days.items():
+            for weekday in days:
+                availability.setdefault(key, {})[weekday] = []
+
+        candidates = []
+        for member in staff:
+            key = str(member.id)
+            allowed = frozenset(str(loc.id) for loc in member.allowed_locations.all())
+            candidates.append(StaffCandidate(
+                staff_id=key,
+                name=f"{member.first_name} {member.last_name}",
+                role=member.role,
+                hourly_rate=self._hourly_rate(member),
+                location_ids=allowed or None,
+                availability=availability.get(key, {}),
+                unavailable_dates=frozenset(unavailable.get(key, ())),
+            ))
+        return candidates
+
+    @staticmethod
+    def _hourly_rate(staff: CustomUser) -> float:
+        return float(staff.profile.hourly_rate) if hasattr(staff, 'profile') else 15.0
     
     def _get_historical_patterns(self, week_start: datetime.date) -> Dict:
         """
@@ -256,66 +366,6 @@ class AIScheduler:
         
         return required
     
-    def _assign_staff_to_shifts(
-        self,
-        shift_date: datetime.date,
-        required_roles: Dict,
-        available_staff: List[CustomUser],
-        existing_assignments: List[Dict],
-        template: Optional[ScheduleTemplate] = None
-    ) -> List[Dict]:
-        """
-        Assign staff to shifts for a specific day
-        
-        Returns:
-            List of shift assignments
-        """
-        shifts = []
-        
-        # Get staff already assigned this week
-        weekly_hours = self._calculate_weekly_hours(existing_assignments)
-        
-        for role, count in required_roles.items():
-            # Find available staff for this role
-            role_staff = [s for s in available_staff if s.role == role]
-            
-            # Sort by weekly hours (assign to those with fewer hours first)
-            role_staff.sort(key=lambda s: weekly_hours.get(str(s.id), 0))
-            
-            assigned_count = 0
-            for staff in role_staff:
-                if assigned_count >= count:
-                    break
-                
-                # Check constraints
-                if not self._can_assign_shift(staff, shift_date, existing_assignments):
-                    continue
-                
-                # Determine shift times based on role and demand
-                start_time, end_time = self._determine_shift_times(role, shift_date, template)
-                
-                # Calculate hours
-                shift_duration = self._calculate_shift_duration(start_time, end_time)
-                
-                # Get hourly rate
-                hourly_rate = staff.profile.hourly_rate if hasattr(staff, 'profile') else 15.0
-                
-                shifts.append({
-                    'staff_id': str(staff.id),
-                    'staff_name': f"{staff.first_name} {staff.last_name}",
-                    'role': role,
-                    'shift_date': shift_date,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'hours': shift_duration,
-                    'hourly_rate': hourly_rate
-                })
-                
-                assigned_count += 1
-                weekly_hours[str(staff.id)] = weekly_hours.get(str(staff.id), 0) + shift_duration
-        
-        return shifts
-    
     def _calculate_weekly_hours(self, assignments: List[Dict]) -> Dict[str, float]:
         """Calculate total hours per staff member"""
         hours = {}
@@ -324,50 +374,15 @@ class AIScheduler:
             hours[staff_id] = hours.get(staff_id, 0) + assignment['hours']
         return hours
     
-    def _can_assign_shift(
-        self,
-        staff: CustomUser,
-        shift_date: datetime.date,
-        existing_assignments: List[Dict]
-    ) -> bool:
-        """Check if staff can be assigned to this shift"""
-        staff_id = str(staff.id)
-        
-        # Check weekly hours limit
-        weekly_hours = sum(
-            a['hours'] for a in existing_assignments
-            if a['staff_id'] == staff_id
-        )
-        
-        if weekly_hours >= self.MAX_WEEKLY_HOURS:
-            return False
-        
-        # Check rest period between shifts
-        staff_assignments = [a for a in existing_assignments if a['staff_id'] == staff_id]
-        
-        for assignment in staff_assignments:
-            prev_date = assignment['shift_date']
-            prev_end = assignment['end_time']
-            
-            # Calculate hours between shifts
-            if prev_date == shift_date:
-                # Same day - not allowed
-                return False
-            
-            if prev_date == shift_date - timedelta(days=1):
-                # Previous day - check rest period
-                hours_between = 24 - prev_end.hour
-                if hours_between < self.MIN_REST_HOURS:
-                    return False
-        
-        return True
-    
     def _determine_shift_times(self, role: str, shift_date: datetime.date, template: Optional[ScheduleTemplate] = None) -> Tuple[time, time]:
         """Determine shift start and end times based on role or template"""
         if template:
             day_num = shift_date.weekday()
-            ts = TemplateShift.objects.filter(template=template, role=role, day_of_week=day_num).first()
-            if ts:
+            if self._template_shifts is not None:
+                ts = self._template_shifts.get((day_num, role))
+            else:
+                ts = TemplateShift.objects.filter(template=template, role=role, day_of_week=day_num).first()
+            if ts and ts.start_time and ts.end_time:
                 return ts.start_time, ts.end_time
 
         # Simplified shift times fallback
@@ -4,17 +4,22 @@ Provides comprehensive logging and tracking of all activities
 """
 
 import json
+import logging
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from functools import partial
 from typing import Dict, Any, Optional, List
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.utils import timezone as django_timezone
 from enum import Enum
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 def serialize_for_audit(data):
     """Serialize data for audit logging, handling UUIDs and other non-JSON types"""
@@ -113,6 +118,54 @@ class AuditLog(models.Model):
     def __str__(self):
         return f"{self.timestamp} - {self.user} - {self.action} - {self.description[:50]}"
 
+class _AuditBatch:
+    """AuditLog rows collected by :func:`audit_batch`, written by ``flush``."""
+
+    def __init__(self):
+        self.entries: List[AuditLog] = []
+
+    def add(self, entry: 'AuditLog') -> None:
+        self.entries.append(entry)
+
+    def flush(self) -> None:
+        entries, self.entries = self.entries, []
+        if not entries:
+            return
+        try:
+            AuditLog.objects.bulk_create(entries, batch_size=500)
+        except Exception:
+            # The audited change is already committed; never fail it here.
+            logger.exception("audit_batch: failed to write %d audit rows", len(entries))
+
+
+_batch_state = threading.local()
+
+
+@contextmanager
+def audit_batch():
+    """
+    Collect every ``AuditTrailService`` write in the block and store them
+    with one ``bulk_create`` after the enclosing transaction commits
+    (at the end of the block in autocommit mode).
+
+    Each row joins the batch through ``transaction.on_commit``, so rows
+    logged inside an atomic block or savepoint that rolls back are dropped,
+    exactly as the synchronous ``create`` they replace would have been.
+    Nested blocks share the outermost batch.
+    """
+    if getattr(_batch_state, 'batch', None) is not None:
+        yield _batch_state.batch
+        return
+    batch = _AuditBatch()
+    _batch_state.batch = batch
+    try:
+        yield batch
+    finally:
+        _batch_state.batch = None
+        # Registered after every row's on_commit, so it runs after them.
+        transaction.on_commit(batch.flush)
+
+
 class AuditTrailService:
     """Service class for managing audit trails"""
     
@@ -167,13 +220,19 @@ class AuditTrailService:
                 'session_key': request.session.session_key,
             })
         
-        # Set restaurant context
-        if user and hasattr(user, 'restaurant'):
-            audit_data['restaurant'] = user.restaurant
-        elif content_object and hasattr(content_object, 'restaurant'):
-            audit_data['restaurant'] = content_object.restaurant
+        # Set restaurant context (by id: no fetch of the restaurant row)
+        if user and hasattr(user, 'restaurant_id'):
+            audit_data['restaurant_id'] = user.restaurant_id
+        elif content_object and hasattr(content_object, 'restaurant_id'):
+            audit_data['restaurant_id'] = content_object.restaurant_id
         
-        return AuditLog.objects.create(**audit_data)
+        entry = AuditLog(**audit_data)
+        batch = getattr(_batch_state, 'batch', None)
+        if batch is None:
+            entry.save()
+        else:
+            transaction.on_commit(partial(batch.add, entry))
+        return entry
     
     @staticmethod
     def log_task_activity(
@@ -211,6 +211,7 @@ def calendar_event_approach_sweep_for_restaurant(restaurant) -> dict[str, int]:
     """
     Ping managers on WhatsApp before Google Calendar events (1 day, 1 hour, 30 min).
     Skips events already tracked via PersonalReminder (Miya-created sync path).
+    Events are read from the tenant's calendar mirror once per sweep.
     """
     from accounts.models import CustomUser
     from dashboard.api.meetings_reminders import _get_valid_access_token
@@ -234,18 +235,20 @@ def calendar_event_approach_sweep_for_restaurant(restaurant) -> dict[str, int]:
     if not managers:
         return summary
 
+    # One mirror read per tenant: the calendar is shared, only the
+    # recipients differ.
     now = timezone.now()
-    for manager in managers:
-        rows = _fetch_calendar_events_for_agent(
-            access_token,
-            manager,
-            past_hours=1,
-            future_hours=48,
-            max_results=40,
-        )
-        if not rows:
-            continue
+    rows = _fetch_calendar_events_for_agent(
+        restaurant,
+        None,
+        past_hours=1,
+        future_hours=48,
+        max_results=200,
+    )
+    if not rows:
+        return summary
 
+    for manager in managers:
         phone = re.sub(r"\D", "", str(getattr(manager, "phone", "") or ""))
         if len(phone) < 8:
             continue
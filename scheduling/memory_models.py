@@ -261,6 +261,10 @@ class PersonalReminder(models.Model):
         blank=True,
         help_text="Milestone days-before-due already pinged on WhatsApp (e.g. 30, 7, 1, 0).",
     )
+    # Dispatcher lease (scheduling.reminder_dispatch): the batch holding
+    # claim_token owns delivery until claimed_until, then anyone may reclaim.
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
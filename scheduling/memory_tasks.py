@@ -12,6 +12,8 @@ from django.conf import settings
 from django.db.models import Q
 from django.utils import timezone
 
+from core.metrics import timed_per_tenant
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,112 +44,21 @@ def _next_due(rem):
 @shared_task(name="scheduling.memory_tasks.personal_reminder_sweep")
 def personal_reminder_sweep():
     """
-    Fire due personal reminders via WhatsApp (free-form inside 24h window).
-    Runs every minute via Celery beat.
+    Claim due personal reminders and queue their delivery (see
+    ``scheduling.reminder_dispatch``). Runs every minute via Celery beat;
+    reminders due within the next minute are sent with a second-level ETA.
     """
-    from scheduling.memory_models import PersonalReminder
-    from notifications.services import notification_service
+    from scheduling.reminder_dispatch import dispatch_due
 
-    now = timezone.now()
-    due = list(
-        PersonalReminder.objects.filter(
-            status="pending",
-            due_at__lte=now + timedelta(minutes=1),
-        )
-        .select_related("owner", "restaurant", "linked_note")
-        .order_by("due_at")[:200]
-    )
-    sent = 0
-    failed = 0
-    for rem in due:
-        phone = rem.phone or re.sub(r"\D", "", str(getattr(rem.owner, "phone", "") or ""))
-        if not phone:
-            rem.status = "failed"
-            rem.save(update_fields=["status", "updated_at"])
-            failed += 1
-            continue
+    return dispatch_due()
 
-        body_parts = [f"Hi — it's Miya. ⏰ Reminder: {rem.title}"]
-        if rem.body:
-            body_parts.append(rem.body)
-        if rem.linked_note_id and rem.linked_note:
-            preview = (rem.linked_note.content or "")[:160]
-            body_parts.append(f"Related note: {preview}")
-        att_url = (getattr(rem, "attachment_url", None) or "").strip()
-        att_file = None
-        if not att_url and getattr(rem, "attachment", None):
-            try:
-                att_url = rem.attachment.url or ""
-            except Exception:
-                att_url = ""
-        if getattr(rem, "attachment", None):
-            try:
-                rem.attachment.open("rb")
-                att_file = rem.attachment.read()
-                rem.attachment.close()
-            except Exception:
-                att_file = None
-
-        text = "\n".join(body_parts)
 
-        try:
-            # Prefer native WhatsApp media when we have file bytes.
-            media_sent = False
-            if att_file:
-                name = ""
-                try:
-                    name = (rem.attachment.name or "").split("/")[-1] or "attachment"
-                except Exception:
-                    name = "attachment"
-                lower = name.lower()
-                if lower.endswith((".png", ".jpg", ".jpeg", ".gif", ".webp")):
-                    mime = "image/jpeg"
-                    if lower.endswith(".png"):
-                        mime = "image/png"
-                    elif lower.endswith(".webp"):
-                        mime = "image/webp"
-                    elif lower.endswith(".gif"):
-                        mime = "image/gif"
-                    as_doc = False
-                else:
-                    mime = "application/pdf" if lower.endswith(".pdf") else "application/octet-stream"
-                    as_doc = True
-                media_ok, _ = notification_service.send_whatsapp_media_attachment(
-                    phone,
-                    file_bytes=att_file,
-                    mime_type=mime,
-                    filename=name,
-                    caption=text[:1024],
-                    as_document=as_doc,
-                )
-                media_sent = bool(media_ok)
-
-            if not media_sent:
-                if att_url and "Attachment:" not in text:
-                    text = f"{text}\nAttachment: {att_url}"
-                result = notification_service.send_whatsapp_text(phone, text)
-                ok = result[0] if isinstance(result, tuple) else bool(result)
-                if not ok:
-                    logger.warning("personal_reminder_sweep: WA send failed for %s", rem.id)
-                    failed += 1
-                    continue
-        except Exception:
-            logger.exception("personal_reminder_sweep send error rem=%s", rem.id)
-            failed += 1
-            continue
-
-        rem.fired_at = now
-        rem.fire_count = (rem.fire_count or 0) + 1
-        nxt = _next_due(rem)
-        if nxt:
-            rem.due_at = nxt
-            rem.status = "pending"
-        else:
-            rem.status = "fired"
-        rem.save()
-        sent += 1
+@shared_task(name="scheduling.memory_tasks.deliver_personal_reminders")
+def deliver_personal_reminders(reminder_ids, claim_token):
+    """Send one claimed batch of reminders via WhatsApp (free-form inside 24h window)."""
+    from scheduling.reminder_dispatch import deliver_batch
 
-    return {"sent": sent, "failed": failed, "checked": len(due)}
+    return deliver_batch(reminder_ids, claim_token)
 
 
 @shared_task(name="scheduling.memory_tasks.personal_reminder_approach_sweep")
@@ -224,7 +135,7 @@ def calendar_event_approach_sweep():
     from scheduling.calendar_reminder_sync import calendar_event_approach_sweep_for_restaurant
 
     totals = {"sent": 0, "skipped": 0, "checked": 0, "restaurants": 0}
-    for restaurant in Restaurant.objects.filter(is_active=True).iterator():
+    for restaurant in timed_per_tenant("calendar_event_approach_sweep", Restaurant.objects.filter(is_active=True).iterator()):
         try:
             row = calendar_event_approach_sweep_for_restaurant(restaurant)
             for k in ("sent", "skipped", "checked"):
@@ -338,7 +249,7 @@ def daily_briefing_sweep():
                 access_token, _gcal = _get_valid_access_token(restaurant)
                 if access_token:
                     events = _fetch_calendar_events_for_agent(
-                        access_token,
+                        restaurant,
                         user,
                         past_hours=0,
                         future_hours=36,
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.16 on 2026-10-18 21:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0024_personalreminder_compliance_approach'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='personalreminder',
+            name='claim_token',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='personalreminder',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -568,15 +568,23 @@ class Timesheet(models.Model):
         return f"Timesheet for {self.staff.email} ({self.start_date} to {self.end_date})"
     
     def calculate_totals(self):
-        """Recalculate total hours and earnings from shifts"""
-        shifts = AssignedShift.objects.filter(
-            staff=self.staff,
-            shift_date__gte=self.start_date,
-            shift_date__lte=self.end_date,
-            status__in=['COMPLETED', 'CONFIRMED']
-        )
-        
-        total_hours = sum(shift.actual_hours for shift in shifts)
+        """Recalculate total hours and earnings.
+
+        Clocked hours (breaks excluded) win when the staff member clocked in
+        during the period; otherwise the completed/confirmed shifts are used.
+        """
+        from decimal import Decimal
+        from payroll.services.hours import staff_hours_from_clock_events
+
+        total_hours = staff_hours_from_clock_events(self.staff, self.start_date, self.end_date)
+        if total_hours <= 0:
+            shifts = AssignedShift.objects.filter(
+                staff=self.staff,
+                shift_date__gte=self.start_date,
+                shift_date__lte=self.end_date,
+                status__in=['COMPLETED', 'CONFIRMED']
+            )
+            total_hours = Decimal(str(round(sum(shift.actual_hours for shift in shifts), 2)))
         self.total_hours = total_hours
         self.total_earnings = total_hours * self.hourly_rate
         self.save()
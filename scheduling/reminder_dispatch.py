@@ -0,0 +1,247 @@
+"""
+Claim-and-lease dispatcher for WhatsApp personal reminders.
+
+The per-minute beat (``personal_reminder_sweep``) no longer sends anything
+itself. It claims due rows in batches and fans them out to workers:
+
+* :func:`claim_batch` locks pending, unleased rows with ``SKIP LOCKED`` and
+  stamps them with a claim token and a lease. Overlapping ticks and parallel
+  workers never pick the same row; a crashed worker's rows are reclaimed
+  once the lease expires.
+* :func:`plan_batches` splits a claim into "send now" work and ETA tasks for
+  reminders due within the next minute, so those fire on the second rather
+  than at the next tick.
+* :func:`deliver_batch` sends one batch and writes the outcome back with a
+  single ``bulk_update``. Recurring reminders are advanced with
+  :func:`scheduling.memory_tasks._next_due` in the same write.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+# Upper bound per tick; at 100 per batch this is 10k reminders a minute.
+MAX_BATCHES_PER_TICK = 100
+# Reminders due this far ahead are claimed now and sent with an ETA.
+ETA_HORIZON = timedelta(minutes=1)
+LEASE = timedelta(minutes=5)
+
+IMAGE_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+def claim_batch(now: datetime, limit: int = BATCH_SIZE) -> Tuple[Optional[str], List[Tuple[str, datetime]]]:
+    """Lease up to ``limit`` reminders due by ``now + ETA_HORIZON``.
+
+    Returns ``(token, [(id, due_at), ...])``; the lease runs until the end of
+    the horizon plus :data:`LEASE` so ETA tasks still own their rows.
+    """
+    from scheduling.memory_models import PersonalReminder
+
+    token = uuid.uuid4()
+    with transaction.atomic():
+        rows = list(
+            PersonalReminder.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", due_at__lte=now + ETA_HORIZON)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .order_by("due_at")
+            .values_list("id", "due_at")[:limit]
+        )
+        if not rows:
+            return None, []
+        PersonalReminder.objects.filter(id__in=[r[0] for r in rows]).update(
+            claim_token=token,
+            claimed_until=now + ETA_HORIZON + LEASE,
+        )
+    return str(token), [(str(rid), due) for rid, due in rows]
+
+
+def plan_batches(rows: Iterable[Tuple[str, datetime]], now: datetime) -> List[Tuple[Optional[datetime], List[str]]]:
+    """``[(eta, ids)]``: rows already due share one immediate batch
+    (``eta=None``); future rows are grouped by their due second."""
+    immediate: List[str] = []
+    by_second: Dict[datetime, List[str]] = defaultdict(list)
+    for rid, due in rows:
+        if due <= now:
+            immediate.append(rid)
+        else:
+            by_second[due.replace(microsecond=0)].append(rid)
+    plan: List[Tuple[Optional[datetime], List[str]]] = []
+    if immediate:
+        plan.append((None, immediate))
+    plan.extend(sorted(by_second.items()))
+    return plan
+
+
+def dispatch_due(now: Optional[datetime] = None, max_batches: int = MAX_BATCHES_PER_TICK) -> Dict[str, int]:
+    """Claim due reminders and queue delivery tasks. Called once a minute."""
+    from scheduling.memory_tasks import deliver_personal_reminders
+
+    now = now or timezone.now()
+    claimed = batches = scheduled = 0
+    for _ in range(max_batches):
+        token, rows = claim_batch(now)
+        if not rows:
+            break
+        claimed += len(rows)
+        for eta, ids in plan_batches(rows, now):
+            batches += 1
+            if eta is None:
+                deliver_personal_reminders.delay(ids, token)
+            else:
+                scheduled += len(ids)
+                deliver_personal_reminders.apply_async(args=[ids, token], eta=eta)
+        if len(rows) < BATCH_SIZE:
+            break
+    return {"claimed": claimed, "batches": batches, "scheduled_eta": scheduled}
+
+
+# --- Delivery ---------------------------------------------------------------
+
+def reminder_phone(rem) -> str:
+    return rem.phone or re.sub(r"\D", "", str(getattr(rem.owner, "phone", "") or ""))
+
+
+def reminder_text(rem) -> str:
+    parts = [f"Hi — it's Miya. ⏰ Reminder: {rem.title}"]
+    if rem.body:
+        parts.append(rem.body)
+    if rem.linked_note_id and rem.linked_note:
+        parts.append(f"Related note: {(rem.linked_note.content or '')[:160]}")
+    return "\n".join(parts)
+
+
+def _attachment(rem) -> Tuple[str, Optional[bytes], str]:
+    """``(url, file bytes, filename)`` for the reminder's attachment, if any."""
+    url = (getattr(rem, "attachment_url", None) or "").strip()
+    data = None
+    name = ""
+    if getattr(rem, "attachment", None):
+        if not url:
+            try:
+                url = rem.attachment.url or ""
+            except Exception:
+                url = ""
+        try:
+            rem.attachment.open("rb")
+            data = rem.attachment.read()
+            rem.attachment.close()
+        except Exception:
+            data = None
+        try:
+            name = (rem.attachment.name or "").split("/")[-1] or "attachment"
+        except Exception:
+            name = "attachment"
+    return url, data, name
+
+
+def send_reminder(rem, notification_service) -> bool:
+    """WhatsApp one reminder: native media when we have the file, text otherwise."""
+    phone = reminder_phone(rem)
+    text = reminder_text(rem)
+    url, data, name = _attachment(rem)
+    if data:
+        lower = name.lower()
+        ext = lower[lower.rfind("."):] if "." in lower else ""
+        mime = IMAGE_MIME_TYPES.get(ext)
+        as_doc = mime is None
+        if as_doc:
+            mime = "application/pdf" if ext == ".pdf" else "application/octet-stream"
+        media_ok, _ = notification_service.send_whatsapp_media_attachment(
+            phone,
+            file_bytes=data,
+            mime_type=mime,
+            filename=name,
+            caption=text[:1024],
+            as_document=as_doc,
+        )
+        if media_ok:
+            return True
+    if url and "Attachment:" not in text:
+        text = f"{text}\nAttachment: {url}"
+    result = notification_service.send_whatsapp_text(phone, text)
+    return result[0] if isinstance(result, tuple) else bool(result)
+
+
+def deliver_batch(ids: Sequence[str], token: str, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Send the reminders this claim still owns and record each outcome.
+
+    Every sent row is marked fired (or advanced to its next occurrence) right
+    after its send, so a worker dying mid-batch re-sends nothing already
+    delivered. Rows whose lease was lost, or whose ``due_at`` moved past the
+    horizon after the claim, are skipped. Failed sends release the lease so
+    the next tick retries them; reminders without a phone are marked
+    ``failed``.
+    """
+    from notifications.services import notification_service
+    from scheduling.memory_models import PersonalReminder
+    from scheduling.memory_tasks import _next_due
+
+    now = now or timezone.now()
+    reminders = list(
+        PersonalReminder.objects.filter(id__in=list(ids), claim_token=token, status="pending")
+        .select_related("owner", "restaurant", "linked_note")
+    )
+    sent = 0
+    release: List[str] = []
+    no_phone: List[str] = []
+    for rem in reminders:
+        if rem.due_at > now + ETA_HORIZON:
+            release.append(rem.id)
+            continue
+        if not reminder_phone(rem):
+            no_phone.append(rem.id)
+            continue
+        try:
+            ok = send_reminder(rem, notification_service)
+        except Exception:
+            logger.exception("personal reminder send error rem=%s", rem.id)
+            ok = False
+        if not ok:
+            logger.warning("personal reminder: WA send failed for %s", rem.id)
+            release.append(rem.id)
+            continue
+        rem.fired_at = now
+        rem.fire_count = (rem.fire_count or 0) + 1
+        nxt = _next_due(rem)
+        PersonalReminder.objects.filter(id=rem.id, claim_token=token).update(
+            status="pending" if nxt else "fired",
+            due_at=nxt or rem.due_at,
+            fired_at=now,
+            fire_count=rem.fire_count,
+            claim_token=None,
+            claimed_until=None,
+            updated_at=now,
+        )
+        sent += 1
+
+    if no_phone:
+        PersonalReminder.objects.filter(id__in=no_phone, claim_token=token).update(
+            status="failed", claim_token=None, claimed_until=None, updated_at=now
+        )
+    if release:
+        PersonalReminder.objects.filter(id__in=release, claim_token=token).update(
+            claim_token=None, claimed_until=None
+        )
+    return {
+        "sent": sent,
+        "failed": len(no_phone),
+        "retry": len(release),
+        "lost": len(ids) - len(reminders),
+    }
@@ -6,6 +6,7 @@ from typing import Dict, List, Optional, Tuple
 import hashlib
 import logging
 
+from django.db import transaction
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
 
@@ -408,52 +409,63 @@ class SchedulingService:
         except (WeeklySchedule.DoesNotExist, ScheduleTemplate.DoesNotExist):
             return False, "Schedule or template not found"
         
+        from .signals import audit_bulk_operation
+
         try:
             # Get template shifts
             template_shifts = TemplateShift.objects.filter(template=template)
             
             created_count = 0
-            for ts in template_shifts:
-                # Calculate the actual date for this day of week
-                days_ahead = ts.day_of_week - week_start_date.weekday()
-                if days_ahead < 0:
-                    days_ahead += 7
-                
-                shift_date = week_start_date + timedelta(days=days_ahead)
+            # One audit record for the whole run instead of one per shift
+            with transaction.atomic(), audit_bulk_operation(
+                AssignedShift,
+                'generate_from_template',
+                f"Generated shifts from template {template.name} for week {week_start_date}",
+                content_object=schedule,
+                metadata={'template_id': str(template.id), 'week_start': week_start_date.isoformat()},
+            ) as op:
+                for ts in template_shifts:
+                    # Calculate the actual date for this day of week
+                    days_ahead = ts.day_of_week - week_start_date.weekday()
+                    if days_ahead < 0:
+                        days_ahead += 7
                 
-                # Find available staff for this role
-                available_staff = CustomUser.objects.filter(
-                    restaurant=schedule.restaurant,
-                    role=ts.role,
-                    is_active=True
-                )
+                    shift_date = week_start_date + timedelta(days=days_ahead)
                 
-                if available_staff.exists():
-                    staff = available_staff.first()
-                    
-                    # Check for conflicts
-                    conflicts = SchedulingService.detect_scheduling_conflicts(
-                        str(staff.id),
-                        shift_date,
-                        ts.start_time,
-                        ts.end_time
+                    # Find available staff for this role
+                    available_staff = CustomUser.objects.filter(
+                        restaurant=schedule.restaurant,
+                        role=ts.role,
+                        is_active=True
                     )
+                
+                    if available_staff.exists():
+                        staff = available_staff.first()
                     
-                    if not conflicts:
-                        # Use full datetime so clock-in/reminder tasks find shifts (they filter by start_time range)
-                        start_dt = timezone.make_aware(datetime.combine(shift_date, ts.start_time)) if ts.start_time else timezone.now()
-                        end_dt = timezone.make_aware(datetime.combine(shift_date, ts.end_time)) if ts.end_time else start_dt + timedelta(hours=4)
-                        if ts.end_time and ts.end_time < ts.start_time:
-                            end_dt = timezone.make_aware(datetime.combine(shift_date + timedelta(days=1), ts.end_time))
-                        AssignedShift.objects.create(
-                            schedule=schedule,
-                            staff=staff,
-                            shift_date=shift_date,
-                            start_time=start_dt,
-                            end_time=end_dt,
-                            role=ts.role
+                        # Check for conflicts
+                        conflicts = SchedulingService.detect_scheduling_conflicts(
+                            str(staff.id),
+                            shift_date,
+                            ts.start_time,
+                            ts.end_time
                         )
-                        created_count += 1
+                    
+                        if not conflicts:
+                            # Use full datetime so clock-in/reminder tasks find shifts (they filter by start_time range)
+                            start_dt = timezone.make_aware(datetime.combine(shift_date, ts.start_time)) if ts.start_time else timezone.now()
+                            end_dt = timezone.make_aware(datetime.combine(shift_date, ts.end_time)) if ts.end_time else start_dt + timedelta(hours=4)
+                            if ts.end_time and ts.end_time < ts.start_time:
+                                end_dt = timezone.make_aware(datetime.combine(shift_date + timedelta(days=1), ts.end_time))
+                            shift = AssignedShift.objects.create(
+                                schedule=schedule,
+                                staff=staff,
+                                shift_date=shift_date,
+                                start_time=start_dt,
+                                end_time=end_dt,
+                                role=ts.role
+                            )
+                            op.add(shift)
+                            created_count += 1
             
             return True, f"Generated {created_count} shifts from template"
         
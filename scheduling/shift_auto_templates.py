@@ -320,6 +320,139 @@ def _template_localized_tasks(task_template: TaskTemplate, lang: str):
     return getattr(task_template, "tasks", None) or []
 
 
+# Materialized step lists, keyed by (template id, updated_at, lang, kind).
+# Saving a template bumps updated_at, so edits are picked up without explicit
+# invalidation; the dict is simply dropped when it fills up.
+_STEP_CACHE: dict = {}
+_STEP_CACHE_MAX = 512
+
+
+def _memoized_steps(task_template: TaskTemplate, key: tuple, build) -> tuple:
+    pk = getattr(task_template, "pk", None)
+    if pk is None:
+        return tuple(build())
+    full_key = (pk, getattr(task_template, "updated_at", None)) + key
+    steps = _STEP_CACHE.get(full_key)
+    if steps is None:
+        steps = tuple(build())
+        if len(_STEP_CACHE) >= _STEP_CACHE_MAX:
+            _STEP_CACHE.clear()
+        _STEP_CACHE[full_key] = steps
+    return steps
+
+
+def materialized_template_steps(task_template: TaskTemplate, lang: str = "en") -> Tuple[dict, ...]:
+    """
+    Normalized steps (``_normalize_task_item`` shape, titled ones only) of a
+    TaskTemplate localized to ``lang``. Memoized per process; treat the
+    returned dicts as read-only.
+    """
+
+    def build():
+        tasks_data = _template_localized_tasks(task_template, lang)
+        if not isinstance(tasks_data, list):
+            return []
+        items = (_normalize_task_item(raw) for raw in tasks_data if isinstance(raw, dict))
+        return [t for t in items if t["title"]]
+
+    return _memoized_steps(task_template, (lang, "tasks"), build)
+
+
+def clock_in_template_steps(task_template: TaskTemplate) -> Tuple[dict, ...]:
+    """
+    Steps used when a staff member clocks in (``sop_steps`` first, then
+    ``tasks``, else the template name as a single step), as
+    ``{"title", "description", "raw"}`` dicts. Memoized like
+    :func:`materialized_template_steps`.
+    """
+
+    def build():
+        name = getattr(task_template, "name", "Task")
+        steps = []
+        try:
+            if getattr(task_template, "sop_steps", None):
+                steps = list(task_template.sop_steps or [])
+            elif getattr(task_template, "tasks", None):
+                steps = list(task_template.tasks or [])
+        except Exception:
+            steps = []
+        if not steps:
+            steps = [{"title": name, "description": getattr(task_template, "description", "") or ""}]
+        out = []
+        for step in steps:
+            if isinstance(step, str):
+                title = (step.strip()[:255] or name).strip()
+                desc = ""
+                raw = {"title": title, "description": desc}
+            elif isinstance(step, dict):
+                title = (step.get("title") or step.get("name") or step.get("task") or name)[:255].strip()
+                desc = (step.get("description") or step.get("details") or "").strip()
+                raw = step
+            else:
+                title = (name or "Task").strip()
+                desc = ""
+                raw = {"title": title, "description": desc}
+            if not title:
+                title = name or "Task"
+            out.append({"title": title, "description": desc, "raw": raw})
+        return out
+
+    return _memoized_steps(task_template, ("clock_in",), build)
+
+
+def bulk_create_shift_tasks(
+    *,
+    shift: AssignedShift,
+    assignee,
+    tasks: Iterable[ShiftTask],
+    created_by=None,
+    source: str = "",
+) -> List[ShiftTask]:
+    """
+    Insert ``tasks`` for (shift, assignee) with one ``bulk_create``, skipping
+    titles the assignee already has on the shift, so repeating the call (every
+    WhatsApp clock-in) writes nothing. The shift row is locked so concurrent
+    clock-ins cannot both insert. ``bulk_create`` skips the per-row ShiftTask
+    audit signal; one batched audit record is written instead.
+    Returns the created rows.
+    """
+    with transaction.atomic():
+        list(AssignedShift.objects.select_for_update().filter(pk=shift.pk).values_list("pk", flat=True))
+        seen = set(
+            ShiftTask.objects.filter(shift=shift, assigned_to=assignee).values_list("title", flat=True)
+        )
+        fresh: List[ShiftTask] = []
+        for task in tasks:
+            if task.title in seen:
+                continue
+            seen.add(task.title)
+            fresh.append(task)
+        if not fresh:
+            return []
+        ShiftTask.objects.bulk_create(fresh)
+
+        from .audit import AuditSeverity
+        from .signals import bulk_operation_signal
+
+        bulk_operation_signal.send(
+            sender=ShiftTask,
+            operation_type="create",
+            affected_count=len(fresh),
+            model_name="ShiftTask",
+            description=f"Created {len(fresh)} shift tasks ({source or 'template'})",
+            user=created_by or assignee,
+            content_object=shift,
+            severity=AuditSeverity.LOW,
+            metadata={
+                "shift_id": str(shift.pk),
+                "assigned_to": str(getattr(assignee, "pk", "") or ""),
+                "source": source,
+                "task_ids": [str(t.pk) for t in fresh],
+            },
+        )
+    return fresh
+
+
 def instantiate_shift_tasks_from_template(
     *,
     shift: AssignedShift,
@@ -329,21 +462,19 @@ def instantiate_shift_tasks_from_template(
     language: str | None = None,
 ) -> int:
     """
-    Create ShiftTask rows for this shift from TaskTemplate.tasks.
+    Create ShiftTask rows for this shift from TaskTemplate.tasks (bulk; titles
+    the assignee already has on the shift are skipped).
     Returns number created.
     """
-    created = 0
     lang = normalize_language(language) if language else "en"
-    tasks_data = _template_localized_tasks(task_template, lang)
-    if not isinstance(tasks_data, list) or not tasks_data:
+    steps = materialized_template_steps(task_template, lang)
+    if not steps:
         return 0
 
-    for raw in tasks_data:
-        if not isinstance(raw, dict):
-            continue
-        t = _normalize_task_item(raw)
-        if not t["title"]:
-            continue
+    template_id = str(getattr(task_template, "id", "") or "")
+    template_name = _safe_text(getattr(task_template, "name", "")) or ""
+    tasks = []
+    for t in steps:
         branch_config = {}
         if (
             t.get("branches")
@@ -354,30 +485,38 @@ def instantiate_shift_tasks_from_template(
             branch_config = {
                 "template_task_id": t.get("template_task_id") or "",
                 "response_type": t.get("response_type") or "check",
-                "branches": t.get("branches") or {},
-                "template_id": str(getattr(task_template, "id", "") or ""),
-                "template_name": _safe_text(getattr(task_template, "name", "")) or "",
+                "branches": dict(t.get("branches") or {}),
+                "template_id": template_id,
+                "template_name": template_name,
                 "requires_photo": bool(t.get("requires_photo")),
                 "verification_type": t.get("verification_type") or "NONE",
             }
-        ShiftTask.objects.create(
-            shift=shift,
-            title=t["title"],
-            description=t["description"],
-            priority=t["priority"],
-            status="TODO",
-            assigned_to=assignee,
-            created_by=created_by,
-            # Copy SOP hints when present on template
-            sop_document=getattr(task_template, "sop_document", None) or None,
-            sop_steps=getattr(task_template, "sop_steps", None) or [],
-            is_critical=getattr(task_template, "is_critical", False) or False,
-            branch_config=branch_config,
-            verification_required=bool(t.get("verification_required") or t.get("requires_photo")),
-            verification_type=t.get("verification_type") or "NONE",
+        tasks.append(
+            ShiftTask(
+                shift=shift,
+                title=t["title"],
+                description=t["description"],
+                priority=t["priority"],
+                status="TODO",
+                assigned_to=assignee,
+                created_by=created_by,
+                # Copy SOP hints when present on template
+                sop_document=getattr(task_template, "sop_document", None) or None,
+                sop_steps=list(getattr(task_template, "sop_steps", None) or []),
+                is_critical=getattr(task_template, "is_critical", False) or False,
+                branch_config=branch_config,
+                verification_required=bool(t.get("verification_required") or t.get("requires_photo")),
+                verification_type=t.get("verification_type") or "NONE",
+            )
         )
-        created += 1
-    return created
+    created = bulk_create_shift_tasks(
+        shift=shift,
+        assignee=assignee,
+        tasks=tasks,
+        created_by=created_by,
+        source=f"template:{template_id}",
+    )
+    return len(created)
 
 
 def ensure_checklist_for_task_template(
@@ -420,24 +559,20 @@ def ensure_checklist_for_task_template(
         created_by=created_by,
     )
 
-    # Create steps from task_template.tasks (ordered)
-    tasks_data = _template_localized_tasks(task_template, lang)
-    order = 1
-    for raw in tasks_data:
-        if not isinstance(raw, dict):
-            continue
-        t = _normalize_task_item(raw)
-        if not t["title"]:
-            continue
-        ChecklistStep.objects.create(
-            template=checklist,
-            title=t["title"],
-            description=t["description"] or None,
-            step_type="CHECK",
-            order=order,
-            is_required=True,
-        )
-        order += 1
+    # Create steps from task_template.tasks (ordered), in one insert
+    ChecklistStep.objects.bulk_create(
+        [
+            ChecklistStep(
+                template=checklist,
+                title=t["title"],
+                description=t["description"] or None,
+                step_type="CHECK",
+                order=order,
+                is_required=True,
+            )
+            for order, t in enumerate(materialized_template_steps(task_template, lang), start=1)
+        ]
+    )
 
     return checklist
 
@@ -474,10 +609,13 @@ def ensure_checklist_execution_for_shift(
         due_date=getattr(shift, "end_time", None) or None,
     )
 
-    # Pre-create step responses for conversational checklist flow
-    steps = list(checklist_template.steps.all().order_by("order"))
-    for step in steps:
-        ChecklistStepResponse.objects.create(execution=execution, step=step)
+    # Pre-create step responses for conversational checklist flow. Sorting in
+    # Python keeps a prefetched ``steps`` cache usable.
+    steps = sorted(checklist_template.steps.all(), key=lambda step: step.order)
+    ChecklistStepResponse.objects.bulk_create(
+        [ChecklistStepResponse(execution=execution, step=step) for step in steps],
+        ignore_conflicts=True,
+    )
 
     return 1
 
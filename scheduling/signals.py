@@ -3,7 +3,11 @@ Django signals for automatic audit logging
 Automatically tracks changes to scheduling and task models
 """
 
-from django.db.models.signals import post_save, post_delete, pre_save
+import copy
+from contextlib import contextmanager
+
+from django.db import models as db_models
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
@@ -17,7 +21,7 @@ from .models import (
     ScheduleTemplate, TemplateShift, WeeklySchedule, 
     AssignedShift, ShiftTask, ShiftSwapRequest
 )
-from .audit import AuditTrailService, AuditActionType, AuditSeverity
+from .audit import AuditTrailService, AuditActionType, AuditSeverity, audit_batch
 
 User = get_user_model()
 
@@ -47,41 +51,68 @@ def clear_audit_context():
     if hasattr(_thread_locals, 'request'):
         delattr(_thread_locals, 'request')
 
+# Audited models keep an in-memory snapshot of their field values as loaded
+# (post_init) and as last saved (post_save), so update diffs and the shift
+# change check need no extra SELECT.
+_SNAPSHOT_ATTR = '_audit_snapshot'
+_DEFERRED = object()
+
+
+def _snapshot(instance):
+    data = instance.__dict__
+    snap = {}
+    for field in instance._meta.concrete_fields:
+        value = data.get(field.attname, _DEFERRED)
+        if isinstance(field, db_models.JSONField) and value is not _DEFERRED:
+            value = copy.deepcopy(value)  # JSON values are mutated in place
+        snap[field.attname] = value
+    return snap
+
+
+def take_audit_snapshot(sender, instance, **kwargs):
+    setattr(instance, _SNAPSHOT_ATTR, _snapshot(instance))
+
+
+def snapshot_value(instance, attname):
+    """Field value as last loaded or saved; ``_DEFERRED`` when unknown."""
+    return (getattr(instance, _SNAPSHOT_ATTR, None) or {}).get(attname, _DEFERRED)
+
+
 class AuditSignalMixin:
     """Mixin to handle common audit signal functionality"""
     
     @staticmethod
-    def get_model_changes(sender, instance, **kwargs):
-        """Get the changes made to a model instance"""
-        if not hasattr(instance, '_state') or instance._state.adding:
-            return None, None
-        
-        try:
-            # Get the original instance from database
-            original = sender.objects.get(pk=instance.pk)
-            old_values = {}
-            new_values = {}
-            
-            # Compare field values
-            for field in instance._meta.fields:
-                field_name = field.name
-                old_value = getattr(original, field_name, None)
-                new_value = getattr(instance, field_name, None)
-                
-                if old_value != new_value:
-                    # Convert to JSON serializable format
-                    old_values[field_name] = AuditSignalMixin._serialize_value(old_value)
-                    new_values[field_name] = AuditSignalMixin._serialize_value(new_value)
-            
-            return old_values if old_values else None, new_values if new_values else None
-        except sender.DoesNotExist:
+    def get_model_changes(sender, instance, update_fields=None, **kwargs):
+        """Field changes since the instance was loaded / last saved.
+
+        Call from ``post_save`` before the snapshot is refreshed. Keys are
+        field names; foreign keys are compared and reported by id.
+        """
+        snap = getattr(instance, _SNAPSHOT_ATTR, None)
+        if not snap:
             return None, None
+        old_values = {}
+        new_values = {}
+        for field in instance._meta.concrete_fields:
+            if update_fields is not None and field.name not in update_fields:
+                continue
+            if getattr(field, 'auto_now', False):  # changes on every save
+                continue
+            old_value = snap.get(field.attname, _DEFERRED)
+            new_value = instance.__dict__.get(field.attname, _DEFERRED)
+            if old_value is _DEFERRED or new_value is _DEFERRED or old_value == new_value:
+                continue
+            old_values[field.name] = AuditSignalMixin._serialize_value(old_value)
+            new_values[field.name] = AuditSignalMixin._serialize_value(new_value)
+        return old_values if old_values else None, new_values if new_values else None
     
     @staticmethod
     def _serialize_value(value):
         """Convert value to JSON serializable format"""
         if value is None:
             return None
+        elif isinstance(value, (bool, int, float, list, dict)):
+            return value
         elif hasattr(value, 'isoformat'):  # datetime objects
             return value.isoformat()
         elif hasattr(value, '__str__'):
@@ -89,10 +120,19 @@ class AuditSignalMixin:
         else:
             return value
 
+
+def _audited(sender):
+    """True unless per-row audit for ``sender`` is suppressed by
+    :func:`audit_bulk_operation`."""
+    return sender not in getattr(_thread_locals, 'bulk_models', ())
+
+
 # Schedule Template Signals
 @receiver(post_save, sender=ScheduleTemplate)
 def log_schedule_template_save(sender, instance, created, **kwargs):
     """Log schedule template creation and updates"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     if created:
@@ -130,6 +170,8 @@ def log_schedule_template_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=ScheduleTemplate)
 def log_schedule_template_delete(sender, instance, **kwargs):
     """Log schedule template deletion"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
@@ -150,6 +192,8 @@ def log_schedule_template_delete(sender, instance, **kwargs):
 @receiver(post_save, sender=TemplateShift)
 def log_template_shift_save(sender, instance, created, **kwargs):
     """Log template shift creation and updates"""
+    if not _audited(sender):
+        return
     # Logging template shift save removed for production
 
     user = get_current_user()
@@ -210,16 +254,20 @@ def inform_staff_before_save(sender, instance, **kwargs):
     if not instance.pk:
         return
 
-    try:
-        old_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
-    
+    # Old values come from the in-memory snapshot; only an instance built
+    # by hand (or with these fields deferred) needs the row refetched.
+    watched = ['start_time', 'end_time', 'staff_id',
+               'clock_in_reminder_sent', 'check_list_reminder_sent']
+    old = {f: snapshot_value(instance, f) for f in watched}
+    if any(v is _DEFERRED for v in old.values()):
+        old = sender.objects.filter(pk=instance.pk).values(*watched).first()
+        if old is None:
+            return
 
     # Compare specific fields you care about
-    fields_to_watch = ['start_time', 'end_time', 'staff']  # example fields
+    fields_to_watch = ['start_time', 'end_time', 'staff_id']  # example fields
     has_changed = any(
-        getattr(old_instance, f) != getattr(instance, f)
+        old[f] != getattr(instance, f)
         for f in fields_to_watch
     )
 
@@ -231,7 +279,7 @@ def inform_staff_before_save(sender, instance, **kwargs):
     # Shift change notification logic
 
     # Check if staff changed (reassignment)
-    if old_instance.staff != instance.staff:
+    if old['staff_id'] != instance.staff_id:
         if hasattr(instance.staff, 'phone') and instance.staff.phone:
             status_code = shift_create_notification(instance)
             if status_code == 200:
@@ -245,14 +293,10 @@ def inform_staff_before_save(sender, instance, **kwargs):
         else:
             # Staff phone number not available
             pass
-
-        
-        if hasattr(old_instance.staff, 'phone') and old_instance.staff.phone:
-            print(f"✅ Hello {old_instance.staff.first_name}, your shift on {old_instance.shift_date} has been reassigned.", file=sys.stderr)
         return
     # Check if these two fields changed
-    clock_in_changed = old_instance.clock_in_reminder_sent != instance.clock_in_reminder_sent
-    checklist_changed = old_instance.check_list_reminder_sent != instance.check_list_reminder_sent
+    clock_in_changed = old['clock_in_reminder_sent'] != instance.clock_in_reminder_sent
+    checklist_changed = old['check_list_reminder_sent'] != instance.check_list_reminder_sent
 
     # If only these two changed → skip
     if clock_in_changed or checklist_changed:
@@ -311,10 +355,11 @@ Static link as a button : http://localhost:8080/staff-dashboard/schedule redirec
 @receiver(post_save, sender=WeeklySchedule)
 def log_weekly_schedule_save(sender, instance, created, **kwargs):
     """Log weekly schedule creation and updates"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
-    print("Loggin§g creation of weekly schedule",file=sys.stderr)
     if created:
         AuditTrailService.log_schedule_activity(
             user=user,
@@ -358,6 +403,8 @@ def log_weekly_schedule_save(sender, instance, created, **kwargs):
 @receiver(post_save, sender=AssignedShift)
 def log_assigned_shift_save(sender, instance, created, **kwargs):
     """Log assigned shift creation and updates"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
@@ -406,6 +453,8 @@ def log_assigned_shift_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=AssignedShift)
 def log_assigned_shift_delete(sender, instance, **kwargs):
     """Log assigned shift deletion"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
@@ -427,6 +476,8 @@ def log_assigned_shift_delete(sender, instance, **kwargs):
 @receiver(post_save, sender=ShiftTask)
 def log_shift_task_save(sender, instance, created, **kwargs):
     """Log shift task creation and updates"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
@@ -486,7 +537,6 @@ def log_shift_task_save(sender, instance, created, **kwargs):
                 metadata={
                     'task_title': instance.title,
                     'current_status': instance.status,
-                    'progress': instance.progress_percentage
                 },
                 request=request
             )
@@ -494,6 +544,8 @@ def log_shift_task_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=ShiftTask)
 def log_shift_task_delete(sender, instance, **kwargs):
     """Log shift task deletion"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
@@ -516,6 +568,8 @@ def log_shift_task_delete(sender, instance, **kwargs):
 @receiver(post_save, sender=ShiftSwapRequest)
 def log_shift_swap_save(sender, instance, created, **kwargs):
     """Log shift swap request creation and updates"""
+    if not _audited(sender):
+        return
     user = get_current_user()
     request = get_current_request()
     
@@ -580,23 +634,84 @@ from django.dispatch import Signal
 
 bulk_operation_signal = Signal()
 
+
+class BulkOperation:
+    """Handle yielded by :func:`audit_bulk_operation`."""
+
+    def __init__(self):
+        self.object_ids = []
+
+    def add(self, obj):
+        self.object_ids.append(str(getattr(obj, 'pk', obj)))
+
+
+@contextmanager
+def audit_bulk_operation(
+    model,
+    operation_type,
+    description,
+    *,
+    user=None,
+    content_object=None,
+    metadata=None,
+    severity=None,
+):
+    """
+    Audit a generator or bulk edit as one record instead of one per row.
+
+    Per-row audit signals for ``model`` are suppressed inside the block;
+    call ``op.add(obj)`` for each affected row. On success a single
+    ``bulk_operation_signal`` record lists the ids. All audit writes in the
+    block are collected by :func:`audit_batch`.
+    """
+    op = BulkOperation()
+    previous = getattr(_thread_locals, 'bulk_models', frozenset())
+    _thread_locals.bulk_models = previous | {model}
+    try:
+        with audit_batch():
+            yield op
+            if op.object_ids:
+                bulk_operation_signal.send(
+                    sender=model,
+                    operation_type=operation_type,
+                    affected_count=len(op.object_ids),
+                    model_name=model.__name__,
+                    description=description,
+                    user=user,
+                    content_object=content_object,
+                    severity=severity,
+                    metadata={**(metadata or {}), 'object_ids': op.object_ids},
+                )
+    finally:
+        _thread_locals.bulk_models = previous
+
 @receiver(bulk_operation_signal)
 def log_bulk_operation(sender, **kwargs):
-    """Log bulk operations"""
-    user = get_current_user()
+    """Log bulk operations (one record for a ``bulk_create`` / ``update``,
+    which bypass the per-row signals above).
+
+    Optional kwargs: ``user`` (else the request user), ``content_object``,
+    ``severity`` and extra ``metadata``.
+    """
+    user = kwargs.get('user') or get_current_user()
     request = get_current_request()
     
     operation_type = kwargs.get('operation_type', 'unknown')
     affected_count = kwargs.get('affected_count', 0)
     model_name = kwargs.get('model_name', 'unknown')
     description = kwargs.get('description', f'Bulk {operation_type} operation')
+    severity = kwargs.get('severity') or (
+        AuditSeverity.HIGH if affected_count > 10 else AuditSeverity.MEDIUM
+    )
     
     AuditTrailService.log_activity(
         user=user,
         action=AuditActionType.BULK_UPDATE,
         description=description,
-        severity=AuditSeverity.HIGH if affected_count > 10 else AuditSeverity.MEDIUM,
+        content_object=kwargs.get('content_object'),
+        severity=severity,
         metadata={
+            **(kwargs.get('metadata') or {}),
             'operation_type': operation_type,
             'affected_count': affected_count,
             'model_name': model_name,
@@ -604,3 +719,16 @@ def log_bulk_operation(sender, **kwargs):
         },
         request=request
     )
+
+
+_SNAPSHOT_MODELS = (ScheduleTemplate, WeeklySchedule, AssignedShift, ShiftTask, ShiftSwapRequest)
+
+
+def _refresh_audit_snapshot(sender, instance, **kwargs):
+    take_audit_snapshot(sender, instance)
+
+
+for _model in _SNAPSHOT_MODELS:
+    post_init.connect(take_audit_snapshot, sender=_model, dispatch_uid=f'audit_snapshot_init_{_model.__name__}')
+    # Connected last, so the audit receivers above still see the pre-save snapshot.
+    post_save.connect(_refresh_audit_snapshot, sender=_model, dispatch_uid=f'audit_snapshot_save_{_model.__name__}')
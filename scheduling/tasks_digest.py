@@ -11,6 +11,8 @@ from celery import shared_task
 from django.db.models import Q
 from django.utils import timezone
 
+from core.metrics import timed_per_tenant
+
 logger = logging.getLogger(__name__)
 
 _MANAGER_ROLES = ("MANAGER", "ADMIN", "OWNER", "SUPER_ADMIN", "RESTAURANT_OWNER", "GENERAL_MANAGER")
@@ -126,7 +128,7 @@ def manager_ops_digest_sweep(period: str = "daily") -> dict:
 
     restaurants = list(Restaurant.objects.all()[:500])
 
-    for restaurant in restaurants:
+    for restaurant in timed_per_tenant("manager_ops_digest_sweep", restaurants):
         managers = (
             CustomUser.objects.filter(
                 restaurant_id=restaurant.id,
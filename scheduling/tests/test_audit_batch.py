@@ -0,0 +1,132 @@
+"""Scheduling audit trail: in-memory diffs, batched on-commit writes and the
+bulk-operation API used by generators."""
+
+from datetime import datetime, time, timedelta
+from unittest.mock import patch
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import CustomUser, Restaurant
+from core.query_profile import profile_queries
+from scheduling.audit import AuditActionType, AuditLog, audit_batch
+from scheduling.models import AssignedShift, ScheduleTemplate, TemplateShift, WeeklySchedule
+from scheduling.services import SchedulingService
+
+# Refetch-by-pk of the shift being saved. The scheduling handlers no longer
+# do it; notifications.signals still does once for its own change check.
+REFETCH = 'WHERE "assigned_shifts"."id" = %s'
+OTHER_APP_REFETCHES = 1
+
+
+def _refetches(profile):
+    return sum(n for fp, n in profile.fingerprints.items() if fp.startswith("SELECT") and REFETCH in fp)
+
+
+class AuditBatchTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Audit Cafe", email="audit@cafe.test")
+        self.staff = CustomUser.objects.create_user(
+            email="cook@cafe.test",
+            password="pass12345",
+            first_name="Cook",
+            last_name="One",
+            role="CHEF",
+            restaurant=self.restaurant,
+        )
+        today = timezone.localdate()
+        self.week_start = today - timedelta(days=today.weekday())
+        self.schedule = WeeklySchedule.objects.create(
+            restaurant=self.restaurant, week_start=self.week_start, week_end=self.week_start + timedelta(days=6)
+        )
+        start = timezone.make_aware(datetime.combine(today, time(9, 0)))
+        self.shift = AssignedShift.objects.create(
+            schedule=self.schedule,
+            staff=self.staff,
+            shift_date=today,
+            start_time=start,
+            end_time=start + timedelta(hours=8),
+            role="CHEF",
+        )
+
+    def _audit(self, **filters):
+        return AuditLog.objects.filter(object_id=str(self.shift.pk), **filters)
+
+    def test_update_diff_comes_from_snapshot(self):
+        shift = AssignedShift.objects.get(pk=self.shift.pk)
+        shift.end_time = shift.end_time + timedelta(hours=1)
+        with profile_queries() as profile:
+            shift.save()
+        self.assertEqual(_refetches(profile), OTHER_APP_REFETCHES)
+        log = self._audit(action=AuditActionType.UPDATE).get()
+        self.assertEqual(set(log.new_values), {"end_time"})
+
+        # The snapshot is refreshed on save: saving again unchanged logs nothing.
+        shift.save()
+        self.assertEqual(self._audit(action=AuditActionType.UPDATE).count(), 1)
+
+    @override_settings(WHATSAPP_ACCESS_TOKEN="t", WHATSAPP_PHONE_NUMBER_ID="p")
+    @patch("scheduling.signals.send_whatsapp", return_value={"status_code": 200})
+    def test_shift_change_notice_uses_snapshot(self, send_whatsapp):
+        self.staff.phone = "+212600000001"
+        self.staff.save()
+        shift = AssignedShift.objects.select_related("staff").get(pk=self.shift.pk)
+        shift.clock_in_reminder_sent = True
+        shift.save()
+        send_whatsapp.assert_not_called()
+
+        shift.end_time = shift.end_time + timedelta(hours=1)
+        with profile_queries() as profile:
+            shift.save()
+        send_whatsapp.assert_called_once()
+        self.assertEqual(_refetches(profile), OTHER_APP_REFETCHES)
+
+    def test_batch_writes_once_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with audit_batch(), profile_queries() as profile:
+                for hours in (1, 2, 3):
+                    self.shift.end_time = self.shift.end_time + timedelta(hours=hours)
+                    self.shift.save()
+            self.assertFalse(any(fp.startswith('INSERT INTO "audit_log"') for fp in profile.fingerprints))
+            self.assertEqual(self._audit(action=AuditActionType.UPDATE).count(), 0)
+        self.assertEqual(self._audit(action=AuditActionType.UPDATE).count(), 3)
+
+    def test_rolled_back_savepoint_drops_its_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with audit_batch():
+                self.shift.role = "WAITER"
+                self.shift.save()
+                try:
+                    with transaction.atomic():
+                        self.shift.role = "HOST"
+                        self.shift.save()
+                        raise RuntimeError("abort")
+                except RuntimeError:
+                    pass
+        roles = [log.new_values["role"] for log in self._audit(action=AuditActionType.UPDATE)]
+        self.assertEqual(roles, ["WAITER"])
+
+    def test_generate_from_template_logs_one_bulk_record(self):
+        template = ScheduleTemplate.objects.create(restaurant=self.restaurant, name="Week")
+        for day in range(3):
+            TemplateShift.objects.create(
+                template=template, role="CHEF", day_of_week=day, start_time=time(18, 0), end_time=time(23, 0)
+            )
+        schedule = WeeklySchedule.objects.create(
+            restaurant=self.restaurant,
+            week_start=self.week_start + timedelta(days=7),
+            week_end=self.week_start + timedelta(days=13),
+        )
+        before_assign = AuditLog.objects.filter(action=AuditActionType.ASSIGN).count()
+        with self.captureOnCommitCallbacks(execute=True):
+            ok, message = SchedulingService.generate_schedule_from_template(
+                str(schedule.id), str(template.id), self.week_start + timedelta(days=7)
+            )
+        self.assertTrue(ok, message)
+        self.assertEqual(AssignedShift.objects.filter(schedule=schedule).count(), 3)
+        self.assertEqual(AuditLog.objects.filter(action=AuditActionType.ASSIGN).count(), before_assign)
+        bulk = AuditLog.objects.get(action=AuditActionType.BULK_UPDATE)
+        self.assertEqual(bulk.metadata["operation_type"], "generate_from_template")
+        self.assertEqual(len(bulk.metadata["object_ids"]), 3)
+        self.assertEqual(bulk.object_id, str(schedule.pk))
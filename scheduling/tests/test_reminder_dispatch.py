@@ -0,0 +1,168 @@
+"""Claim-and-lease reminder dispatcher."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from accounts.models import CustomUser, Restaurant
+from scheduling.memory_models import PersonalReminder
+from scheduling.reminder_dispatch import (
+    LEASE,
+    claim_batch,
+    deliver_batch,
+    plan_batches,
+    send_reminder,
+)
+
+NOW = datetime(2026, 3, 2, 9, 0, 0, tzinfo=dt_timezone.utc)
+
+
+class _FakeWhatsApp:
+    def __init__(self, text_ok=True, media_ok=True):
+        self.text_ok = text_ok
+        self.media_ok = media_ok
+        self.texts = []
+        self.media = []
+
+    def send_whatsapp_text(self, phone, text):
+        self.texts.append((phone, text))
+        return self.text_ok, {}
+
+    def send_whatsapp_media_attachment(self, phone, **kwargs):
+        self.media.append((phone, kwargs))
+        return self.media_ok, {}
+
+
+class PlanBatchesTests(SimpleTestCase):
+    def test_due_rows_share_one_immediate_batch(self):
+        plan = plan_batches(
+            [
+                ("a", NOW - timedelta(minutes=3)),
+                ("b", NOW + timedelta(seconds=20, microseconds=400)),
+                ("c", NOW),
+                ("d", NOW + timedelta(seconds=20)),
+                ("e", NOW + timedelta(seconds=45)),
+            ],
+            NOW,
+        )
+        self.assertEqual(
+            plan,
+            [
+                (None, ["a", "c"]),
+                (NOW + timedelta(seconds=20), ["b", "d"]),
+                (NOW + timedelta(seconds=45), ["e"]),
+            ],
+        )
+
+    def test_nothing_claimed(self):
+        self.assertEqual(plan_batches([], NOW), [])
+
+
+class SendReminderTests(SimpleTestCase):
+    def _rem(self, **kw):
+        base = dict(
+            phone="212600000001",
+            owner=None,
+            title="Call supplier",
+            body="",
+            linked_note_id=None,
+            linked_note=None,
+            attachment_url="",
+            attachment=None,
+        )
+        base.update(kw)
+        return SimpleNamespace(**base)
+
+    def test_text_includes_external_attachment_link(self):
+        wa = _FakeWhatsApp()
+        self.assertTrue(send_reminder(self._rem(attachment_url="https://x/y.pdf"), wa))
+        self.assertIn("Reminder: Call supplier", wa.texts[0][1])
+        self.assertIn("Attachment: https://x/y.pdf", wa.texts[0][1])
+
+    def test_image_attachment_is_sent_as_media(self):
+        att = SimpleNamespace(
+            name="organizations/1/reminders/r/photo.PNG",
+            url="https://media/photo.png",
+            open=lambda mode: None,
+            read=lambda: b"img",
+            close=lambda: None,
+        )
+        wa = _FakeWhatsApp()
+        self.assertTrue(send_reminder(self._rem(attachment=att), wa))
+        self.assertEqual(wa.texts, [])
+        kwargs = wa.media[0][1]
+        self.assertEqual(kwargs["mime_type"], "image/png")
+        self.assertFalse(kwargs["as_document"])
+
+    def test_failed_text_send_reports_failure(self):
+        self.assertFalse(send_reminder(self._rem(), _FakeWhatsApp(text_ok=False)))
+
+
+class DispatcherLeaseTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Lease Resto", email="lease-resto@test.com")
+        self.owner = CustomUser.objects.create_user(
+            email="lease@test.com",
+            password="pass",
+            role="OWNER",
+            restaurant=self.restaurant,
+            phone="+212600000011",
+        )
+        self.now = timezone.now()
+
+    def _reminder(self, due, **kw):
+        return PersonalReminder.objects.create(
+            restaurant=self.restaurant, owner=self.owner, title="Check fridge", due_at=due, **kw
+        )
+
+    def test_claimed_rows_are_not_claimed_again_until_the_lease_expires(self):
+        rem = self._reminder(self.now - timedelta(minutes=1))
+        token, rows = claim_batch(self.now)
+        self.assertEqual([r[0] for r in rows], [str(rem.id)])
+        self.assertEqual(claim_batch(self.now), (None, []))
+        token2, rows2 = claim_batch(self.now + timedelta(minutes=2) + LEASE)
+        self.assertEqual(len(rows2), 1)
+        self.assertNotEqual(token, token2)
+
+    @patch("notifications.services.notification_service")
+    def test_delivery_fires_one_shot_and_advances_recurring(self, service):
+        service.send_whatsapp_text.return_value = (True, {})
+        once = self._reminder(self.now - timedelta(minutes=1))
+        daily = self._reminder(self.now - timedelta(minutes=1), recurrence="daily")
+        token, rows = claim_batch(self.now)
+        result = deliver_batch([r[0] for r in rows], token, now=self.now)
+        self.assertEqual(result["sent"], 2)
+        once.refresh_from_db()
+        daily.refresh_from_db()
+        self.assertEqual(once.status, "fired")
+        self.assertEqual(daily.status, "pending")
+        self.assertEqual(daily.due_at, self.now - timedelta(minutes=1) + timedelta(days=1))
+        self.assertEqual(daily.fire_count, 1)
+        self.assertIsNone(daily.claim_token)
+
+    @patch("notifications.services.notification_service")
+    def test_each_send_is_recorded_before_the_next(self, service):
+        first = self._reminder(self.now - timedelta(minutes=2))
+        second = self._reminder(self.now - timedelta(minutes=1))
+        # The worker dies on the second send.
+        service.send_whatsapp_text.side_effect = [(True, {}), SystemExit()]
+        token, rows = claim_batch(self.now)
+        with self.assertRaises(SystemExit):
+            deliver_batch([r[0] for r in rows], token, now=self.now)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.status, first.claim_token), ("fired", None))
+        self.assertEqual(second.status, "pending")
+
+    @patch("notifications.services.notification_service")
+    def test_stale_token_delivers_nothing(self, service):
+        rem = self._reminder(self.now - timedelta(minutes=1))
+        claim_batch(self.now)
+        result = deliver_batch([str(rem.id)], "00000000-0000-0000-0000-000000000000", now=self.now)
+        self.assertEqual(result["sent"], 0)
+        service.send_whatsapp_text.assert_not_called()
@@ -0,0 +1,153 @@
+"""Week solver behind AIScheduler: hard constraints, cost objective, scale."""
+from datetime import date, time, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from accounts.models import BusinessLocation, CustomUser, Restaurant
+from scheduling.ai_scheduler import AIScheduler
+from scheduling.models import ScheduleTemplate, TemplateShift
+from scheduling.schedule_optimizer import (
+    SchedulePolicy,
+    ShiftSlot,
+    StaffCandidate,
+    solve_schedule,
+    synthetic_roster,
+)
+
+MONDAY = date(2026, 1, 5)
+
+
+def _slot(day, role="WAITER", start=time(11, 0), end=time(19, 0), required=1, location_id=None):
+    return ShiftSlot(
+        shift_date=MONDAY + timedelta(days=day),
+        day_index=day,
+        role=role,
+        start_time=start,
+        end_time=end,
+        required=required,
+        location_id=location_id,
+    )
+
+
+def _staff(staff_id, rate=15.0, role="WAITER", **extra):
+    return StaffCandidate(staff_id=staff_id, name=staff_id, role=role, hourly_rate=rate, **extra)
+
+
+def _assigned(slots, staff, solution):
+    return {(slots[i].day_index, staff[s].staff_id) for i, s in solution.assignments}
+
+
+class HardConstraintTests(SimpleTestCase):
+    def test_prefers_cheapest_feasible_staff(self):
+        slots = [_slot(0)]
+        staff = [_staff("pricey", rate=30), _staff("cheap", rate=12)]
+        sol = solve_schedule(slots, staff)
+        self.assertEqual(_assigned(slots, staff, sol), {(0, "cheap")})
+
+    def test_rest_hours_between_late_close_and_early_open(self):
+        slots = [_slot(0, start=time(16, 0), end=time(23, 0)), _slot(1, start=time(6, 0), end=time(14, 0))]
+        staff = [_staff("a", rate=10), _staff("b", rate=20)]
+        sol = solve_schedule(slots, staff, SchedulePolicy(min_rest_hours=11))
+        people = {s for _, s in sol.assignments}
+        self.assertEqual(len(people), 2)
+        self.assertEqual(sol.unfilled, [])
+
+    def test_time_off_and_unavailable_weekday_are_respected(self):
+        slots = [_slot(0), _slot(1)]
+        staff = [
+            _staff("off_monday", rate=10, unavailable_dates=frozenset({MONDAY})),
+            _staff("no_tuesdays", rate=10, availability={1: []}),
+        ]
+        sol = solve_schedule(slots, staff)
+        self.assertEqual(_assigned(slots, staff, sol), {(0, "no_tuesdays"), (1, "off_monday")})
+
+    def test_availability_window_must_contain_shift(self):
+        slots = [_slot(0, start=time(11, 0), end=time(19, 0))]
+        staff = [_staff("mornings", rate=10, availability={0: [(6 * 60, 15 * 60)]})]
+        sol = solve_schedule(slots, staff)
+        self.assertEqual(sol.unfilled, [0])
+
+    def test_allowed_branches(self):
+        slots = [_slot(0, location_id="north"), _slot(0, location_id="south")]
+        staff = [
+            _staff("north_only", rate=10, location_ids=frozenset({"north"})),
+            _staff("anywhere", rate=20),
+        ]
+        sol = solve_schedule(slots, staff)
+        placed = {(slots[i].location_id, staff[s].staff_id) for i, s in sol.assignments}
+        self.assertEqual(placed, {("north", "north_only"), ("south", "anywhere")})
+
+    def test_max_weekly_hours(self):
+        slots = [_slot(d) for d in range(7)]
+        staff = [_staff("solo")]
+        sol = solve_schedule(slots, staff, SchedulePolicy(max_weekly_hours=30))
+        self.assertEqual(len(sol.assignments), 4)  # 4 x 7.5h
+        self.assertEqual(len(sol.unfilled), 3)
+
+    def test_week_is_solved_as_a_whole(self):
+        # Only "flex" can cover Tuesday. A day-by-day greedy pass gives the
+        # cheaper "flex" Monday's close and then cannot staff Tuesday's open.
+        slots = [
+            _slot(0, start=time(15, 0), end=time(23, 30)),
+            _slot(1, start=time(6, 0), end=time(14, 0)),
+        ]
+        staff = [
+            _staff("flex", rate=10),
+            _staff("monday_only", rate=20, availability={1: []}),
+        ]
+        sol = solve_schedule(slots, staff, SchedulePolicy(min_rest_hours=11))
+        self.assertEqual(sol.unfilled, [])
+        self.assertEqual(_assigned(slots, staff, sol), {(0, "monday_only"), (1, "flex")})
+
+
+class ScaleTests(SimpleTestCase):
+    def test_300_staff_multi_location_week_under_a_second(self):
+        slots, staff = synthetic_roster(300, n_locations=3)
+        sol = solve_schedule(slots, staff, time_budget=0.8)
+        self.assertLess(sol.elapsed_seconds, 1.0)
+        seats = sum(s.required for s in slots)
+        self.assertGreater(len(sol.assignments), 0.95 * seats)
+        # Every person works at most one shift per day.
+        per_day = {(slots[i].day_index, s) for i, s in sol.assignments}
+        self.assertEqual(len(per_day), len(sol.assignments))
+
+
+class TenantWideDemandTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Two Branch Grill", email="branches@grill.test")
+        self.north, self.south = (
+            BusinessLocation.objects.create(restaurant=self.restaurant, name=name, is_primary=name == "North")
+            for name in ("North", "South")
+        )
+        self.template = ScheduleTemplate.objects.create(restaurant=self.restaurant, name="Base")
+
+    def _waiter(self, n, *locations):
+        user = CustomUser.objects.create_user(
+            email=f"waiter{n}@grill.test", password="pass12345", role="WAITER", restaurant=self.restaurant,
+        )
+        user.allowed_locations.set(locations)
+        return user
+
+    def _schedule(self, required):
+        TemplateShift.objects.create(
+            template=self.template, role="WAITER", day_of_week=0, start_time=time(11, 0), end_time=time(19, 0),
+            required_staff=required,
+        )
+        return AIScheduler(self.restaurant).generate_optimal_schedule(
+            MONDAY, template_id=str(self.template.id), demand_forecast={"Monday": "MEDIUM"},
+        )["shifts"]
+
+    def test_multi_branch_tenant_is_not_staffed_once_per_branch(self):
+        for n in range(3):
+            self._waiter(n)
+        shifts = self._schedule(1)
+        self.assertEqual(len(shifts), 1)
+        self.assertEqual(shifts[0]["location_id"], str(self.north.id))
+
+    def test_staff_are_only_rostered_at_allowed_branches(self):
+        north_only = self._waiter(0, self.north)
+        self._waiter(1)
+        shifts = self._schedule(2)
+        self.assertEqual(sorted(s["location_id"] for s in shifts), sorted([str(self.north.id), str(self.south.id)]))
+        mine = [s for s in shifts if s["staff_id"] == str(north_only.id)]
+        self.assertEqual([s["location_id"] for s in mine], [str(self.north.id)])
@@ -0,0 +1,131 @@
+"""Bulk shift-task / checklist instantiation: one insert per table, one audit
+record, and nothing written when the same shift is instantiated again."""
+
+from datetime import time
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import CustomUser, Restaurant
+from core.query_profile import profile_queries
+from notifications.services import NotificationService
+from scheduling.audit import AuditActionType, AuditLog
+from scheduling.models import AssignedShift, ShiftTask, WeeklySchedule
+from scheduling.shift_auto_templates import (
+    ensure_checklist_execution_for_shift,
+    ensure_checklist_for_task_template,
+    instantiate_shift_tasks_from_template,
+    materialized_template_steps,
+)
+from scheduling.task_templates import TaskTemplate
+
+STEPS = 40
+
+
+def _writes(profile):
+    return sum(
+        n for fp, n in profile.fingerprints.items() if fp.split(" ", 1)[0] in {"INSERT", "UPDATE", "DELETE"}
+    )
+
+
+class BulkShiftTaskTests(TestCase):
+    def setUp(self):
+        self.restaurant = Restaurant.objects.create(name="Bulk Cafe", email="bulk@cafe.test")
+        self.staff = CustomUser.objects.create_user(
+            email="opener@cafe.test",
+            password="pass12345",
+            first_name="Open",
+            last_name="Er",
+            role="WAITER",
+            restaurant=self.restaurant,
+        )
+        self.template = TaskTemplate.objects.create(
+            restaurant=self.restaurant,
+            name="Opening",
+            template_type="OPENING",
+            tasks=[{"title": f"Step {i}", "description": ""} for i in range(STEPS)]
+            + [{"title": "Photo of fridge", "requires_photo": True}],
+        )
+        schedule = WeeklySchedule.objects.create(
+            restaurant=self.restaurant,
+            week_start=timezone.localdate(),
+            week_end=timezone.localdate(),
+        )
+        self.shift = AssignedShift.objects.create(
+            schedule=schedule,
+            staff=self.staff,
+            shift_date=timezone.localdate(),
+            start_time=time(8, 0),
+            end_time=time(16, 0),
+            role="WAITER",
+            status="SCHEDULED",
+        )
+        self.shift.task_templates.add(self.template)
+
+    def _instantiate(self):
+        return instantiate_shift_tasks_from_template(
+            shift=self.shift, assignee=self.staff, task_template=self.template
+        )
+
+    def test_instantiate_is_one_insert_and_one_audit_record(self):
+        with profile_queries() as profile:
+            created = self._instantiate()
+        self.assertEqual(created, STEPS + 1)
+        self.assertEqual(ShiftTask.objects.filter(shift=self.shift).count(), STEPS + 1)
+        # The bulk insert (SQLite splits it by its parameter limit) and the audit record.
+        self.assertLessEqual(_writes(profile), 3)
+        audit = AuditLog.objects.filter(action=AuditActionType.BULK_UPDATE)
+        self.assertEqual(audit.count(), 1)
+        self.assertEqual(audit.get().metadata["affected_count"], STEPS + 1)
+        self.assertEqual(audit.get().restaurant_id, self.restaurant.id)
+        photo = ShiftTask.objects.get(shift=self.shift, title="Photo of fridge")
+        self.assertEqual(photo.verification_type, "PHOTO")
+
+    def test_repeat_instantiation_writes_nothing(self):
+        self._instantiate()
+        with profile_queries() as profile:
+            created = self._instantiate()
+        self.assertEqual(created, 0)
+        self.assertEqual(_writes(profile), 0)
+        self.assertEqual(ShiftTask.objects.filter(shift=self.shift).count(), STEPS + 1)
+
+    def test_checklist_steps_and_responses_are_bulk(self):
+        with profile_queries() as profile:
+            checklist = ensure_checklist_for_task_template(
+                restaurant=self.restaurant, task_template=self.template
+            )
+            created = ensure_checklist_execution_for_shift(
+                checklist_template=checklist, assignee=self.staff, shift=self.shift
+            )
+        self.assertEqual(created, 1)
+        self.assertEqual(checklist.steps.count(), STEPS + 1)
+        self.assertEqual(list(checklist.steps.order_by("order").values_list("order", flat=True))[:3], [1, 2, 3])
+        execution = checklist.executions.get()
+        self.assertEqual(execution.step_responses.count(), STEPS + 1)
+        self.assertLess(_writes(profile), 10)
+
+        self.assertEqual(
+            ensure_checklist_execution_for_shift(
+                checklist_template=checklist, assignee=self.staff, shift=self.shift
+            ),
+            0,
+        )
+
+    def test_clock_in_instantiation_is_idempotent(self):
+        service = NotificationService()
+        with profile_queries() as first:
+            service._ensure_shift_tasks_from_templates(self.staff, self.shift)
+        self.assertEqual(ShiftTask.objects.filter(shift=self.shift, assigned_to=self.staff).count(), STEPS + 1)
+        self.assertLess(_writes(first), 10)
+
+        with profile_queries() as again:
+            service._ensure_shift_tasks_from_templates(self.staff, self.shift)
+        self.assertEqual(_writes(again), 0)
+        self.assertEqual(ShiftTask.objects.filter(shift=self.shift, assigned_to=self.staff).count(), STEPS + 1)
+
+    def test_materialized_steps_follow_template_edits(self):
+        first = materialized_template_steps(self.template)
+        self.assertIs(materialized_template_steps(self.template), first)
+        self.template.tasks = [{"title": "Only step"}]
+        self.template.save()
+        self.assertEqual([s["title"] for s in materialized_template_steps(self.template)], ["Only step"])
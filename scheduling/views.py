@@ -51,6 +51,8 @@ from .serializers import (
 )
 from .services import SchedulingService, OptimizationService
 from .task_assignment_service import TaskAssignmentService
+from reporting.exports import normalize_format
+from reporting.views_export import ExportContentNegotiation, export_or_queue
 from accounts.views import IsManagerOrAdmin
 from notifications.services import notification_service
 from django.conf import settings
@@ -1317,10 +1319,13 @@ class TimesheetViewSet(viewsets.ModelViewSet):
         timesheet.calculate_totals()
         return Response({'detail': 'Timesheet recalculated', 'timesheet': self.get_serializer(timesheet).data})
 
-    @action(detail=False, methods=['get'], url_path='export-payroll')
+    @action(detail=False, methods=['get'], url_path='export-payroll', content_negotiation_class=ExportContentNegotiation)
     def export_payroll(self, request):
-        """Export timesheets for pay period as CSV (for payroll systems)."""
-        from django.http import HttpResponse
+        """Export timesheets for pay period as CSV (for payroll systems).
+
+        Streams the file; large ranges are queued as a background export
+        (``202`` with a status URL). ``format=xlsx|pdf`` is also accepted.
+        """
         if not (request.user.role in ('ADMIN', 'SUPER_ADMIN', 'MANAGER')):
             return Response({'detail': 'Only managers can export payroll'}, status=status.HTTP_403_FORBIDDEN)
         start_date = request.query_params.get('start_date')
@@ -1335,38 +1340,15 @@ class TimesheetViewSet(viewsets.ModelViewSet):
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         except ValueError:
             return Response({'detail': 'Invalid date format'}, status=status.HTTP_400_BAD_REQUEST)
-        qs = Timesheet.objects.filter(
-            restaurant=request.user.restaurant,
-            start_date__lte=end_date,
-            end_date__gte=start_date
-        ).select_related('staff').order_by('staff__last_name', 'start_date')
-        rows = []
-        rows.append(['Staff ID', 'Email', 'First Name', 'Last Name', 'Start Date', 'End Date', 'Total Hours', 'Hourly Rate', 'Total Earnings', 'Status'])
-        for ts in qs:
-            staff = ts.staff
-            email = staff.email if staff else ''
-            first = getattr(staff, 'first_name', '') or '' if staff else ''
-            last = getattr(staff, 'last_name', '') or '' if staff else ''
-            rows.append([
-                str(ts.staff_id) if ts.staff_id else '',
-                email,
-                first,
-                last,
-                ts.start_date.isoformat(),
-                ts.end_date.isoformat(),
-                str(ts.total_hours),
-                str(ts.hourly_rate),
-                str(ts.total_earnings),
-                ts.status or '',
-            ])
-        import csv
-        from io import StringIO
-        buf = StringIO()
-        w = csv.writer(buf)
-        w.writerows(rows)
-        resp = HttpResponse(buf.getvalue(), content_type='text/csv')
-        resp['Content-Disposition'] = f'attachment; filename="payroll_export_{start_date}_{end_date}.csv"'
-        return resp
+        fmt = normalize_format(request.query_params.get('format'), default='csv')
+        if fmt is None:
+            return Response({'detail': "format must be 'csv', 'xlsx' or 'pdf'"}, status=status.HTTP_400_BAD_REQUEST)
+        if end_date < start_date:
+            return Response({'detail': 'end_date must be on or after start_date'}, status=status.HTTP_400_BAD_REQUEST)
+        return export_or_queue(
+            request, 'payroll', fmt, request.user.restaurant, start_date, end_date,
+            'report_export_status', requested_by=request.user,
+        )
 
 
 class TimesheetEntryViewSet(viewsets.ModelViewSet):
@@ -95,6 +95,7 @@ class EnhancedSchedulingViewSet(viewsets.ModelViewSet):
                     start_time=shift_data['start_time'],
                     end_time=shift_data['end_time'],
                     role=shift_data['role'],
+                    location_id=shift_data.get('location_id'),
                     status='SCHEDULED'
                 )
                 created_shifts.append(shift)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""Benchmark the week schedule solver on synthetic rosters.
+
+Usage: python scripts/bench_schedule_optimizer.py [--budget 0.8] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduling.schedule_optimizer import solve_schedule, synthetic_roster  # noqa: E402
+
+# (staff, branches)
+SCENARIOS = [(25, 1), (80, 1), (150, 2), (300, 1), (300, 3), (300, 5), (600, 6)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget", type=float, default=0.8, help="solver time budget (s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'staff':>6} {'sites':>5} {'seats':>6} {'filled':>7} {'cost':>12} {'p50 ms':>8} {'max ms':>8}")
+    slow = False
+    for n_staff, n_sites in SCENARIOS:
+        slots, staff = synthetic_roster(n_staff, n_locations=n_sites)
+        timings = []
+        for _ in range(args.repeat):
+            sol = solve_schedule(slots, staff, time_budget=args.budget)
+            timings.append(sol.elapsed_seconds * 1000)
+        seats = sum(s.required for s in slots)
+        print(
+            f"{n_staff:>6} {n_sites:>5} {seats:>6} {len(sol.assignments):>7} "
+            f"{sol.labor_cost:>12.2f} {statistics.median(timings):>8.1f} {max(timings):>8.1f}"
+        )
+        if n_staff <= 300 and max(timings) > 1000:
+            slow = True
+    if slow:
+        print("FAIL: a <=300-staff roster took over 1s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
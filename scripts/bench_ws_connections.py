@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""Simulate a shift-change reconnect storm against the WebSocket layer.
+
+Opens N concurrent notification sockets (default 2000) for one tenant with
+Channels' ``WebsocketCommunicator``, then fans one event out to the tenant
+managers group. Principals are pre-seeded in the cache the way HTTP logins
+leave them, so the run also checks that connects make no principal loads.
+At 2k sockets the in-memory layer's expiry sweep dominates the connect
+latencies; pass --redis to measure against the configured layer.
+
+Usage: python scripts/bench_ws_connections.py [--sockets 2000] [--managers 50] [--cold]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mizan.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+# In-process layer unless told otherwise: measures our code, not Redis.
+if "--redis" not in sys.argv:
+    settings.CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+# Local-memory caches cull at 300 keys by default; room for every principal.
+if settings.CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+    settings.CACHES["default"].setdefault("OPTIONS", {})["MAX_ENTRIES"] = 100_000
+
+from channels.layers import get_channel_layer  # noqa: E402
+from channels.routing import URLRouter  # noqa: E402
+from channels.testing import WebsocketCommunicator  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+import notifications.routing  # noqa: E402
+from accounts.authentication import MizanJWTAuthentication, principal_cache_key  # noqa: E402
+from accounts.models import CustomUser  # noqa: E402
+from core.realtime import JWTQueryAuthMiddleware, managers_group  # noqa: E402
+
+application = JWTQueryAuthMiddleware(URLRouter(notifications.routing.websocket_urlpatterns))
+
+
+def _principals(n: int, managers: int, *, seed: bool):
+    restaurant_id = uuid.uuid4()
+    users = []
+    for i in range(n):
+        user = CustomUser(id=uuid.uuid4(), restaurant_id=restaurant_id, is_active=True,
+                          role="MANAGER" if i < managers else "WAITER")
+        if seed:
+            cache.set(principal_cache_key(user.pk), (user, None), 600)
+        users.append(user)
+    return restaurant_id, users
+
+
+async def _connect(user, timings):
+    socket = WebsocketCommunicator(application, f"/ws/notifications/?token={AccessToken.for_user(user)}")
+    started = time.perf_counter()
+    connected, _ = await socket.connect(timeout=30)
+    timings.append((time.perf_counter() - started) * 1000)
+    return socket if connected else None
+
+
+async def run(n: int, managers: int, seed: bool) -> int:
+    managers = min(managers, n)
+    restaurant_id, users = _principals(n, managers, seed=seed)
+    loads = 0
+    original = MizanJWTAuthentication._load_user
+
+    def counting_load(self, user_id):
+        nonlocal loads
+        loads += 1
+        return original(self, user_id)
+
+    MizanJWTAuthentication._load_user = counting_load
+    timings: list = []
+    started = time.perf_counter()
+    sockets = await asyncio.gather(*[_connect(u, timings) for u in users])
+    storm_s = time.perf_counter() - started
+    MizanJWTAuthentication._load_user = original
+    open_sockets = [s for s in sockets if s is not None]
+
+    # Drain connect-time presence events before timing the fan-out.
+    for socket in open_sockets[:managers]:
+        while not await socket.receive_nothing(timeout=0.01):
+            await socket.receive_from()
+    started = time.perf_counter()
+    await get_channel_layer().group_send(managers_group(restaurant_id), {"type": "tasks_invalidate", "reason": "bench"})
+    await asyncio.gather(*[s.receive_json_from(timeout=10) for s in open_sockets[:managers]])
+    fanout_ms = (time.perf_counter() - started) * 1000
+
+    await asyncio.gather(*[s.disconnect() for s in open_sockets])
+    timings.sort()
+    print(f"sockets        {len(open_sockets)}/{n} connected in {storm_s:.2f}s")
+    print(f"connect ms     p50 {statistics.median(timings):.1f}  p95 {timings[int(len(timings) * 0.95) - 1]:.1f}  "
+          f"max {timings[-1]:.1f}")
+    print(f"principal loads {loads}")
+    print(f"fan-out        1 group_send -> {managers} manager sockets in {fanout_ms:.1f} ms")
+    if len(open_sockets) < n or (seed and loads):
+        print("FAIL: sockets refused or principals loaded from the DB")
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--managers", type=int, default=50)
+    parser.add_argument("--cold", action="store_true", help="do not pre-seed the principal cache (needs a DB)")
+    parser.add_argument("--redis", action="store_true", help="use the configured channel layer")
+    args = parser.parse_args()
+    return asyncio.run(run(args.sockets, args.managers, seed=not args.cold))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
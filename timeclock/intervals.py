@@ -0,0 +1,216 @@
+"""
+Worked-interval engine: the clock event stream, turned into work and break
+intervals once.
+
+Payroll, payslips, timesheets, labor reports and the timecards screen each
+used to pair ``in``/``out`` rows on their own, filtering on
+``timestamp__date`` (which casts the column and skips the index), ignoring
+breaks and silently dropping unmatched events. They now share:
+
+* :func:`build_intervals` — pure pairing. Breaks are subtracted, a shift
+  still open at the end of the stream is returned with ``end=None``, and
+  every event that could not be paired is reported in ``anomalies``
+  instead of disappearing.
+* :func:`day_bounds` — sargable ``[lo, hi)`` timestamp range for business
+  days in the restaurant's timezone. Shifts are attributed to the business
+  day they started on; the query reaches :data:`MAX_SHIFT` past both ends
+  so overnight shifts pair correctly.
+* :func:`daily_worked_seconds` — per-(day, staff) worked/break seconds for a
+  restaurant. Closed days are cached under a per-restaurant version that
+  ``timeclock.signals`` bumps on every clock edit, so a month-long payroll
+  run is one streaming query over the uncached days.
+"""
+from __future__ import annotations
+
+import time as _time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.utils import timezone
+
+from core.read_through_cache import safe_cache_get, safe_cache_set
+from core.tenant_time import restaurant_tz
+
+# Longest plausible shift; bounds how far past the window we read events.
+MAX_SHIFT = timedelta(hours=16)
+DAY_CACHE_TTL = 35 * 24 * 3600
+
+Event = Tuple[str, str, datetime]  # (staff_id, event_type, timestamp)
+
+
+@dataclass
+class WorkInterval:
+    staff_id: str
+    start: datetime
+    end: Optional[datetime] = None  # None: still clocked in
+    breaks: List[Tuple[datetime, Optional[datetime]]] = field(default_factory=list)
+
+    @property
+    def is_closed(self) -> bool:
+        return self.end is not None
+
+    def break_seconds(self, until: Optional[datetime] = None) -> float:
+        stop = self.end or until
+        total = 0.0
+        for b_start, b_end in self.breaks:
+            b_stop = b_end or stop
+            if b_stop is not None and b_stop > b_start:
+                total += (b_stop - b_start).total_seconds()
+        return total
+
+    def worked_seconds(self, until: Optional[datetime] = None) -> float:
+        """Clocked time minus breaks. Open intervals count up to ``until``
+        (e.g. now for a live timecard) and are 0 otherwise."""
+        stop = self.end or until
+        if stop is None or stop <= self.start:
+            return 0.0
+        return max(0.0, (stop - self.start).total_seconds() - self.break_seconds(until))
+
+
+@dataclass
+class Anomaly:
+    staff_id: str
+    kind: str  # 'missing_out' | 'orphan_out' | 'orphan_break_start' | 'orphan_break_end'
+    timestamp: datetime
+
+
+def build_intervals(events: Iterable[Event]) -> Tuple[List[WorkInterval], List[Anomaly]]:
+    """Pair a stream ordered by (staff, timestamp) into work intervals.
+
+    * ``in`` while already clocked in: the earlier interval is kept open
+      (``end=None``) and reported as ``missing_out``.
+    * ``out`` while on break ends the break too.
+    * ``out``/``break_*`` with nothing to attach to are reported, not dropped.
+    """
+    intervals: List[WorkInterval] = []
+    anomalies: List[Anomaly] = []
+    open_by_staff: Dict[str, WorkInterval] = {}
+
+    for sid, event_type, ts in events:
+        current = open_by_staff.get(sid)
+        on_break = current is not None and current.breaks and current.breaks[-1][1] is None
+        if event_type == 'in':
+            if current is not None:
+                anomalies.append(Anomaly(sid, 'missing_out', current.start))
+            current = WorkInterval(staff_id=sid, start=ts)
+            intervals.append(current)
+            open_by_staff[sid] = current
+        elif event_type == 'out':
+            if current is None:
+                anomalies.append(Anomaly(sid, 'orphan_out', ts))
+                continue
+            if on_break:
+                current.breaks[-1] = (current.breaks[-1][0], ts)
+            current.end = ts
+            del open_by_staff[sid]
+        elif event_type == 'break_start':
+            if current is None or on_break:
+                anomalies.append(Anomaly(sid, 'orphan_break_start', ts))
+                continue
+            current.breaks.append((ts, None))
+        elif event_type == 'break_end':
+            if not on_break:
+                anomalies.append(Anomaly(sid, 'orphan_break_end', ts))
+                continue
+            current.breaks[-1] = (current.breaks[-1][0], ts)
+    return intervals, anomalies
+
+
+def day_bounds(restaurant, start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """Aware ``[lo, hi)`` covering the business days ``start_date..end_date``."""
+    tz = restaurant_tz(restaurant)
+    lo = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    hi = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return lo, hi
+
+
+def stream_events(restaurant, lo: datetime, hi: datetime, staff_ids: Optional[Sequence] = None, location_id=None):
+    """Events that can belong to intervals starting in ``[lo, hi)``, ordered
+    for :func:`build_intervals`. Streamed with ``iterator()``."""
+    from timeclock.models import ClockEvent
+
+    qs = ClockEvent.objects.filter(timestamp__gte=lo - MAX_SHIFT, timestamp__lt=hi + MAX_SHIFT)
+    if staff_ids is not None:
+        qs = qs.filter(staff_id__in=list(staff_ids))
+    else:
+        qs = qs.filter(staff__restaurant=restaurant)
+    if location_id:
+        qs = qs.filter(location_id=location_id)
+    for sid, event_type, ts in (
+        qs.order_by('staff_id', 'timestamp').values_list('staff_id', 'event_type', 'timestamp').iterator(chunk_size=5000)
+    ):
+        yield str(sid), event_type, ts
+
+
+def intervals_in_window(
+    restaurant, start_date: date, end_date: date, staff_ids=None, location_id=None
+) -> Tuple[List[WorkInterval], List[Anomaly]]:
+    """Intervals (and anomalies) that started on business days in the window."""
+    lo, hi = day_bounds(restaurant, start_date, end_date)
+    intervals, anomalies = build_intervals(stream_events(restaurant, lo, hi, staff_ids, location_id))
+    return (
+        [i for i in intervals if lo <= i.start < hi],
+        [a for a in anomalies if lo <= a.timestamp < hi],
+    )
+
+
+def _version_key(restaurant_id) -> str:
+    return f"timeclock:worked_version:{restaurant_id}"
+
+
+def bump_worked_version(restaurant_id) -> None:
+    """Invalidate every cached day of a restaurant (a clock event changed)."""
+    safe_cache_set(_version_key(restaurant_id), _time.time_ns(), None)
+
+
+def _summarize(intervals: Iterable[WorkInterval], tz) -> Dict[date, Dict[str, List[float]]]:
+    """``{day: {staff_id: [worked_seconds, break_seconds, open_intervals]}}``."""
+    out: Dict[date, Dict[str, List[float]]] = defaultdict(dict)
+    for iv in intervals:
+        day = timezone.localtime(iv.start, tz).date()
+        row = out[day].setdefault(iv.staff_id, [0.0, 0.0, 0])
+        row[0] += iv.worked_seconds()
+        row[1] += iv.break_seconds()
+        row[2] += 0 if iv.is_closed else 1
+    return out
+
+
+def daily_worked_seconds(restaurant, start_date: date, end_date: date) -> Dict[date, Dict[str, List[float]]]:
+    """Per-day, per-staff worked/break seconds for the restaurant's staff.
+
+    Closed days (before the restaurant's today) are served from the cache;
+    the uncached span is computed with one streaming range query.
+    """
+    tz = restaurant_tz(restaurant)
+    today = timezone.localtime(timezone.now(), tz).date()
+    version = safe_cache_get(_version_key(restaurant.id)) or 0
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    keys = {d: f"timeclock:worked_day:{restaurant.id}:{d.isoformat()}:{version}" for d in days}
+
+    result: Dict[date, Dict[str, List[float]]] = {}
+    for d in days:
+        if d < today:
+            cached = safe_cache_get(keys[d])
+            if cached is not None:
+                result[d] = cached
+    missing = [d for d in days if d not in result]
+    if missing:
+        intervals, _ = intervals_in_window(restaurant, missing[0], missing[-1])
+        computed = _summarize(intervals, tz)
+        for d in missing:
+            result[d] = computed.get(d, {})
+            if d < today:
+                safe_cache_set(keys[d], result[d], DAY_CACHE_TTL)
+    return result
+
+
+def worked_hours_by_staff(restaurant, start_date: date, end_date: date) -> Dict[str, Decimal]:
+    """``{staff_id: hours}`` worked (breaks excluded) across the window."""
+    totals: Dict[str, float] = defaultdict(float)
+    for per_staff in daily_worked_seconds(restaurant, start_date, end_date).values():
+        for sid, (worked, _breaks, _open) in per_staff.items():
+            totals[sid] += worked
+    return {sid: Decimal(str(round(sec / 3600, 2))) for sid, sec in totals.items() if sec > 0}
@@ -59,6 +59,21 @@ def bust_dashboard_summary_on_clock_event(sender, instance, **kwargs):
             pass
 
 
+@receiver(post_save, sender=ClockEvent)
+@receiver(post_delete, sender=ClockEvent)
+def bump_worked_hours_version_on_clock_event(sender, instance, **kwargs):
+    # Closed days of worked hours are cached per restaurant version; any
+    # edit (including a manager correcting last week) invalidates them.
+    from .intervals import bump_worked_version
+
+    try:
+        rids = restaurant_ids_for_clock_event(instance)
+    except Exception:
+        rids = set()
+    for rid in rids:
+        bump_worked_version(rid)
+
+
 def _bust_attendance_for_shift(instance) -> None:
     """Invalidate the attendance-report cache for the shift's tenant+date.
 
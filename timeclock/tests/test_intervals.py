@@ -0,0 +1,82 @@
+"""Worked-interval engine: pairing, breaks, anomalies and day bounds."""
+
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from timeclock.intervals import build_intervals, day_bounds
+
+T0 = datetime(2026, 3, 2, 9, 0, tzinfo=dt_timezone.utc)
+
+
+def _at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+class BuildIntervalsTests(SimpleTestCase):
+    def test_breaks_are_subtracted(self):
+        intervals, anomalies = build_intervals([
+            ("a", "in", _at(0)),
+            ("a", "break_start", _at(120)),
+            ("a", "break_end", _at(150)),
+            ("a", "out", _at(480)),
+        ])
+        self.assertEqual(anomalies, [])
+        self.assertEqual(len(intervals), 1)
+        self.assertEqual(intervals[0].break_seconds(), 30 * 60)
+        self.assertEqual(intervals[0].worked_seconds(), 450 * 60)
+
+    def test_out_during_break_closes_the_break(self):
+        intervals, _ = build_intervals([
+            ("a", "in", _at(0)),
+            ("a", "break_start", _at(60)),
+            ("a", "out", _at(90)),
+        ])
+        self.assertEqual(intervals[0].breaks, [(_at(60), _at(90))])
+        self.assertEqual(intervals[0].worked_seconds(), 60 * 60)
+
+    def test_unpaired_events_are_reported(self):
+        intervals, anomalies = build_intervals([
+            ("a", "out", _at(0)),
+            ("a", "break_end", _at(5)),
+            ("a", "in", _at(10)),
+            ("a", "in", _at(60)),
+            ("a", "break_start", _at(70)),
+            ("a", "break_start", _at(80)),
+            ("a", "out", _at(120)),
+        ])
+        self.assertEqual(
+            [(a.kind, a.timestamp) for a in anomalies],
+            [
+                ("orphan_out", _at(0)),
+                ("orphan_break_end", _at(5)),
+                ("missing_out", _at(10)),
+                ("orphan_break_start", _at(80)),
+            ],
+        )
+        self.assertEqual(len(intervals), 2)
+        self.assertFalse(intervals[0].is_closed)
+        self.assertEqual(intervals[0].worked_seconds(), 0)
+        self.assertEqual(intervals[1].worked_seconds(), 10 * 60)
+
+    def test_open_interval_counts_up_to_until(self):
+        intervals, _ = build_intervals([
+            ("a", "in", _at(0)),
+            ("b", "in", _at(0)),
+            ("b", "out", _at(30)),
+        ])
+        open_iv = intervals[0]
+        self.assertEqual(open_iv.staff_id, "a")
+        self.assertEqual(open_iv.worked_seconds(), 0)
+        self.assertEqual(open_iv.worked_seconds(until=_at(45)), 45 * 60)
+        self.assertEqual(intervals[1].worked_seconds(), 30 * 60)
+
+
+class DayBoundsTests(SimpleTestCase):
+    def test_bounds_follow_restaurant_timezone(self):
+        restaurant = SimpleNamespace(timezone="America/New_York")
+        lo, hi = day_bounds(restaurant, date(2026, 7, 1), date(2026, 7, 2))
+        self.assertEqual(lo.astimezone(dt_timezone.utc), datetime(2026, 7, 1, 4, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(hi - lo, timedelta(days=2))
@@ -117,7 +117,9 @@ from accounts.permissions import IsAdminOrManager
 from django.db.models import Q
 from django.db import transaction
 from scheduling.models import AssignedShift
-from datetime import datetime
+from datetime import date, datetime
+from core.tenant_time import restaurant_tz
+from .intervals import MAX_SHIFT, build_intervals, day_bounds
 import base64
 import logging
 
@@ -862,46 +864,57 @@ def timecards(request):
         start_date = today.replace(day=1)
         end_date = today
     
-    events = ClockEvent.objects.filter(
-        staff=user,
-        timestamp__date__range=[start_date, end_date]
-    ).order_by('timestamp')
-    
+    if isinstance(start_date, str):
+        try:
+            start_date = date.fromisoformat(start_date)
+            end_date = date.fromisoformat(end_date)
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Sargable range in the restaurant's timezone; pairing (breaks excluded,
+    # unmatched events reported) is shared with payroll via the interval engine.
+    restaurant = getattr(user, 'restaurant', None)
+    lo, hi = day_bounds(restaurant, start_date, end_date)
+    events = list(
+        ClockEvent.objects.filter(
+            staff=user,
+            timestamp__gte=lo - MAX_SHIFT,
+            timestamp__lt=hi + MAX_SHIFT,
+        ).order_by('timestamp')
+    )
+    by_key = {(e.event_type, e.timestamp): e for e in events}
+    intervals, _ = build_intervals((str(user.id), e.event_type, e.timestamp) for e in events)
+    # Only the latest interval can still be running; earlier open ones are
+    # missed clock-outs and count no hours.
+    live = intervals[-1] if intervals and not intervals[-1].is_closed else None
+    now = timezone.now()
+    tz = restaurant_tz(restaurant)
+
+    def _location(event):
+        if event and event.latitude and event.longitude:
+            return {'latitude': event.latitude, 'longitude': event.longitude}
+        return None
+
     sessions = []
-    current_session = None
-    
-    for event in events:
-        if event.event_type == 'in':
-            current_session = {
-                'date': event.timestamp.date().isoformat(),
-                'clock_in': event.timestamp,
-                'clock_out': None,
-                'total_hours': 0,
-                'status': 'incomplete',
-                'location_in': {
-                    'latitude': event.latitude,
-                    'longitude': event.longitude
-                } if event.latitude and event.longitude else None
-            }
-        elif event.event_type == 'out' and current_session:
-            current_session['clock_out'] = event.timestamp
-            current_session['location_out'] = {
-                'latitude': event.latitude,
-                'longitude': event.longitude
-            } if event.latitude and event.longitude else None
-            
-            duration = event.timestamp - current_session['clock_in']
-            current_session['total_hours'] = round(duration.total_seconds() / 3600, 2)
-            current_session['status'] = 'completed'
-            
-            sessions.append(current_session)
-            current_session = None
-    
-    if current_session:
-        duration = timezone.now() - current_session['clock_in']
-        current_session['total_hours'] = round(duration.total_seconds() / 3600, 2)
-        sessions.append(current_session)
-    
+    for iv in intervals:
+        if not lo <= iv.start < hi:
+            continue
+        until = now if iv is live else None
+        session = {
+            'date': timezone.localtime(iv.start, tz).date().isoformat(),
+            'clock_in': iv.start,
+            'clock_out': iv.end,
+            'total_hours': round(iv.worked_seconds(until) / 3600, 2),
+            'break_hours': round(iv.break_seconds(until) / 3600, 2),
+            'status': 'completed' if iv.is_closed else 'incomplete',
+            'location_in': _location(by_key.get(('in', iv.start))),
+        }
+        if iv.is_closed:
+            session['location_out'] = _location(by_key.get(('out', iv.end)))
+        elif iv is not live:
+            session['anomaly'] = 'missing_out'
+        sessions.append(session)
+
     return Response(sessions)
 
 @api_view(['GET'])